@@ -3,22 +3,22 @@
 #
 """
 Spriteクラスを使用してロボットの顔アニメーションを実装するサンプルです。
-状態管理と描画がSpriteクラスにカプセル化されています。
+状態管理と描画がSpriteクラスにカプセル化され、SpriteSceneが
+変化したパーツの領域だけを再描画・転送します。
 """
 import time
 import sys
 from pathlib import Path
 from typing import Tuple, List
-import math
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
 # Add project root to the Python path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from pi0disp.disp.st7789v import ST7789V
+from pi0disp.utils.scene import SpriteScene
 from pi0disp.utils.sprite import Sprite
-from pi0disp.utils.performance_core import RegionOptimizer
 
 # --- Configuration ---
 TARGET_FPS = 15
@@ -26,11 +26,10 @@ BACKGROUND_COLOR = (0, 0, 0)
 FACE_COLOR = (255, 255, 255)
 FONT_PATH = "../src/pi0disp/fonts/Firge-Regular.ttf"
 
-class RobotFace(Sprite):
-    """Spriteを継承したロボットの顔クラス。"""
+class FaceState:
+    """表情の切り替えとまばたきのタイミングを管理するクラス。"""
 
-    def __init__(self, x: int, y: int, width: int, height: int):
-        super().__init__(x, y, width, height)
+    def __init__(self):
         self.expressions = ["neutral", "happy", "sad", "blinking"]
         self.current_expression_index = 0
         self.expression_timer = 0
@@ -38,16 +37,9 @@ class RobotFace(Sprite):
         self.blink_state_timer = 0
         self.is_blinking_closed = False
 
-        # 顔のパーツのジオメトリを計算
-        self.eye_radius = int(width * 0.15)
-        self.eye_y = y + int(height * 0.4)
-        self.left_eye_x = x + int(width * 0.3)
-        self.right_eye_x = x + int(width * 0.7)
-        self.mouth_y = y + int(height * 0.75)
-        self.mouth_rect = (
-            x + int(width * 0.25), self.mouth_y,
-            x + int(width * 0.75), self.mouth_y + int(height * 0.15)
-        )
+    @property
+    def expression(self) -> str:
+        return self.expressions[self.current_expression_index]
 
     def update(self, delta_t: float):
         """表情の状態を時間に基づいて更新します。"""
@@ -56,64 +48,116 @@ class RobotFace(Sprite):
             self.expression_timer = 0
             self.current_expression_index = (self.current_expression_index + 1) % len(self.expressions)
 
-        if self.expressions[self.current_expression_index] == "blinking":
+        if self.expression == "blinking":
             self.blink_state_timer += delta_t
             if self.blink_state_timer > 0.15: # まばたきの速度
                 self.blink_state_timer = 0
                 self.is_blinking_closed = not self.is_blinking_closed
 
-    def draw(self, draw: ImageDraw.ImageDraw):
-        """現在の表情に基づいて顔を描画します。"""
-        expression = self.expressions[self.current_expression_index]
 
-        # --- 目を描画 ---
+class FacePart(Sprite):
+    """
+    顔のパーツ（目・口）のスプライト。
+    見た目（look）が変わったときだけ mark_dirty() して再描画させます。
+    """
+
+    def __init__(self, state: FaceState, x: int, y: int, width: int, height: int):
+        super().__init__(x, y, width, height)
+        self.state = state
+        self.look = None
+
+    def update(self, delta_t: float):
+        look = self.current_look()
+        if look != self.look:
+            self.look = look
+            self.mark_dirty()
+
+    def current_look(self) -> str:
+        return self.state.expression
+
+
+class Eye(FacePart):
+    """目のスプライト。"""
+
+    def __init__(self, state: FaceState, center_x: int, center_y: int, radius: int):
+        # 線幅の分だけ余裕を持たせる
+        super().__init__(state, center_x - radius - 2, center_y - radius - 2,
+                         radius * 2 + 4, radius * 2 + 4)
+        self.center_x = center_x
+        self.center_y = center_y
+        self.radius = radius
+
+    def current_look(self) -> str:
+        expression = self.state.expression
         if expression == "blinking":
-            if self.is_blinking_closed:
-                self._draw_closed_eye(draw, self.left_eye_x)
-                self._draw_closed_eye(draw, self.right_eye_x)
-            else:
-                self._draw_open_eye(draw, self.left_eye_x)
-                self._draw_open_eye(draw, self.right_eye_x)
-        elif expression == "happy":
-            self._draw_happy_eye(draw, self.left_eye_x)
-            self._draw_happy_eye(draw, self.right_eye_x)
-        else: # neutral, sad
-            self._draw_open_eye(draw, self.left_eye_x)
-            self._draw_open_eye(draw, self.right_eye_x)
-
-        # --- 口を描画 ---
+            return "closed" if self.state.is_blinking_closed else "open"
         if expression == "happy":
-            draw.arc(self.mouth_rect, 0, 180, fill=FACE_COLOR, width=4)
-        elif expression == "sad":
-            draw.arc(self.mouth_rect, 180, 360, fill=FACE_COLOR, width=4)
-        else: # neutral, blinking
-            draw.line((self.mouth_rect[0], self.mouth_y, self.mouth_rect[2], self.mouth_y), fill=FACE_COLOR, width=4)
+            return "happy"
+        return "open"  # neutral, sad
+
+    def draw(self, draw: ImageDraw.ImageDraw):
+        bbox = (self.center_x - self.radius, self.center_y - self.radius,
+                self.center_x + self.radius, self.center_y + self.radius)
+        if self.look == "closed":
+            draw.line((bbox[0], self.center_y, bbox[2], self.center_y), fill=FACE_COLOR, width=2)
+        elif self.look == "happy":
+            draw.arc(bbox, 180, 360, fill=FACE_COLOR, width=3)
+        else:
+            draw.ellipse(bbox, outline=FACE_COLOR, width=2)
+
 
-    def _draw_open_eye(self, draw: ImageDraw.ImageDraw, center_x: int):
-        bbox = (center_x - self.eye_radius, self.eye_y - self.eye_radius,
-                center_x + self.eye_radius, self.eye_y + self.eye_radius)
-        draw.ellipse(bbox, outline=FACE_COLOR, width=2)
+class Mouth(FacePart):
+    """口のスプライト。"""
 
-    def _draw_closed_eye(self, draw: ImageDraw.ImageDraw, center_x: int):
-        draw.line((center_x - self.eye_radius, self.eye_y,
-                   center_x + self.eye_radius, self.eye_y), fill=FACE_COLOR, width=2)
+    def __init__(self, state: FaceState, rect: Tuple[int, int, int, int]):
+        # 線幅の分だけ余裕を持たせる
+        super().__init__(state, rect[0] - 3, rect[1] - 3,
+                         rect[2] - rect[0] + 6, rect[3] - rect[1] + 6)
+        self.rect = rect
 
-    def _draw_happy_eye(self, draw: ImageDraw.ImageDraw, center_x: int):
-        bbox = (center_x - self.eye_radius, self.eye_y - self.eye_radius,
-                center_x + self.eye_radius, self.eye_y + self.eye_radius)
-        draw.arc(bbox, 180, 360, fill=FACE_COLOR, width=3)
+    def current_look(self) -> str:
+        expression = self.state.expression
+        return expression if expression in ("happy", "sad") else "neutral"
+
+    def draw(self, draw: ImageDraw.ImageDraw):
+        if self.look == "happy":
+            draw.arc(self.rect, 0, 180, fill=FACE_COLOR, width=4)
+        elif self.look == "sad":
+            draw.arc(self.rect, 180, 360, fill=FACE_COLOR, width=4)
+        else:
+            y = self.rect[1]
+            draw.line((self.rect[0], y, self.rect[2], y), fill=FACE_COLOR, width=4)
+
+
+def create_face_sprites(state: FaceState, x: int, y: int, width: int, height: int) -> List[Sprite]:
+    """顔のパーツのジオメトリを計算し、スプライトを作成します。"""
+    eye_radius = int(width * 0.15)
+    eye_y = y + int(height * 0.4)
+    mouth_y = y + int(height * 0.75)
+    mouth_rect = (
+        x + int(width * 0.25), mouth_y,
+        x + int(width * 0.75), mouth_y + int(height * 0.15)
+    )
+    return [
+        Eye(state, x + int(width * 0.3), eye_y, eye_radius),
+        Eye(state, x + int(width * 0.7), eye_y, eye_radius),
+        Mouth(state, mouth_rect),
+    ]
 
 
 def main():
     """メイン関数"""
     with ST7789V() as lcd:
         width, height = lcd.width, lcd.height
-        image = Image.new("RGB", (width, height), BACKGROUND_COLOR)
-        draw = ImageDraw.Draw(image)
+        background = Image.new("RGB", (width, height), BACKGROUND_COLOR)
+        lcd.display(background)
 
-        # RobotFaceスプライトを作成
-        face = RobotFace(0, 0, width, height)
-        sprites: List[Sprite] = [face]
+        # 顔のパーツをスプライトとしてシーンに登録
+        # （ダーティリージョンの収集・背景の復元・描画・転送はシーンが行う）
+        state = FaceState()
+        scene = SpriteScene(background)
+        for sprite in create_face_sprites(state, 0, 0, width, height):
+            scene.add_sprite(sprite)
 
         # メインループ
         target_duration = 1.0 / TARGET_FPS
@@ -125,32 +169,10 @@ def main():
             delta_t = current_time - last_time
             last_time = current_time
 
-            dirty_regions = []
-
-            # スプライトの状態を更新し、ダーティリージョンを収集
-            for s in sprites:
-                s.update(delta_t)
-                dirty_regions.append(s.get_dirty_region())
-
-            # ダーティリージョンを最適化
-            optimized_regions = RegionOptimizer.merge_regions(
-                [r for r in dirty_regions if r], max_regions=4
-            )
-
-            # ダーティリージョンをクリア
-            for r in optimized_regions:
-                draw.rectangle(r, fill=BACKGROUND_COLOR)
-            
-            # スプライトを描画し、バウンディングボックスを記録
-            for s in sprites:
-                s.draw(draw)
-                s.record_current_bbox()
-
-            # ディスプレイに転送
-            for r in optimized_regions:
-                clamped_r = RegionOptimizer.clamp_region(r, width, height)
-                if clamped_r[2] > clamped_r[0] and clamped_r[3] > clamped_r[1]:
-                    lcd.display_region(image, *clamped_r)
+            # 状態を更新し、変化したパーツだけを転送
+            state.update(delta_t)
+            scene.update(delta_t)
+            scene.render(lcd)
 
             # フレームレートを維持
             sleep_duration = target_duration - (time.time() - current_time)
@@ -0,0 +1,102 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+SpriteSheet と RGB565 フレームバッファを使用するサンプルスクリプトです。
+ボールは色ごとに一度だけラスタライズしてキャッシュし、毎フレームは
+RGB565 配列へのコピーだけで描画します。転送時の色変換も不要です。
+"""
+import time
+import sys
+from pathlib import Path
+import colorsys
+
+import numpy as np
+
+# Add project root to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from pi0disp.disp.st7789v import ST7789V
+from pi0disp.utils.physics import BallPhysics
+from pi0disp.utils.sprite_sheet import (
+    SpriteCache, SpriteSheet, new_rgb565_frame
+)
+from pi0disp.utils.utils import expand_bbox, optimize_dirty_regions_tiled
+
+# --- Configuration ---
+NUM_BALLS = 30
+BALL_RADIUS = 10
+TARGET_FPS = 30
+BACKGROUND_COLOR = (0, 0, 48)
+
+
+def ball_sheet(radius: int, color: tuple) -> SpriteSheet:
+    """ボールを1フレームのスプライトシートとしてラスタライズします。"""
+    size = radius * 2 + 1
+    return SpriteSheet.render(
+        (size, size),
+        lambda draw, _: draw.ellipse((0, 0, size - 1, size - 1),
+                                     fill=color, outline=color)
+    )
+
+
+def main():
+    """メイン関数"""
+    with ST7789V() as lcd:
+        width, height = lcd.width, lcd.height
+
+        background = new_rgb565_frame(width, height, BACKGROUND_COLOR)
+        frame = background.copy()
+        lcd.display_rgb565(frame)
+
+        physics = BallPhysics.random(NUM_BALLS, width, height,
+                                     BALL_RADIUS, 150.0)
+        colors = [
+            tuple(int(c * 255) for c in colorsys.hsv_to_rgb(i / NUM_BALLS, 1.0, 1.0))
+            for i in range(len(physics))
+        ]
+
+        # (半径, 色) をキーにラスタライズ済みのボールをキャッシュ
+        cache = SpriteCache()
+        prev_bboxes = physics.bboxes()
+
+        target_duration = 1.0 / TARGET_FPS
+        last_time = time.time()
+
+        print("アニメーションを開始します... Ctrl+Cで終了")
+        while True:
+            current_time = time.time()
+            delta_t = min(current_time - last_time, target_duration * 2)
+            last_time = current_time
+
+            physics.step(delta_t)
+            bboxes = physics.bboxes()
+
+            # 前回と今回の位置をダーティリージョンとしてまとめる
+            regions = optimize_dirty_regions_tiled(
+                [expand_bbox(tuple(b), 1) for b in np.vstack((prev_bboxes, bboxes)).tolist()],
+                max_regions=8
+            )
+
+            # 背景を復元し、ボールをコピーで描画
+            for x0, y0, x1, y1 in regions:
+                frame[y0:y1, x0:x1] = background[y0:y1, x0:x1]
+            for (x0, y0, _, _), color in zip(bboxes.tolist(), colors):
+                sheet = cache.get((BALL_RADIUS, color),
+                                  lambda: ball_sheet(BALL_RADIUS, color))
+                sheet[0].blit(frame, x0, y0)
+            prev_bboxes = bboxes
+
+            # 色変換なしで転送
+            lcd.display_rgb565(frame, regions)
+
+            sleep_duration = target_duration - (time.time() - current_time)
+            if sleep_duration > 0:
+                time.sleep(sleep_duration)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n終了しました。")
@@ -10,13 +10,29 @@ else:
 
 from .utils.my_logger import get_logger
 from .disp.st7789v import ST7789V
-from .utils.utils import ImageProcessor, get_ip_address, draw_text
+from .disp.presenter import AsyncPresenter
+from .disp.console import ScrollingConsole
+from .utils.compositor import Compositor, Layer, SpriteLayer, TextLayer
+from .utils.scene import SpriteScene
+from .utils.sprite import Sprite
+from .utils.utils import (
+    ImageProcessor, get_ip_address, draw_text, draw_text_cached
+)
 
 __all__ = [
     "__version__",
     "ST7789V",
+    "AsyncPresenter",
+    "ScrollingConsole",
+    "Compositor",
+    "Layer",
+    "SpriteLayer",
+    "TextLayer",
+    "SpriteScene",
+    "Sprite",
     "get_logger",
     "ImageProcessor",
     "get_ip_address",
     "draw_text",
+    "draw_text_cached",
 ]
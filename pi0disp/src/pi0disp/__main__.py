@@ -4,26 +4,50 @@
 import click
 
 from . import __version__
+from .commands.bench import bench
 from .commands.off import off
 from .commands.sleep import sleep
 from .commands.ball_anime import ball_anime
 from .commands.wake import wake
 from .commands.rgb import rgb
 from .commands.image import image
+from .commands.play import play
 from .utils.my_logger import get_logger
+from .utils.profiler import Profiler, set_default_profiler
 
 log = get_logger(__name__)
 
+def _finish_profile(profiler: Profiler, profile_out):
+    """Prints the profile summary and writes the trace file."""
+    summary = profiler.summary()
+    click.echo(f"--- profile: {summary['frames']} frames, "
+               f"{summary['fps']:.1f} fps ---")
+    for name, stage in summary['stages'].items():
+        click.echo(f"{name:>10}: avg {stage['avg_ms']:7.2f} ms  "
+                   f"max {stage['max_ms']:7.2f} ms")
+    for name, value in summary['counters'].items():
+        click.echo(f"{name:>10}: {value:.1f} / frame")
+    if profile_out:
+        profiler.dump(profile_out)
+
 @click.group()
+@click.option('--profile', is_flag=True, default=False,
+              help='Record per-stage timings (draw, convert, merge, window, spi) and print a summary.')
+@click.option('--profile-out', type=click.Path(dir_okay=False), default=None,
+              help='Write the per-frame trace to FILE (.json or .csv). Implies --profile.')
 @click.version_option(version=__version__)
-def cli():
+@click.pass_context
+def cli(ctx, profile, profile_out):
     """
     A CLI tool for the ST7789V Display Driver.
 
     Provides basic commands to test and interact with the display,
     serving as a demonstration of the pi0disp library's capabilities.
     """
-    pass
+    if profile or profile_out:
+        profiler = Profiler()
+        set_default_profiler(profiler)
+        ctx.call_on_close(lambda: _finish_profile(profiler, profile_out))
 
 cli.add_command(ball_anime)
 cli.add_command(sleep)
@@ -31,6 +55,8 @@ cli.add_command(wake)
 cli.add_command(off)
 cli.add_command(rgb)
 cli.add_command(image)
+cli.add_command(play)
+cli.add_command(bench)
 
 
 if __name__ == "__main__":
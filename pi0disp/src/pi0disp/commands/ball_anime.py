@@ -7,20 +7,18 @@ ST7789Vディスプレイで動作する、物理ベースのアニメーショ
 """
 import time
 import colorsys
-from typing import List
-import math
+from typing import List, Optional
 
 import click
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from ..disp.presenter import AsyncPresenter
 from ..disp.st7789v import ST7789V
+from ..utils.compositor import Compositor, Layer, TextLayer
 from ..utils.my_logger import get_logger
-from ..utils.performance_core import RegionOptimizer
-from ..utils.utils import (
-    merge_bboxes, 
-    get_ip_address, draw_text, expand_bbox
-)
+from ..utils.physics import BallPhysics
+from ..utils.utils import get_ip_address, draw_text
 
 log = get_logger(__name__)
 
@@ -34,110 +32,9 @@ FPS_UPDATE_INTERVAL = 0.2
 
 # --- 計算最適化のみの設定 ---
 PHYSICS_SUBSTEPS = 4  # 物理精度維持
-COLLISION_CHECK_SKIP = 2  # 衝突チェックのみ軽量化
-MAX_SPEED_SQ = 1000000.0  # speed^2での比較用（1000^2）
-
-# 事前計算済み定数
-TWO_PI = 2.0 * math.pi
-SQRT_CACHE = {}  # 平方根キャッシュ
-COS_SIN_CACHE = {}  # 三角関数キャッシュ
-
-# --- 高速化ヘルパー関数 ---
-def fast_sqrt(value):
-    """キャッシュ付き高速平方根計算"""
-    if value in SQRT_CACHE:
-        return SQRT_CACHE[value]
-    result = math.sqrt(value)
-    if len(SQRT_CACHE) < 1000:  # キャッシュサイズ制限
-        SQRT_CACHE[value] = result
-    return result
-
-def fast_cos_sin(angle):
-    """キャッシュ付き三角関数計算"""
-    # 角度を適度に量子化してキャッシュヒット率向上
-    quantized = round(angle * 100) / 100
-    if quantized in COS_SIN_CACHE:
-        return COS_SIN_CACHE[quantized]
-    
-    cos_val = math.cos(quantized)
-    sin_val = math.sin(quantized)
-    if len(COS_SIN_CACHE) < 500:
-        COS_SIN_CACHE[quantized] = (cos_val, sin_val)
-    return cos_val, sin_val
+MAX_SPEED = 1000.0  # 衝突後の速度上限
 
 # --- 最適化されたクラス定義 ---
-class Ball:
-    """計算最適化版ボールクラス（見た目は同じ）"""
-    __slots__ = ('x', 'y', 'radius', 'speed_x', 'speed_y', 'fill_color', 'prev_bbox', 
-                 'speed_sq', '_bbox_cache', '_bbox_dirty')
-
-    def __init__(self, x, y, radius, speed, angle, fill_color):
-        self.x = float(x)
-        self.y = float(y)
-        self.radius = radius
-        
-        # 三角関数計算を事前実行
-        cos_a, sin_a = fast_cos_sin(angle)
-        self.speed_x = speed * cos_a
-        self.speed_y = speed * sin_a
-        self.speed_sq = speed * speed  # 速度の二乗を事前計算
-        
-        self.fill_color = fill_color
-        self.prev_bbox = None
-        self._bbox_cache = None
-        self._bbox_dirty = True
-
-    def update_position(self, delta_t, screen_width, screen_height):
-        """位置更新（計算最適化版）"""
-        # インライン計算で関数呼び出しオーバーヘッド削減
-        new_x = self.x + self.speed_x * delta_t
-        new_y = self.y + self.speed_y * delta_t
-        
-        # 境界チェック（分岐予測最適化）
-        r = self.radius
-        width_limit = screen_width - r
-        height_limit = screen_height - r
-        
-        # X軸境界チェック
-        if new_x <= r:
-            new_x = r
-            self.speed_x = -self.speed_x
-        elif new_x >= width_limit:
-            new_x = width_limit - 1
-            self.speed_x = -self.speed_x
-        
-        # Y軸境界チェック
-        if new_y <= r:
-            new_y = r
-            self.speed_y = -self.speed_y
-        elif new_y >= height_limit:
-            new_y = height_limit - 1
-            self.speed_y = -self.speed_y
-        
-        # 位置更新時に速度の二乗も更新
-        self.speed_sq = self.speed_x * self.speed_x + self.speed_y * self.speed_y
-        
-        # 位置が変わったらbboxキャッシュを無効化
-        if new_x != self.x or new_y != self.y:
-            self.x = new_x
-            self.y = new_y
-            self._bbox_dirty = True
-
-    def get_bbox(self):
-        """バウンディングボックス取得（キャッシュ付き）"""
-        if self._bbox_dirty or self._bbox_cache is None:
-            r = self.radius
-            x_int = int(self.x)
-            y_int = int(self.y)
-            self._bbox_cache = (x_int - r, y_int - r, x_int + r, y_int + r)
-            self._bbox_dirty = False
-        return self._bbox_cache
-
-    def draw(self, draw: ImageDraw.ImageDraw):
-        """描画処理（変更なし）"""
-        bbox = self.get_bbox()
-        draw.ellipse(bbox, fill=self.fill_color, outline=self.fill_color)
-
 class FpsCounter:
     """FPSカウンター（計算最適化版）"""
     __slots__ = ('frame_count', 'last_update_time', 'fps_text', '_update_threshold')
@@ -164,182 +61,108 @@ class FpsCounter:
         return False
 
 # --- 計算最適化されたヘルパー関数 ---
-def _initialize_balls_optimized(num_balls: int, width: int, height: int, ball_speed: float) -> List[Ball]:
-    """ボール初期化（計算最適化版）"""
-    balls: List[Ball] = []
+def _initialize_balls_optimized(num_balls: int, width: int, height: int,
+                                ball_speed: Optional[float],
+                                radius: int = BALL_RADIUS):
+    """ボール初期化（重ならない位置にランダム配置）
+
+    Returns:
+        (BallPhysics, 各ボールの色のリスト)
+    """
     speed = ball_speed if ball_speed is not None else 300.0
-    max_attempts_per_ball = 100
-    
-    # 色相計算を事前実行
+    physics = BallPhysics.random(num_balls, width, height, radius, speed,
+                                 max_speed=MAX_SPEED)
+
+    # 色相を均等に割り当ててシャッフル
     hue_values = [i / num_balls for i in range(num_balls)]
     np.random.shuffle(hue_values)
-    
-    # 配置範囲を事前計算
-    min_pos = BALL_RADIUS
-    max_x = width - BALL_RADIUS
-    max_y = height - BALL_RADIUS
-    
-    for i in range(num_balls):
-        ball_placed = False
-        hue = hue_values[i]
-        
-        # RGB色を事前計算
-        rgb_float = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
-        fill_color = tuple(int(c * 255) for c in rgb_float)
-        
-        for attempt in range(max_attempts_per_ball):
-            x = np.random.randint(min_pos, max_x)
-            y = np.random.randint(min_pos, max_y)
-            
-            # 重なりチェック（距離の二乗で比較して平方根計算を回避）
-            min_dist_sq = (BALL_RADIUS * 2) ** 2
-            is_valid = True
-            
-            for existing_ball in balls:
-                dx = x - existing_ball.x
-                dy = y - existing_ball.y
-                dist_sq = dx * dx + dy * dy
-                
-                if dist_sq <= min_dist_sq:
-                    is_valid = False
-                    break
-            
-            if is_valid:
-                angle = np.random.rand() * TWO_PI
-                balls.append(Ball(x, y, BALL_RADIUS, speed, angle, fill_color))
-                ball_placed = True
-                break
-                
-        if not ball_placed:
-            log.warning(f"ボール{len(balls)+1}を配置できませんでした。")
-
-    return balls
-
-def _handle_ball_collisions_optimized(balls: List[Ball], frame_count: int):
-    """衝突処理（計算最適化版）"""
-    # フレームスキップで計算負荷削減（見た目への影響は最小）
-    if frame_count % COLLISION_CHECK_SKIP != 0:
-        return
-    
-    num_balls = len(balls)
-    radii_sum = BALL_RADIUS * 2  # 全ボール同サイズなので事前計算
-    radii_sum_sq = radii_sum * radii_sum
-    min_dist_sq = (radii_sum * 0.05) ** 2
-    
-    for i in range(num_balls):
-        ball1 = balls[i]
-        for j in range(i + 1, num_balls):
-            ball2 = balls[j]
-            
-            # 距離計算（平方根回避）
-            dx = ball1.x - ball2.x
-            dy = ball1.y - ball2.y
-            dist_sq = dx * dx + dy * dy
-            
-            # 早期リターン（衝突していない）
-            if dist_sq >= radii_sum_sq:
-                continue
-            
-            # 極近距離処理
-            if dist_sq <= min_dist_sq:
-                # ランダム分離（三角関数キャッシュ使用）
-                angle = np.random.rand() * TWO_PI
-                cos_a, sin_a = fast_cos_sin(angle)
-                sep_dist = radii_sum * 0.55
-                
-                sep_x = cos_a * sep_dist * 0.5
-                sep_y = sin_a * sep_dist * 0.5
-                
-                ball1.x += sep_x
-                ball1.y += sep_y
-                ball2.x -= sep_x
-                ball2.y -= sep_y
-                
-                ball1._bbox_dirty = True
-                ball2._bbox_dirty = True
-                continue
-            
-            # 通常の衝突処理
-            # 平方根計算を1回のみ実行
-            dist = fast_sqrt(dist_sq)
-            inv_dist = 1.0 / dist  # 除算を1回のみ
-            nx = dx * inv_dist
-            ny = dy * inv_dist
-            
-            # 相対速度計算
-            rel_vx = ball1.speed_x - ball2.speed_x
-            rel_vy = ball1.speed_y - ball2.speed_y
-            rel_v_normal = rel_vx * nx + rel_vy * ny
-            
-            # 接近している場合のみ処理
-            if rel_v_normal < 0:
-                # 接線ベクトル
-                tx = -ny
-                ty = nx
-                
-                # 速度成分分解
-                v1n = ball1.speed_x * nx + ball1.speed_y * ny
-                v1t = ball1.speed_x * tx + ball1.speed_y * ty
-                v2n = ball2.speed_x * nx + ball2.speed_y * ny
-                v2t = ball2.speed_x * tx + ball2.speed_y * ty
-                
-                # 速度交換
-                new_v1x = v2n * nx + v1t * tx
-                new_v1y = v2n * ny + v1t * ty
-                new_v2x = v1n * nx + v2t * tx
-                new_v2y = v1n * ny + v2t * ty
-                
-                # 速度上限チェック（二乗比較で高速化）
-                if (new_v1x * new_v1x + new_v1y * new_v1y <= MAX_SPEED_SQ and
-                    new_v2x * new_v2x + new_v2y * new_v2y <= MAX_SPEED_SQ):
-                    
-                    ball1.speed_x = new_v1x
-                    ball1.speed_y = new_v1y
-                    ball2.speed_x = new_v2x
-                    ball2.speed_y = new_v2y
-                    
-                    # 速度の二乗を更新
-                    ball1.speed_sq = new_v1x * new_v1x + new_v1y * new_v1y
-                    ball2.speed_sq = new_v2x * new_v2x + new_v2y * new_v2y
-            
-            # 位置補正
-            overlap = radii_sum - dist
-            if overlap > 0:
-                correction = overlap * 0.4  # 補正係数
-                correction_x = correction * nx
-                correction_y = correction * ny
-                
-                ball1.x += correction_x
-                ball1.y += correction_y
-                ball2.x -= correction_x
-                ball2.y -= correction_y
-                
-                ball1._bbox_dirty = True
-                ball2._bbox_dirty = True
-
-def _main_loop_optimized(lcd: ST7789V, background: Image.Image, balls: List[Ball], 
-                        fps_counter: FpsCounter, font, target_fps: float):
-    """メインループ（計算最適化版）"""
+    colors = [
+        tuple(int(c * 255) for c in colorsys.hsv_to_rgb(hue, 1.0, 1.0))
+        for hue in hue_values[:len(physics)]
+    ]
+    return physics, colors
+
+class BallLayer(Layer):
+    """ボール群を描画するコンポジタ用レイヤー"""
+
+    def __init__(self, physics: BallPhysics, colors: List[tuple],
+                 width: int, height: int, z: int = 0):
+        super().__init__(z)
+        self.physics = physics
+        self.colors = colors
+        self._width = width
+        self._height = height
+        self._bboxes = physics.bboxes()
+        self._prev_bboxes: Optional[np.ndarray] = None
+
+    def bounds(self):
+        return None  # ボールは画面全体を動き回る
+
+    def dirty_regions(self):
+        self._bboxes = self.physics.bboxes()
+        if self._prev_bboxes is None:
+            union = self._bboxes
+        else:
+            moved = np.any(self._bboxes != self._prev_bboxes, axis=1)
+            union = np.hstack((
+                np.minimum(self._bboxes[:, :2], self._prev_bboxes[:, :2]),
+                np.maximum(self._bboxes[:, 2:], self._prev_bboxes[:, 2:])
+            ))[moved]
+        # 1ピクセル広げて画面内に収める
+        union = union + (-1, -1, 1, 1)
+        union = np.clip(union, 0,
+                        (self._width, self._height, self._width, self._height))
+        return [tuple(r) for r in union.tolist()]
+
+    def render(self, frame: Image.Image, draw: ImageDraw.ImageDraw):
+        for bbox, color in zip(self._bboxes.tolist(), self.colors):
+            draw.ellipse(bbox, fill=color, outline=color)
+
+    def commit(self):
+        self._prev_bboxes = self._bboxes
+
+def _main_loop_optimized(lcd: ST7789V, background: Image.Image,
+                        physics: BallPhysics, colors: List[tuple],
+                        fps_counter: FpsCounter, font, target_fps: float,
+                        presenter: Optional[AsyncPresenter] = None,
+                        hud_font=None):
+    """メインループ（計算最適化版）
+
+    描画は Compositor が永続フレームバッファ上で行い、
+    ダーティ領域内だけ背景を復元してレイヤーを重ねる。
+    presenter が指定された場合、転送はバックグラウンドスレッドで行い、
+    次フレームの計算と並行させる。
+    """
     target_duration = 1.0 / target_fps
     last_frame_time = time.time()
-    frame_count = 0
     
     # 時間制限を事前計算
     max_delta_t = target_duration * 2.5
     min_delta_t = target_duration * 0.2
     inv_substeps = 1.0 / PHYSICS_SUBSTEPS  # 除算を事前計算
 
-    # 再利用オブジェクト
-    hud_layer = Image.new("RGBA", (lcd.width, lcd.height), (0, 0, 0, 0))
-    hud_draw = ImageDraw.Draw(hud_layer)
-    prev_fps_bbox = None
-    
     # 画面サイズを事前取得
     screen_width = lcd.width
     screen_height = lcd.height
 
+    # レイヤー構成: 背景 < ボール < FPS表示
+    compositor = Compositor(background, max_regions=8)
+    compositor.add(BallLayer(physics, colors, screen_width, screen_height, z=0))
+    fps_layer = TextLayer(font, x='left', y='top',
+                          width=screen_width, height=screen_height,
+                          color=TEXT_COLOR, text=fps_counter.fps_text, z=100)
+    compositor.add(fps_layer)
+
+    # --profile 時は各処理の時間を右上に表示
+    profiler = lcd.profiler
+    hud_layer: Optional[TextLayer] = None
+    if profiler.enabled:
+        hud_layer = TextLayer(hud_font or font, x='right', y='top',
+                              width=screen_width, height=screen_height,
+                              color=TEXT_COLOR, z=101)
+        compositor.add(hud_layer)
+
     while True:
-        frame_count += 1
         current_time = time.time()
         actual_delta_t = current_time - last_frame_time
         
@@ -354,64 +177,27 @@ def _main_loop_optimized(lcd: ST7789V, background: Image.Image, balls: List[Ball
         last_frame_time = current_time
         sub_delta_t = delta_t * inv_substeps
 
-        # --- 物理更新ループ ---
-        for _ in range(PHYSICS_SUBSTEPS):
-            # 位置更新（ループ最適化）
-            for ball in balls:
-                ball.update_position(sub_delta_t, screen_width, screen_height)
-            
-            # 衝突処理
-            _handle_ball_collisions_optimized(balls, frame_count)
-
-        # --- 描画処理 ---
-        new_frame_image = background.copy()
-        draw = ImageDraw.Draw(new_frame_image)
-        dirty_regions = []
-
-        # ボール描画
-        for ball in balls:
-            prev_bbox = ball.prev_bbox
-            curr_bbox = ball.get_bbox()
-            dirty_region = merge_bboxes(prev_bbox, curr_bbox)
-            
-            if dirty_region:
-                expanded_dirty_region = expand_bbox(dirty_region, 1)
-                dirty_regions.append(RegionOptimizer.clamp_region(expanded_dirty_region, screen_width, screen_height))
-            
-            ball.draw(draw)
-            ball.prev_bbox = curr_bbox
-
-        # FPS表示更新
-        if fps_counter.update():
-            if prev_fps_bbox:
-                expanded_prev_fps_bbox = (
-                    prev_fps_bbox[0] - 4, prev_fps_bbox[1] - 6,
-                    prev_fps_bbox[2] + 4, prev_fps_bbox[3] + 6
-                )
-                hud_draw.rectangle(expanded_prev_fps_bbox, fill=(0, 0, 0, 0))
-
-            current_fps_bbox = draw_text(hud_draw, fps_counter.fps_text, font, 
-                                      x='left', y='top',
-                                      width=screen_width, height=screen_height, 
-                                      color=TEXT_COLOR)
-            
-            if current_fps_bbox:
-                expanded_current_fps_bbox = (
-                    current_fps_bbox[0] - 4, current_fps_bbox[1] - 6,
-                    current_fps_bbox[2] + 4, current_fps_bbox[3] + 6
-                )
-                dirty_regions.append(expanded_current_fps_bbox)
-                prev_fps_bbox = current_fps_bbox
-
-        # 画面合成と表示
-        frame_rgba = new_frame_image.convert("RGBA")
-        frame_rgba.alpha_composite(hud_layer)
-        final_frame = frame_rgba.convert("RGB")
-
-        if dirty_regions:
-            optimized = RegionOptimizer.merge_regions(dirty_regions, max_regions=8)
-            for r in optimized:
-                lcd.display_region(final_frame, *r)
+        with profiler.frame():
+            # --- 物理更新ループ ---
+            with profiler.stage('physics'):
+                for _ in range(PHYSICS_SUBSTEPS):
+                    # 位置更新・壁反射・衝突処理（NumPyで一括計算）
+                    physics.step(sub_delta_t)
+
+            # FPS表示更新
+            if fps_counter.update():
+                fps_layer.set_text(fps_counter.fps_text)
+                if hud_layer is not None:
+                    hud_layer.set_text(profiler.hud_text())
+
+            # --- 描画処理（ダーティ領域のみ） ---
+            with profiler.stage('draw'):
+                regions = compositor.compose()
+            if regions:
+                if presenter is not None:
+                    presenter.present(compositor.frame, regions)
+                else:
+                    lcd.display_regions(compositor.frame, regions)
 
         # フレームレート制御
         next_frame_time = last_frame_time + target_duration
@@ -426,7 +212,9 @@ def _main_loop_optimized(lcd: ST7789V, background: Image.Image, balls: List[Ball
 @click.option('--fps', "-f", default=TARGET_FPS, type=float, help='Target frames per second', show_default=True)
 @click.option('--num-balls', "-n", default=3, type=int, help='Number of balls to display', show_default=True)
 @click.option('--ball-speed', "-b", default=None, type=float, help='Absolute speed of balls (pixels/second).')
-def ball_anime(spi_mhz: float, fps: float, num_balls: int, ball_speed: float):
+@click.option('--radius', "-r", default=BALL_RADIUS, type=int, help='Ball radius in pixels.', show_default=True)
+@click.option('--async-present', "-a", is_flag=True, help='Transfer frames in a background thread.')
+def ball_anime(spi_mhz: float, fps: float, num_balls: int, ball_speed: float, radius: int, async_present: bool):
     """物理ベースのアニメーションデモを実行する（計算最適化版）。"""
     log.info(f"計算最適化モードでフレームレート約{fps}FPSで動作します... Ctrl+C で終了してください。")
 
@@ -460,11 +248,21 @@ def ball_anime(spi_mhz: float, fps: float, num_balls: int, ball_speed: float):
             lcd.display(background_image)
 
             # オブジェクトを初期化
-            balls = _initialize_balls_optimized(num_balls, lcd.width, lcd.height, ball_speed)
+            physics, colors = _initialize_balls_optimized(num_balls, lcd.width, lcd.height,
+                                                          ball_speed, radius)
             fps_counter = FpsCounter()
             
             # メインループを開始
-            _main_loop_optimized(lcd, background_image, balls, fps_counter, font_large, fps)
+            if async_present:
+                with AsyncPresenter(lcd) as presenter:
+                    try:
+                        _main_loop_optimized(lcd, background_image, physics, colors, fps_counter,
+                                             font_large, fps, presenter, font_small)
+                    finally:
+                        log.info("presenter stats: %s", presenter.get_stats())
+            else:
+                _main_loop_optimized(lcd, background_image, physics, colors, fps_counter, font_large, fps,
+                                     hud_font=font_small)
 
     except KeyboardInterrupt:
         log.info("\n終了しました。\n")
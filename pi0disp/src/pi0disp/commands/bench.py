@@ -0,0 +1,303 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""Benchmark and calibration commands."""
+import time
+
+import click
+import numpy as np
+from PIL import Image
+
+from ..disp.st7789v import ST7789V, CHUNK_CANDIDATES
+from ..utils.my_logger import get_logger
+from ..utils.performance_core import TileDirtyTracker
+from ..utils.physics import BallPhysics
+
+log = get_logger(__name__)
+
+
+@click.group()
+def bench():
+    """Measures and tunes display transfer performance."""
+    pass
+
+
+@bench.command()
+@click.option('--spi-mhz', '-z', type=float, default=32.0, show_default=True,
+              help='SPI speed in MHz.')
+@click.option('--repeats', '-r', type=int, default=3, show_default=True,
+              help='Full-frame transfers per chunk size.')
+@click.option('--save/--no-save', default=True, show_default=True,
+              help='Store the best chunk size for this device.')
+def chunk(spi_mhz, repeats, save):
+    """Sweeps SPI chunk sizes and selects the fastest one."""
+    log.info("Calibrating SPI chunk size at %.1f MHz...", spi_mhz)
+    try:
+        with ST7789V(speed_hz=int(spi_mhz * 1_000_000)) as lcd:
+            results = lcd.calibrate_chunk_size(
+                CHUNK_CANDIDATES, repeats=repeats, save=save
+            )
+            best = lcd.get_stats()['chunk_size']
+            for size, throughput in sorted(results.items()):
+                mark = " *" if size == best else ""
+                click.echo(
+                    f"{size:6d} bytes: {throughput / 1024:8.1f} KB/s{mark}"
+                )
+            if save:
+                click.echo(f"Saved chunk size {best} for this device.")
+
+    except RuntimeError as e:
+        log.error(f"Error: {e}. Make sure pigpio daemon is running and SPI is enabled.")
+        exit(1)
+    except Exception as e:
+        log.error("%s: %s", type(e).__name__, e)
+        exit(1)
+
+
+def _random_regions(width, height, count, max_size, rng):
+    """Generates random regions (x0, y0, x1, y1) within the screen."""
+    regions = []
+    for _ in range(count):
+        w = int(rng.integers(8, max_size))
+        h = int(rng.integers(8, max_size))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        regions.append((x, y, x + w, y + h))
+    return regions
+
+
+def _tile_regions(width, height, count, max_size, rng):
+    """
+    Generates a column of adjacent tiles, as produced by an unmerged
+    tile-based dirty tracker for a tall sprite.
+    """
+    size = max(8, max_size // 2)
+    x = int(rng.integers(0, width - size))
+    y = int(rng.integers(0, max(1, height - size * count)))
+    return [
+        (x, y + i * size, x + size, y + (i + 1) * size)
+        for i in range(count) if y + (i + 1) * size <= height
+    ]
+
+
+@bench.command()
+@click.option('--spi-mhz', '-z', type=float, default=32.0, show_default=True,
+              help='SPI speed in MHz.')
+@click.option('--num-regions', '-n', type=int, default=8, show_default=True,
+              help='Dirty regions per frame.')
+@click.option('--frames', '-f', type=int, default=100, show_default=True,
+              help='Frames per method.')
+@click.option('--max-size', '-s', type=int, default=48, show_default=True,
+              help='Maximum region width/height in pixels.')
+@click.option('--pattern', '-p', type=click.Choice(['random', 'tiles']),
+              default='random', show_default=True,
+              help='Region layout: scattered, or adjacent tiles.')
+def regions(spi_mhz, num_regions, frames, max_size, pattern):
+    """Compares per-region updates with batched display_regions()."""
+    rng = np.random.default_rng(0)
+    make_regions = _tile_regions if pattern == 'tiles' else _random_regions
+    try:
+        with ST7789V(speed_hz=int(spi_mhz * 1_000_000)) as lcd:
+            frame = Image.fromarray(
+                rng.integers(0, 256, (lcd.height, lcd.width, 3),
+                             dtype=np.uint8), "RGB"
+            )
+            region_sets = [
+                make_regions(lcd.width, lcd.height, num_regions,
+                             max_size, rng)
+                for _ in range(frames)
+            ]
+
+            def per_region(regs):
+                for r in regs:
+                    lcd.display_region(frame, *r)
+
+            def batched(regs):
+                lcd.display_regions(frame, regs)
+
+            for name, method in (("display_region", per_region),
+                                 ("display_regions", batched)):
+                before = lcd.get_stats()
+                start = time.perf_counter()
+                for regs in region_sets:
+                    method(regs)
+                elapsed = time.perf_counter() - start
+                after = lcd.get_stats()
+                spi = (after['spi_calls'] - before['spi_calls']) / frames
+                gpio = (after['gpio_calls'] - before['gpio_calls']) / frames
+                click.echo(
+                    f"{name:16s}: {elapsed / frames * 1000:7.2f} ms/frame, "
+                    f"{spi:6.1f} SPI calls/frame, "
+                    f"{gpio:6.1f} GPIO calls/frame"
+                )
+
+    except RuntimeError as e:
+        log.error(f"Error: {e}. Make sure pigpio daemon is running and SPI is enabled.")
+        exit(1)
+    except Exception as e:
+        log.error("%s: %s", type(e).__name__, e)
+        exit(1)
+
+
+def _scattered_tiles(width, height, count, tile_size, rng):
+    """Generates single tiles at random positions on the tile grid."""
+    cols, rows = width // tile_size, height // tile_size
+    cells = rng.choice(cols * rows, size=min(count, cols * rows),
+                       replace=False)
+    return [
+        (int(c % cols) * tile_size, int(c // cols) * tile_size,
+         int(c % cols + 1) * tile_size, int(c // cols + 1) * tile_size)
+        for c in cells
+    ]
+
+
+def _band_tiles(width, height, count, tile_size, rng):
+    """
+    Generates adjacent tiles filling a horizontal band, as produced by a
+    large changed area.
+    """
+    cols = width // tile_size
+    y0 = int(rng.integers(0, max(1, height - tile_size * (count // cols + 1))))
+    return [
+        ((i % cols) * tile_size, y0 + (i // cols) * tile_size,
+         (i % cols + 1) * tile_size, y0 + (i // cols + 1) * tile_size)
+        for i in range(count)
+        if y0 + (i // cols + 1) * tile_size <= height
+    ]
+
+
+def _ball_frames(width, height, count, frames, rng):
+    """
+    Generates the dirty regions of `ball_anime` for successive frames:
+    the union of the previous and current bounding box of each ball that
+    moved, plus an FPS text area in the top left corner.
+    """
+    physics = BallPhysics.random(count, width, height, 20, 300.0, rng=rng)
+    prev = physics.bboxes()
+    region_sets = []
+    for _ in range(frames):
+        for _ in range(4):
+            physics.step(1 / 120)
+        boxes = physics.bboxes()
+        union = np.hstack((np.minimum(boxes[:, :2], prev[:, :2]),
+                           np.maximum(boxes[:, 2:], prev[:, 2:])))
+        union = np.clip(union + (-1, -1, 1, 1), 0,
+                        (width, height, width, height))
+        region_sets.append(
+            [tuple(r) for r in union.tolist()] + [(0, 0, 120, 40)]
+        )
+        prev = boxes
+    return region_sets
+
+
+@bench.command()
+@click.option('--width', '-W', type=int, default=320, show_default=True,
+              help='Screen width in pixels.')
+@click.option('--height', '-H', type=int, default=240, show_default=True,
+              help='Screen height in pixels.')
+@click.option('--tile-size', '-t', type=int, default=16, show_default=True,
+              help='Tile edge length in pixels.')
+@click.option('--num-regions', '-n', 'counts', type=int, multiple=True,
+              default=(4, 32, 100, 300), show_default=True,
+              help='Dirty regions per frame (can be repeated).')
+@click.option('--frames', '-f', type=int, default=50, show_default=True,
+              help='Frames per method.')
+@click.option('--max-size', '-s', type=int, default=48, show_default=True,
+              help='Maximum region width/height in pixels (random).')
+@click.option('--pattern', '-p',
+              type=click.Choice(['random', 'scatter', 'band', 'balls']),
+              default='random', show_default=True,
+              help='Region layout: random rectangles, scattered tiles, '
+                   'adjacent tiles in a band, or moving balls as in '
+                   'ball_anime (-n is the number of balls).')
+def merge(width, height, tile_size, counts, frames, max_size, pattern):
+    """
+    Compares the region merge strategies of TileDirtyTracker.
+
+    "merge" is RegionOptimizer.merge_regions(), "tiles" the tile merge and
+    "auto" the default choice between them. Besides the time, the pixels
+    sent and the number of windows per frame are shown. No display is
+    needed.
+    """
+    rng = np.random.default_rng(0)
+    for count in counts:
+        if pattern == 'balls':
+            region_sets = _ball_frames(width, height, count, frames, rng)
+        elif pattern == 'random':
+            region_sets = [
+                _random_regions(width, height, count, max_size, rng)
+                for _ in range(frames)
+            ]
+        else:
+            make_tiles = _scattered_tiles if pattern == 'scatter' else _band_tiles
+            region_sets = [
+                make_tiles(width, height, count, tile_size, rng)
+                for _ in range(frames)
+            ]
+
+        results = []
+        for strategy in ("merge", "tiles", "auto"):
+            tracker = TileDirtyTracker(width, height, tile_size,
+                                       strategy=strategy)
+            merged = []
+            start = time.perf_counter()
+            for regs in region_sets:
+                tracker.mark_regions(regs)
+                merged.append(tracker.pop_regions())
+            elapsed = time.perf_counter() - start
+            pixels = sum(
+                (r[2] - r[0]) * (r[3] - r[1]) for regs in merged for r in regs
+            ) / frames
+            windows = sum(len(regs) for regs in merged) / frames
+            results.append(
+                f"{strategy} {elapsed / frames * 1000:7.3f} ms "
+                f"{pixels:7.0f} px {windows:4.1f} win"
+            )
+        unit = "balls" if pattern == 'balls' else "regions"
+        click.echo(f"{count:5d} {unit}: " + ", ".join(results))
+
+
+@bench.command()
+@click.option('--spi-mhz', '-z', type=float, default=32.0, show_default=True,
+              help='SPI speed in MHz.')
+@click.option('--frames', '-f', type=int, default=30, show_default=True,
+              help='Full frames per backend.')
+@click.option('--backend', '-b', 'backends', multiple=True,
+              type=click.Choice(['pigpio', 'spidev']),
+              default=('pigpio', 'spidev'), show_default=True,
+              help='Backends to measure (can be repeated).')
+@click.option('--spi-device', '-d', type=str, default=None,
+              help='spidev device path (a regular file works as a fake).')
+def backend(spi_mhz, frames, backends, spi_device):
+    """Compares full-frame throughput of the I/O backends."""
+    rng = np.random.default_rng(0)
+    for name in backends:
+        try:
+            with ST7789V(speed_hz=int(spi_mhz * 1_000_000), backend=name,
+                         spi_device=spi_device) as lcd:
+                frame = Image.fromarray(
+                    rng.integers(0, 256, (lcd.height, lcd.width, 3),
+                                 dtype=np.uint8), "RGB"
+                )
+                lcd.display(frame)  # warm up
+                before = lcd.get_stats()
+                start = time.perf_counter()
+                for _ in range(frames):
+                    lcd.display(frame)
+                elapsed = time.perf_counter() - start
+                after = lcd.get_stats()
+
+                sent = after['bytes_sent'] - before['bytes_sent']
+                spi = (after['spi_calls'] - before['spi_calls']) / frames
+                click.echo(
+                    f"{name:6s} ({after['backend']}): "
+                    f"{elapsed / frames * 1000:7.2f} ms/frame, "
+                    f"{frames / elapsed:6.1f} fps, "
+                    f"{sent / elapsed / 1024 / 1024:6.2f} MB/s, "
+                    f"{spi:5.1f} SPI calls/frame"
+                )
+
+        except RuntimeError as e:
+            log.error(f"{name}: {e}")
+        except Exception as e:
+            log.error("%s: %s: %s", name, type(e).__name__, e)
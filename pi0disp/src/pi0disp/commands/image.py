@@ -7,6 +7,7 @@ import click
 from PIL import Image
 
 from ..disp.st7789v import ST7789V
+from ..utils.asset_cache import AssetCache
 from ..utils.utils import ImageProcessor
 from ..utils.my_logger import get_logger
 
@@ -15,14 +16,18 @@ log = get_logger(__name__)
 @click.command()
 @click.argument('image_path', type=click.Path(exists=True, dir_okay=False, readable=True))
 @click.option('--duration', '-d', type=float, default=3.0, help='Duration to display each image in seconds.')
-def image(image_path, duration):
+@click.option('--fit', '-f', type=click.Choice(['contain', 'cover']), default='contain', show_default=True,
+              help='How the image is fitted to the screen.')
+@click.option('--no-cache', is_flag=True, default=False,
+              help='Convert the image every time instead of using the RGB565 asset cache.')
+def image(image_path, duration, fit, no_cache):
     """Displays an image with optional gamma correction.
 
     IMAGE_PATH: Path to the image file to display.
     """
     log.info(f"Attempting to display image: {image_path}")
     try:
-        source_image = Image.open(image_path)
+        source_image = Image.open(image_path) if no_cache else None
     except FileNotFoundError:
         log.error(f"Error: Image file '{image_path}' not found.")
         exit(1)
@@ -31,24 +36,38 @@ def image(image_path, duration):
         exit(1)
 
     processor = ImageProcessor()
+    cache = AssetCache()
 
     try:
         with ST7789V() as lcd:
-            log.info("Displaying original image resized to screen (contain mode)...")
+            log.info(f"Displaying original image resized to screen ({fit} mode)...")
+            size = (lcd.width, lcd.height)
 
-            # Resize while maintaining aspect ratio
-            resized_image = processor.resize_with_aspect_ratio(
-                source_image, lcd.width, lcd.height, fit_mode="contain"
-            )
-            lcd.display(resized_image)
+            def show(gamma: float):
+                if no_cache:
+                    # Resize while maintaining aspect ratio
+                    resized_image = processor.resize_with_aspect_ratio(
+                        source_image, lcd.width, lcd.height, fit_mode=fit
+                    )
+                    # Gamma is applied while converting to RGB565
+                    lcd.set_color_correction(gamma=gamma)
+                    lcd.display(resized_image)
+                    return
+                # Decoded, resized and converted once, then memory-mapped
+                lcd.display_rgb565(
+                    cache.load(image_path, size, fit, lcd.rotation, gamma)
+                )
+
+            show(1.0)
             time.sleep(duration)
 
             for gamma in (1.0, 1.5, 1.0, 0.5, 1.0):
                 log.info(f"Applying gamma={gamma}")
-                corrected_image = processor.apply_gamma(resized_image, gamma=gamma)
-                lcd.display(corrected_image)
+                show(gamma)
                 time.sleep(duration)
 
+            log.debug(f"Asset cache: {cache.get_stats()}")
+
     except RuntimeError as e:
         log.error(f"Error: {e}. Make sure pigpio daemon is running and SPI is enabled.")
         exit(1)
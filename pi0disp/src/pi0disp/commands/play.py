@@ -0,0 +1,56 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""Play animation command."""
+import click
+
+from ..disp.st7789v import ST7789V
+from ..utils.player import AnimationPlayer
+from ..utils.my_logger import get_logger
+
+log = get_logger(__name__)
+
+@click.command()
+@click.argument('path', type=click.Path(exists=True, readable=True))
+@click.option('--spi-mhz', "-z", default=32.0, type=float, help='SPI speed in MHz', show_default=True)
+@click.option('--fps', "-f", default=None, type=float, help='Override the frame rate of the source.')
+@click.option('--loops', "-l", default=1, type=int, help='Number of times to play (0: until Ctrl+C).', show_default=True)
+@click.option('--fit', type=click.Choice(['contain', 'cover']), default='contain', show_default=True,
+              help='How frames are fitted to the screen.')
+@click.option('--queue-size', "-q", default=4, type=int, help='Number of frames decoded ahead.', show_default=True)
+def play(path, spi_mhz, fps, loops, fit, queue_size):
+    """Plays an animated GIF/APNG/WebP or a directory of frames.
+
+    PATH: Animation file, or directory of images played in name order.
+    """
+    log.info(f"Playing {path}")
+    player = None
+    try:
+        with ST7789V(speed_hz=int(spi_mhz * 1_000_000)) as lcd:
+            player = AnimationPlayer(
+                lcd, path, fit_mode=fit, fps=fps, loops=loops,
+                queue_size=queue_size
+            )
+            player.play()
+    except KeyboardInterrupt:
+        log.info("Stopped.")
+        if player is not None:
+            player.stop()
+    except RuntimeError as e:
+        if player is not None:
+            log.error(f"Error: {e}")
+        else:
+            log.error(f"Error: {e}. Make sure pigpio daemon is running and SPI is enabled.")
+        exit(1)
+    except Exception as e:
+        log.error(f"An unexpected error occurred during playback: {e}")
+        exit(1)
+    finally:
+        if player is not None:
+            stats = player.get_stats()
+            click.echo(
+                f"presented={stats['presented']} dropped={stats['dropped']} "
+                f"unchanged={stats['unchanged']} "
+                f"decode={stats['avg_decode_time_ms']:.1f}ms "
+                f"present={stats['avg_present_time_ms']:.1f}ms"
+            )
@@ -0,0 +1,352 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+I/O backends for the ST7789V driver.
+
+A backend drives the three GPIO pins (RST, D/C, backlight) and sends bytes
+over SPI. Two implementations are provided:
+
+- `PigpioBackend`: goes through the pigpio daemon (default).
+- `SpidevBackend`: writes to `/dev/spidevB.C` with `ioctl` transfers and
+  drives the pins through libgpiod (if installed) or sysfs, bypassing the
+  pigpio daemon socket. If the device path is a regular file or a FIFO,
+  bytes are simply written to it and pin levels are kept in memory, which
+  allows testing without hardware.
+"""
+import ctypes
+import fcntl
+import os
+import stat
+import struct
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import pigpio
+
+from ..utils.my_logger import get_logger
+
+log = get_logger(__name__)
+
+# --- spidev ioctl definitions (linux/spi/spidev.h) ---
+_IOC_WRITE = 1
+_SPI_IOC_MAGIC = ord('k')
+_SPI_IOC_TRANSFER_SIZE = 32  # sizeof(struct spi_ioc_transfer)
+_SPI_IOC_TRANSFER_FORMAT = "QQIIHBBBBBB"
+
+
+def _iow(nr: int, size: int) -> int:
+    """Equivalent of the _IOW() macro for the SPI ioctl magic."""
+    return (_IOC_WRITE << 30) | (size << 16) | (_SPI_IOC_MAGIC << 8) | nr
+
+
+SPI_IOC_WR_MODE = _iow(1, 1)
+SPI_IOC_WR_BITS_PER_WORD = _iow(3, 1)
+SPI_IOC_WR_MAX_SPEED_HZ = _iow(4, 4)
+SPI_IOC_MESSAGE_1 = _iow(0, _SPI_IOC_TRANSFER_SIZE)
+
+SPIDEV_BUFSIZ_PARAM = Path("/sys/module/spidev/parameters/bufsiz")
+DEFAULT_SPIDEV_BUFSIZ = 4096
+
+SYSFS_GPIO = Path("/sys/class/gpio")
+
+
+class DisplayBackend(ABC):
+    """Interface between the ST7789V driver and the hardware."""
+
+    name = "backend"
+
+    #: Maximum number of bytes per `spi_write()` call, or None if unlimited.
+    max_transfer: Optional[int] = None
+
+    @property
+    def device_key(self) -> str:
+        """Identifies the SPI device and clock, e.g. for stored settings."""
+        return self.name
+
+    @abstractmethod
+    def gpio_write(self, pin: int, level: int):
+        """Sets an output pin to 0 or 1."""
+
+    @abstractmethod
+    def spi_write(self, data: Union[bytes, bytearray, list]):
+        """Sends bytes over SPI."""
+
+    @abstractmethod
+    def close(self):
+        """Releases the SPI device and GPIO pins."""
+
+
+class PigpioBackend(DisplayBackend):
+    """Backend using the pigpio daemon."""
+
+    name = "pigpio"
+
+    # The daemon rejects socket commands with more than 64 KiB of data
+    max_transfer = 65536
+
+    def __init__(self, channel: int, speed_hz: int, pins: Sequence[int]):
+        self.channel = channel
+        self.speed_hz = speed_hz
+
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError(
+                "Could not connect to pigpio daemon. Is it running?"
+            )
+
+        for pin in pins:
+            self.pi.set_mode(pin, pigpio.OUTPUT)
+
+        self.spi_handle = self.pi.spi_open(channel, speed_hz, 0)
+        if self.spi_handle < 0:
+            raise RuntimeError(
+                f"Failed to open SPI bus: handle={self.spi_handle}"
+            )
+
+    @property
+    def device_key(self) -> str:
+        return f"spi{self.channel}@{self.speed_hz}"
+
+    def gpio_write(self, pin: int, level: int):
+        self.pi.write(pin, level)
+
+    def spi_write(self, data: Union[bytes, bytearray, list]):
+        self.pi.spi_write(self.spi_handle, data)
+
+    def close(self):
+        try:
+            if self.spi_handle >= 0:
+                self.pi.spi_close(self.spi_handle)
+        finally:
+            if self.pi.connected:
+                self.pi.stop()
+
+
+class _MemoryPins:
+    """Keeps pin levels in memory (used with a fake SPI device)."""
+
+    def __init__(self, pins: Sequence[int]):
+        self.levels: Dict[int, int] = {pin: 0 for pin in pins}
+
+    def write(self, pin: int, level: int):
+        self.levels[pin] = level
+
+    def close(self):
+        pass
+
+
+class _GpiodPins:
+    """Drives output pins with the libgpiod v2 Python bindings."""
+
+    def __init__(self, pins: Sequence[int], chip: str):
+        import gpiod  # optional dependency
+        from gpiod.line import Direction, Value
+
+        self._value = {0: Value.INACTIVE, 1: Value.ACTIVE}
+        self._request = gpiod.request_lines(
+            chip,
+            consumer="pi0disp",
+            config={
+                tuple(pins): gpiod.LineSettings(direction=Direction.OUTPUT)
+            },
+        )
+
+    def write(self, pin: int, level: int):
+        self._request.set_value(pin, self._value[1 if level else 0])
+
+    def close(self):
+        self._request.release()
+
+
+class _SysfsPins:
+    """Drives output pins through /sys/class/gpio."""
+
+    def __init__(self, pins: Sequence[int]):
+        base = self._find_base()
+        self._fds: Dict[int, int] = {}
+        for pin in pins:
+            gpio = SYSFS_GPIO / f"gpio{base + pin}"
+            if not gpio.exists():
+                (SYSFS_GPIO / "export").write_text(str(base + pin))
+            (gpio / "direction").write_text("out")
+            self._fds[pin] = os.open(gpio / "value", os.O_WRONLY)
+
+    @staticmethod
+    def _find_base() -> int:
+        """
+        Returns the sysfs number of BCM GPIO 0. Recent kernels no longer
+        place the SoC GPIO controller at base 0.
+        """
+        for chip in sorted(SYSFS_GPIO.glob("gpiochip*")):
+            try:
+                label = (chip / "label").read_text().strip()
+                if label.startswith("pinctrl-bcm") or label.startswith(
+                        "pinctrl-rp1"
+                ):
+                    return int((chip / "base").read_text())
+            except OSError:
+                continue
+        return 0
+
+    def write(self, pin: int, level: int):
+        os.pwrite(self._fds[pin], b"1" if level else b"0", 0)
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+
+class SpidevBackend(DisplayBackend):
+    """
+    Backend writing directly to the kernel spidev driver.
+
+    Large buffers are sent with one `SPI_IOC_MESSAGE` ioctl per
+    `max_transfer` bytes (the spidev `bufsiz` module parameter, 4096 by
+    default; raise it with `spidev.bufsiz=65536` in cmdline.txt).
+    """
+
+    name = "spidev"
+
+    def __init__(
+            self,
+            channel: int,
+            speed_hz: int,
+            pins: Sequence[int],
+            bus: int = 0,
+            device: Optional[str] = None,
+            gpio: str = "auto",
+            gpio_chip: str = "/dev/gpiochip0"
+    ):
+        """
+        Args:
+            channel: SPI chip select (the C in /dev/spidevB.C).
+            speed_hz: SPI clock speed in Hz.
+            pins: Output pins (RST, D/C, backlight).
+            bus: SPI bus number (the B in /dev/spidevB.C).
+            device: Explicit device path. A regular file or FIFO can be
+                    given to capture the output without hardware.
+            gpio: "gpiod", "sysfs", "memory" or "auto".
+            gpio_chip: GPIO chip device used with libgpiod.
+        """
+        self.channel = channel
+        self.speed_hz = speed_hz
+        self.device = device or f"/dev/spidev{bus}.{channel}"
+
+        self._fd = os.open(self.device, os.O_RDWR)
+        self.is_fake = not stat.S_ISCHR(os.fstat(self._fd).st_mode)
+        try:
+            if self.is_fake:
+                self.max_transfer = None
+            else:
+                self._configure()
+                self.max_transfer = self._read_bufsiz()
+            self._pins = self._open_pins(pins, gpio, gpio_chip)
+        except Exception:
+            os.close(self._fd)
+            raise
+        log.debug(
+            "device=%s, fake=%s, max_transfer=%s, gpio=%s",
+            self.device, self.is_fake, self.max_transfer,
+            type(self._pins).__name__
+        )
+
+    @property
+    def device_key(self) -> str:
+        return f"{Path(self.device).name}@{self.speed_hz}"
+
+    def _configure(self):
+        """Sets SPI mode 0, 8 bits per word and the clock speed."""
+        fcntl.ioctl(self._fd, SPI_IOC_WR_MODE, struct.pack("B", 0))
+        fcntl.ioctl(self._fd, SPI_IOC_WR_BITS_PER_WORD, struct.pack("B", 8))
+        fcntl.ioctl(
+            self._fd, SPI_IOC_WR_MAX_SPEED_HZ, struct.pack("I", self.speed_hz)
+        )
+
+    @staticmethod
+    def _read_bufsiz() -> int:
+        """Returns the largest transfer the spidev driver accepts."""
+        try:
+            return int(SPIDEV_BUFSIZ_PARAM.read_text())
+        except (OSError, ValueError):
+            return DEFAULT_SPIDEV_BUFSIZ
+
+    def _open_pins(self, pins: Sequence[int], gpio: str, gpio_chip: str):
+        """Selects the GPIO implementation."""
+        if gpio == "memory" or (gpio == "auto" and self.is_fake):
+            return _MemoryPins(pins)
+        if gpio in ("gpiod", "auto"):
+            try:
+                return _GpiodPins(pins, gpio_chip)
+            except (ImportError, AttributeError, OSError) as e:
+                if gpio == "gpiod":
+                    raise
+                log.debug("gpiod unavailable (%s), using sysfs", e)
+        return _SysfsPins(pins)
+
+    @property
+    def pin_levels(self) -> Dict[int, int]:
+        """Pin levels recorded in memory (fake device only)."""
+        if isinstance(self._pins, _MemoryPins):
+            return dict(self._pins.levels)
+        return {}
+
+    def gpio_write(self, pin: int, level: int):
+        self._pins.write(pin, level)
+
+    def spi_write(self, data: Union[bytes, bytearray, list]):
+        if isinstance(data, list):
+            data = bytes(data)
+        if self.is_fake:
+            os.write(self._fd, data)
+            return
+
+        length = len(data)
+        if isinstance(data, bytearray):
+            buf = (ctypes.c_char * length).from_buffer(data)
+        else:
+            buf = (ctypes.c_char * length).from_buffer_copy(data)
+        transfer = struct.pack(
+            _SPI_IOC_TRANSFER_FORMAT,
+            ctypes.addressof(buf), 0, length, self.speed_hz,
+            0, 8, 0, 0, 0, 0, 0
+        )
+        fcntl.ioctl(self._fd, SPI_IOC_MESSAGE_1, transfer)
+
+    def close(self):
+        try:
+            self._pins.close()
+        finally:
+            os.close(self._fd)
+
+
+def create_backend(
+        backend: Union[str, DisplayBackend],
+        channel: int,
+        speed_hz: int,
+        pins: Sequence[int],
+        spi_device: Optional[str] = None
+) -> DisplayBackend:
+    """
+    Creates a display backend by name.
+
+    "spidev" falls back to pigpio if the spidev device cannot be opened.
+    """
+    if isinstance(backend, DisplayBackend):
+        return backend
+    if backend == "pigpio":
+        return PigpioBackend(channel, speed_hz, pins)
+    if backend == "spidev":
+        try:
+            return SpidevBackend(
+                channel, speed_hz, pins, device=spi_device
+            )
+        except (OSError, ImportError) as e:
+            log.warning(
+                "spidev backend unavailable (%s: %s), falling back to pigpio",
+                type(e).__name__, e
+            )
+            return PigpioBackend(channel, speed_hz, pins)
+    raise ValueError(f"Unknown backend: {backend}")
@@ -0,0 +1,150 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Scrolling text console using the ST7789V hardware scroll.
+
+Once the console is full, each new line is drawn over the oldest one in
+frame memory and the display is scrolled by one line with a single
+VSCRSADD command, instead of transferring the whole text area again.
+"""
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from ..utils.my_logger import get_logger
+from .st7789v import ST7789V
+
+log = get_logger(__name__)
+
+
+class ScrollingConsole:
+    """
+    A text console occupying the lines [top, bottom) of the screen.
+
+    The hardware scrolls along the native height of the panel, so the
+    console requires a portrait rotation (0 or 180). `ST7789V` opens in
+    landscape (rotation 90) by default, so pass `rotation=0` or call
+    `set_rotation(0)` first; otherwise ValueError is raised. Lines outside the
+    console stay fixed and can be drawn normally, e.g. for a title bar.
+
+    While the console is scrolled, frame memory no longer matches screen
+    coordinates inside the console area, so other drawing must stay
+    outside of it.
+    """
+    def __init__(
+            self,
+            lcd: ST7789V,
+            font: Optional[ImageFont.ImageFont] = None,
+            line_height: Optional[int] = None,
+            fg: Tuple[int, int, int] = (255, 255, 255),
+            bg: Tuple[int, int, int] = (0, 0, 0),
+            top: int = 0,
+            bottom: Optional[int] = None
+    ):
+        """
+        Args:
+            lcd: The display (rotation 0 or 180).
+            font: Font for the text. Defaults to PIL's default font.
+            line_height: Height of a line in pixels.
+                         Defaults to the font's line spacing.
+            fg: Text color.
+            bg: Background color.
+            top: First screen line of the console.
+            bottom: Screen line after the console. Defaults to the bottom
+                    of the screen. The console is shortened to a whole
+                    number of lines.
+        """
+        if lcd.scroll_axis != "y":
+            raise ValueError(
+                "ScrollingConsole requires rotation 0 or 180 "
+                f"(the display is at rotation {lcd.rotation})."
+            )
+
+        self._lcd = lcd
+        self._font = font or ImageFont.load_default()
+        if line_height is None:
+            ascent, descent = self._font.getmetrics()
+            line_height = ascent + descent + 2
+        self._line_height = line_height
+        self._fg = fg
+        self._bg = bg
+
+        bottom = lcd.height if bottom is None else bottom
+        self.rows = (bottom - top) // line_height
+        if self.rows < 1:
+            raise ValueError("The console area is smaller than one line.")
+        self._top = top
+        self._bottom = top + self.rows * line_height
+
+        # Frame memory contents of the console area (unscrolled order)
+        self._canvas = Image.new("RGB", (lcd.width, lcd.height), bg)
+        self._draw = ImageDraw.Draw(self._canvas)
+        self._count = 0
+        self._offset = 0
+
+        lcd.set_scroll_area(self._top, self._bottom)
+        self.clear()
+
+    @property
+    def lines_written(self) -> int:
+        """Number of lines written since the last `clear()`."""
+        return self._count
+
+    def clear(self):
+        """Clears the console and resets the scroll position."""
+        self._draw.rectangle(
+            (0, self._top, self._canvas.width - 1, self._bottom - 1),
+            fill=self._bg
+        )
+        self._lcd.scroll(0)
+        self._lcd.display_region(
+            self._canvas, 0, self._top, self._canvas.width, self._bottom
+        )
+        self._count = 0
+        self._offset = 0
+
+    def write(self, text: str):
+        """
+        Writes text to the console. Newlines start a new line, and lines
+        wider than the screen are wrapped.
+        """
+        for line in text.split("\n"):
+            for wrapped in self._wrap(line):
+                self.write_line(wrapped)
+
+    def write_line(self, text: str):
+        """Appends one line (not wrapped) at the bottom of the console."""
+        lh = self._line_height
+        if self._count < self.rows:
+            y = self._top + self._count * lh
+        else:
+            # Overwrite the oldest line, then scroll it to the bottom
+            y = self._top + self._offset
+        self._count += 1
+
+        self._draw.rectangle(
+            (0, y, self._canvas.width - 1, y + lh - 1), fill=self._bg
+        )
+        self._draw.text((2, y + 1), text, font=self._font, fill=self._fg)
+        self._lcd.display_region(self._canvas, 0, y, self._canvas.width, y + lh)
+
+        if self._count > self.rows:
+            self._offset = (self._offset + lh) % (self._bottom - self._top)
+            self._lcd.scroll(self._offset)
+
+    def _wrap(self, line: str) -> List[str]:
+        """Splits a line into pieces that fit the screen width."""
+        max_width = self._canvas.width - 4
+        if not line or self._font.getlength(line) <= max_width:
+            return [line]
+
+        pieces = []
+        start = 0
+        for end in range(1, len(line) + 1):
+            if (self._font.getlength(line[start:end]) > max_width
+                    and end - 1 > start):
+                pieces.append(line[start:end - 1])
+                start = end - 1
+        pieces.append(line[start:])
+        return pieces
@@ -0,0 +1,271 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Asynchronous frame presenter for the ST7789V driver.
+
+`ST7789V.display()` and `ST7789V.display_region()` convert and transmit
+pixels on the caller's thread. `AsyncPresenter` moves that work to a
+background thread with a small set of swap buffers, so the application can
+render the next frame while the current one is being sent over SPI.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from ..utils.my_logger import get_logger
+from ..utils.performance_core import RegionOptimizer
+from ..utils.utils import optimize_dirty_regions
+from .st7789v import ST7789V
+
+log = get_logger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+
+class AsyncPresenter:
+    """
+    Presents frames to an ST7789V display from a background thread.
+
+    `present()` copies the frame into one of `num_buffers` swap buffers and
+    returns immediately. If the bus falls behind and no buffer is free, the
+    newest pending frame is replaced by the incoming one and its dirty
+    regions are carried over, so no update is lost while stale frames are
+    skipped.
+
+    While the presenter is running, the display must not be driven directly
+    from other threads.
+    """
+    def __init__(
+            self,
+            lcd: ST7789V,
+            num_buffers: int = 2,
+            max_regions: int = 8
+    ):
+        """
+        Args:
+            lcd: The display to present frames to.
+            num_buffers: Number of swap buffers (at least 2). One buffer is
+                         being transmitted while the others hold pending
+                         frames.
+            max_regions: Maximum number of regions kept for a frame after
+                         regions of skipped frames have been merged into it.
+        """
+        if num_buffers < 2:
+            raise ValueError("num_buffers must be 2 or more.")
+
+        self._lcd = lcd
+        self._num_buffers = num_buffers
+        self._max_regions = max_regions
+
+        self._free: Deque[Image.Image] = deque()
+        self._pending: Deque[Tuple[Image.Image, Optional[List[Region]]]] = (
+            deque()
+        )
+        self._cond = threading.Condition()
+        self._busy = False
+        self._running = False
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'submitted': 0,
+            'presented': 0,
+            'skipped': 0,
+            'max_queue_depth': 0,
+            'busy_time': 0.0,
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """Starts the background presenter thread."""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="AsyncPresenter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = None):
+        """
+        Stops the background thread.
+
+        Args:
+            flush: If True, pending frames are transmitted before stopping.
+            timeout: Maximum time in seconds to wait for the thread.
+        """
+        if flush:
+            self.wait_idle(timeout)
+        with self._cond:
+            self._running = False
+            if not flush:
+                while self._pending:
+                    self._free.append(self._pending.popleft()[0])
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def present(
+            self,
+            frame: Image.Image,
+            regions: Optional[Sequence[Region]] = None
+    ) -> bool:
+        """
+        Queues a frame for presentation and returns immediately.
+
+        Args:
+            frame: The frame to present. It is copied, so the caller may
+                   keep drawing on it right away.
+            regions: Dirty regions (x0, y0, x1, y1) to transmit, or None to
+                     transmit the whole frame.
+
+        Returns:
+            False if a pending frame had to be skipped to make room,
+            True otherwise.
+        """
+        new_regions = None if regions is None else list(regions)
+
+        with self._cond:
+            if self._error is not None:
+                raise RuntimeError(
+                    "AsyncPresenter thread failed"
+                ) from self._error
+            if not self._running:
+                raise RuntimeError("AsyncPresenter is not running.")
+
+            self._stats['submitted'] += 1
+            skipped = False
+
+            if self._free:
+                buffer = self._free.popleft()
+            elif len(self._pending) + int(self._busy) < self._num_buffers:
+                buffer = Image.new("RGB", (self._lcd.width, self._lcd.height))
+            else:
+                # The bus is behind: drop the newest pending frame and
+                # carry its regions over to the incoming one.
+                buffer, old_regions = self._pending.pop()
+                new_regions = self._merge(old_regions, new_regions)
+                self._stats['skipped'] += 1
+                skipped = True
+
+            self._copy_frame(frame, buffer, new_regions)
+            self._pending.append((buffer, new_regions))
+
+            depth = len(self._pending)
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+            self._cond.notify_all()
+
+        return not skipped
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until all queued frames have been transmitted.
+
+        Returns:
+            True if the presenter became idle, False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: (not self._pending and not self._busy)
+                or not self._running or self._error is not None,
+                timeout
+            )
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of frames waiting to be transmitted."""
+        with self._cond:
+            return len(self._pending)
+
+    def get_stats(self) -> dict:
+        """Returns presenter statistics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._pending)
+        presented = stats['presented']
+        stats['avg_present_time_ms'] = (
+            stats['busy_time'] / presented * 1000 if presented else 0.0
+        )
+        return stats
+
+    def _merge(
+            self,
+            old: Optional[List[Region]],
+            new: Optional[List[Region]]
+    ) -> Optional[List[Region]]:
+        """Combines the regions of a skipped frame with a newer frame."""
+        if old is None or new is None:
+            return None
+        return optimize_dirty_regions(old + new, self._max_regions)
+
+    def _copy_frame(
+            self,
+            frame: Image.Image,
+            buffer: Image.Image,
+            regions: Optional[List[Region]]
+    ):
+        """
+        Copies the frame into a swap buffer.
+        Only the dirty regions are copied, as nothing else is transmitted.
+        """
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        if frame.size != buffer.size:
+            frame = frame.resize(buffer.size)
+        if regions is None:
+            buffer.paste(frame)
+            return
+        for region in regions:
+            region = RegionOptimizer.clamp_region(
+                region, buffer.width, buffer.height
+            )
+            if region[2] > region[0] and region[3] > region[1]:
+                buffer.paste(frame.crop(region), region[:2])
+
+    def _run(self):
+        """Background loop transmitting pending frames."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending or not self._running
+                )
+                if not self._pending:
+                    return
+                buffer, regions = self._pending.popleft()
+                self._busy = True
+
+            start = time.monotonic()
+            try:
+                if regions is None:
+                    self._lcd.display(buffer)
+                else:
+                    self._lcd.display_regions(buffer, regions)
+            except Exception as e:
+                log.error("%s: %s", type(e).__name__, e)
+                with self._cond:
+                    self._error = e
+                    self._busy = False
+                    self._free.append(buffer)
+                    self._cond.notify_all()
+                return
+
+            with self._cond:
+                self._stats['presented'] += 1
+                self._stats['busy_time'] += time.monotonic() - start
+                self._busy = False
+                self._free.append(buffer)
+                self._cond.notify_all()
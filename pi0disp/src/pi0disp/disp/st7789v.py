@@ -9,18 +9,30 @@ optimized for Raspberry Pi environments. It leverages the `performance_core`
 module to achieve high frame rates with low CPU usage.
 """
 import time
-from typing import Optional, Tuple, Union
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-import pigpio
 from PIL import Image
 
+from ..utils.config_manager import (
+    get_default_config_filepath, load_config, update_config
+)
+from ..utils.my_logger import get_logger
 from ..utils.performance_core import create_optimizer_pack
+from ..utils.profiler import Profiler, get_default_profiler
+from .backends import DisplayBackend, create_backend
+
+log = get_logger(__name__)
+
+# A run of bytes sent with one D/C level: (level, parts)
+Segment = Tuple[int, List[bytes]]
 
 # --- ST7789V Commands ---
 CMD_SWRESET = 0x01
 CMD_SLPIN = 0x10
 CMD_SLPOUT = 0x11
+CMD_PTLON = 0x12
 CMD_NORON = 0x13
 CMD_INVON = 0x21
 CMD_DISPOFF = 0x28
@@ -28,9 +40,16 @@ CMD_DISPON = 0x29
 CMD_CASET = 0x2A
 CMD_RASET = 0x2B
 CMD_RAMWR = 0x2C
+CMD_PTLAR = 0x30
+CMD_VSCRDEF = 0x33
 CMD_MADCTL = 0x36
+CMD_VSCRSADD = 0x37
 CMD_COLMOD = 0x3A
 
+# Config file section holding calibrated chunk sizes
+CHUNK_CONFIG_SECTION = "spi_chunk_size"
+CHUNK_CANDIDATES = (1024, 2048, 4096, 8192, 16384)
+
 class ST7789V:
     """
     An optimized driver for ST7789V-based SPI displays.
@@ -47,7 +66,11 @@ class ST7789V:
             speed_hz: int = 32_000_000, 
             width: int = 240, 
             height: int = 320, 
-            rotation: int = 90
+            rotation: int = 90,
+            config_file_path: Optional[Path] = None,
+            backend: Union[str, DisplayBackend] = "pigpio",
+            spi_device: Optional[str] = None,
+            profiler: Optional[Profiler] = None
     ):
         """
         Initializes the display driver.
@@ -61,6 +84,17 @@ class ST7789V:
             width: The native width of the display.
             height: The native height of the display.
             rotation: Initial rotation (0, 90, 180, or 270 degrees).
+            config_file_path: File holding per-device settings such as the
+                              calibrated SPI chunk size.
+                              Defaults to `~/pi0disp.json`.
+            backend: "pigpio" (default), "spidev", or a `DisplayBackend`
+                     instance. "spidev" falls back to pigpio if the device
+                     cannot be opened.
+            spi_device: spidev device path (defaults to
+                        `/dev/spidev0.<channel>`).
+            profiler: Records per-stage timings of each display call.
+                      Defaults to the one set with `set_default_profiler()`
+                      (none unless the CLI runs with `--profile`).
         """
         self._native_width = width
         self._native_height = height
@@ -68,32 +102,38 @@ class ST7789V:
         self.height = height
         self._rotation = rotation
         
-        # Initialize the optimizer pack
-        self._optimizers = create_optimizer_pack()
-        
-        # Initialize pigpio
-        self.pi = pigpio.pi()
-        if not self.pi.connected:
-            raise RuntimeError(
-                "Could not connect to pigpio daemon. Is it running?"
-            )
+        self.channel = channel
+        self.speed_hz = speed_hz
+        self._config_file_path = (
+            config_file_path or get_default_config_filepath()
+        )
 
         self.rst_pin = rst_pin
         self.dc_pin = dc_pin
         self.backlight_pin = backlight_pin
 
-        # Configure GPIO pins
-        for pin in [self.rst_pin, self.dc_pin, self.backlight_pin]:
-            self.pi.set_mode(pin, pigpio.OUTPUT)
+        # Open SPI and configure GPIO pins
+        self.backend = create_backend(
+            backend, channel, speed_hz,
+            [self.rst_pin, self.dc_pin, self.backlight_pin],
+            spi_device=spi_device
+        )
 
-        # Open SPI handle
-        self.spi_handle = self.pi.spi_open(channel, speed_hz, 0)
-        if self.spi_handle < 0:
-            raise RuntimeError(
-                f"Failed to open SPI bus: handle={self.spi_handle}"
-            )
+        # Initialize the optimizer pack
+        self._optimizers = create_optimizer_pack()
+        self.profiler = profiler or get_default_profiler()
+        self._load_chunk_size()
 
         self._last_window: Optional[Tuple[int, int, int, int]] = None
+        self._last_cols: Optional[Tuple[int, int]] = None
+        self._last_rows: Optional[Tuple[int, int]] = None
+        self._dc_level: Optional[int] = None
+        self._io_stats = {'spi_calls': 0, 'gpio_calls': 0, 'bytes_sent': 0}
+        # Scroll area (start, end) in screen coordinates, and its offset
+        self._scroll_area: Optional[Tuple[int, int]] = None
+        self._scroll_offset = 0
+        # Fused color correction table (see set_color_correction)
+        self._color_lut: Optional[np.ndarray] = None
         
         self._init_display()
         self.set_rotation(self._rotation)
@@ -104,27 +144,40 @@ class ST7789V:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    def _set_dc(self, level: int):
+        """Drives the D/C pin, skipping the call if it is already there."""
+        if self._dc_level != level:
+            self.backend.gpio_write(self.dc_pin, level)
+            self._dc_level = level
+            self._io_stats['gpio_calls'] += 1
+
+    def _spi_write(self, data: Union[bytes, bytearray, list]):
+        """Sends a buffer over SPI in a single call."""
+        self.backend.spi_write(data)
+        self._io_stats['spi_calls'] += 1
+        self._io_stats['bytes_sent'] += len(data)
+
     def _write_command(self, command: int):
         """Sends a command byte to the display."""
-        self.pi.write(self.dc_pin, 0)  # D/C pin low for command
-        self.pi.spi_write(self.spi_handle, [command])
+        self._set_dc(0)  # D/C pin low for command
+        self._spi_write([command])
 
     def _write_data(self, data: Union[int, bytes, list]):
         """Sends a data byte or buffer to the display."""
-        self.pi.write(self.dc_pin, 1)  # D/C pin high for data
+        self._set_dc(1)  # D/C pin high for data
         if isinstance(data, int):
-            self.pi.spi_write(self.spi_handle, [data])
+            self._spi_write([data])
         else:
-            self.pi.spi_write(self.spi_handle, data)
+            self._spi_write(data)
 
     def _init_display(self):
         """Performs the hardware initialization sequence for the ST7789V."""
         # Hardware reset
-        self.pi.write(self.rst_pin, 1)
+        self.backend.gpio_write(self.rst_pin, 1)
         time.sleep(0.01)
-        self.pi.write(self.rst_pin, 0)
+        self.backend.gpio_write(self.rst_pin, 0)
         time.sleep(0.01)
-        self.pi.write(self.rst_pin, 1)
+        self.backend.gpio_write(self.rst_pin, 1)
         time.sleep(0.150)
 
         # Initialization sequence
@@ -139,7 +192,7 @@ class ST7789V:
         self._write_command(CMD_DISPON)
         time.sleep(0.1)
 
-        self.pi.write(self.backlight_pin, 1)
+        self.backend.gpio_write(self.backlight_pin, 1)
 
     def set_rotation(self, rotation: int):
         """
@@ -152,6 +205,10 @@ class ST7789V:
         if rotation not in madctl_values:
             raise ValueError("Rotation must be 0, 90, 180, or 270.")
 
+        # The scroll mapping depends on the rotation
+        if self._scroll_area is not None:
+            self.reset_scroll()
+
         self._write_command(CMD_MADCTL)
         self._write_data(madctl_values[rotation])
 
@@ -162,7 +219,122 @@ class ST7789V:
             self.width, self.height = self._native_width, self._native_height
         
         self._rotation = rotation
-        self._last_window = None  # Invalidate window cache
+        # Invalidate window cache
+        self._last_window = None
+        self._last_cols = None
+        self._last_rows = None
+
+    @property
+    def rotation(self) -> int:
+        """Current rotation in degrees (0, 90, 180 or 270)."""
+        return self._rotation
+
+    @property
+    def scroll_axis(self) -> str:
+        """
+        Screen axis along which the hardware scrolls: "y" in portrait
+        (rotation 0/180), "x" in landscape (rotation 90/270).
+        """
+        return "y" if self._rotation in (0, 180) else "x"
+
+    @property
+    def _scroll_length(self) -> int:
+        """Number of gate lines (the native height)."""
+        return self._native_height
+
+    def _to_gate_range(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        Converts a screen range [start, end) along the scroll axis into
+        gate lines [start, end). With rotation 180/270 the gate lines run in
+        the opposite direction of the screen axis.
+        """
+        if self._rotation in (180, 270):
+            return self._scroll_length - end, self._scroll_length - start
+        return start, end
+
+    def set_scroll_area(self, start: int, end: int):
+        """
+        Defines the vertical scrolling area (VSCRDEF).
+
+        The area is given in screen coordinates along `scroll_axis`; the
+        parts before `start` and from `end` on stay fixed.
+
+        Args:
+            start: First line of the scrolling area.
+            end: Line after the last line of the scrolling area.
+        """
+        length = self._scroll_length
+        if not 0 <= start < end <= length:
+            raise ValueError(f"Invalid scroll area: ({start}, {end})")
+
+        top, bottom = self._to_gate_range(start, end)
+        tfa, vsa, bfa = top, bottom - top, length - bottom
+        self._write_command(CMD_VSCRDEF)
+        self._write_data([
+            tfa >> 8, tfa & 0xFF, vsa >> 8, vsa & 0xFF, bfa >> 8, bfa & 0xFF
+        ])
+        self._scroll_area = (start, end)
+        self.scroll(0)
+
+    def scroll(self, offset: int):
+        """
+        Scrolls the content of the scrolling area (VSCRSADD).
+
+        After `scroll(offset)`, the first line of the area shows the line
+        that was drawn `offset` lines further along the axis, i.e. the
+        content moves towards the start of the area as `offset` grows and
+        wraps around. Only one command is sent; pixel data is not touched.
+
+        Args:
+            offset: Scroll offset in lines (taken modulo the area length).
+        """
+        if self._scroll_area is None:
+            self.set_scroll_area(0, self._scroll_length)
+        start, end = self._scroll_area
+        size = end - start
+        top, _ = self._to_gate_range(start, end)
+
+        if self._rotation in (180, 270):
+            vsp = top + (-offset) % size
+        else:
+            vsp = top + offset % size
+        self._write_command(CMD_VSCRSADD)
+        self._write_data([vsp >> 8, vsp & 0xFF])
+        self._scroll_offset = offset % size
+
+    @property
+    def scroll_offset(self) -> int:
+        """Current scroll offset in lines."""
+        return self._scroll_offset
+
+    def reset_scroll(self):
+        """Restores the unscrolled, full-screen mapping."""
+        self.set_scroll_area(0, self._scroll_length)
+        self._scroll_area = None
+
+    def set_partial_area(self, start: int, end: int):
+        """
+        Enters partial display mode (PTLAR, PTLON).
+
+        Only the lines [start, end) along `scroll_axis` are refreshed from
+        frame memory; the rest of the panel shows the non-display color,
+        which reduces power consumption.
+        """
+        length = self._scroll_length
+        if not 0 <= start < end <= length:
+            raise ValueError(f"Invalid partial area: ({start}, {end})")
+
+        top, bottom = self._to_gate_range(start, end)
+        last = bottom - 1
+        self._write_command(CMD_PTLAR)
+        self._write_data([top >> 8, top & 0xFF, last >> 8, last & 0xFF])
+        self._write_command(CMD_PTLON)
+
+    def normal_mode(self):
+        """Leaves partial display mode and scroll mode (NORON)."""
+        self._write_command(CMD_NORON)
+        self._scroll_area = None
+        self._scroll_offset = 0
 
     def set_window(self, x0: int, y0: int, x1: int, y1: int):
         """
@@ -175,46 +347,204 @@ class ST7789V:
         if self._last_window == window:
             return
 
-        self._write_command(CMD_CASET)
-        self._write_data([x0 >> 8, x0 & 0xFF, x1 >> 8, x1 & 0xFF])
-        self._write_command(CMD_RASET)
-        self._write_data([y0 >> 8, y0 & 0xFF, y1 >> 8, y1 & 0xFF])
-        self._write_command(CMD_RAMWR)
-        
+        self._start_ram_write(x0, y0, x1, y1)
         self._last_window = window
 
+    def _start_ram_write(self, x0: int, y0: int, x1: int, y1: int):
+        """
+        Sends CASET/RASET (only those that changed) followed by RAMWR.
+        RAMWR always resets the write pointer to the top-left of the window.
+        """
+        segments: List[Segment] = []
+        self._queue_ram_write(segments, x0, y0, x1, y1)
+        self._send_segments(segments)
+
+    def _queue_ram_write(
+            self, segments: List[Segment], x0: int, y0: int, x1: int, y1: int
+    ):
+        """Appends the commands of `_start_ram_write` to a segment list."""
+        cols = (x0, x1)
+        if self._last_cols != cols:
+            self._queue(segments, 0, bytes([CMD_CASET]))
+            self._queue(segments, 1, bytes([x0 >> 8, x0 & 0xFF,
+                                            x1 >> 8, x1 & 0xFF]))
+            self._last_cols = cols
+        rows = (y0, y1)
+        if self._last_rows != rows:
+            self._queue(segments, 0, bytes([CMD_RASET]))
+            self._queue(segments, 1, bytes([y0 >> 8, y0 & 0xFF,
+                                            y1 >> 8, y1 & 0xFF]))
+            self._last_rows = rows
+        self._queue(segments, 0, bytes([CMD_RAMWR]))
+
+    @staticmethod
+    def _queue(segments: List[Segment], level: int, data: bytes):
+        """Appends bytes to the last segment if it has the same D/C level."""
+        if segments and segments[-1][0] == level:
+            segments[-1][1].append(data)
+        else:
+            segments.append((level, [data]))
+
+    def _send_segments(self, segments: Sequence[Segment]):
+        """
+        Sends a segment list with one SPI write per segment, so the D/C pin
+        is only driven at segment boundaries. Segments longer than the
+        backend's `max_transfer` are split without touching D/C.
+        """
+        limit = self.backend.max_transfer
+        sent = 0
+        start = time.perf_counter()
+        for level, parts in segments:
+            data = parts[0] if len(parts) == 1 else b"".join(parts)
+            self._set_dc(level)
+            if limit and len(data) > limit:
+                for i in range(0, len(data), limit):
+                    self._spi_write(data[i:i + limit])
+            else:
+                self._spi_write(data)
+            sent += len(data)
+        self.profiler.add_time('spi', time.perf_counter() - start)
+        self.profiler.count('bytes', sent)
+
     def write_pixels(self, pixel_bytes: bytes):
         """
         Writes a raw buffer of pixel data to the current window.
         Uses adaptive chunking to optimize transfer speed.
         """
-        chunk_size = self._optimizers['adaptive_chunking'].get_chunk_size()
+        chunking = self._optimizers['adaptive_chunking']
+        chunk_size = chunking.get_chunk_size()
+        if self.backend.max_transfer:
+            chunk_size = min(chunk_size, self.backend.max_transfer)
         data_len = len(pixel_bytes)
         
-        self.pi.write(self.dc_pin, 1) # Set D/C high for data
+        self._set_dc(1) # Set D/C high for data
         
+        start = time.perf_counter()
         if data_len <= chunk_size:
-            self.pi.spi_write(self.spi_handle, pixel_bytes)
+            self._spi_write(pixel_bytes)
         else:
             for i in range(0, data_len, chunk_size):
-                self.pi.spi_write(
-                    self.spi_handle, pixel_bytes[i:i + chunk_size]
-                )
+                self._spi_write(pixel_bytes[i:i + chunk_size])
+        elapsed = time.perf_counter() - start
+        chunking.record_transfer(data_len, elapsed)
+        self.profiler.add_time('spi', elapsed)
+        self.profiler.count('bytes', data_len)
+
+    @property
+    def _chunk_config_key(self) -> str:
+        """Key identifying this SPI device and clock in the config file."""
+        return self.backend.device_key
+
+    def _load_chunk_size(self):
+        """Restores a previously calibrated chunk size, if any."""
+        config = load_config(self._config_file_path)
+        size = config.get(CHUNK_CONFIG_SECTION, {}).get(self._chunk_config_key)
+        if size:
+            self._optimizers['adaptive_chunking'].set_chunk_size(size)
+            log.debug("chunk_size=%s (%s)", size, self._chunk_config_key)
+
+    def calibrate_chunk_size(
+            self,
+            candidates: Sequence[int] = CHUNK_CANDIDATES,
+            repeats: int = 3,
+            save: bool = True
+    ) -> Dict[int, float]:
+        """
+        Measures full-frame throughput for each candidate chunk size at the
+        configured SPI speed, and pins the fastest one.
+
+        The screen is filled with black while measuring.
+
+        Args:
+            candidates: Chunk sizes (bytes) to try.
+            repeats: Number of full-frame transfers per candidate.
+            save: If True, the result is stored in the config file so it is
+                  restored the next time this device is opened.
+
+        Returns:
+            A dict mapping each candidate to its throughput in bytes/second.
+        """
+        chunking = self._optimizers['adaptive_chunking']
+        pixel_bytes = bytes(self.width * self.height * 2)
+        results: Dict[int, float] = {}
+
+        for size in candidates:
+            chunking.set_chunk_size(size)
+            size = chunking.get_chunk_size()
+            if size in results:
+                continue  # clamped to an already measured size
+
+            self.set_window(0, 0, self.width - 1, self.height - 1)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                self.write_pixels(pixel_bytes)
+            elapsed = time.perf_counter() - start
+            results[size] = len(pixel_bytes) * repeats / elapsed
+            log.debug(
+                "chunk_size=%s: %.1f KB/s", size, results[size] / 1024
+            )
+
+        best = max(results, key=lambda k: results[k])
+        chunking.set_chunk_size(best)
+        if save:
+            update_config(
+                self._config_file_path, CHUNK_CONFIG_SECTION,
+                self._chunk_config_key, best
+            )
+        return results
+
+    def get_stats(self) -> dict:
+        """Returns transfer statistics (chunk size, throughput, etc.)."""
+        stats = self._optimizers['adaptive_chunking'].get_stats()
+        stats.update(self._io_stats)
+        stats['speed_hz'] = self.speed_hz
+        stats['backend'] = self.backend.name
+        return stats
+
+    def set_color_correction(
+            self,
+            gamma: float = 1.0,
+            brightness: float = 1.0,
+            color_temperature: float = 6500.0
+    ):
+        """
+        Applies gamma, brightness and color temperature to everything sent
+        with `display`, `display_region` and `display_regions`.
+
+        The correction is folded into the RGB565 conversion table, so it
+        costs no extra pass over the pixels. Calling it with the defaults
+        turns the correction off. `display_rgb565` buffers are sent as
+        they are.
+
+        Args:
+            gamma: Gamma exponent (1.0 leaves levels unchanged).
+            brightness: Multiplier applied after gamma.
+            color_temperature: White point in Kelvin (6500 is neutral).
+        """
+        if (gamma, brightness, color_temperature) == (1.0, 1.0, 6500.0):
+            self._color_lut = None
+        else:
+            self._color_lut = self._optimizers['color_converter'].rgb565_lut(
+                gamma, brightness, color_temperature
+            )
 
     def display(self, image: Image.Image):
         """
         Displays a full PIL Image on the screen.
         The image is automatically resized to fit the display.
         """
-        if image.size != (self.width, self.height):
-            image = image.resize((self.width, self.height))
+        with self.profiler.frame():
+            if image.size != (self.width, self.height):
+                image = image.resize((self.width, self.height))
 
-        pixel_bytes = self._optimizers['color_converter'].rgb_to_rgb565_bytes(
-            np.array(image)
-        )
-        
-        self.set_window(0, 0, self.width - 1, self.height - 1)
-        self.write_pixels(pixel_bytes)
+            with self.profiler.stage('convert'):
+                pixel_bytes = self._optimizers[
+                    'color_converter'
+                ].rgb_to_rgb565_bytes(np.array(image), self._color_lut)
+
+            with self.profiler.stage('window'):
+                self.set_window(0, 0, self.width - 1, self.height - 1)
+            self.write_pixels(pixel_bytes)
 
     def display_region(
             self, image: Image.Image, x0: int, y0: int, x1: int, y1: int
@@ -233,37 +563,155 @@ class ST7789V:
         if region[2] <= region[0] or region[3] <= region[1]:
             return # Skip zero- or negative-sized regions
 
-        # Crop the image to the specified region and convert to pixel data
-        region_img = image.crop(region)
-        pixel_bytes = self._optimizers['color_converter'].rgb_to_rgb565_bytes(
-            np.array(region_img)
-        )
+        with self.profiler.frame():
+            # Crop the image to the specified region and convert to pixel data
+            with self.profiler.stage('convert'):
+                region_img = image.crop(region)
+                pixel_bytes = self._optimizers[
+                    'color_converter'
+                ].rgb_to_rgb565_bytes(np.array(region_img), self._color_lut)
+
+            # Set window and write data
+            with self.profiler.stage('window'):
+                self.set_window(
+                    region[0], region[1], region[2] - 1, region[3] - 1
+                )
+            self.write_pixels(pixel_bytes)
+
+    def display_regions(
+            self,
+            image: Image.Image,
+            regions: Sequence[Tuple[int, int, int, int]]
+    ):
+        """
+        Displays several regions of a PIL image in one batched sequence.
+
+        Compared to calling `display_region` for each region, the image is
+        converted to an array only once, regions are ordered so that
+        consecutive windows share their column (CASET) or row (RASET)
+        range, and vertically adjacent regions with the same columns are
+        sent as a single window. The commands and pixels of all windows
+        are collected into one segment list per frame, and each run of
+        bytes with the same D/C level is sent with a single SPI write
+        (split only at the backend's `max_transfer`).
+
+        Args:
+            image: The frame to take pixel data from.
+            regions: Regions (x0, y0, x1, y1) to transmit.
+        """
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        profiler = self.profiler
+        with profiler.frame():
+            with profiler.stage('merge'):
+                windows = self._group_windows(regions)
+            if not windows:
+                return
+            profiler.count('regions', len(windows))
+
+            rgb = np.asarray(image)
+            converter = self._optimizers['color_converter']
+            segments: List[Segment] = []
+            for x0, y0, x1, y1 in windows:
+                with profiler.stage('convert'):
+                    pixel_bytes = converter.rgb_to_rgb565_bytes(
+                        rgb[y0:y1, x0:x1], self._color_lut
+                    )
+                with profiler.stage('window'):
+                    self._queue_ram_write(segments, x0, y0, x1 - 1, y1 - 1)
+                self._queue(segments, 1, pixel_bytes)
+            self._send_segments(segments)
+            self._last_window = None
+
+    def display_rgb565(
+            self,
+            buffer: np.ndarray,
+            regions: Optional[Sequence[Tuple[int, int, int, int]]] = None
+    ):
+        """
+        Displays a frame buffer that is already in RGB565, skipping color
+        conversion (see `utils.sprite_sheet`).
 
-        # Set window and write data
-        self.set_window(region[0], region[1], region[2] - 1, region[3] - 1)
-        self.write_pixels(pixel_bytes)
+        Args:
+            buffer: Array of shape (height, width). Big-endian ('>u2')
+                    buffers are sent as they are; native uint16 is swapped.
+            regions: Regions (x0, y0, x1, y1) to transmit, batched as in
+                     `display_regions`. None transmits the whole buffer.
+        """
+        if buffer.shape != (self.height, self.width):
+            raise ValueError(
+                f"Buffer shape {buffer.shape} does not match the display "
+                f"({self.height}, {self.width})."
+            )
+        if buffer.dtype != np.dtype('>u2'):
+            buffer = buffer.astype('>u2')
+
+        profiler = self.profiler
+        with profiler.frame():
+            if regions is None:
+                with profiler.stage('window'):
+                    self.set_window(0, 0, self.width - 1, self.height - 1)
+                self.write_pixels(buffer.tobytes())
+                return
+
+            with profiler.stage('merge'):
+                windows = self._group_windows(regions)
+            profiler.count('regions', len(windows))
+            segments: List[Segment] = []
+            for x0, y0, x1, y1 in windows:
+                with profiler.stage('window'):
+                    self._queue_ram_write(segments, x0, y0, x1 - 1, y1 - 1)
+                self._queue(segments, 1, buffer[y0:y1, x0:x1].tobytes())
+            self._send_segments(segments)
+            self._last_window = None
+
+    def _group_windows(
+            self, regions: Sequence[Tuple[int, int, int, int]]
+    ) -> List[List[int]]:
+        """
+        Clamps regions and orders them so that consecutive windows share
+        their column range; vertically contiguous regions with the same
+        columns are joined into one window.
+        """
+        region_optimizer = self._optimizers['region_optimizer']
+        clamped = []
+        for r in regions:
+            r = region_optimizer.clamp_region(r, self.width, self.height)
+            if r[2] > r[0] and r[3] > r[1]:
+                clamped.append(r)
+
+        # Group by column range, then top to bottom
+        clamped.sort(key=lambda r: (r[0], r[2], r[1]))
+        windows: List[List[int]] = []
+        for x0, y0, x1, y1 in clamped:
+            last = windows[-1] if windows else None
+            if last and last[0] == x0 and last[2] == x1 and last[3] == y0:
+                last[3] = y1  # contiguous rows: extend the window
+            else:
+                windows.append([x0, y0, x1, y1])
+        return windows
 
     def close(self):
         """Cleans up resources (turns off backlight, closes SPI handle)."""
         try:
-            self.pi.write(self.backlight_pin, 0)
-            if hasattr(self, 'spi_handle') and self.spi_handle >= 0:
-                self.pi.spi_close(self.spi_handle)
+            self.backend.gpio_write(self.backlight_pin, 0)
         finally:
-            if self.pi.connected:
-                self.pi.stop()
+            self.backend.close()
 
     def dispoff(self):
         """DISPOFF."""
         self._write_command(CMD_DISPOFF)
-        self.pi.write(self.backlight_pin, 0)
+        self.backend.gpio_write(self.backlight_pin, 0)
 
     def sleep(self):
         """Puts the display into sleep mode."""
         self._write_command(CMD_SLPIN)
-        self.pi.write(self.backlight_pin, 0)
+        self.backend.gpio_write(self.backlight_pin, 0)
 
     def wake(self):
         """Wakes the display from sleep mode."""
         self._write_command(CMD_SLPOUT)
-        self.pi.write(self.backlight_pin, 1)
+        self.backend.gpio_write(self.backlight_pin, 1)
@@ -0,0 +1,204 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+On-disk cache of display-ready images.
+
+Decoding a JPEG/PNG, resizing it with LANCZOS and converting it to RGB565
+takes far longer on a Pi Zero than sending it. `AssetCache` does this work
+once and stores the result as a `.npy` RGB565 blob. Later loads memory-map
+the blob, so showing a splash screen or the next slide of a slideshow is an
+mmap plus the SPI transfer (`ST7789V.display_rgb565()`).
+
+Entries are keyed by the source file (path, modification time and size)
+and by everything that changes the pixels: output size, fit mode, rotation
+and gamma. Editing the source file therefore creates a new entry instead of
+returning a stale one, and the blobs made from the previous version of the
+file are deleted at that point.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from .my_logger import get_logger
+from .performance_core import ColorConverter
+from .utils import ImageProcessor
+
+log = get_logger(__name__)
+
+CACHE_DIR_NAME = "pi0disp"
+ASSET_SUFFIX = ".npy"
+
+
+def get_default_cache_dir() -> Path:
+    """
+    Returns the default asset cache directory.
+    e.g. ~/.cache/pi0disp/assets
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / CACHE_DIR_NAME / "assets"
+
+
+class AssetCache:
+    """
+    Converts images to RGB565 once and memory-maps the result afterwards.
+
+    Recently loaded blobs are also kept mapped in memory (up to
+    `max_mapped`), so cycling through a few images does not even reopen
+    the files.
+    """
+    def __init__(
+            self,
+            cache_dir: Optional[Union[str, Path]] = None,
+            max_mapped: int = 8
+    ):
+        """
+        Args:
+            cache_dir: Directory for the blobs.
+                       Defaults to `get_default_cache_dir()`.
+            max_mapped: Number of memory-mapped blobs kept open.
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else (
+            get_default_cache_dir()
+        )
+        self.max_mapped = max_mapped
+        self._mapped: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._converter = ColorConverter()
+        self._processor = ImageProcessor()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def make_key(
+            path: Union[str, Path],
+            size: Tuple[int, int],
+            fit_mode: str = "contain",
+            rotation: int = 0,
+            gamma: float = 1.0
+    ) -> tuple:
+        """
+        Returns the cache key of an image:
+        (path, mtime, file size, output size, fit mode, rotation, gamma).
+        """
+        path = Path(path).resolve()
+        st = path.stat()
+        return (str(path), st.st_mtime_ns, st.st_size, tuple(size),
+                fit_mode, rotation, float(gamma))
+
+    @staticmethod
+    def _digest(value) -> str:
+        return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+    def blob_path(self, key: tuple) -> Path:
+        """
+        Returns the file holding the blob for `key`.
+
+        The name is "<path>-<source version>-<variant>.npy" (each part a
+        digest), so the blobs of an older version of a file can be found.
+        """
+        path, mtime, file_size = key[:3]
+        return self.cache_dir / (
+            f"{self._digest(path)[:16]}-{self._digest((mtime, file_size))[:16]}"
+            f"-{self._digest(key[3:])[:16]}{ASSET_SUFFIX}"
+        )
+
+    def _prune_superseded(self, key: tuple, blob: Path):
+        """
+        Deletes the blobs and mappings made from other versions (mtime or
+        size) of the source file of `key`. Variants of the current version
+        (other sizes, rotations, gammas) are kept.
+        """
+        for stale in [k for k in self._mapped
+                      if k[0] == key[0] and k[1:3] != key[1:3]]:
+            del self._mapped[stale]
+
+        prefix, version = blob.name.split("-")[:2]
+        for other in self.cache_dir.glob(f"{prefix}-*{ASSET_SUFFIX}"):
+            if other.name.split("-")[1] != version:
+                log.debug("Removing superseded blob %s", other.name)
+                other.unlink(missing_ok=True)
+
+    def load(
+            self,
+            path: Union[str, Path],
+            size: Tuple[int, int],
+            fit_mode: str = "contain",
+            rotation: int = 0,
+            gamma: float = 1.0
+    ) -> np.ndarray:
+        """
+        Returns an image as a read-only RGB565 frame buffer.
+
+        Args:
+            path: Source image file.
+            size: Output size (width, height), e.g. `(lcd.width, lcd.height)`.
+            fit_mode: "contain" or "cover" (see `resize_with_aspect_ratio`).
+            rotation: Display rotation the blob is made for.
+            gamma: Gamma correction baked into the pixels.
+
+        Returns:
+            An array of shape (height, width) and dtype '>u2'.
+        """
+        key = self.make_key(path, size, fit_mode, rotation, gamma)
+        buffer = self._mapped.get(key)
+        if buffer is not None:
+            self._mapped.move_to_end(key)
+            self._stats['hits'] += 1
+            return buffer
+
+        blob = self.blob_path(key)
+        try:
+            buffer = np.load(blob, mmap_mode='r')
+            self._stats['hits'] += 1
+        except (OSError, ValueError):
+            self._stats['misses'] += 1
+            self._save(blob, self._convert(path, size, fit_mode, gamma))
+            self._prune_superseded(key, blob)
+            buffer = np.load(blob, mmap_mode='r')
+
+        self._mapped[key] = buffer
+        if len(self._mapped) > self.max_mapped:
+            self._mapped.popitem(last=False)
+        return buffer
+
+    def _convert(
+            self,
+            path: Union[str, Path],
+            size: Tuple[int, int],
+            fit_mode: str,
+            gamma: float
+    ) -> np.ndarray:
+        """Decodes, resizes and converts an image to RGB565."""
+        log.debug("Converting %s to %sx%s (%s)", path, *size, fit_mode)
+        with Image.open(path) as img:
+            img = img.convert("RGB")
+        resized = self._processor.resize_with_aspect_ratio(
+            img, size[0], size[1], fit_mode=fit_mode
+        )
+        lut = None if gamma == 1.0 else self._converter.rgb565_lut(gamma)
+        return self._converter.rgb_to_rgb565(np.asarray(resized), lut)
+
+    def _save(self, blob: Path, buffer: np.ndarray):
+        """Writes a blob atomically, so readers never see a partial file."""
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(f".{blob.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, buffer)
+        os.replace(tmp, blob)
+
+    def clear(self):
+        """Deletes all cached blobs."""
+        self._mapped.clear()
+        if self.cache_dir.is_dir():
+            for blob in self.cache_dir.glob(f"*{ASSET_SUFFIX}"):
+                blob.unlink(missing_ok=True)
+
+    def get_stats(self) -> dict:
+        """Returns cache statistics."""
+        stats = dict(self._stats)
+        stats['mapped'] = len(self._mapped)
+        return stats
@@ -0,0 +1,313 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Layered compositor working in place on a persistent frame buffer.
+
+Instead of copying the background and compositing full-screen layers every
+frame, `Compositor` keeps one frame buffer, restores the background only
+inside the dirty regions, and redraws (in z-order) only the layers that
+intersect them. The dirty regions are returned so that only they are
+transferred to the display.
+"""
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .my_logger import get_logger
+from .performance_core import TileDirtyTracker
+from .sprite import Sprite
+from .text_cache import TextCache
+from .utils import (
+    clamp_region, draw_text_cached, expand_bbox, measure_text_cached,
+    optimize_dirty_regions
+)
+
+log = get_logger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+
+def regions_intersect(a: Region, b: Region) -> bool:
+    """Returns True if two regions (x0, y0, x1, y1) overlap."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class Layer(ABC):
+    """
+    Something drawn on top of the compositor's background.
+
+    Subclasses report the regions that changed since the last frame and
+    draw themselves onto the frame buffer. Layers are drawn in ascending
+    `z` order.
+    """
+    def __init__(self, z: int = 0):
+        self.z = z
+        self._visible = True
+        self._pending: List[Region] = []
+
+    @property
+    def visible(self) -> bool:
+        return self._visible
+
+    @visible.setter
+    def visible(self, value: bool):
+        if value != self._visible:
+            self._visible = value
+            self.invalidate()
+
+    def invalidate(self):
+        """Forces the layer's area to be redrawn in the next frame."""
+        bounds = self.bounds()
+        if bounds is not None:
+            self._pending.append(bounds)
+
+    def collect_dirty_regions(self) -> List[Region]:
+        """Returns and clears the regions to update for this layer."""
+        regions = self._pending
+        self._pending = []
+        if self._visible:
+            regions.extend(self.dirty_regions())
+        return regions
+
+    @abstractmethod
+    def bounds(self) -> Optional[Region]:
+        """
+        Current extent of the layer, or None if it may cover the whole
+        screen (the layer is then drawn whenever anything is dirty).
+        """
+
+    @abstractmethod
+    def dirty_regions(self) -> List[Region]:
+        """Regions that changed since the last frame."""
+
+    @abstractmethod
+    def render(self, frame: Image.Image, draw: ImageDraw.ImageDraw):
+        """Draws the layer onto the frame buffer."""
+
+    def commit(self):
+        """Called after each frame, e.g. to remember the drawn position."""
+        pass
+
+
+class SpriteLayer(Layer):
+    """
+    Plugs a `Sprite` into the compositor.
+
+    The sprite is redrawn when it moved or was marked dirty. Its regions
+    are expanded by `margin` pixels to cover anti-aliased edges and
+    shapes drawn up to the inclusive right/bottom edge.
+    """
+
+    def __init__(self, sprite: Sprite, z: int = 0, margin: int = 1):
+        super().__init__(z)
+        self.sprite = sprite
+        self.margin = margin
+
+    def bounds(self) -> Optional[Region]:
+        return expand_bbox(self.sprite.bbox, self.margin)
+
+    def dirty_regions(self) -> List[Region]:
+        prev, curr = self.sprite.prev_bbox, self.sprite.bbox
+        if prev == curr and not self.sprite.dirty:
+            return []
+        return [
+            expand_bbox(r, self.margin) for r in (prev, curr) if r is not None
+        ]
+
+    def render(self, frame: Image.Image, draw: ImageDraw.ImageDraw):
+        self.sprite.draw(draw)
+
+    def commit(self):
+        self.sprite.record_current_bbox()
+
+
+class TextLayer(Layer):
+    """
+    A line of text (e.g. an FPS counter) drawn with `draw_text_cached`.
+    Positions accept the same keywords as `draw_text`.
+    """
+    def __init__(
+            self,
+            font: Union[ImageFont.FreeTypeFont, ImageFont.ImageFont],
+            x: Union[int, str],
+            y: Union[int, str],
+            width: int,
+            height: int,
+            color: Tuple[int, int, int] = (255, 255, 255),
+            text: str = "",
+            z: int = 100,
+            margin: int = 2,
+            cache: Optional[TextCache] = None
+    ):
+        """
+        Args:
+            font: The font.
+            x, y: Position, as for `draw_text`.
+            width, height: Size of the screen.
+            color: Text color.
+            text: Initial text.
+            z: Stacking order.
+            margin: Extra pixels around the text included in its region.
+            cache: Text cache. Defaults to the shared module cache.
+        """
+        super().__init__(z)
+        self._font = font
+        self._pos = (x, y)
+        self._size = (width, height)
+        self._color = color
+        self._margin = margin
+        self._cache = cache
+        self._text = ""
+        self._bbox: Optional[Region] = None
+        self._drawn_bbox: Optional[Region] = None
+        self._drawn_text: Optional[str] = None
+        self.set_text(text)
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def set_text(self, text: str):
+        """Changes the text; only redraws if it actually changed."""
+        if text == self._text and self._bbox is not None:
+            return
+        self._text = text
+        bbox = measure_text_cached(
+            text, self._font, *self._pos, *self._size, cache=self._cache
+        )
+        self._bbox = (
+            None if bbox[2] <= bbox[0] else expand_bbox(bbox, self._margin)
+        )
+
+    def bounds(self) -> Optional[Region]:
+        return self._bbox
+
+    def dirty_regions(self) -> List[Region]:
+        if self._bbox == self._drawn_bbox and self._text == self._drawn_text:
+            return []
+        return [r for r in (self._drawn_bbox, self._bbox) if r is not None]
+
+    def render(self, frame: Image.Image, draw: ImageDraw.ImageDraw):
+        if self._text:
+            draw_text_cached(
+                frame, self._text, self._font, *self._pos, *self._size,
+                color=self._color, cache=self._cache
+            )
+
+    def commit(self):
+        self._drawn_bbox = self._bbox
+        self._drawn_text = self._text
+
+
+class Compositor:
+    """
+    Composes layers over a static background on a persistent frame.
+
+    Call `compose()` once per frame after updating the layers; it returns
+    the (merged) regions that have to be sent to the display.
+    """
+    def __init__(
+            self,
+            background: Image.Image,
+            tile_size: Optional[int] = None,
+            max_regions: int = 8
+    ):
+        """
+        Args:
+            background: Static background image (RGB).
+            tile_size: Merge the dirty regions with a `TileDirtyTracker`
+                       of this tile size. None (default) merges them with
+                       `optimize_dirty_regions()`, which is faster for the
+                       few regions of a typical sprite animation.
+            max_regions: Maximum number of regions returned per frame.
+        """
+        if background.mode != "RGB":
+            background = background.convert("RGB")
+        self._background = background
+        self.width, self.height = background.size
+        self.frame = background.copy()
+        self._draw = ImageDraw.Draw(self.frame)
+        self._layers: List[Layer] = []
+        self._invalid: List[Region] = []
+        self._tracker = None if tile_size is None else TileDirtyTracker(
+            self.width, self.height, tile_size
+        )
+        self.max_regions = max_regions
+
+    @property
+    def layers(self) -> List[Layer]:
+        """Layers in drawing order."""
+        return list(self._layers)
+
+    def add(self, layer: Layer) -> Layer:
+        """Adds a layer and schedules it to be drawn."""
+        self._layers.append(layer)
+        self._layers.sort(key=lambda layer: layer.z)
+        layer.invalidate()
+        return layer
+
+    def remove(self, layer: Layer):
+        """Removes a layer and schedules its area to be restored."""
+        self._layers.remove(layer)
+        bounds = layer.bounds()
+        self.invalidate(bounds)
+
+    def invalidate(self, region: Optional[Region] = None):
+        """Forces a region (or the whole screen if None) to be redrawn."""
+        self._invalid.append(region or (0, 0, self.width, self.height))
+
+    def set_background(self, background: Image.Image):
+        """Replaces the background and redraws the whole screen."""
+        if background.mode != "RGB":
+            background = background.convert("RGB")
+        if background.size != self.frame.size:
+            background = background.resize(self.frame.size)
+        self._background = background
+        self.invalidate()
+
+    def compose(self) -> List[Region]:
+        """
+        Updates the frame buffer for the current state of the layers.
+
+        Returns:
+            The regions that changed (empty if nothing changed).
+        """
+        regions = self._invalid
+        self._invalid = []
+        for layer in self._layers:
+            regions.extend(layer.collect_dirty_regions())
+        if not regions:
+            return []
+
+        if self._tracker is not None:
+            self._tracker.mark_regions(regions)
+            regions = self._tracker.pop_regions(self.max_regions)
+        else:
+            regions = [
+                r for r in (
+                    clamp_region(r, self.width, self.height)
+                    for r in optimize_dirty_regions(regions, self.max_regions)
+                ) if r[2] > r[0] and r[3] > r[1]
+            ]
+            if not regions:
+                return []
+
+        # Restore the background under the dirty regions only
+        for region in regions:
+            self.frame.paste(self._background.crop(region), region[:2])
+
+        # Redraw the layers touching them, bottom to top
+        for layer in self._layers:
+            if not layer.visible:
+                continue
+            bounds = layer.bounds()
+            if bounds is None or any(
+                    regions_intersect(bounds, r) for r in regions
+            ):
+                layer.render(self.frame, self._draw)
+
+        for layer in self._layers:
+            layer.commit()
+        return regions
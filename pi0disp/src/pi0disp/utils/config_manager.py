@@ -0,0 +1,55 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Persistent per-device settings for pi0disp.
+
+Settings measured on the actual hardware (such as the calibrated SPI chunk
+size) are stored in a small JSON file, by default `~/pi0disp.json`.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, cast
+
+from .my_logger import get_logger
+
+log = get_logger(__name__)
+
+CONFIG_FILE_NAME = "pi0disp.json"
+
+
+def get_default_config_filepath() -> Path:
+    """
+    Returns the default path of the configuration file.
+    e.g. ~/pi0disp.json
+    """
+    return Path.home() / CONFIG_FILE_NAME
+
+
+def load_config(filepath: Path) -> Dict[str, Any]:
+    """
+    Loads the configuration file.
+    Returns an empty dict if the file does not exist or cannot be parsed.
+    """
+    if not filepath.exists():
+        return {}
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return cast(Dict[str, Any], json.load(f))
+    except (OSError, ValueError) as e:
+        log.warning("%s: %s: %s", filepath, type(e).__name__, e)
+        return {}
+
+
+def save_config(filepath: Path, config: Dict[str, Any]) -> None:
+    """Saves the configuration file."""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+
+
+def update_config(filepath: Path, section: str, key: str, value: Any) -> None:
+    """Updates a single `section[key]` entry, keeping the other settings."""
+    config = load_config(filepath)
+    config.setdefault(section, {})[key] = value
+    save_config(filepath, config)
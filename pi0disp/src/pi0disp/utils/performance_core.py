@@ -8,8 +8,8 @@ performance_core.py - パフォーマンス最適化のための汎用モジュ
 """
 import time
 import threading
-from collections import deque
-from typing import List, Tuple, Callable, Any, Dict
+from collections import OrderedDict, deque
+from typing import List, Tuple, Callable, Any, Dict, Optional
 
 import numpy as np
 
@@ -107,9 +107,14 @@ class LookupTableCache:
     事前に計算されたルックアップテーブル（LUTs: LookUp Tables）をキャッシュする
     シングルトン（プログラム全体で1つしか存在しない）クラスです。
     色変換やガンマ補正のような、計算コストの高い処理を高速化するために使用されます。
+
+    パラメータ（ガンマ値など）ごとにテーブルを作るタイプは、保持する数を
+    `MAX_TABLES` までに制限し、最も長く使われていないものから破棄します（LRU）。
     """
     _instances: Dict[str, 'LookupTableCache'] = {}
     _lock = threading.Lock()  # スレッドセーフにするためのロック
+    # テーブルタイプごとの最大保持数（ないタイプは無制限）
+    MAX_TABLES: Dict[str, int] = {'gamma': 8, 'rgb565_corrected': 8}
 
     @classmethod
     def get_instance(cls, table_type: str) -> 'LookupTableCache':
@@ -126,10 +131,16 @@ class LookupTableCache:
     def __init__(self, table_type: str):
         self.table_type = table_type  # テーブルのタイプ
         # （例: 'rgb565', 'gamma'）
-        self._tables: Dict[str, np.ndarray] = {} # キャッシュされたテーブルを保持
+        # キャッシュされたテーブルを保持（キーは (テーブル名, パラメータ) のタプル、
+        # 最近使ったものが末尾）
+        self._tables: "OrderedDict[Tuple[Any, ...], np.ndarray]" = OrderedDict()
+        self._max_tables = self.MAX_TABLES.get(table_type)
+        self._tables_lock = threading.Lock()
         self._generators: Dict[str, Callable[..., Dict[str, np.ndarray]]] = {
             'rgb565': self._generate_rgb565_tables,  # RGB565変換テーブルの生成関数
             'gamma': self._generate_gamma_tables,    # ガンマ補正テーブルの生成関数
+            'rgb565_corrected': self._generate_corrected_rgb565_tables,
+            # 色補正込みのRGB565変換テーブルの生成関数
         }
 
     def _generate_rgb565_tables(self) -> Dict[str, np.ndarray]:
@@ -152,12 +163,33 @@ class LookupTableCache:
         ガンマ補正は、画像の明るさやコントラストを調整するために使われる技術です。
         人間の目の明るさに対する感度に合わせて画像を調整します。
         """
-        table = np.array([
-            int(255 * ((i / 255.0) ** gamma)) for i in range(256)
-        ], dtype=np.uint8)  # 0-255の各値に対してガンマ補正を適用した
-        # テーブルを作成
+        # 0-255の各値に対してガンマ補正を適用したテーブルを一括で作成
+        levels = np.arange(256, dtype=np.float64) / 255.0
+        table = (255.0 * levels ** gamma).astype(np.uint8)
         return {'gamma_table': table}
 
+    def _generate_corrected_rgb565_tables(
+            self,
+            gamma: float = 1.0,
+            brightness: float = 1.0,
+            color_temperature: float = 6500.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        ガンマ補正・明るさ・色温度の調整とRGB565へのパッキングを
+        まとめて行うための 3x256 のLUTを生成します。
+        各行は R, G, B 成分の値から、シフト済みのRGB565のビットへの対応です。
+        """
+        levels = np.arange(256, dtype=np.float64) / 255.0
+        gains = brightness * color_temperature_gains(color_temperature)
+        values = np.rint(
+            255.0 * np.clip(levels ** gamma * gains[:, None], 0.0, 1.0)
+        ).astype(np.uint16)  # 形状 (3, 256) の補正後の8ビット値
+        lut = np.empty((3, 256), dtype=np.uint16)
+        lut[0] = (values[0] >> 3) << 11  # 赤成分 (5ビット)
+        lut[1] = (values[1] >> 2) << 5   # 緑成分 (6ビット)
+        lut[2] = values[2] >> 3          # 青成分 (5ビット)
+        return {'rgb565_lut': lut}
+
     def get_table(self, table_name: str, **kwargs: Any) -> np.ndarray:
         """
         テーブルを取得します。もしキャッシュに存在しない場合は、新しく生成して
@@ -171,25 +203,31 @@ class LookupTableCache:
         Returns:
             要求されたルックアップテーブル（通常はNumPy配列）。
         """
-        # キャッシュキーを作成（テーブル名とパラメータのハッシュ値で一意に識別）
-        cache_key = (
-            f"{table_name}_{hash(str(sorted(kwargs.items())))}"
-        )  # キャッシュキーを作成
-        # （テーブル名とパラメータのハッシュ値で一意に識別）
-        if cache_key not in self._tables:  # キャッシュに存在しない場合
+        # キャッシュキーを作成（テーブル名とパラメータのタプルで一意に識別）
+        cache_key = (table_name, tuple(sorted(kwargs.items())))
+        with self._tables_lock:
+            table = self._tables.get(cache_key)
+            if table is not None:
+                self._tables.move_to_end(cache_key)  # 最近使ったものにする
+                return table
+
             if self.table_type not in self._generators:
                 raise ValueError(f"不明なテーブルタイプ: {self.table_type}")
-            
+
             # テーブル生成関数を呼び出してテーブルを生成
             generated = self._generators[self.table_type](**kwargs)
             if table_name not in generated:
                 raise KeyError(
                     f"Table '{table_name}' not found for type '{self.table_type}'"
                 )
-            
-            self._tables[cache_key] = generated[table_name]
-        
-        return self._tables[cache_key]
+
+            table = generated[table_name]
+            self._tables[cache_key] = table
+            if self._max_tables is not None:
+                # 最も長く使われていないテーブルから破棄
+                while len(self._tables) > self._max_tables:
+                    self._tables.popitem(last=False)
+            return table
 
 
 class RegionOptimizer:
@@ -263,8 +301,8 @@ class RegionOptimizer:
             
             i, j = sorted(best_pair_to_merge, reverse=True)
             merged_region = RegionOptimizer._merge_two(merged[i], merged[j])
+            merged.pop(i)  # i > j: pop the later one first
             merged.pop(j)
-            merged.pop(i)
             merged.append(merged_region)
 
         return merged
@@ -309,6 +347,304 @@ class RegionOptimizer:
         )
 
 
+class TileDirtyTracker:
+    """
+    Tracks dirty areas on a grid of tiles and converts them into a small
+    set of update rectangles.
+
+    Marking a region only records it; `get_regions()` rasterizes all marks
+    into a tile bitmap at once, finds the runs of dirty tiles in each tile
+    row with `np.diff`, and stacks runs with the same columns in
+    consecutive rows into rectangles. All of this is vectorized, so its
+    cost grows linearly with the number of marks and tiles.
+
+    To get few rectangles, the bitmap is coarsened by a factor of two per
+    level (a coarse tile is dirty if any of its tiles is). A simple cost
+    model picks the level: every rectangle costs `window_cost_px` (the SPI
+    window-setup overhead expressed in pixels) plus the number of pixels it
+    contains. Coarsening stops at the first level with at most
+    `max_regions` rectangles whose cost is higher than that of the level
+    before. The chosen rectangles are finally shrunk to the bounds of the
+    regions marked inside them.
+
+    For a handful of marks the fixed NumPy overhead is larger than the cost
+    of `RegionOptimizer.merge_regions()`, so the default strategy "auto"
+    uses that up to `MERGE_MAX_MARKED` marks (`pi0disp bench merge`
+    compares both).
+    """
+    # At 320x240 with 8px tiles (`pi0disp bench merge`), the tile merge
+    # breaks even with merge_regions() at about 200 random regions.
+    MERGE_MAX_MARKED = 192
+    STRATEGIES = ("auto", "tiles", "merge")
+
+    def __init__(
+            self,
+            width: int,
+            height: int,
+            tile_size: int = 16,
+            window_cost_px: int = 1024,
+            max_regions: int = 8,
+            strategy: str = "auto"
+    ):
+        """
+        Args:
+            width: Width of the tracked area in pixels.
+            height: Height of the tracked area in pixels.
+            tile_size: Edge length of a tile in pixels.
+            window_cost_px: Cost of setting up one more window, in pixels.
+            max_regions: The maximum number of regions to return.
+            strategy: "auto", "tiles" (always the tile merge) or "merge"
+                      (always `RegionOptimizer.merge_regions()`).
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.window_cost_px = window_cost_px
+        self.max_regions = max_regions
+        self.strategy = strategy
+        self.cols = -(-width // tile_size)
+        self.rows = -(-height // tile_size)
+        self._marked: List[Tuple[int, int, int, int]] = []
+
+    @property
+    def is_dirty(self) -> bool:
+        """True if any region has been marked since the last clear."""
+        return bool(self._marked)
+
+    def mark(self, region: Tuple[int, int, int, int]):
+        """Marks a region (x0, y0, x1, y1) as dirty."""
+        self._marked.append(region)
+
+    def mark_regions(self, regions: List[Tuple[int, int, int, int]]):
+        """
+        Marks several regions as dirty.
+
+        Regions are only recorded here; they are clamped to the tracked
+        area and empty ones dropped in `get_regions()`.
+        """
+        self._marked.extend(r for r in regions if r)
+
+    def mark_mask(self, mask: np.ndarray):
+        """
+        Marks the tiles containing changed pixels.
+
+        Args:
+            mask: Boolean array of shape (height, width), True where a
+                  pixel changed (e.g. `current != previous`).
+        """
+        ts = self.tile_size
+        padded = np.zeros((self.rows * ts, self.cols * ts), dtype=bool)
+        padded[:self.height, :self.width] = mask
+        tiles = padded.reshape(self.rows, ts, self.cols, ts).any(axis=(1, 3))
+        if not tiles.any():
+            return
+        # Runs of changed tiles, so that a large change adds few marks
+        rects = self._coalesce(tiles) * ts
+        rects[:, 2] = np.minimum(rects[:, 2], self.width)
+        rects[:, 3] = np.minimum(rects[:, 3], self.height)
+        self._marked.extend(map(tuple, rects.tolist()))
+
+    def clear(self):
+        """Clears all dirty marks."""
+        self._marked.clear()
+
+    def pop_regions(
+            self, max_regions: Optional[int] = None
+    ) -> List[Tuple[int, int, int, int]]:
+        """Returns the optimized regions and clears the tracker."""
+        regions = self.get_regions(max_regions)
+        self.clear()
+        return regions
+
+    def get_regions(
+            self, max_regions: Optional[int] = None
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Converts the dirty tiles into an optimized list of regions.
+
+        Args:
+            max_regions: Overrides the maximum number of regions.
+
+        Returns:
+            A list of (x0, y0, x1, y1) regions in pixel coordinates.
+        """
+        if not self._marked:
+            return []
+        if max_regions is None:
+            max_regions = self.max_regions
+        max_regions = max(1, max_regions)
+
+        if self.strategy == "merge" or (
+                self.strategy == "auto"
+                and len(self._marked) <= self.MERGE_MAX_MARKED
+        ):
+            return self._merge_marked(max_regions)
+
+        marked = np.array(self._marked, dtype=np.int64).reshape(-1, 4)
+        np.clip(marked, 0, (self.width, self.height) * 2, out=marked)
+        marked = marked[
+            (marked[:, 2] > marked[:, 0]) & (marked[:, 3] > marked[:, 1])
+        ]
+        if not len(marked):
+            return []
+        tiles = self._rasterize(marked)
+        best_rects, best_size, best_cost = None, 0, 0
+        size = self.tile_size
+        while True:
+            # Coalescing costs more than a lower bound of its result, so
+            # skip levels that cannot give few enough or cheaper rects
+            min_rects = self._min_rects(tiles)
+            if min_rects <= max_regions:
+                area = self._area(tiles, size)
+                if best_rects is not None and (
+                        area + min_rects * self.window_cost_px >= best_cost
+                ):
+                    break  # coarser levels only add more pixels
+                rects = self._coalesce(tiles)
+                cost = area + len(rects) * self.window_cost_px
+                if len(rects) <= max_regions and (
+                        best_rects is None or cost < best_cost
+                ):
+                    best_rects, best_size, best_cost = rects, size, cost
+            if tiles.size == 1:
+                break
+            tiles = self._coarsen(tiles)
+            size *= 2
+        return self._to_pixels(best_rects, best_size, marked)
+
+    def _merge_marked(
+            self, max_regions: int
+    ) -> List[Tuple[int, int, int, int]]:
+        """Merges the marked regions with `RegionOptimizer`."""
+        regions = [
+            r for r in self._marked if r and r[2] > r[0] and r[3] > r[1]
+        ]
+        merged = RegionOptimizer.merge_regions(regions, max_regions)
+        # Clamping the merged regions covers the clamped marks as well
+        clamped = (
+            RegionOptimizer.clamp_region(r, self.width, self.height)
+            for r in merged
+        )
+        return [r for r in clamped if r[2] > r[0] and r[3] > r[1]]
+
+    def _rasterize(self, marked: np.ndarray) -> np.ndarray:
+        """
+        Bitmap of the tiles touched by the marked regions.
+
+        Each region adds +1/-1 at the corners of a difference array, whose
+        2-D prefix sum counts the regions covering each tile.
+        """
+        ts = self.tile_size
+        c0, r0 = marked[:, 0] // ts, marked[:, 1] // ts
+        c1, r1 = -(-marked[:, 2] // ts), -(-marked[:, 3] // ts)
+        stride = self.cols + 1
+        corners = np.concatenate((
+            r0 * stride + c0, r1 * stride + c1,
+            r0 * stride + c1, r1 * stride + c0
+        ))
+        weights = np.repeat((1, 1, -1, -1), len(marked))
+        counts = np.bincount(
+            corners, weights, minlength=(self.rows + 1) * stride
+        ).reshape(self.rows + 1, stride)
+        return counts.cumsum(axis=0).cumsum(axis=1)[:-1, :-1] > 0.5
+
+    @staticmethod
+    def _coalesce(tiles: np.ndarray) -> np.ndarray:
+        """
+        Finds the runs of dirty tiles in each row and stacks runs spanning
+        the same columns in consecutive rows into one rectangle.
+
+        Returns:
+            An (n, 4) array of disjoint tile rectangles (c0, r0, c1, r1).
+        """
+        rows, cols = tiles.shape
+        padded = np.zeros((rows, cols + 2), dtype=np.int8)
+        padded[:, 1:-1] = tiles
+        edges = np.diff(padded, axis=1)
+        run_rows, run_c0 = np.nonzero(edges == 1)
+        run_c1 = np.nonzero(edges == -1)[1]
+
+        # ends[r + 1, c0] = c1 of the run starting at (r, c0), else -1
+        ends = np.full((rows + 2, cols + 1), -1, dtype=np.int64)
+        ends[run_rows + 1, run_c0] = run_c1
+        runs = ends[1:-1] >= 0
+        first = runs & (ends[:-2] != ends[1:-1])
+        last = runs & (ends[2:] != ends[1:-1])
+
+        # Taken column by column, the first and last runs of the stacks
+        # alternate, so they pair up in order
+        c0, r0 = np.nonzero(first.T)
+        r1 = np.nonzero(last.T)[1] + 1
+        return np.column_stack((c0, r0, ends[r0 + 1, c0], r1))
+
+    @staticmethod
+    def _min_rects(tiles: np.ndarray) -> int:
+        """
+        Lower bound for the number of rectangles `_coalesce()` returns.
+
+        Each rectangle has one run starting (and one ending) at its top
+        left (right) tile, so starts (ends) of runs with no start (end)
+        directly above them begin different rectangles.
+        """
+        padded = np.zeros((tiles.shape[0] + 1, tiles.shape[1] + 2), dtype=bool)
+        padded[1:, 1:-1] = tiles
+        starts = padded[:, 1:] > padded[:, :-1]
+        ends = padded[:, :-1] > padded[:, 1:]
+        return max(
+            int((starts[1:] > starts[:-1]).sum()),
+            int((ends[1:] > ends[:-1]).sum())
+        )
+
+    @staticmethod
+    def _coarsen(tiles: np.ndarray) -> np.ndarray:
+        """Halves the bitmap; a tile is dirty if any of its 2x2 tiles is."""
+        rows, cols = tiles.shape
+        padded = np.zeros((rows + rows % 2, cols + cols % 2), dtype=bool)
+        padded[:rows, :cols] = tiles
+        return padded.reshape(
+            padded.shape[0] // 2, 2, padded.shape[1] // 2, 2
+        ).any(axis=(1, 3))
+
+    def _area(self, tiles: np.ndarray, size: int) -> int:
+        """Number of pixels in the dirty tiles of `size` pixels."""
+        rows, cols = tiles.shape
+        heights = np.full(rows, size)
+        heights[-1] = self.height - size * (rows - 1)
+        widths = np.full(cols, size)
+        widths[-1] = self.width - size * (cols - 1)
+        return int(heights @ tiles @ widths)
+
+    def _to_pixels(
+            self, rects: np.ndarray, size: int, marked: np.ndarray
+    ) -> List[Tuple[int, int, int, int]]:
+        """
+        Converts tile rectangles to pixel regions, shrinking each one to the
+        bounds of the regions actually marked inside it.
+        """
+        px = rects * size
+        px[:, 2] = np.minimum(px[:, 2], self.width)
+        px[:, 3] = np.minimum(px[:, 3], self.height)
+
+        # Intersections of every rect with every marked region
+        mx0, my0, mx1, my1 = marked.T
+        ix0 = np.maximum(px[:, 0, None], mx0)
+        iy0 = np.maximum(px[:, 1, None], my0)
+        ix1 = np.minimum(px[:, 2, None], mx1)
+        iy1 = np.minimum(px[:, 3, None], my1)
+        valid = (ix1 > ix0) & (iy1 > iy0)
+        invalid = ~valid
+
+        ix0[invalid] = iy0[invalid] = self.width + self.height
+        ix1[invalid] = iy1[invalid] = -1
+        keep = valid.any(axis=1)
+        return list(zip(
+            ix0.min(axis=1)[keep].tolist(), iy0.min(axis=1)[keep].tolist(),
+            ix1.max(axis=1)[keep].tolist(), iy1.max(axis=1)[keep].tolist()
+        ))
+
+
 class PerformanceMonitor:
     """
     Tracks performance metrics like FPS and processing time.
@@ -355,6 +691,11 @@ class AdaptiveChunking:
     """
     Dynamically adjusts data transfer chunk sizes based on performance to
     optimize throughput.
+
+    Measured transfers are fed in through `record_transfer()`. The chunk
+    size is tuned by hill climbing: it keeps moving in the same direction
+    while throughput improves and turns back when it degrades. A size found
+    by an explicit calibration can be pinned with `set_chunk_size()`.
     """
     def __init__(
             self,
@@ -365,14 +706,28 @@ class AdaptiveChunking:
         self.chunk_size = initial_size
         self.min_size = min_size
         self.max_size = max_size
+        self.locked = False
         self._throughputs: deque[float] = deque(maxlen=20)
         self._last_adjustment = time.monotonic()
+        self._direction = 1
+        self._prev_avg: Optional[float] = None
+        self._total_bytes = 0
+        self._total_time = 0.0
+        self._transfers = 0
 
     def record_transfer(self, data_size: int, transfer_time: float):
         """Records a data transfer to adjust future chunk sizes."""
-        if transfer_time > 0:
-            self._throughputs.append(data_size / transfer_time)
-        
+        self._transfers += 1
+        self._total_bytes += data_size
+        self._total_time += transfer_time
+
+        # Transfers that fit in a single chunk say nothing about chunking.
+        if transfer_time <= 0 or data_size <= self.chunk_size:
+            return
+        self._throughputs.append(data_size / transfer_time)
+
+        if self.locked:
+            return
         if time.monotonic() - self._last_adjustment > 1.0 and len(self._throughputs) >= 10:
             self._adjust_chunk_size()
 
@@ -381,21 +736,59 @@ class AdaptiveChunking:
         if len(self._throughputs) < 10:
             return
 
-        recent_avg = sum(list(self._throughputs)[-10:]) / 10
-        older_avg = sum(list(self._throughputs)[:-10]) / 10 \
-            if len(self._throughputs) > 10 else recent_avg
+        recent_avg = sum(self._throughputs) / len(self._throughputs)
+        if self._prev_avg is not None and recent_avg < self._prev_avg * 0.95:
+            # Throughput is degrading: go back the other way
+            self._direction = -self._direction
+        self._prev_avg = recent_avg
 
-        if recent_avg > older_avg * 1.05:  # Throughput is improving
-            self.chunk_size = min(self.max_size, int(self.chunk_size * 1.2))
-        elif recent_avg < older_avg * 0.95:  # Throughput is degrading
-            self.chunk_size = max(self.min_size, int(self.chunk_size * 0.8))
-        
+        factor = 1.2 if self._direction > 0 else 0.8
+        new_size = max(
+            self.min_size, min(self.max_size, int(self.chunk_size * factor))
+        )
+        if new_size == self.chunk_size:
+            # Hit a limit
+            self._direction = -self._direction
+        self.chunk_size = new_size
+
+        self._throughputs.clear()
         self._last_adjustment = time.monotonic()
 
+    def set_chunk_size(self, size: int, lock: bool = True):
+        """
+        Sets the chunk size explicitly (e.g. from a calibration result).
+
+        Args:
+            size: The chunk size in bytes.
+            lock: If True, automatic adjustment is disabled.
+        """
+        self.chunk_size = max(self.min_size, min(self.max_size, int(size)))
+        self.locked = lock
+        self._throughputs.clear()
+        self._prev_avg = None
+
     def get_chunk_size(self) -> int:
         """Returns the current optimal chunk size."""
         return self.chunk_size
 
+    def get_throughput(self) -> float:
+        """Returns the recent average throughput in bytes per second."""
+        if self._throughputs:
+            return sum(self._throughputs) / len(self._throughputs)
+        if self._total_time > 0:
+            return self._total_bytes / self._total_time
+        return 0.0
+
+    def get_stats(self) -> dict:
+        """Returns the current chunk size and measured throughput."""
+        return {
+            'chunk_size': self.chunk_size,
+            'locked': self.locked,
+            'throughput_bps': self.get_throughput(),
+            'transfers': self._transfers,
+            'bytes': self._total_bytes,
+        }
+
 
 class ColorConverter:
     """
@@ -404,29 +797,104 @@ class ColorConverter:
     def __init__(self):
         self._rgb565_cache = LookupTableCache.get_instance('rgb565')
         self._gamma_cache = LookupTableCache.get_instance('gamma')
+        self._corrected_cache = LookupTableCache.get_instance(
+            'rgb565_corrected'
+        )
 
-    def rgb_to_rgb565_bytes(self, rgb_array: np.ndarray) -> bytes:
+    def rgb_to_rgb565(
+            self, rgb_array: np.ndarray, lut: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """
-        Converts an RGB NumPy array to a big-endian RGB565 byte string.
+        Converts an RGB NumPy array to a big-endian RGB565 array.
 
         Args:
             rgb_array: A NumPy array with shape (height, width, 3).
+            lut: Optional (3, 256) table from `rgb565_lut()`, applying
+                 color correction in the same pass.
 
         Returns:
-            A byte string containing the RGB565 pixel data.
+            An array of shape (height, width) and dtype '>u2', whose bytes
+            can be sent to the display as they are.
         """
-        r = self._rgb565_cache.get_table('r_shift')[rgb_array[:, :, 0]]
-        g = self._rgb565_cache.get_table('g_shift')[rgb_array[:, :, 1]]
-        b = self._rgb565_cache.get_table('b_shift')[rgb_array[:, :, 2]]
+        if lut is None:
+            r = self._rgb565_cache.get_table('r_shift')[rgb_array[:, :, 0]]
+            g = self._rgb565_cache.get_table('g_shift')[rgb_array[:, :, 1]]
+            b = self._rgb565_cache.get_table('b_shift')[rgb_array[:, :, 2]]
+        else:
+            r = lut[0][rgb_array[:, :, 0]]
+            g = lut[1][rgb_array[:, :, 1]]
+            b = lut[2][rgb_array[:, :, 2]]
         
         rgb565 = r | g | b
-        return rgb565.astype('>u2').tobytes()
+        return rgb565.astype('>u2')
+
+    def rgb_to_rgb565_bytes(
+            self, rgb_array: np.ndarray, lut: Optional[np.ndarray] = None
+    ) -> bytes:
+        """
+        Converts an RGB NumPy array to a big-endian RGB565 byte string.
+
+        Args:
+            rgb_array: A NumPy array with shape (height, width, 3).
+            lut: Optional color correction table (see `rgb_to_rgb565`).
+
+        Returns:
+            A byte string containing the RGB565 pixel data.
+        """
+        return self.rgb_to_rgb565(rgb_array, lut).tobytes()
+
+    def rgb565_lut(
+            self,
+            gamma: float = 1.0,
+            brightness: float = 1.0,
+            color_temperature: float = 6500.0
+    ) -> np.ndarray:
+        """
+        Returns the cached (3, 256) table that applies gamma, brightness and
+        color temperature and packs the result into RGB565 in one lookup.
+
+        Args:
+            gamma: Gamma exponent (1.0 leaves levels unchanged).
+            brightness: Multiplier applied after gamma.
+            color_temperature: White point in Kelvin; 6500 is neutral,
+                               lower is warmer, higher is cooler.
+        """
+        return self._corrected_cache.get_table(
+            'rgb565_lut', gamma=float(gamma), brightness=float(brightness),
+            color_temperature=float(color_temperature)
+        )
 
     def apply_gamma(self, rgb_array: np.ndarray, gamma: float = 2.2) -> np.ndarray:
         """Applies gamma correction to an RGB NumPy array."""
         gamma_table = self._gamma_cache.get_table('gamma_table', gamma=gamma)
         return gamma_table[rgb_array]
 
+def color_temperature_gains(kelvin: float) -> np.ndarray:
+    """
+    Returns RGB gains that shift the white point to `kelvin`, normalized
+    so that 6500K gives (1, 1, 1) and no channel exceeds 1.
+
+    Uses Tanner Helland's approximation of the black-body color.
+    """
+    def white(k: float) -> np.ndarray:
+        t = min(max(k, 1000.0), 40000.0) / 100.0
+        if t <= 66:
+            r = 255.0
+            g = 99.4708025861 * np.log(t) - 161.1195681661
+        else:
+            r = 329.698727446 * (t - 60) ** -0.1332047592
+            g = 288.1221695283 * (t - 60) ** -0.0755148492
+        if t >= 66:
+            b = 255.0
+        elif t <= 19:
+            b = 0.0
+        else:
+            b = 138.5177312231 * np.log(t - 10) - 305.0447927307
+        return np.clip(np.array((r, g, b)), 0.0, 255.0)
+
+    gains = white(kelvin) / white(6500.0)
+    return gains / max(1.0, float(gains.max()))
+
 # --- Factory Function ---
 
 def create_optimizer_pack() -> dict:
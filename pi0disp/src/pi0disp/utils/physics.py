@@ -0,0 +1,253 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Vectorized 2D ball physics.
+
+Ball state is kept as a structure of arrays (positions, velocities and
+radii as NumPy arrays), so integration, wall reflection and collision
+response run as array operations. Collision candidates are found with a
+uniform grid (spatial hash) whose cells are as large as the largest ball,
+so only balls in the same or adjacent cells are compared.
+"""
+from typing import Optional
+
+import numpy as np
+
+from .my_logger import get_logger
+
+log = get_logger(__name__)
+
+# Neighbor cells visited from each cell. Together with the cell itself,
+# this half of the 3x3 neighborhood covers every adjacent pair once.
+_NEIGHBOR_OFFSETS = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class BallPhysics:
+    """
+    Elastic balls bouncing inside a rectangle.
+
+    Attributes:
+        pos: (n, 2) positions of the ball centers.
+        vel: (n, 2) velocities in pixels/second.
+        radius: (n,) radii in pixels.
+    """
+    def __init__(
+            self,
+            pos: np.ndarray,
+            vel: np.ndarray,
+            radius: np.ndarray,
+            width: int,
+            height: int,
+            max_speed: float = 1000.0,
+            correction: float = 0.4,
+            rng: Optional[np.random.Generator] = None
+    ):
+        """
+        Args:
+            pos: (n, 2) initial positions.
+            vel: (n, 2) initial velocities.
+            radius: (n,) radii, or a scalar for equal-sized balls.
+            width, height: Size of the area.
+            max_speed: Speeds are clipped to this value after collisions.
+            correction: Fraction of the overlap each ball of a colliding
+                        pair is pushed back.
+            rng: Random generator (used to separate coincident balls).
+        """
+        self.pos = np.asarray(pos, dtype=np.float64).reshape(-1, 2).copy()
+        self.vel = np.asarray(vel, dtype=np.float64).reshape(-1, 2).copy()
+        self.radius = np.broadcast_to(
+            np.asarray(radius, dtype=np.float64), (len(self.pos),)
+        ).copy()
+        self.width = width
+        self.height = height
+        self.max_speed = max_speed
+        self.correction = correction
+        self._rng = rng or np.random.default_rng()
+
+        # Equal masses if all radii match, area-proportional otherwise
+        self._mass = self.radius ** 2
+        self._cell_size = max(1.0, 2.0 * float(self.radius.max(initial=1.0)))
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    @classmethod
+    def random(
+            cls,
+            num_balls: int,
+            width: int,
+            height: int,
+            radius: float,
+            speed: float,
+            max_attempts: int = 100,
+            rng: Optional[np.random.Generator] = None,
+            **kwargs
+    ) -> "BallPhysics":
+        """
+        Places balls at random non-overlapping positions, moving in random
+        directions at `speed`. Balls that cannot be placed after
+        `max_attempts` tries are left out.
+        """
+        rng = rng or np.random.default_rng()
+        min_dist_sq = (2 * radius) ** 2
+        positions = np.empty((num_balls, 2))
+        count = 0
+        for _ in range(num_balls):
+            for _attempt in range(max_attempts):
+                p = rng.uniform((radius, radius),
+                                (width - radius, height - radius))
+                d = positions[:count] - p
+                if not np.any(np.einsum('ij,ij->i', d, d) <= min_dist_sq):
+                    positions[count] = p
+                    count += 1
+                    break
+            else:
+                log.warning("Could not place ball %d.", count + 1)
+
+        angle = rng.uniform(0.0, 2.0 * np.pi, count)
+        vel = speed * np.column_stack((np.cos(angle), np.sin(angle)))
+        return cls(positions[:count], vel, radius, width, height,
+                   rng=rng, **kwargs)
+
+    def step(self, dt: float):
+        """Advances the simulation by `dt` seconds."""
+        self.pos += self.vel * dt
+        self._reflect_walls()
+        self._collide()
+
+    def bboxes(self) -> np.ndarray:
+        """Returns (n, 4) integer bounding boxes (x0, y0, x1, y1)."""
+        center = self.pos.astype(np.int32)
+        r = self.radius.astype(np.int32)[:, None]
+        return np.hstack((center - r, center + r))
+
+    def _reflect_walls(self):
+        """Keeps balls inside the area, reversing their velocity."""
+        r = self.radius[:, None]
+        low = r
+        high = np.array((self.width, self.height)) - r
+        below = self.pos < low
+        above = self.pos > high
+        self.pos = np.where(below, low, np.where(above, high, self.pos))
+        self.vel = np.where(below, np.abs(self.vel),
+                            np.where(above, -np.abs(self.vel), self.vel))
+
+    def _candidate_pairs(self):
+        """
+        Broad phase: returns index arrays (i, j) of ball pairs in the same
+        or adjacent grid cells, each pair once.
+        """
+        n = len(self.pos)
+        cells = np.floor(self.pos / self._cell_size).astype(np.int64)
+        ncx = int(np.ceil(self.width / self._cell_size)) + 2
+        ncy = int(np.ceil(self.height / self._cell_size)) + 2
+        cells = np.clip(cells, -1, (ncx - 2, ncy - 2)) + 1  # margin cells
+        keys = cells[:, 0] * ncy + cells[:, 1]
+
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        all_i, all_j = [], []
+        for dx, dy in ((0, 0),) + _NEIGHBOR_OFFSETS:
+            nx = cells[:, 0] + dx
+            ny = cells[:, 1] + dy
+            valid = (nx >= 0) & (nx < ncx) & (ny < ncy)
+            nkeys = np.where(valid, nx * ncy + ny, -1)
+
+            start = np.searchsorted(sorted_keys, nkeys, 'left')
+            end = np.searchsorted(sorted_keys, nkeys, 'right')
+            counts = np.where(valid, end - start, 0)
+            total = int(counts.sum())
+            if total == 0:
+                continue
+
+            i = np.repeat(np.arange(n), counts)
+            offsets = np.arange(total) - np.repeat(
+                np.cumsum(counts) - counts, counts
+            )
+            j = order[np.repeat(start, counts) + offsets]
+            if dx == 0 and dy == 0:
+                keep = i < j  # same cell: each pair once, no self pairs
+                i, j = i[keep], j[keep]
+            all_i.append(i)
+            all_j.append(j)
+
+        if not all_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(all_i), np.concatenate(all_j)
+
+    def _collide(self):
+        """Narrow phase and elastic collision response."""
+        if len(self.pos) < 2:
+            return
+        i, j = self._candidate_pairs()
+        if len(i) == 0:
+            return
+
+        delta = self.pos[i] - self.pos[j]
+        dist_sq = np.einsum('ij,ij->i', delta, delta)
+        radii = self.radius[i] + self.radius[j]
+        hit = dist_sq < radii * radii
+        if not np.any(hit):
+            return
+        i, j, delta, dist_sq, radii = (
+            i[hit], j[hit], delta[hit], dist_sq[hit], radii[hit]
+        )
+
+        # Separate (almost) coincident balls in a random direction
+        dist = np.sqrt(dist_sq)
+        tiny = dist < radii * 0.05
+        if np.any(tiny):
+            angle = self._rng.uniform(0.0, 2.0 * np.pi, int(tiny.sum()))
+            delta[tiny] = np.column_stack((np.cos(angle), np.sin(angle)))
+            dist[tiny] = 1.0
+        normal = delta / dist[:, None]
+
+        self._exchange_momentum(i[~tiny], j[~tiny], normal[~tiny])
+
+        # Push overlapping balls apart
+        overlap = np.where(tiny, radii * 0.55, radii - dist)
+        push = (overlap * self.correction)[:, None] * normal
+        np.add.at(self.pos, i, push)
+        np.add.at(self.pos, j, -push)
+
+        self._reflect_walls()
+
+        speed_sq = np.einsum('ij,ij->i', self.vel, self.vel)
+        fast = speed_sq > self.max_speed ** 2
+        if np.any(fast):
+            self.vel[fast] *= (
+                self.max_speed / np.sqrt(speed_sq[fast])
+            )[:, None]
+
+    def _exchange_momentum(
+            self, i: np.ndarray, j: np.ndarray, normal: np.ndarray
+    ):
+        """
+        Elastic impulses along the contact normals of approaching pairs.
+
+        A ball touching several others must see the velocity left by the
+        previous contact, as in sequential pairwise resolution, or energy
+        is not conserved. Pairs are therefore resolved in rounds in which
+        every ball appears at most once.
+        """
+        remaining = np.arange(len(i))
+        while remaining.size:
+            ii, jj = i[remaining], j[remaining]
+            # A pair is taken if both balls appear here for the first time
+            both = np.column_stack((ii, jj)).ravel()
+            _, first = np.unique(both, return_index=True)
+            is_first = np.zeros(len(both), dtype=bool)
+            is_first[first] = True
+            take = is_first[0::2] & is_first[1::2]
+
+            a, b, n = ii[take], jj[take], normal[remaining[take]]
+            rel_vn = np.einsum('ij,ij->i', self.vel[a] - self.vel[b], n)
+            ma, mb = self._mass[a], self._mass[b]
+            impulse = np.where(rel_vn < 0, 2.0 * rel_vn / (ma + mb), 0.0)
+            self.vel[a] -= (impulse * mb)[:, None] * n
+            self.vel[b] += (impulse * ma)[:, None] * n
+
+            remaining = remaining[~take]
@@ -0,0 +1,307 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Animation player with decode-ahead.
+
+`AnimationPlayer` plays animated GIF/APNG/WebP files and directories of
+numbered still images (raw frame sequences). A producer thread decodes,
+resizes and converts the frames to RGB565 ahead of time and compares each
+frame with the previous one, so only the tiles that changed are sent.
+Frames pass through a bounded queue to the presenting thread, which shows
+them at the source frame rate. When presentation falls behind, late frames
+are dropped and their changed regions are carried over to the next frame
+shown, so the screen never misses an update.
+"""
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from ..disp.st7789v import ST7789V
+from .my_logger import get_logger
+from .performance_core import ColorConverter, TileDirtyTracker
+from .utils import ImageProcessor, optimize_dirty_regions
+
+log = get_logger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+DEFAULT_FPS = 10.0
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp")
+
+
+class AnimationFrame(NamedTuple):
+    """A decoded frame ready to be sent."""
+    buffer: np.ndarray  # (height, width) RGB565, dtype '>u2'
+    regions: Optional[List[Region]]  # changed regions, None = whole frame
+    timestamp: float  # seconds from the start of the loop
+    duration: float  # seconds
+
+
+def iter_source_frames(
+        path: Union[str, Path],
+        fps: Optional[float] = None
+) -> Iterator[Tuple[Image.Image, float]]:
+    """
+    Yields (image, duration in seconds) for each frame of an animation.
+
+    Args:
+        path: An animated image file, or a directory of still images
+              played in file name order.
+        fps: Overrides the frame rate stored in the file. Directories use
+             `DEFAULT_FPS` if not given.
+    """
+    path = Path(path)
+    if path.is_dir():
+        duration = 1.0 / (fps or DEFAULT_FPS)
+        files = sorted(
+            p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+        )
+        if not files:
+            raise ValueError(f"No image files in {path}")
+        for file in files:
+            with Image.open(file) as img:
+                yield img.convert("RGB"), duration
+        return
+
+    with Image.open(path) as img:
+        for frame in ImageSequence.Iterator(img):
+            if fps:
+                duration = 1.0 / fps
+            else:
+                duration = (frame.info.get('duration') or 0) / 1000.0
+                if duration <= 0:
+                    duration = 1.0 / DEFAULT_FPS
+            yield frame.convert("RGB"), duration
+
+
+class AnimationPlayer:
+    """
+    Plays an animation on an ST7789V display.
+
+    The display must not be driven from other threads while playing.
+    """
+    def __init__(
+            self,
+            lcd: ST7789V,
+            path: Union[str, Path],
+            fit_mode: str = "contain",
+            fps: Optional[float] = None,
+            loops: int = 1,
+            queue_size: int = 4,
+            tile_size: int = 16,
+            max_regions: int = 8
+    ):
+        """
+        Args:
+            lcd: The display.
+            path: Animated image file or directory of frames.
+            fit_mode: "contain" or "cover" (see `resize_with_aspect_ratio`).
+            fps: Overrides the source frame rate.
+            loops: Number of times to play, 0 to repeat until stopped.
+            queue_size: Number of frames decoded ahead.
+            tile_size: Granularity of the frame-to-frame change detection.
+            max_regions: Maximum number of regions sent per frame.
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be 1 or more.")
+
+        self._lcd = lcd
+        self.path = Path(path)
+        self.fit_mode = fit_mode
+        self.fps = fps
+        self.loops = loops
+        self.max_regions = max_regions
+
+        self._size = (lcd.width, lcd.height)
+        self._queue: "queue.Queue[AnimationFrame]" = queue.Queue(
+            maxsize=queue_size
+        )
+        self._tracker = TileDirtyTracker(
+            lcd.width, lcd.height, tile_size, max_regions=max_regions
+        )
+        self._converter = ColorConverter()
+        self._processor = ImageProcessor()
+        self._stop = threading.Event()
+        self._done = threading.Event()  # all frames have been queued
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'decoded': 0,
+            'presented': 0,
+            'dropped': 0,
+            'unchanged': 0,
+            'decode_time': 0.0,
+            'present_time': 0.0,
+            'pixels_sent': 0,
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """Starts decoding ahead in the background."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._done.clear()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._produce, name="AnimationPlayer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stops playback and the decoding thread."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            # Unblock the producer if it waits for room in the queue
+            while thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            thread.join()
+            self._thread = None
+
+    def play(self) -> dict:
+        """
+        Plays the animation until it ends or `stop()` is called.
+
+        Returns:
+            Playback statistics (see `get_stats`).
+        """
+        self.start()
+        carry: Optional[List[Region]] = []  # regions of dropped frames
+        loop_start = 0.0
+        last_timestamp = float('inf')
+
+        while not self._stop.is_set():
+            try:
+                frame = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._done.is_set() and self._queue.empty():
+                    break
+                continue
+
+            if frame.timestamp <= last_timestamp:
+                loop_start = time.monotonic()  # first frame of a loop
+            last_timestamp = frame.timestamp
+            due = loop_start + frame.timestamp
+            regions = self._merge(carry, frame.regions)
+
+            now = time.monotonic()
+            if now >= due + frame.duration and not self._queue.empty():
+                # Too late to be seen: skip it but keep its changes
+                carry = regions
+                self._stats['dropped'] += 1
+                continue
+            carry = []
+
+            if now < due:
+                self._stop.wait(due - now)
+            if regions is not None and not regions:
+                self._stats['unchanged'] += 1
+                continue
+
+            start = time.monotonic()
+            self._lcd.display_rgb565(frame.buffer, regions)
+            self._stats['present_time'] += time.monotonic() - start
+            self._stats['presented'] += 1
+            self._stats['pixels_sent'] += (
+                frame.buffer.size if regions is None else sum(
+                    (r[2] - r[0]) * (r[3] - r[1]) for r in regions
+                )
+            )
+
+        self.stop()
+        if self._error is not None:
+            raise RuntimeError(
+                f"AnimationPlayer thread failed: {self._error}"
+            ) from self._error
+        return self.get_stats()
+
+    def get_stats(self) -> dict:
+        """Returns playback statistics."""
+        stats = dict(self._stats)
+        decoded, presented = stats['decoded'], stats['presented']
+        stats['avg_decode_time_ms'] = (
+            stats['decode_time'] / decoded * 1000 if decoded else 0.0
+        )
+        stats['avg_present_time_ms'] = (
+            stats['present_time'] / presented * 1000 if presented else 0.0
+        )
+        return stats
+
+    def _merge(
+            self,
+            old: Optional[List[Region]],
+            new: Optional[List[Region]]
+    ) -> Optional[List[Region]]:
+        """Combines the regions of dropped frames with a newer frame."""
+        if old is None or new is None:
+            return None
+        if not old:
+            return new
+        return optimize_dirty_regions(old + new, self.max_regions)
+
+    def _put(self, frame: AnimationFrame) -> bool:
+        """Waits for room in the queue; returns False when stopped."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(frame, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce(self):
+        """Background loop decoding and converting frames."""
+        prev: Optional[np.ndarray] = None
+        loop = 0
+        try:
+            while self.loops == 0 or loop < self.loops:
+                timestamp = 0.0
+                for image, duration in iter_source_frames(
+                        self.path, self.fps
+                ):
+                    start = time.monotonic()
+                    buffer = self._convert(image)
+                    if prev is None:
+                        regions = None
+                    else:
+                        self._tracker.mark_mask(buffer != prev)
+                        regions = self._tracker.pop_regions()
+                    prev = buffer
+                    self._stats['decode_time'] += time.monotonic() - start
+                    self._stats['decoded'] += 1
+
+                    if not self._put(
+                            AnimationFrame(buffer, regions, timestamp, duration)
+                    ):
+                        return
+                    timestamp += duration
+                loop += 1
+        except Exception as e:
+            log.error("%s: %s", type(e).__name__, e)
+            self._error = e
+        self._done.set()
+
+    def _convert(self, image: Image.Image) -> np.ndarray:
+        """Fits a frame to the screen and converts it to RGB565."""
+        if image.size != self._size:
+            image = self._processor.resize_with_aspect_ratio(
+                image, *self._size, fit_mode=self.fit_mode
+            )
+        return self._converter.rgb_to_rgb565(np.asarray(image))
@@ -0,0 +1,293 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Per-stage frame profiler.
+
+`Profiler` records how long each stage of a frame takes (e.g. drawing,
+RGB565 conversion, region merging, window setup and SPI transfer) together
+with counters such as bytes sent and regions per frame. `ST7789V` reports
+its own stages when it has a profiler; applications add theirs with
+`stage()` and group everything belonging to one frame with `frame()`.
+
+The records can be summarized, written as a JSON or CSV trace, or shown on
+the screen through `hud_text()`. When profiling is off, the shared
+`NullProfiler` makes every call a no-op.
+"""
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import (
+    Any, Callable, ContextManager, Deque, Dict, Iterator, List, Optional,
+    Union
+)
+
+from .my_logger import get_logger
+
+log = get_logger(__name__)
+
+# Stages reported by the display driver
+DRIVER_STAGES = ("convert", "merge", "window", "spi")
+
+_NULL_CONTEXT = nullcontext()
+
+
+class Profiler:
+    """
+    Collects per-frame stage timings and counters.
+
+    Stages and counters are accumulated into the current frame until the
+    outermost `frame()` block ends. Calls outside any `frame()` block (e.g.
+    a plain `lcd.display()`) form a frame of their own, because the driver
+    wraps each display call in `frame()`.
+
+    The current frame is kept per thread, so frames presented from a
+    background thread (e.g. by `AsyncPresenter`) are recorded separately
+    from the application's frames.
+    """
+    enabled = True
+
+    def __init__(self, max_frames: int = 10000):
+        """
+        Args:
+            max_frames: Number of most recent frames kept.
+        """
+        self._records: Deque[Dict[str, Any]] = deque(maxlen=max_frames)
+        self._sources: Dict[str, Callable[[], dict]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._frame_count = 0
+        # Incremented by reset() to discard the other threads' frames
+        self._generation = 0
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """Recorded frames, oldest first."""
+        with self._lock:
+            return list(self._records)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measures the enclosed block as stage `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def _current(self) -> Dict[str, float]:
+        """The calling thread's current frame."""
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            local.current = {}
+            local.generation = self._generation
+        return local.current
+
+    def add_time(self, name: str, seconds: float):
+        """Adds time to a stage of the current frame."""
+        key = f"{name}_ms"
+        current = self._current()
+        current[key] = current.get(key, 0.0) + seconds * 1000
+
+    def count(self, name: str, value: float = 1):
+        """Adds to a counter of the current frame (e.g. bytes sent)."""
+        current = self._current()
+        current[name] = current.get(name, 0) + value
+
+    @contextmanager
+    def frame(self) -> Iterator[None]:
+        """
+        Groups everything inside into one frame. Nested blocks (including
+        the driver's own) belong to the outermost one.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self._end_frame(start)
+
+    def _end_frame(self, start: float):
+        """Stores the current frame."""
+        now = time.perf_counter()
+        current = self._current()
+        self._local.current = {}
+        with self._lock:
+            record: Dict[str, Any] = {
+                'frame': self._frame_count,
+                'time': round(start - self._origin, 6),
+                'thread': threading.current_thread().name,
+                'total_ms': (now - start) * 1000,
+            }
+            record.update(current)
+            self._records.append(record)
+            self._frame_count += 1
+
+    def add_source(self, name: str, get_stats: Callable[[], dict]):
+        """
+        Registers statistics included in the summary, e.g. the hit counts
+        of a `TextCache` (`cache.get_stats`).
+        """
+        self._sources[name] = get_stats
+
+    def reset(self):
+        """Discards all recorded frames."""
+        with self._lock:
+            self._records.clear()
+            self._generation += 1
+            self._frame_count = 0
+            self._origin = time.perf_counter()
+
+    def summary(self, last: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Summarizes the recorded frames.
+
+        Args:
+            last: Only use the most recent `last` frames.
+
+        Returns:
+            A dict with the frame count, the frame rate, the average and
+            maximum of each stage, the average of each counter per frame,
+            and the registered statistics sources.
+
+            The frame rate is that of the main thread's frames if there are
+            any. Stages and counters are averaged over the frames of the
+            threads that report them.
+        """
+        records = self.records
+        if last is not None:
+            records = records[-last:]
+        summary: Dict[str, Any] = {'frames': len(records)}
+        main = threading.main_thread().name
+        timed = [r for r in records if r.get('thread') == main] or records
+        if len(timed) >= 2:
+            span = timed[-1]['time'] - timed[0]['time']
+            summary['fps'] = (len(timed) - 1) / span if span > 0 else 0.0
+        else:
+            summary['fps'] = 0.0
+
+        stages: Dict[str, Dict[str, float]] = {}
+        counters: Dict[str, float] = {}
+        for key in _columns(records):
+            if key in ('frame', 'time', 'thread'):
+                continue
+            threads = {r.get('thread') for r in records if key in r}
+            values = [
+                r.get(key, 0) for r in records if r.get('thread') in threads
+            ]
+            if key.endswith('_ms'):
+                stages[key[:-3]] = {
+                    'avg_ms': sum(values) / len(values),
+                    'max_ms': max(values),
+                }
+            else:
+                counters[key] = sum(values) / len(values)
+        summary['stages'] = stages
+        summary['counters'] = counters
+
+        for name, get_stats in self._sources.items():
+            stats = dict(get_stats())
+            lookups = stats.get('hits', 0) + stats.get('misses', 0)
+            if 'hits' in stats:
+                stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            summary[name] = stats
+        return summary
+
+    def hud_text(self, last: int = 30) -> str:
+        """
+        A one-line summary of recent frames for an on-screen overlay,
+        e.g. "28fps cv1.2 spi3.4ms 12K".
+        """
+        summary = self.summary(last)
+        stages = summary['stages']
+        parts = [f"{summary['fps']:.0f}fps"]
+        for name, label in (("draw", "dr"), ("convert", "cv"), ("spi", "spi")):
+            if name in stages:
+                parts.append(f"{label}{stages[name]['avg_ms']:.1f}")
+        text = " ".join(parts) + "ms"
+        sent = summary['counters'].get('bytes')
+        if sent is not None:
+            text += f" {sent / 1024:.0f}K"
+        return text
+
+    def dump(self, path: Union[str, Path]):
+        """
+        Writes the trace to `path`: CSV (one row per frame) if the name ends
+        with ".csv", otherwise JSON with the summary and all frames.
+        """
+        path = Path(path)
+        records = self.records
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == ".csv":
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(
+                    f, fieldnames=_columns(records), restval=0
+                )
+                writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {'summary': self.summary(), 'frames': records}, f,
+                    indent=2
+                )
+        log.info("Profile written to %s (%d frames)", path, len(records))
+
+
+class NullProfiler(Profiler):
+    """A profiler that records nothing (used when profiling is off)."""
+    enabled = False
+
+    def __init__(self):
+        super().__init__(max_frames=1)
+
+    def stage(self, name: str) -> ContextManager[None]:  # type: ignore[override]
+        return _NULL_CONTEXT
+
+    def frame(self) -> ContextManager[None]:  # type: ignore[override]
+        return _NULL_CONTEXT
+
+    def add_time(self, name: str, seconds: float):
+        pass
+
+    def count(self, name: str, value: float = 1):
+        pass
+
+    def add_source(self, name: str, get_stats: Callable[[], dict]):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+_default_profiler: Profiler = NULL_PROFILER
+
+
+def set_default_profiler(profiler: Optional[Profiler]):
+    """
+    Sets the profiler used by displays created without one
+    (the CLI's `--profile` option does this). None turns it off.
+    """
+    global _default_profiler
+    _default_profiler = profiler or NULL_PROFILER
+
+
+def get_default_profiler() -> Profiler:
+    """Returns the default profiler (`NULL_PROFILER` if none is set)."""
+    return _default_profiler
+
+
+def _columns(records: List[Dict[str, Any]]) -> List[str]:
+    """All keys appearing in the records, in first-seen order."""
+    columns: Dict[str, None] = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key)
+    return list(columns)
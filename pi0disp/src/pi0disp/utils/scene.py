@@ -0,0 +1,90 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Sprite scene built on the compositor.
+
+`SpriteScene` owns a set of sprites in z-order and takes care of what each
+application used to do by hand: collecting dirty regions, merging them,
+restoring the background under them, redrawing only the sprites that
+intersect them and sending the resulting regions to the display.
+"""
+from typing import Dict, List, Optional
+
+from PIL import Image
+
+from ..disp.presenter import AsyncPresenter
+from ..disp.st7789v import ST7789V
+from .compositor import Compositor, Region, SpriteLayer
+from .my_logger import get_logger
+from .sprite import Sprite
+from .utils import expand_bbox
+
+log = get_logger(__name__)
+
+
+class SpriteScene(Compositor):
+    """
+    A compositor whose layers are sprites.
+
+    Other layers (e.g. `TextLayer`) can be added with `add()` as usual.
+    Sprites that neither move nor call `mark_dirty()` cost nothing per
+    frame, so the work scales with what changed, not with the number of
+    sprites.
+    """
+    def __init__(
+            self,
+            background: Image.Image,
+            tile_size: Optional[int] = None,
+            max_regions: int = 8
+    ):
+        super().__init__(background, tile_size, max_regions)
+        self._sprite_layers: Dict[int, SpriteLayer] = {}
+
+    @property
+    def sprites(self) -> List[Sprite]:
+        """Sprites in drawing order."""
+        return [
+            layer.sprite for layer in self.layers
+            if isinstance(layer, SpriteLayer)
+            and id(layer.sprite) in self._sprite_layers
+        ]
+
+    def add_sprite(self, sprite: Sprite, z: int = 0) -> SpriteLayer:
+        """Adds a sprite, drawn above sprites with a lower `z`."""
+        layer = SpriteLayer(sprite, z)
+        self._sprite_layers[id(sprite)] = layer
+        self.add(layer)
+        return layer
+
+    def remove_sprite(self, sprite: Sprite):
+        """Removes a sprite and restores the background under it."""
+        layer = self._sprite_layers.pop(id(sprite))
+        self.remove(layer)
+        if sprite.prev_bbox is not None:
+            self.invalidate(expand_bbox(sprite.prev_bbox, layer.margin))
+
+    def update(self, delta_t: float):
+        """Calls `update()` on every sprite."""
+        for sprite in self.sprites:
+            sprite.update(delta_t)
+
+    def render(
+            self,
+            lcd: ST7789V,
+            presenter: Optional[AsyncPresenter] = None
+    ) -> List[Region]:
+        """
+        Composes the frame and sends the changed regions to the display,
+        through `presenter` if given.
+
+        Returns:
+            The regions that were sent.
+        """
+        regions = self.compose()
+        if regions:
+            if presenter is not None:
+                presenter.present(self.frame, regions)
+            else:
+                lcd.display_regions(self.frame, regions)
+        return regions
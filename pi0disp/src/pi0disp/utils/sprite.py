@@ -24,6 +24,8 @@ class Sprite(ABC):
         self.width = width
         self.height = height
         self.prev_bbox: Optional[Tuple[int, int, int, int]] = None
+        # True if the appearance changed since the last recorded frame
+        self.dirty = True
 
     @property
     def bbox(self) -> Tuple[int, int, int, int]:
@@ -37,12 +39,21 @@ class Sprite(ABC):
         """
         return merge_bboxes(self.prev_bbox, self.bbox)
 
+    def mark_dirty(self):
+        """
+        Requests a redraw although the sprite did not move, e.g. after its
+        appearance changed. Only needed with `SpriteScene`, which skips
+        sprites that neither moved nor were marked dirty.
+        """
+        self.dirty = True
+
     def record_current_bbox(self):
         """
         Records the current bounding box. This should be called after drawing
         to prepare for the next frame's dirty region calculation.
         """
         self.prev_bbox = self.bbox
+        self.dirty = False
 
     @abstractmethod
     def update(self, delta_t: float):
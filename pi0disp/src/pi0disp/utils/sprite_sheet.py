@@ -0,0 +1,267 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Sprite sheets: frames rasterized once and blitted afterwards.
+
+Drawing sprites with PIL vector primitives every frame costs far more than
+copying pixels. A `SpriteSheet` rasterizes each frame once (from PIL drawing
+code or a PNG) and keeps it both as a big-endian RGB565 array with a
+boolean alpha mask, for blitting into an RGB565 frame buffer sent with
+`ST7789V.display_rgb565()`, and as a PIL image with a mask, for pasting into
+PIL frames. `SpriteCache` keeps recently used sheets keyed by the
+parameters they were rendered from (size, color, state, ...).
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .my_logger import get_logger
+from .performance_core import ColorConverter
+
+log = get_logger(__name__)
+
+Region = Tuple[int, int, int, int]
+
+_CONVERTER: Optional[ColorConverter] = None
+
+
+def _converter() -> ColorConverter:
+    global _CONVERTER
+    if _CONVERTER is None:
+        _CONVERTER = ColorConverter()
+    return _CONVERTER
+
+
+def _clip(
+        x: int, y: int, w: int, h: int, dst_w: int, dst_h: int
+) -> Optional[Tuple[Region, Tuple[slice, slice]]]:
+    """
+    Clips a w x h rectangle at (x, y) to a destination of dst_w x dst_h.
+
+    Returns:
+        The destination region and the matching source slices,
+        or None if nothing is visible.
+    """
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, dst_w), min(y + h, dst_h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    src = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+    return (x0, y0, x1, y1), src
+
+
+class SpriteFrame:
+    """One pre-rasterized sprite image."""
+
+    def __init__(self, image: Image.Image, alpha_threshold: int = 128):
+        """
+        Args:
+            image: The frame (RGBA, or any mode treated as opaque).
+            alpha_threshold: Pixels with alpha at or above this value are
+                             drawn; the others are transparent.
+        """
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        rgba = np.asarray(image)
+        self.width, self.height = image.size
+        self.mask: np.ndarray = rgba[:, :, 3] >= alpha_threshold
+        self.opaque = bool(self.mask.all())
+        self.rgb565: np.ndarray = _converter().rgb_to_rgb565(
+            np.ascontiguousarray(rgba[:, :, :3])
+        )
+        self.image = image.convert("RGB")
+        self.mask_image: Optional[Image.Image] = (
+            None if self.opaque
+            else Image.fromarray(self.mask.astype(np.uint8) * 255, "L")
+        )
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    def blit(self, dst: np.ndarray, x: int, y: int) -> Optional[Region]:
+        """
+        Copies the frame into an RGB565 buffer, clipped to its bounds.
+
+        Args:
+            dst: Destination of shape (height, width) and dtype '>u2'.
+            x, y: Position of the frame's top-left corner.
+
+        Returns:
+            The region (x0, y0, x1, y1) that was written, or None.
+        """
+        clipped = _clip(x, y, self.width, self.height,
+                        dst.shape[1], dst.shape[0])
+        if clipped is None:
+            return None
+        (x0, y0, x1, y1), src = clipped
+        target = dst[y0:y1, x0:x1]
+        if self.opaque:
+            target[...] = self.rgb565[src]
+        else:
+            np.copyto(target, self.rgb565[src], where=self.mask[src])
+        return (x0, y0, x1, y1)
+
+    def paste(self, dst: Image.Image, x: int, y: int) -> Optional[Region]:
+        """
+        Pastes the frame into a PIL image (PIL clips it to the image).
+
+        Returns:
+            The region (x0, y0, x1, y1) that was written, or None.
+        """
+        clipped = _clip(x, y, self.width, self.height, dst.width, dst.height)
+        if clipped is None:
+            return None
+        dst.paste(self.image, (x, y), self.mask_image)
+        return clipped[0]
+
+
+class SpriteSheet:
+    """An ordered set of frames for one sprite."""
+
+    def __init__(self, frames: Sequence[SpriteFrame]):
+        if not frames:
+            raise ValueError("A sprite sheet needs at least one frame.")
+        self.frames: List[SpriteFrame] = list(frames)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, index: int) -> SpriteFrame:
+        return self.frames[index]
+
+    @classmethod
+    def from_images(
+            cls, images: Sequence[Image.Image], alpha_threshold: int = 128
+    ) -> "SpriteSheet":
+        """Creates a sheet from one image per frame."""
+        return cls([SpriteFrame(im, alpha_threshold) for im in images])
+
+    @classmethod
+    def from_grid(
+            cls,
+            image: Image.Image,
+            frame_width: int,
+            frame_height: int,
+            count: Optional[int] = None,
+            alpha_threshold: int = 128
+    ) -> "SpriteSheet":
+        """
+        Splits a sheet image into frames, left to right, top to bottom.
+
+        Args:
+            image: The sheet.
+            frame_width, frame_height: Size of one frame.
+            count: Number of frames (default: all complete cells).
+        """
+        cols = image.width // frame_width
+        rows = image.height // frame_height
+        total = cols * rows if count is None else min(count, cols * rows)
+        images = []
+        for i in range(total):
+            x = (i % cols) * frame_width
+            y = (i // cols) * frame_height
+            images.append(
+                image.crop((x, y, x + frame_width, y + frame_height))
+            )
+        return cls.from_images(images, alpha_threshold)
+
+    @classmethod
+    def from_file(
+            cls,
+            path: Union[str, Path],
+            frame_width: Optional[int] = None,
+            frame_height: Optional[int] = None,
+            count: Optional[int] = None,
+            alpha_threshold: int = 128
+    ) -> "SpriteSheet":
+        """Loads a sheet from an image file (e.g. a PNG with alpha)."""
+        with Image.open(path) as im:
+            im = im.convert("RGBA")
+        if frame_width is None or frame_height is None:
+            return cls.from_images([im], alpha_threshold)
+        return cls.from_grid(im, frame_width, frame_height, count,
+                             alpha_threshold)
+
+    @classmethod
+    def render(
+            cls,
+            size: Tuple[int, int],
+            draw_frame: Callable[[ImageDraw.ImageDraw, int], None],
+            count: int = 1,
+            alpha_threshold: int = 128
+    ) -> "SpriteSheet":
+        """
+        Rasterizes frames with PIL drawing code.
+
+        Args:
+            size: Frame size (width, height).
+            draw_frame: Called as draw_frame(draw, index) on a transparent
+                        RGBA canvas for each frame.
+            count: Number of frames.
+        """
+        images = []
+        for i in range(count):
+            im = Image.new("RGBA", size, (0, 0, 0, 0))
+            draw_frame(ImageDraw.Draw(im), i)
+            images.append(im)
+        return cls.from_images(images, alpha_threshold)
+
+
+class SpriteCache:
+    """
+    LRU cache of sprite sheets keyed by their rendering parameters,
+    e.g. ('ball', radius, color) or ('eye', size, state).
+    """
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._sheets: "OrderedDict[Hashable, SpriteSheet]" = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get(
+            self, key: Hashable, factory: Callable[[], SpriteSheet]
+    ) -> SpriteSheet:
+        """Returns the sheet for `key`, creating it with `factory()`."""
+        sheet = self._sheets.get(key)
+        if sheet is not None:
+            self._sheets.move_to_end(key)
+            self._stats['hits'] += 1
+            return sheet
+
+        self._stats['misses'] += 1
+        sheet = factory()
+        self._sheets[key] = sheet
+        if len(self._sheets) > self.max_entries:
+            self._sheets.popitem(last=False)
+        return sheet
+
+    def clear(self):
+        self._sheets.clear()
+
+    def get_stats(self) -> dict:
+        """Returns cache statistics."""
+        stats = dict(self._stats)
+        stats['entries'] = len(self._sheets)
+        return stats
+
+
+def new_rgb565_frame(
+        width: int,
+        height: int,
+        color: Tuple[int, int, int] = (0, 0, 0)
+) -> np.ndarray:
+    """Creates an RGB565 frame buffer filled with a color."""
+    r, g, b = color
+    value = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+    return np.full((height, width), value, dtype='>u2')
+
+
+def image_to_rgb565(image: Image.Image) -> np.ndarray:
+    """Converts a PIL image to an RGB565 frame buffer."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return _converter().rgb_to_rgb565(np.asarray(image))
@@ -0,0 +1,182 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+Glyph and string cache for text rendering.
+
+Rasterizing text with FreeType on every frame is expensive on a Pi Zero.
+`TextCache` keeps an alpha mask for each glyph (per font) and for each
+recently rendered string, so drawing text becomes a mask lookup followed by
+`Image.paste()` of a solid color through the mask.
+
+Strings are composed from cached glyphs placed at their advance widths.
+Kerning is not applied, which makes no difference for monospaced fonts.
+With the legacy bitmap fonts (`ImageFont.load_default_imagefont()`),
+`ImageDraw.text()` lets each glyph cell overwrite the edge of the previous
+one while the cache keeps both, so a few edge pixels may differ.
+"""
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .my_logger import get_logger
+
+log = get_logger(__name__)
+
+Font = Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]
+
+
+class RenderedText(NamedTuple):
+    """A rasterized glyph or string."""
+    mask: Image.Image  # "L" mode alpha mask
+    bbox: Tuple[int, int, int, int]  # mask extent relative to the origin
+    advance: float  # pen advance in pixels
+
+
+class TextCache:
+    """
+    LRU cache of rasterized glyphs and strings.
+
+    Glyphs are kept for every font that has been used (their number is
+    bounded by the character set); rendered strings are evicted in
+    least-recently-used order once `max_strings` is reached.
+    """
+    def __init__(self, max_strings: int = 256):
+        """
+        Args:
+            max_strings: Maximum number of cached strings.
+        """
+        self.max_strings = max_strings
+        self._glyphs: Dict[tuple, Dict[str, RenderedText]] = {}
+        self._strings: "OrderedDict[tuple, RenderedText]" = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'glyphs': 0}
+
+    @staticmethod
+    def _font_key(font: Font) -> tuple:
+        """Identifies a font face and size."""
+        path = getattr(font, 'path', None)
+        if path is None:
+            return ('id', id(font))
+        return (
+            path, getattr(font, 'size', None), getattr(font, 'index', 0)
+        )
+
+    def _glyph(self, font: Font, glyphs: Dict[str, RenderedText],
+               char: str) -> RenderedText:
+        """Returns the cached glyph, rasterizing it on first use."""
+        glyph = glyphs.get(char)
+        if glyph is not None:
+            return glyph
+
+        x0, y0, x1, y1 = font.getbbox(char)
+        mask = Image.new("L", (max(1, x1 - x0), max(1, y1 - y0)), 0)
+        ImageDraw.Draw(mask).text((-x0, -y0), char, font=font, fill=255)
+        glyph = RenderedText(mask, (x0, y0, x1, y1), font.getlength(char))
+        glyphs[char] = glyph
+        self._stats['glyphs'] += 1
+        return glyph
+
+    def render(self, text: str, font: Font) -> RenderedText:
+        """
+        Returns the alpha mask and bounding box of a string.
+
+        The bounding box is relative to the drawing origin, like
+        `ImageDraw.textbbox((0, 0), text, font)`.
+        """
+        font_key = self._font_key(font)
+        key = (font_key, text)
+        cached = self._strings.get(key)
+        if cached is not None:
+            self._strings.move_to_end(key)
+            self._stats['hits'] += 1
+            return cached
+        self._stats['misses'] += 1
+
+        glyphs = self._glyphs.setdefault(font_key, {})
+        placed = []
+        pen = 0.0
+        for char in text:
+            glyph = self._glyph(font, glyphs, char)
+            if glyph.bbox[2] > glyph.bbox[0] and glyph.bbox[3] > glyph.bbox[1]:
+                placed.append((round(pen), glyph))
+            pen += glyph.advance
+
+        if not placed:
+            rendered = RenderedText(
+                Image.new("L", (1, 1), 0), (0, 0, 0, 0), pen
+            )
+        else:
+            x0 = min(x + g.bbox[0] for x, g in placed)
+            y0 = min(g.bbox[1] for _, g in placed)
+            x1 = max(x + g.bbox[2] for x, g in placed)
+            y1 = max(g.bbox[3] for _, g in placed)
+            canvas = np.zeros((y1 - y0, x1 - x0), dtype=np.uint16)
+            for x, g in placed:
+                gx = x + g.bbox[0] - x0
+                gy = g.bbox[1] - y0
+                h, w = g.mask.height, g.mask.width
+                # Overlapping edges are combined like FreeType does
+                # ("over": a + b - a * b / 255)
+                dst = canvas[gy:gy + h, gx:gx + w]
+                src = np.asarray(g.mask, dtype=np.uint16)
+                dst += src - (dst * src + 127) // 255
+            rendered = RenderedText(
+                Image.fromarray(canvas.astype(np.uint8), "L"),
+                (x0, y0, x1, y1), pen
+            )
+
+        self._strings[key] = rendered
+        if len(self._strings) > self.max_strings:
+            self._strings.popitem(last=False)
+        return rendered
+
+    def textbbox(self, text: str, font: Font) -> Tuple[int, int, int, int]:
+        """Cached equivalent of `ImageDraw.textbbox((0, 0), text, font)`."""
+        return self.render(text, font).bbox
+
+    def blit(
+            self,
+            image: Image.Image,
+            xy: Tuple[int, int],
+            text: str,
+            font: Font,
+            color: Union[Tuple[int, ...], int, str]
+    ) -> Tuple[int, int, int, int]:
+        """
+        Draws text on an image by pasting the color through the cached mask.
+
+        Args:
+            image: Target image (RGB or RGBA).
+            xy: Drawing origin, as for `ImageDraw.text()`.
+            text: The string to draw.
+            font: The font.
+            color: Text color.
+
+        Returns:
+            The bounding box of the drawn text (x0, y0, x1, y1).
+        """
+        rendered = self.render(text, font)
+        x0, y0, x1, y1 = rendered.bbox
+        if x1 <= x0 or y1 <= y0:
+            return (xy[0], xy[1], xy[0], xy[1])
+        box = (int(xy[0] + x0), int(xy[1] + y0))
+        image.paste(color, box + (box[0] + rendered.mask.width,
+                                  box[1] + rendered.mask.height),
+                    rendered.mask)
+        return (box[0], box[1], box[0] + x1 - x0, box[1] + y1 - y0)
+
+    def clear(self):
+        """Drops all cached glyphs and strings."""
+        self._glyphs.clear()
+        self._strings.clear()
+        self._stats['glyphs'] = 0
+
+    def get_stats(self) -> dict:
+        """Returns cache statistics."""
+        stats = dict(self._stats)
+        stats['strings'] = len(self._strings)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
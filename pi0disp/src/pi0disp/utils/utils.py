@@ -13,12 +13,14 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 from .my_logger import get_logger
-from .performance_core import create_optimizer_pack
+from .performance_core import TileDirtyTracker, create_optimizer_pack
+from .text_cache import TextCache
 
 log = get_logger(__name__)
 
 # --- Module-level Singleton ---
 _OPTIMIZER_PACK = None
+_TEXT_CACHE: Optional[TextCache] = None
 
 def _get_optimizers():
     """Lazy initializer for the singleton optimizer pack."""
@@ -64,6 +66,35 @@ def optimize_dirty_regions(
         regions, max_regions
     )
 
+def optimize_dirty_regions_tiled(
+        regions: List[Tuple[int, int, int, int]],
+        max_regions: int = 8,
+        tile_size: int = 16,
+        tracker: Optional[TileDirtyTracker] = None
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Drop-in replacement for `optimize_dirty_regions` based on
+    `TileDirtyTracker`. Its cost has a fixed NumPy overhead and then grows
+    linearly with the number of regions, so with the default strategy
+    "auto" it only takes over from `optimize_dirty_regions` for many
+    regions (`TileDirtyTracker.MERGE_MAX_MARKED`).
+
+    Callers that merge regions every frame should pass their own `tracker`
+    (one per display or presenter; it is not thread-safe) so that its
+    bitmap is reused. Without one, a temporary tracker is created.
+    """
+    valid = [r for r in regions if r and r[2] > r[0] and r[3] > r[1]]
+    if not valid:
+        return []
+    width = max(r[2] for r in valid)
+    height = max(r[3] for r in valid)
+
+    if tracker is None or tracker.width < width or tracker.height < height:
+        tracker = TileDirtyTracker(width, height, tile_size)
+
+    tracker.mark_regions(valid)
+    return tracker.pop_regions(max_regions)
+
 def clamp_region(
         region: Tuple[int, int, int, int], 
         width: int, height: int
@@ -218,6 +249,86 @@ def draw_text(
         # Text is empty or completely transparent, return a zero-sized bbox
         return (0, 0, 0, 0)
 
+    final_pos = _text_position(actual_bbox, x, y, width, height, padding)
+
+    # Draw the text on the actual draw object
+    draw.text(final_pos, text, font=font, fill=color)
+
+    # Return the bounding box of the drawn text for dirty region tracking
+    # Expand by 1 pixel on right and bottom for robustness against anti-aliasing
+    return _text_bbox(final_pos, actual_bbox)
+
+def draw_text_cached(
+        image: Image.Image,
+        text: str, font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
+        x: Union[int, str],
+        y: Union[int, str],
+        width: int,
+        height: int,
+        color: Tuple[int, int, int],
+        padding: int = 5,
+        cache: Optional[TextCache] = None
+) -> Tuple[int, int, int, int]:
+    """
+    Same as `draw_text`, but draws on an Image by blitting a cached,
+    pre-rasterized mask of the string instead of calling FreeType.
+
+    Args:
+        image: The image (RGB or RGBA) to draw on.
+        cache: The text cache to use. Defaults to a shared module cache.
+        (other arguments as for `draw_text`)
+
+    Returns:
+        The bounding box of the drawn text (x0, y0, x1, y1).
+    """
+    cache = _text_cache(cache)
+    actual_bbox = cache.textbbox(text, font)
+    if actual_bbox[2] <= actual_bbox[0] or actual_bbox[3] <= actual_bbox[1]:
+        return (0, 0, 0, 0)
+
+    final_pos = _text_position(actual_bbox, x, y, width, height, padding)
+    cache.blit(image, final_pos, text, font, color)
+    return _text_bbox(final_pos, actual_bbox)
+
+def measure_text_cached(
+        text: str, font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
+        x: Union[int, str],
+        y: Union[int, str],
+        width: int,
+        height: int,
+        padding: int = 5,
+        cache: Optional[TextCache] = None
+) -> Tuple[int, int, int, int]:
+    """
+    Returns the bounding box `draw_text_cached` would return for the same
+    arguments, without drawing.
+    """
+    cache = _text_cache(cache)
+    actual_bbox = cache.textbbox(text, font)
+    if actual_bbox[2] <= actual_bbox[0] or actual_bbox[3] <= actual_bbox[1]:
+        return (0, 0, 0, 0)
+
+    final_pos = _text_position(actual_bbox, x, y, width, height, padding)
+    return _text_bbox(final_pos, actual_bbox)
+
+def _text_cache(cache: Optional[TextCache]) -> TextCache:
+    """Returns the given cache, or the shared module cache."""
+    global _TEXT_CACHE
+    if cache is not None:
+        return cache
+    if _TEXT_CACHE is None:
+        _TEXT_CACHE = TextCache()
+    return _TEXT_CACHE
+
+def _text_position(
+        actual_bbox: Tuple[int, int, int, int],
+        x: Union[int, str],
+        y: Union[int, str],
+        width: int,
+        height: int,
+        padding: int
+) -> Tuple[int, int]:
+    """Resolves keyword or coordinate positions into a drawing origin."""
     text_width = actual_bbox[2] - actual_bbox[0]
     text_height = actual_bbox[3] - actual_bbox[1]
 
@@ -252,14 +363,14 @@ def draw_text(
             final_y = padding - actual_bbox[1]
     else:
         final_y = y - actual_bbox[1] # Adjust for textbbox offset
-        
-    final_pos = (final_x, final_y)
-    
-    # Draw the text on the actual draw object
-    draw.text(final_pos, text, font=font, fill=color)
-    
-    # Return the bounding box of the drawn text for dirty region tracking
-    # Expand by 1 pixel on right and bottom for robustness against anti-aliasing
+
+    return (final_x, final_y)
+
+def _text_bbox(
+        final_pos: Tuple[int, int],
+        actual_bbox: Tuple[int, int, int, int]
+) -> Tuple[int, int, int, int]:
+    """Bounding box of drawn text, expanded by 1 pixel on right/bottom."""
     return (
         int(final_pos[0] + actual_bbox[0]),
         int(final_pos[1] + actual_bbox[1]),
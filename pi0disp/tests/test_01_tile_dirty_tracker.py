@@ -0,0 +1,150 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_01_tile_dirty_tracker.py
+"""
+import numpy as np
+import pytest
+
+from pi0disp.utils.performance_core import RegionOptimizer, TileDirtyTracker
+from pi0disp.utils.utils import optimize_dirty_regions_tiled
+
+WIDTH, HEIGHT = 320, 240
+
+
+def random_regions(rng, count, max_size=48):
+    """画面内のランダムな領域を生成する"""
+    regions = []
+    for _ in range(count):
+        w = int(rng.integers(1, max_size))
+        h = int(rng.integers(1, max_size))
+        x = int(rng.integers(0, WIDTH - w))
+        y = int(rng.integers(0, HEIGHT - h))
+        regions.append((x, y, x + w, y + h))
+    return regions
+
+
+def paint(regions):
+    """領域を塗ったマスクを返す"""
+    mask = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    for x0, y0, x1, y1 in regions:
+        mask[y0:y1, x0:x1] = True
+    return mask
+
+
+class TestTileDirtyTracker:
+    """TileDirtyTrackerのテスト"""
+
+    @pytest.mark.parametrize("strategy", TileDirtyTracker.STRATEGIES)
+    @pytest.mark.parametrize("tile_size", [8, 16])
+    @pytest.mark.parametrize("count", [1, 5, 40, 200])
+    def test_covers_every_dirty_pixel(self, strategy, tile_size, count):
+        """すべての汚れたピクセルが返された領域に含まれる"""
+        rng = np.random.default_rng(count)
+        tracker = TileDirtyTracker(
+            WIDTH, HEIGHT, tile_size, max_regions=6, strategy=strategy
+        )
+        for _ in range(5):
+            regions = random_regions(rng, count)
+            tracker.mark_regions(regions)
+            result = tracker.pop_regions()
+
+            assert 1 <= len(result) <= 6
+            for x0, y0, x1, y1 in result:
+                assert 0 <= x0 < x1 <= WIDTH
+                assert 0 <= y0 < y1 <= HEIGHT
+            dirty = paint(regions)
+            assert not (dirty & ~paint(result)).any()
+            assert not tracker.is_dirty
+
+    @pytest.mark.parametrize("strategy", TileDirtyTracker.STRATEGIES)
+    def test_mark_mask(self, strategy):
+        """mark_mask()で汚れたピクセルが含まれる"""
+        rng = np.random.default_rng(0)
+        mask = rng.random((HEIGHT, WIDTH)) < 0.001
+        mask[100:140, 0:WIDTH] = True
+        tracker = TileDirtyTracker(WIDTH, HEIGHT, 8, strategy=strategy)
+        tracker.mark_mask(mask)
+        result = tracker.pop_regions()
+        assert len(result) <= tracker.max_regions
+        assert not (mask & ~paint(result)).any()
+
+    def test_band_is_one_region(self):
+        """隣接するタイルは1つの領域にまとまる"""
+        tracker = TileDirtyTracker(WIDTH, HEIGHT, 8, strategy="tiles")
+        tracker.mark_regions([
+            (x, 80, x + 8, 88) for x in range(0, WIDTH, 8)
+        ])
+        assert tracker.pop_regions() == [(0, 80, WIDTH, 88)]
+
+    def test_auto_uses_merge_for_few_regions(self):
+        """autoはマークが少なければmerge_regionsと同じ結果を返す"""
+        rng = np.random.default_rng(1)
+        regions = random_regions(rng, 10)
+        tracker = TileDirtyTracker(WIDTH, HEIGHT, 8, max_regions=4)
+        tracker.mark_regions(regions)
+        assert tracker.pop_regions() == [
+            tuple(r) for r in RegionOptimizer.merge_regions(regions, 4)
+        ]
+
+    def test_tiles_send_fewer_pixels(self):
+        """tilesは重なったボールの領域を余分なピクセルを減らしてまとめる"""
+        regions = [(10, 10, 60, 60), (200, 150, 250, 200),
+                   (50, 50, 100, 100), (0, 0, 120, 40)]
+        sent = {}
+        for strategy in ("merge", "tiles"):
+            tracker = TileDirtyTracker(WIDTH, HEIGHT, 8, max_regions=8,
+                                       strategy=strategy)
+            tracker.mark_regions(regions)
+            result = tracker.pop_regions()
+            assert not (paint(regions) & ~paint(result)).any()
+            sent[strategy] = paint(result).sum()
+        assert sent["tiles"] <= sent["merge"]
+
+    def test_empty(self):
+        """何もマークしなければ空"""
+        tracker = TileDirtyTracker(WIDTH, HEIGHT)
+        assert not tracker.is_dirty
+        assert tracker.pop_regions() == []
+
+    def test_bad_strategy(self):
+        """不明なstrategyはValueError"""
+        with pytest.raises(ValueError):
+            TileDirtyTracker(WIDTH, HEIGHT, strategy="bogus")
+
+
+class TestMergeRegions:
+    """RegionOptimizer.merge_regionsのテスト"""
+
+    @pytest.mark.parametrize("count", [2, 9, 50, 300])
+    def test_covers_every_region(self, count):
+        """max_regions以下にまとめ、元の領域をすべて含む"""
+        rng = np.random.default_rng(count)
+        regions = random_regions(rng, count)
+        result = RegionOptimizer.merge_regions(regions, max_regions=4)
+        assert len(result) <= 4
+        assert not (paint(regions) & ~paint(result)).any()
+
+
+class TestOptimizeDirtyRegionsTiled:
+    """optimize_dirty_regions_tiledのテスト"""
+
+    def test_own_tracker(self):
+        """渡したトラッカーを使い、空の状態で返す"""
+        tracker = TileDirtyTracker(WIDTH, HEIGHT)
+        regions = [(0, 0, 10, 10), (300, 200, 320, 240)]
+        result = optimize_dirty_regions_tiled(regions, tracker=tracker)
+        assert not (paint(regions) & ~paint(result)).any()
+        assert not tracker.is_dirty
+
+    def test_small_tracker(self):
+        """領域より小さいトラッカーは使わない"""
+        tracker = TileDirtyTracker(64, 64)
+        regions = [(0, 0, 10, 10), (300, 200, 320, 240)]
+        result = optimize_dirty_regions_tiled(regions, tracker=tracker)
+        assert not (paint(regions) & ~paint(result)).any()
+
+    def test_no_regions(self):
+        """有効な領域がなければ空"""
+        assert optimize_dirty_regions_tiled([(5, 5, 5, 9)]) == []
@@ -0,0 +1,311 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_02_spidev_backend.py
+
+spidev バックエンドに通常ファイルを渡して (ハードウェアなしで)、
+ST7789V が送るバイト列と D/C ピンのレベルを確認する。
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from pi0disp.disp import st7789v
+from pi0disp.disp.backends import SpidevBackend
+from pi0disp.disp.console import ScrollingConsole
+from pi0disp.disp.st7789v import (
+    CMD_CASET, CMD_COLMOD, CMD_DISPON, CMD_INVON, CMD_MADCTL, CMD_NORON,
+    CMD_PTLAR, CMD_PTLON, CMD_RAMWR, CMD_RASET, CMD_SLPOUT, CMD_SWRESET,
+    CMD_VSCRDEF, CMD_VSCRSADD, ST7789V
+)
+
+DC_PIN = 18
+RED_RGB565 = b"\xf8\x00"
+
+
+@pytest.fixture
+def spi_log(monkeypatch):
+    """SpidevBackend.spi_write() を、送信時の D/C レベルと共に記録する"""
+    log = []
+    spi_write = SpidevBackend.spi_write
+
+    def recording_spi_write(self, data):
+        log.append((self.pin_levels[DC_PIN], bytes(data)))
+        spi_write(self, data)
+
+    monkeypatch.setattr(SpidevBackend, "spi_write", recording_spi_write)
+    return log
+
+
+@pytest.fixture
+def io_log(monkeypatch, spi_log):
+    """D/C ピンの変更 ("dc", level) と SPI 書き込み ("spi", data) を順に記録する"""
+    log = []
+    spi_write = SpidevBackend.spi_write
+    gpio_write = SpidevBackend.gpio_write
+
+    def recording_gpio_write(self, pin, level):
+        if pin == DC_PIN:
+            log.append(("dc", level))
+        gpio_write(self, pin, level)
+
+    def recording_spi_write(self, data):
+        log.append(("spi", bytes(data)))
+        spi_write(self, data)
+
+    monkeypatch.setattr(SpidevBackend, "gpio_write", recording_gpio_write)
+    monkeypatch.setattr(SpidevBackend, "spi_write", recording_spi_write)
+    return log
+
+
+@pytest.fixture
+def lcd(tmp_path, monkeypatch, spi_log):
+    """偽の spidev デバイス (通常ファイル) を使う ST7789V"""
+    monkeypatch.setattr(st7789v.time, "sleep", lambda _: None)
+    device = tmp_path / "spidev0.0"
+    device.touch()
+    lcd = ST7789V(
+        backend="spidev", spi_device=str(device), dc_pin=DC_PIN,
+        config_file_path=tmp_path / "pi0disp.json"
+    )
+    yield lcd
+    lcd.close()
+
+
+def grouped(log):
+    """同じ D/C レベルで続けて送ったバイト列をまとめる"""
+    groups = []
+    for level, data in log:
+        if groups and groups[-1][0] == level:
+            groups[-1] = (level, groups[-1][1] + data)
+        else:
+            groups.append((level, data))
+    return groups
+
+
+def window(start, end):
+    """CASET/RASET のパラメータ (開始・終了、ビッグエンディアン)"""
+    return bytes([start >> 8, start & 0xFF, end >> 8, end & 0xFF])
+
+
+def stream(*segments):
+    """(D/C レベル, バイト列) の並びを、期待する io_log に変換する"""
+    return [
+        event for level, data in segments
+        for event in (("dc", level), ("spi", data))
+    ]
+
+
+class TestSpidevBackend:
+    """SpidevBackend (偽のデバイス) のテスト"""
+
+    def test_fake_device(self, lcd):
+        """通常ファイルは偽のデバイスとして開き、ピンはメモリに保持する"""
+        assert isinstance(lcd.backend, SpidevBackend)
+        assert lcd.backend.is_fake
+        assert lcd.backend.max_transfer is None
+        assert lcd.get_stats()["backend"] == "spidev"
+        # RST, バックライトは high、D/C は最後のパラメータ (MADCTL) の high
+        assert lcd.backend.pin_levels == {19: 1, DC_PIN: 1, 20: 1}
+
+    def test_init_sequence(self, lcd, spi_log):
+        """初期化のコマンドは D/C low、パラメータは D/C high で送る"""
+        assert grouped(spi_log) == [
+            (0, bytes([CMD_SWRESET, CMD_SLPOUT, CMD_COLMOD])),
+            (1, b"\x55"),
+            (0, bytes([CMD_INVON, CMD_NORON, CMD_DISPON, CMD_MADCTL])),
+            (1, b"\x60"),
+        ]
+
+    def test_display_region(self, lcd, spi_log):
+        """CASET/RASET/RAMWR に続けて領域のピクセルを送る"""
+        image = Image.new("RGB", (lcd.width, lcd.height), (255, 0, 0))
+        spi_log.clear()
+        lcd.display_region(image, 10, 20, 30, 40)
+
+        assert grouped(spi_log) == [
+            (0, bytes([CMD_CASET])), (1, window(10, 29)),
+            (0, bytes([CMD_RASET])), (1, window(20, 39)),
+            (0, bytes([CMD_RAMWR])), (1, RED_RGB565 * 20 * 20),
+        ]
+
+    def test_display_regions_skips_unchanged_caset(self, lcd, spi_log):
+        """同じ列範囲の領域では CASET を送り直さない"""
+        image = Image.new("RGB", (lcd.width, lcd.height), (255, 0, 0))
+        lcd.display_region(image, 0, 0, 8, 8)
+        spi_log.clear()
+        lcd.display_regions(image, [(100, 0, 140, 10), (100, 100, 140, 110)])
+
+        commands = [
+            data[0] for level, data in grouped(spi_log) if level == 0
+        ]
+        assert commands.count(CMD_CASET) == 1
+        assert commands.count(CMD_RASET) == 2
+        assert commands.count(CMD_RAMWR) == 2
+
+    def test_file_holds_the_stream(self, lcd, spi_log):
+        """偽のデバイスのファイルには送信したバイト列がそのまま書かれる"""
+        image = Image.new("RGB", (lcd.width, lcd.height), (255, 0, 0))
+        lcd.display(image)
+        expected = b"".join(data for _, data in spi_log)
+        with open(lcd.backend.device, "rb") as f:
+            assert f.read() == expected
+        assert expected.endswith(RED_RGB565 * lcd.width * lcd.height)
+
+
+class TestBatchedTransfer:
+    """display_regions() / display_rgb565() のバイト列のテスト"""
+
+    def test_display_regions_stream(self, lcd, io_log):
+        """
+        1フレームのコマンドとピクセルを1つのセグメント列で送り、
+        D/C はセグメントの境目でだけ切り替える
+        """
+        image = Image.new("RGB", (lcd.width, lcd.height), (255, 0, 0))
+        lcd.display_regions(image, [
+            (100, 0, 140, 10), (100, 100, 140, 110), (0, 200, 10, 210)
+        ])
+
+        assert io_log == stream(
+            # 列範囲の順: (0, 200) が先
+            (0, bytes([CMD_CASET])), (1, window(0, 9)),
+            (0, bytes([CMD_RASET])), (1, window(200, 209)),
+            (0, bytes([CMD_RAMWR])), (1, RED_RGB565 * 10 * 10),
+            (0, bytes([CMD_CASET])), (1, window(100, 139)),
+            (0, bytes([CMD_RASET])), (1, window(0, 9)),
+            (0, bytes([CMD_RAMWR])), (1, RED_RGB565 * 40 * 10),
+            # 同じ列範囲: CASET は送り直さない
+            (0, bytes([CMD_RASET])), (1, window(100, 109)),
+            (0, bytes([CMD_RAMWR])), (1, RED_RGB565 * 40 * 10),
+        )
+
+    def test_adjacent_regions_are_one_window(self, lcd, io_log):
+        """縦に隣接する同じ列範囲の領域は1つのウィンドウ・1回の書き込み"""
+        image = Image.new("RGB", (lcd.width, lcd.height), (255, 0, 0))
+        lcd.display_regions(image, [(10, 20, 20, 30), (10, 10, 20, 20)])
+
+        assert io_log == stream(
+            (0, bytes([CMD_CASET])), (1, window(10, 19)),
+            (0, bytes([CMD_RASET])), (1, window(10, 29)),
+            (0, bytes([CMD_RAMWR])), (1, RED_RGB565 * 10 * 20),
+        )
+
+    def test_display_rgb565_stream(self, lcd, io_log):
+        """RGB565 バッファの領域もビッグエンディアンのまま一括で送る"""
+        buffer = np.zeros((lcd.height, lcd.width), dtype=np.uint16)
+        buffer[5, 1:3] = (0x1234, 0xABCD)
+        lcd.display_rgb565(buffer, [(1, 5, 3, 6), (100, 5, 101, 6)])
+
+        assert io_log == stream(
+            (0, bytes([CMD_CASET])), (1, window(1, 2)),
+            (0, bytes([CMD_RASET])), (1, window(5, 5)),
+            (0, bytes([CMD_RAMWR])), (1, b"\x12\x34\xab\xcd"),
+            (0, bytes([CMD_CASET])), (1, window(100, 100)),
+            (0, bytes([CMD_RAMWR])), (1, b"\x00\x00"),
+        )
+
+    def test_split_at_max_transfer(self, lcd, io_log):
+        """max_transfer を超えるセグメントは D/C を変えずに分割する"""
+        lcd.backend.max_transfer = 64
+        image = Image.new("RGB", (lcd.width, lcd.height), (255, 0, 0))
+        lcd.display_regions(image, [(0, 0, 10, 10)])
+
+        pixels = RED_RGB565 * 10 * 10
+        assert io_log[-5:] == [
+            ("dc", 1),
+            ("spi", pixels[0:64]), ("spi", pixels[64:128]),
+            ("spi", pixels[128:192]), ("spi", pixels[192:200]),
+        ]
+
+
+def words(*values):
+    """16ビットのパラメータ (ビッグエンディアン) を並べる"""
+    return b"".join(bytes([v >> 8, v & 0xFF]) for v in values)
+
+
+class TestScrollCommands:
+    """ハードウェアスクロールとパーシャル表示のコマンド列のテスト"""
+
+    # 画面上の範囲 [10, 300) と、それに対応するパネルのゲートライン
+    # 回転180/270ではゲートラインの向きが画面の軸と逆になる
+    @pytest.mark.parametrize("rotation, tfa, vsa, bfa, vsp", [
+        (0, 10, 290, 20, 15),
+        (90, 10, 290, 20, 15),
+        (180, 20, 290, 10, 20 + 290 - 5),
+        (270, 20, 290, 10, 20 + 290 - 5),
+    ])
+    def test_scroll_area(self, lcd, io_log, rotation, tfa, vsa, bfa, vsp):
+        """VSCRDEF/VSCRSADD のパラメータ"""
+        lcd.set_rotation(rotation)
+        io_log.clear()
+        lcd.set_scroll_area(10, 300)
+        lcd.scroll(5)
+
+        assert io_log == stream(
+            (0, bytes([CMD_VSCRDEF])), (1, words(tfa, vsa, bfa)),
+            # set_scroll_area() はオフセット0から始める
+            (0, bytes([CMD_VSCRSADD])), (1, words(tfa)),
+            (0, bytes([CMD_VSCRSADD])), (1, words(vsp)),
+        )
+        assert lcd.scroll_offset == 5
+        assert lcd.scroll_axis == ("y" if rotation in (0, 180) else "x")
+
+    def test_scroll_wraps(self, lcd, io_log):
+        """オフセットはスクロール範囲の長さで折り返す"""
+        lcd.set_rotation(0)
+        lcd.set_scroll_area(0, 100)
+        io_log.clear()
+        lcd.scroll(105)
+        assert io_log == stream(
+            (0, bytes([CMD_VSCRSADD])), (1, words(5)),
+        )
+        assert lcd.scroll_offset == 5
+
+    def test_scroll_defaults_to_full_screen(self, lcd, io_log):
+        """範囲を決めずに scroll() すると画面全体をスクロールする"""
+        lcd.set_rotation(0)
+        io_log.clear()
+        lcd.scroll(7)
+        assert io_log == stream(
+            (0, bytes([CMD_VSCRDEF])), (1, words(0, 320, 0)),
+            (0, bytes([CMD_VSCRSADD])), (1, words(0)),
+            (0, bytes([CMD_VSCRSADD])), (1, words(7)),
+        )
+
+    @pytest.mark.parametrize("rotation, first, last", [
+        (0, 10, 299), (90, 10, 299), (180, 20, 309), (270, 20, 309),
+    ])
+    def test_partial_area(self, lcd, io_log, rotation, first, last):
+        """PTLAR (開始・終了ライン) に続けて PTLON を送る"""
+        lcd.set_rotation(rotation)
+        io_log.clear()
+        lcd.set_partial_area(10, 300)
+        lcd.normal_mode()
+
+        # コマンドが続く間は D/C を変えない
+        assert io_log == stream(
+            (0, bytes([CMD_PTLAR])), (1, words(first, last)),
+            (0, bytes([CMD_PTLON])),
+        ) + [("spi", bytes([CMD_NORON]))]
+
+    def test_console_requires_portrait(self, lcd, io_log):
+        """ScrollingConsole は既定の回転90ではエラー、回転0で使える"""
+        assert lcd.rotation == 90
+        with pytest.raises(ValueError, match="rotation 90"):
+            ScrollingConsole(lcd)
+        assert io_log == []
+
+        lcd.set_rotation(0)
+        console = ScrollingConsole(lcd, line_height=20, top=20)
+        assert console.rows == 15
+        # コンソールの範囲 [20, 320) をスクロール範囲にする
+        assert ("spi", bytes([CMD_VSCRDEF])) in io_log
+        assert ("spi", words(20, 300, 0)) in io_log
+
+    def test_invalid_areas(self, lcd):
+        """パネルの範囲外はエラー"""
+        with pytest.raises(ValueError):
+            lcd.set_scroll_area(0, 321)
+        with pytest.raises(ValueError):
+            lcd.set_partial_area(10, 10)
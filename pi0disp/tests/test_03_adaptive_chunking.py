@@ -0,0 +1,86 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_03_adaptive_chunking.py
+"""
+import math
+
+import pytest
+
+from pi0disp.utils import performance_core
+from pi0disp.utils.performance_core import AdaptiveChunking
+
+FRAME_BYTES = 320 * 240 * 2
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """呼ばれるたびに0.2秒進む time.monotonic()"""
+    now = [0.0]
+
+    def monotonic():
+        now[0] += 0.2
+        return now[0]
+
+    monkeypatch.setattr(performance_core.time, "monotonic", monotonic)
+    return now
+
+
+def throughput(chunk_size, best=8192):
+    """best で最大になるスループットのモデル (bytes/s)"""
+    return 4e6 * math.exp(-math.log2(chunk_size / best) ** 2)
+
+
+def run(chunking, transfers, model=throughput):
+    """モデルのスループットで全画面の転送を記録し、チャンクサイズの履歴を返す"""
+    sizes = []
+    for _ in range(transfers):
+        tp = model(chunking.get_chunk_size())
+        chunking.record_transfer(FRAME_BYTES, FRAME_BYTES / tp)
+        sizes.append(chunking.get_chunk_size())
+    return sizes
+
+
+class TestAdaptiveChunking:
+    """AdaptiveChunkingのテスト"""
+
+    def test_climbs_to_the_best_size(self, clock):
+        """スループットが最大になるサイズの近くに収まる"""
+        chunking = AdaptiveChunking(initial_size=2048)
+        sizes = run(chunking, 600)
+        assert max(sizes[:100]) > 2048  # まず大きくする
+        assert all(5000 < size < 14000 for size in sizes[-200:])
+
+    def test_turns_back_when_degrading(self, clock):
+        """大きくしてスループットが下がると小さくする"""
+        chunking = AdaptiveChunking(initial_size=8192)
+        sizes = run(chunking, 200, model=lambda size: throughput(size, 2048))
+        assert sizes[-1] < 4096
+
+    def test_reverses_at_the_limit(self, clock):
+        """上限に達したら向きを変える"""
+        chunking = AdaptiveChunking(initial_size=16384, max_size=16384)
+        run(chunking, 10, model=lambda size: 4e6)
+        assert chunking.get_chunk_size() == 16384
+        run(chunking, 10, model=lambda size: 4e6)
+        assert chunking.get_chunk_size() < 16384
+
+    def test_locked(self, clock):
+        """set_chunk_size()で固定すると変えない"""
+        chunking = AdaptiveChunking()
+        chunking.set_chunk_size(100000)
+        assert chunking.get_chunk_size() == chunking.max_size
+        run(chunking, 100)
+        assert chunking.get_chunk_size() == chunking.max_size
+        assert chunking.get_stats()["locked"]
+
+    def test_small_transfers_are_ignored(self, clock):
+        """1チャンクに収まる転送では調整しない"""
+        chunking = AdaptiveChunking(initial_size=4096)
+        for _ in range(100):
+            chunking.record_transfer(1000, 0.001)
+        assert chunking.get_chunk_size() == 4096
+        stats = chunking.get_stats()
+        assert stats["transfers"] == 100
+        assert stats["throughput_bps"] == pytest.approx(1e6)
@@ -0,0 +1,98 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_04_text_cache.py
+"""
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont, features
+
+from pi0disp.utils.text_cache import TextCache
+from pi0disp.utils.utils import (
+    draw_text, draw_text_cached, measure_text_cached
+)
+
+pytestmark = pytest.mark.skipif(
+    not features.check("freetype2"), reason="FreeType is not available"
+)
+
+WIDTH, HEIGHT = 240, 120
+BG = (0, 0, 64)
+FG = (255, 200, 0)
+TEXTS = ["FPS: 30.0", "0123456789", "Hello, World!", "AVAWAY", "i"]
+POSITIONS = [(10, 20), ("center", "center"), ("left", "top"),
+             ("right", "bottom"), (-5, 110)]
+
+
+@pytest.fixture(params=[12, 16, 24])
+def font(request):
+    """Pillow 組み込みの FreeType フォント"""
+    return ImageFont.load_default(size=request.param)
+
+
+class TestTextCache:
+    """TextCacheのテスト"""
+
+    @pytest.mark.parametrize("text", TEXTS)
+    @pytest.mark.parametrize("pos", POSITIONS)
+    def test_same_pixels_as_draw_text(self, font, text, pos):
+        """draw_text()と同じピクセル・同じ領域になる"""
+        expected = Image.new("RGB", (WIDTH, HEIGHT), BG)
+        bbox = draw_text(
+            ImageDraw.Draw(expected), text, font, *pos, WIDTH, HEIGHT, FG
+        )
+        cache = TextCache()
+        for _ in range(2):  # 2回目はキャッシュから
+            actual = Image.new("RGB", (WIDTH, HEIGHT), BG)
+            cached_bbox = draw_text_cached(
+                actual, text, font, *pos, WIDTH, HEIGHT, FG, cache=cache
+            )
+            assert np.array_equal(np.asarray(actual), np.asarray(expected))
+            assert cached_bbox == bbox
+        assert measure_text_cached(
+            text, font, *pos, WIDTH, HEIGHT, cache=cache
+        ) == bbox
+
+    @pytest.mark.parametrize("text", ["", " ", "  "])
+    def test_whitespace(self, font, text):
+        """空白だけなら何も描かず、空の領域を返す"""
+        image = Image.new("RGB", (WIDTH, HEIGHT), BG)
+        bbox = draw_text_cached(
+            image, text, font, 10, 20, WIDTH, HEIGHT, FG, cache=TextCache()
+        )
+        assert bbox == (0, 0, 0, 0)
+        assert image.getcolors() == [(WIDTH * HEIGHT, BG)]
+
+    def test_textbbox(self, font):
+        """textbbox()はImageDraw.textbbox()と同じ"""
+        draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        cache = TextCache()
+        for text in TEXTS:
+            assert cache.textbbox(text, font) == draw.textbbox(
+                (0, 0), text, font=font
+            )
+
+    def test_lru(self, font):
+        """max_stringsを超えると古い文字列から捨てる"""
+        cache = TextCache(max_strings=2)
+        cache.render("a", font)
+        cache.render("b", font)
+        cache.render("a", font)  # "a" が新しくなる
+        cache.render("c", font)  # "b" を捨てる
+        stats = cache.get_stats()
+        assert stats["strings"] == 2
+        assert stats["hits"] == 1
+        cache.render("a", font)
+        assert cache.get_stats()["hits"] == 2
+        cache.render("b", font)
+        assert cache.get_stats()["misses"] == 4
+
+    def test_glyphs_are_shared(self, font):
+        """文字列が違ってもグリフは1回だけラスタライズする"""
+        cache = TextCache()
+        cache.render("abc", font)
+        cache.render("cab", font)
+        assert cache.get_stats()["glyphs"] == 3
+        cache.clear()
+        assert cache.get_stats()["glyphs"] == 0
@@ -0,0 +1,148 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_05_compositor.py
+
+Compositor が返す領域だけを「ディスプレイ」に転送して、
+毎フレーム全体を描き直した画像と一致することを確認する。
+"""
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from pi0disp.utils.compositor import Compositor, SpriteLayer, TextLayer
+from pi0disp.utils.sprite import Sprite
+from pi0disp.utils.text_cache import TextCache
+
+WIDTH, HEIGHT = 160, 120
+
+
+class Ball(Sprite):
+    """塗りつぶした円のスプライト"""
+
+    def __init__(self, x, y, size, color):
+        super().__init__(x, y, size, size)
+        self.color = color
+
+    def update(self, delta_t):
+        pass
+
+    def draw(self, draw):
+        # 右端・下端を含むので margin=1 で覆う
+        draw.ellipse(self.bbox, fill=self.color)
+
+
+def background():
+    """ランダムな背景"""
+    rng = np.random.default_rng(1)
+    return Image.fromarray(
+        rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8), "RGB"
+    )
+
+
+def full_render(compositor):
+    """背景から全レイヤーを z 順に描き直した画像"""
+    frame = background()
+    draw = ImageDraw.Draw(frame)
+    for layer in compositor.layers:
+        if layer.visible:
+            layer.render(frame, draw)
+    return np.asarray(frame)
+
+
+class Display:
+    """返された領域だけを受け取るディスプレイ"""
+
+    def __init__(self, compositor):
+        self.compositor = compositor
+        self.image = compositor.frame.copy()
+
+    def update(self):
+        regions = self.compositor.compose()
+        for region in regions:
+            self.image.paste(self.compositor.frame.crop(region), region[:2])
+        return regions
+
+
+@pytest.fixture(params=[None, 8])
+def compositor(request):
+    return Compositor(background(), tile_size=request.param, max_regions=4)
+
+
+class TestCompositor:
+    """Compositorのテスト"""
+
+    def test_damage_covers_every_change(self, compositor):
+        """返された領域だけの転送で、全体を描き直した画像と一致する"""
+        rng = np.random.default_rng(0)
+        balls = [
+            Ball(rng.uniform(0, WIDTH - 20), rng.uniform(0, HEIGHT - 20),
+                 int(rng.integers(6, 20)), tuple(int(c) for c in rng.integers(0, 256, 3)))
+            for _ in range(6)
+        ]
+        for i, ball in enumerate(balls):
+            compositor.add(SpriteLayer(ball, z=i))
+        text = compositor.add(TextLayer(
+            ImageFont.load_default(), "right", "bottom", WIDTH, HEIGHT,
+            cache=TextCache()
+        ))
+        display = Display(compositor)
+
+        for frame in range(40):
+            for ball in balls:
+                if rng.random() < 0.7:
+                    ball.x = float(np.clip(ball.x + rng.uniform(-9, 9),
+                                           -5, WIDTH - 10))
+                    ball.y = float(np.clip(ball.y + rng.uniform(-9, 9),
+                                           -5, HEIGHT - 10))
+            if frame % 5 == 0:
+                text.set_text(f"FPS: {frame:.1f}")
+            if frame == 20:
+                balls[0].color = (255, 255, 255)
+                balls[0].mark_dirty()
+            if frame == 30:
+                compositor.layers[1].visible = False
+
+            regions = display.update()
+            assert len(regions) <= compositor.max_regions
+            assert np.array_equal(
+                np.asarray(display.image), full_render(compositor)
+            ), f"frame {frame}"
+
+    def test_nothing_changed(self, compositor):
+        """変化がなければ領域を返さない"""
+        compositor.add(SpriteLayer(Ball(10, 10, 10, (255, 0, 0))))
+        assert compositor.compose()
+        assert compositor.compose() == []
+
+    def test_moved_sprite_regions(self, compositor):
+        """移動したスプライトは前と今の位置だけが汚れる"""
+        ball = Ball(10, 10, 10, (255, 0, 0))
+        compositor.add(SpriteLayer(ball))
+        compositor.compose()
+        ball.x = 100
+        regions = compositor.compose()
+        covered = np.zeros((HEIGHT, WIDTH), dtype=bool)
+        for x0, y0, x1, y1 in regions:
+            covered[y0:y1, x0:x1] = True
+        assert covered[9:21, 9:21].all()
+        assert covered[9:21, 99:111].all()
+        assert covered.sum() < WIDTH * HEIGHT // 4
+
+    def test_remove_restores_background(self, compositor):
+        """レイヤーを外すと背景に戻る"""
+        layer = compositor.add(SpriteLayer(Ball(30, 30, 16, (0, 255, 0))))
+        display = Display(compositor)
+        display.update()
+        compositor.remove(layer)
+        display.update()
+        assert np.array_equal(np.asarray(display.image),
+                              np.asarray(background()))
+
+    def test_set_background(self, compositor):
+        """背景を替えると画面全体を描き直す"""
+        compositor.add(SpriteLayer(Ball(30, 30, 16, (0, 255, 0))))
+        compositor.compose()
+        compositor.set_background(Image.new("RGB", (WIDTH, HEIGHT), "blue"))
+        assert compositor.compose() == [(0, 0, WIDTH, HEIGHT)]
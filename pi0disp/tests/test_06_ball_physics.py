@@ -0,0 +1,127 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_06_ball_physics.py
+"""
+import numpy as np
+import pytest
+
+from pi0disp.utils.physics import BallPhysics
+
+WIDTH, HEIGHT = 320, 240
+
+
+def kinetic_energy(physics):
+    """運動エネルギー (質量は半径の2乗)"""
+    return float(np.sum(
+        physics.radius ** 2 * np.einsum('ij,ij->i', physics.vel, physics.vel)
+    ))
+
+
+def momentum(physics):
+    return (physics.radius[:, None] ** 2 * physics.vel).sum(axis=0)
+
+
+class TestBallPhysics:
+    """BallPhysicsのテスト"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_candidate_pairs_find_every_overlap(self, seed):
+        """ブロードフェーズが重なっている組をすべて含む"""
+        rng = np.random.default_rng(seed)
+        n = 300
+        physics = BallPhysics(
+            rng.uniform(-10, (WIDTH + 10, HEIGHT + 10), (n, 2)),
+            np.zeros((n, 2)), rng.uniform(2, 12, n), WIDTH, HEIGHT
+        )
+        i, j = physics._candidate_pairs()
+        found = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())}
+        assert len(found) == len(i)  # 同じ組は1回だけ
+
+        delta = physics.pos[:, None, :] - physics.pos[None, :, :]
+        dist = np.sqrt((delta ** 2).sum(axis=2))
+        radii = physics.radius[:, None] + physics.radius[None, :]
+        a, b = np.nonzero(np.triu(dist < radii, k=1))
+        assert set(zip(a.tolist(), b.tolist())) <= found
+
+    def test_head_on_collision_swaps_velocities(self):
+        """同じ大きさの正面衝突では速度が入れ替わる"""
+        physics = BallPhysics(
+            [(100, 100), (119, 100)], [(50, 0), (-30, 0)], 10, WIDTH, HEIGHT
+        )
+        physics.step(0.0)
+        assert physics.vel == pytest.approx(np.array([(-30, 0), (50, 0)]))
+        # 押し戻して離れる方向なので、次は衝突しない
+        assert physics.pos[1, 0] - physics.pos[0, 0] > 19
+
+    def test_unequal_masses(self):
+        """質量 (半径の2乗) が違う場合の1次元の弾性衝突"""
+        physics = BallPhysics(
+            [(100, 100), (129, 100)], [(60, 0), (0, 0)], [10, 20],
+            WIDTH, HEIGHT
+        )
+        physics.step(0.0)
+        m1, m2 = 100.0, 400.0
+        assert physics.vel[0, 0] == pytest.approx(60 * (m1 - m2) / (m1 + m2))
+        assert physics.vel[1, 0] == pytest.approx(60 * 2 * m1 / (m1 + m2))
+
+    def test_separating_balls_keep_velocity(self):
+        """離れていく組には力積を加えない"""
+        physics = BallPhysics(
+            [(100, 100), (115, 100)], [(-10, 0), (10, 0)], 10, WIDTH, HEIGHT
+        )
+        physics.step(0.0)
+        assert physics.vel == pytest.approx(np.array([(-10, 0), (10, 0)]))
+
+    def test_energy_is_conserved(self):
+        """多数の衝突と壁の反射の後も運動エネルギーが保存される"""
+        rng = np.random.default_rng(0)
+        physics = BallPhysics.random(
+            60, WIDTH, HEIGHT, radius=8, speed=150, rng=rng,
+            max_speed=1e9
+        )
+        energy = kinetic_energy(physics)
+        for _ in range(300):
+            physics.step(1 / 60)
+        assert kinetic_energy(physics) == pytest.approx(energy, rel=1e-9)
+
+    def test_momentum_is_conserved_without_walls(self):
+        """壁に当たらなければ運動量も保存される"""
+        rng = np.random.default_rng(1)
+        n = 40
+        physics = BallPhysics(
+            rng.uniform(4000, 4200, (n, 2)), rng.uniform(-50, 50, (n, 2)),
+            rng.uniform(4, 10, n), 8200, 8200, max_speed=1e9, rng=rng
+        )
+        p = momentum(physics)
+        energy = kinetic_energy(physics)
+        for _ in range(100):
+            physics.step(1 / 60)
+        assert momentum(physics) == pytest.approx(p, abs=1e-6)
+        assert kinetic_energy(physics) == pytest.approx(energy, rel=1e-9)
+
+    def test_balls_stay_inside(self):
+        """ボールは領域の中に留まる"""
+        rng = np.random.default_rng(2)
+        physics = BallPhysics.random(
+            80, WIDTH, HEIGHT, radius=6, speed=400, rng=rng
+        )
+        for _ in range(200):
+            physics.step(1 / 30)
+            r = physics.radius[:, None]
+            assert np.all(physics.pos >= r - 1e-9)
+            assert np.all(physics.pos <= np.array((WIDTH, HEIGHT)) - r + 1e-9)
+
+    def test_max_speed(self):
+        """衝突後の速さは max_speed 以下に抑える"""
+        physics = BallPhysics(
+            [(100, 100), (119, 100)], [(500, 0), (-500, 0)], [10, 1],
+            WIDTH, HEIGHT, max_speed=600
+        )
+        physics.step(0.0)
+        assert np.all(np.hypot(*physics.vel.T) <= 600 + 1e-9)
+
+    def test_bboxes(self):
+        physics = BallPhysics([(10.7, 20.2)], [(0, 0)], 5, WIDTH, HEIGHT)
+        assert physics.bboxes().tolist() == [[5, 15, 15, 25]]
@@ -0,0 +1,109 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_07_color_lut.py
+
+ガンマ・明るさ・色温度を RGB565 変換にまとめた LUT のテスト
+"""
+import numpy as np
+import pytest
+
+from pi0disp.utils.performance_core import (
+    ColorConverter, LookupTableCache, color_temperature_gains
+)
+
+
+@pytest.fixture
+def converter():
+    return ColorConverter()
+
+
+@pytest.fixture
+def image():
+    """すべての 8 ビット値を含むランダムな画像"""
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    img[0:4, :, :] = np.arange(256, dtype=np.uint8).reshape(4, 64, 1)
+    return img
+
+
+def reference_rgb565(img, gamma, brightness, kelvin):
+    """1段ずつ浮動小数点で補正してから RGB565 にする"""
+    levels = img.astype(np.float64) / 255.0
+    gains = brightness * color_temperature_gains(kelvin)
+    values = np.rint(255.0 * np.clip(levels ** gamma * gains, 0.0, 1.0))
+    values = values.astype(np.uint16)
+    rgb565 = (
+        ((values[..., 0] >> 3) << 11)
+        | ((values[..., 1] >> 2) << 5)
+        | (values[..., 2] >> 3)
+    )
+    return rgb565.astype('>u2')
+
+
+class TestRgb565Lut:
+    """ColorConverter.rgb565_lutのテスト"""
+
+    def test_identity(self, converter, image):
+        """補正なしの LUT は通常の変換と同じ"""
+        lut = converter.rgb565_lut()
+        assert np.array_equal(
+            converter.rgb_to_rgb565(image, lut), converter.rgb_to_rgb565(image)
+        )
+
+    @pytest.mark.parametrize("gamma, brightness, kelvin", [
+        (2.2, 1.0, 6500.0),
+        (0.5, 1.0, 6500.0),
+        (1.0, 0.6, 6500.0),
+        (1.0, 1.5, 6500.0),
+        (1.0, 1.0, 3000.0),
+        (1.0, 1.0, 10000.0),
+        (1.8, 0.9, 5000.0),
+    ])
+    def test_same_as_stepwise(self, converter, image, gamma, brightness, kelvin):
+        """1回の参照で、1段ずつ補正した結果と同じになる"""
+        lut = converter.rgb565_lut(gamma, brightness, kelvin)
+        assert lut.shape == (3, 256)
+        assert np.array_equal(
+            converter.rgb_to_rgb565(image, lut),
+            reference_rgb565(image, gamma, brightness, kelvin)
+        )
+        assert converter.rgb_to_rgb565_bytes(image, lut) == reference_rgb565(
+            image, gamma, brightness, kelvin
+        ).tobytes()
+
+    def test_color_temperature_gains(self):
+        """6500K で (1, 1, 1)、低いと暖色、高いと寒色になる"""
+        assert color_temperature_gains(6500) == pytest.approx([1.0, 1.0, 1.0])
+        warm = color_temperature_gains(3000)
+        cool = color_temperature_gains(10000)
+        assert warm[0] == pytest.approx(1.0) and warm[2] < warm[1] < 1.0
+        assert cool[2] == pytest.approx(1.0) and cool[0] < cool[1] < 1.0
+        assert np.all((warm >= 0) & (warm <= 1))
+
+    def test_cached(self, converter):
+        """同じパラメータでは同じテーブルを返す"""
+        assert converter.rgb565_lut(1.8) is ColorConverter().rgb565_lut(1.8)
+
+
+class TestLookupTableCacheLru:
+    """パラメータごとのテーブルの数を制限するテスト"""
+
+    def test_bounded(self):
+        """MAX_TABLES を超えると最も長く使われていないものから捨てる"""
+        cache = LookupTableCache('rgb565_corrected')
+        limit = LookupTableCache.MAX_TABLES['rgb565_corrected']
+        first = cache.get_table('rgb565_lut', gamma=1.0)
+        for i in range(1, limit * 4):
+            cache.get_table('rgb565_lut', gamma=1.0 + i / 10)
+            cache.get_table('rgb565_lut', gamma=1.0)  # 使い続けるものは残る
+            assert len(cache._tables) <= limit
+        assert cache.get_table('rgb565_lut', gamma=1.0) is first
+
+    def test_unparameterized_tables_are_kept(self):
+        """パラメータのないタイプは制限しない"""
+        cache = LookupTableCache('rgb565')
+        for name in ('r_shift', 'g_shift', 'b_shift'):
+            cache.get_table(name)
+        assert len(cache._tables) == 3
@@ -0,0 +1,130 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_08_profiler.py
+"""
+import threading
+
+import pytest
+
+from pi0disp.utils.profiler import NULL_PROFILER, Profiler
+
+
+def in_thread(target, name="presenter"):
+    thread = threading.Thread(target=target, name=name)
+    thread.start()
+    thread.join()
+
+
+class TestProfiler:
+    """Profilerのテスト"""
+
+    def test_nested_frames(self):
+        """入れ子の frame() は外側の1フレームにまとめる"""
+        profiler = Profiler()
+        with profiler.frame():
+            profiler.add_time('draw', 0.002)
+            with profiler.frame():
+                profiler.add_time('spi', 0.003)
+                profiler.count('bytes', 100)
+            profiler.count('bytes', 50)
+        records = profiler.records
+        assert len(records) == 1
+        assert records[0]['draw_ms'] == pytest.approx(2.0)
+        assert records[0]['spi_ms'] == pytest.approx(3.0)
+        assert records[0]['bytes'] == 150
+
+    def test_frames_are_per_thread(self):
+        """別スレッドのフレームは、実行中のフレームに混ざらない"""
+        profiler = Profiler()
+
+        def present():
+            for _ in range(3):
+                with profiler.frame():
+                    profiler.add_time('spi', 0.004)
+                    profiler.count('bytes', 1000)
+
+        with profiler.frame():
+            profiler.add_time('draw', 0.001)
+            in_thread(present)  # メインのフレームの途中で3フレーム送る
+            profiler.add_time('draw', 0.001)
+
+        records = profiler.records
+        assert [r['thread'] for r in records] == ['presenter'] * 3 + [
+            threading.main_thread().name
+        ]
+        for record in records[:3]:
+            assert 'draw_ms' not in record
+            assert record['spi_ms'] == pytest.approx(4.0)
+        assert records[3]['draw_ms'] == pytest.approx(2.0)
+        assert 'spi_ms' not in records[3]
+
+        summary = profiler.summary()
+        # 各ステージは、それを記録したスレッドのフレームで平均する
+        assert summary['stages']['spi']['avg_ms'] == pytest.approx(4.0)
+        assert summary['stages']['draw']['avg_ms'] == pytest.approx(2.0)
+        assert summary['counters']['bytes'] == pytest.approx(1000)
+
+    def test_fps_of_main_thread(self):
+        """フレームレートはメインスレッドのフレームで計算する"""
+        profiler = Profiler()
+
+        def present():
+            for _ in range(10):
+                with profiler.frame():
+                    pass
+
+        for _ in range(3):
+            with profiler.frame():
+                in_thread(present)
+        main = [r for r in profiler.records
+                if r['thread'] == threading.main_thread().name]
+        span = main[-1]['time'] - main[0]['time']
+        assert profiler.summary()['fps'] == pytest.approx(2 / span)
+
+    def test_reset_discards_other_threads(self):
+        """reset() は他のスレッドの途中のフレームも捨てる"""
+        profiler = Profiler()
+        started = threading.Event()
+        resumed = threading.Event()
+
+        def present():
+            with profiler.frame():
+                profiler.add_time('spi', 0.005)
+                started.set()
+                resumed.wait(5)
+                profiler.add_time('convert', 0.001)
+
+        thread = threading.Thread(target=present)
+        thread.start()
+        started.wait(5)
+        profiler.reset()
+        resumed.set()
+        thread.join()
+
+        records = profiler.records
+        assert len(records) == 1
+        assert 'spi_ms' not in records[0]
+        assert records[0]['convert_ms'] == pytest.approx(1.0)
+
+    def test_dump(self, tmp_path):
+        """CSV と JSON に書き出せる"""
+        profiler = Profiler()
+        for _ in range(2):
+            with profiler.frame():
+                profiler.add_time('spi', 0.001)
+        profiler.dump(tmp_path / "trace.csv")
+        lines = (tmp_path / "trace.csv").read_text().splitlines()
+        assert lines[0].split(',') == [
+            'frame', 'time', 'thread', 'total_ms', 'spi_ms'
+        ]
+        assert len(lines) == 3
+        profiler.dump(tmp_path / "trace.json")
+        assert (tmp_path / "trace.json").stat().st_size > 0
+
+    def test_null_profiler(self):
+        """NULL_PROFILER は何も記録しない"""
+        with NULL_PROFILER.frame():
+            NULL_PROFILER.add_time('spi', 1.0)
+        assert NULL_PROFILER.records == []
@@ -0,0 +1,211 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_09_presenter.py
+
+AsyncPresenter を偽のディスプレイで確認する。
+偽のディスプレイは gate が開くまで転送を終えないので、
+バスが追いつかない状態を作れる。
+"""
+import threading
+
+import pytest
+from PIL import Image
+
+from pi0disp.disp.presenter import AsyncPresenter
+
+WIDTH, HEIGHT = 32, 24
+TIMEOUT = 2.0
+
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+
+
+class FakeDisplay:
+    """送られたフレームと領域を記録するディスプレイ"""
+
+    width = WIDTH
+    height = HEIGHT
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Semaphore(0)  # 転送を始めるたびに +1
+        self.calls = []  # (画像のコピー, 領域 or None)
+        self.error = None
+
+    def display(self, image):
+        self._send(image, None)
+
+    def display_regions(self, image, regions):
+        self._send(image, list(regions))
+
+    def _send(self, image, regions):
+        self.started.release()
+        assert self.gate.wait(TIMEOUT)
+        if self.error is not None:
+            raise self.error
+        self.calls.append((image.copy(), regions))
+
+    def block(self):
+        """次の転送から、release() まで待たせる"""
+        self.gate.clear()
+
+    def release(self):
+        self.gate.set()
+
+    def wait_started(self):
+        """転送が始まる (バスが使用中になる) のを待つ"""
+        assert self.started.acquire(timeout=TIMEOUT)
+
+
+def frame(color):
+    return Image.new("RGB", (WIDTH, HEIGHT), color)
+
+
+@pytest.fixture
+def lcd():
+    return FakeDisplay()
+
+
+@pytest.fixture
+def presenter(lcd):
+    presenter = AsyncPresenter(lcd, num_buffers=2, max_regions=4)
+    presenter.start()
+    yield presenter
+    lcd.release()
+    presenter.stop(flush=False, timeout=TIMEOUT)
+
+
+def busy_with_first_frame(lcd, presenter):
+    """1枚目の転送中で止め、バスが追いつかない状態にする"""
+    lcd.block()
+    presenter.present(frame(RED))
+    lcd.wait_started()
+
+
+class TestAsyncPresenter:
+    """AsyncPresenterのテスト"""
+
+    def test_present(self, lcd, presenter):
+        """全体と領域指定のフレームを順に転送する"""
+        assert presenter.present(frame(RED))
+        assert presenter.present(frame(GREEN), [(0, 0, 8, 8)])
+        assert presenter.wait_idle(TIMEOUT)
+
+        assert [regions for _, regions in lcd.calls] == [None, [(0, 0, 8, 8)]]
+        assert lcd.calls[0][0].getpixel((0, 0)) == RED
+        assert lcd.calls[1][0].getpixel((0, 0)) == GREEN
+
+    def test_frame_is_copied(self, lcd, presenter):
+        """present() の後で描き換えても、送るのは渡した時点のフレーム"""
+        lcd.block()
+        image = frame(RED)
+        presenter.present(image)
+        image.paste(BLUE, (0, 0, WIDTH, HEIGHT))
+        lcd.release()
+        assert presenter.wait_idle(TIMEOUT)
+        assert lcd.calls[0][0].getpixel((0, 0)) == RED
+
+    def test_skip_when_bus_is_behind(self, lcd, presenter):
+        """空きバッファがなければ、待っているフレームを新しいものに置き換える"""
+        busy_with_first_frame(lcd, presenter)
+        assert presenter.present(frame(GREEN))
+        assert not presenter.present(frame(BLUE))
+        lcd.release()
+        assert presenter.wait_idle(TIMEOUT)
+
+        # GREEN は送られない
+        colors = [image.getpixel((0, 0)) for image, _ in lcd.calls]
+        assert colors == [RED, BLUE]
+        stats = presenter.get_stats()
+        assert stats['submitted'] == 3
+        assert stats['presented'] == 2
+        assert stats['skipped'] == 1
+
+    def test_skipped_regions_are_carried_over(self, lcd, presenter):
+        """飛ばしたフレームの領域は次のフレームの転送に含める"""
+        busy_with_first_frame(lcd, presenter)
+        presenter.present(frame(GREEN), [(0, 0, 4, 4)])
+        presenter.present(frame(BLUE), [(20, 10, 24, 14)])
+        lcd.release()
+        assert presenter.wait_idle(TIMEOUT)
+
+        image, regions = lcd.calls[-1]
+        covered = Image.new("1", (WIDTH, HEIGHT))
+        for region in regions:
+            covered.paste(1, region)
+        assert covered.getpixel((0, 0)) and covered.getpixel((3, 3))
+        assert covered.getpixel((20, 10)) and covered.getpixel((23, 13))
+        # 飛ばしたフレームの領域も新しいフレームの内容で送る
+        assert image.getpixel((0, 0)) == BLUE
+        assert image.getpixel((23, 13)) == BLUE
+
+    def test_skipped_full_frame_stays_full(self, lcd, presenter):
+        """飛ばしたフレームが全体更新なら、次のフレームも全体を送る"""
+        busy_with_first_frame(lcd, presenter)
+        presenter.present(frame(GREEN))
+        presenter.present(frame(BLUE), [(0, 0, 4, 4)])
+        lcd.release()
+        assert presenter.wait_idle(TIMEOUT)
+        assert lcd.calls[-1][1] is None
+
+    def test_stop_flushes(self, lcd, presenter):
+        """stop() は待っているフレームを送ってから止まる"""
+        busy_with_first_frame(lcd, presenter)
+        presenter.present(frame(GREEN))
+        threading.Timer(0.05, lcd.release).start()
+        presenter.stop(timeout=TIMEOUT)
+
+        assert len(lcd.calls) == 2
+        assert presenter.get_stats()['queue_depth'] == 0
+        with pytest.raises(RuntimeError):
+            presenter.present(frame(RED))
+
+    def test_stop_without_flush(self, lcd, presenter):
+        """stop(flush=False) は転送中のフレームだけ送り、残りは捨てる"""
+        busy_with_first_frame(lcd, presenter)
+        presenter.present(frame(GREEN))
+        threading.Timer(0.05, lcd.release).start()
+        presenter.stop(flush=False, timeout=TIMEOUT)
+
+        assert len(lcd.calls) == 1
+        assert presenter.queue_depth == 0
+
+    def test_worker_error_reaches_caller(self, lcd, presenter):
+        """転送スレッドの例外は次の present() で呼び出し側に届く"""
+        lcd.error = OSError("SPI write failed")
+        presenter.present(frame(RED))
+        assert presenter.wait_idle(TIMEOUT)
+
+        with pytest.raises(RuntimeError) as excinfo:
+            presenter.present(frame(GREEN))
+        assert excinfo.value.__cause__ is lcd.error
+
+    def test_queue_depth_stats(self, lcd):
+        """待ち行列の深さと最大値を記録する"""
+        presenter = AsyncPresenter(lcd, num_buffers=3)
+        with presenter:
+            busy_with_first_frame(lcd, presenter)
+            presenter.present(frame(GREEN))
+            presenter.present(frame(BLUE))
+            assert presenter.queue_depth == 2
+            assert presenter.get_stats()['queue_depth'] == 2
+            lcd.release()
+            assert presenter.wait_idle(TIMEOUT)
+
+        stats = presenter.get_stats()
+        assert stats['queue_depth'] == 0
+        assert stats['max_queue_depth'] == 2
+        assert stats['presented'] == 3
+        assert stats['skipped'] == 0
+        assert stats['avg_present_time_ms'] >= 0.0
+
+    def test_not_running(self, lcd):
+        """start() 前の present() や、バッファ数の不足はエラー"""
+        with pytest.raises(RuntimeError):
+            AsyncPresenter(lcd).present(frame(RED))
+        with pytest.raises(ValueError):
+            AsyncPresenter(lcd, num_buffers=1)
@@ -0,0 +1,164 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_10_console.py
+
+ScrollingConsole を、フレームメモリと縦スクロールを真似る
+偽のパネルで確認する。
+"""
+import numpy as np
+import pytest
+
+from pi0disp.disp.console import ScrollingConsole
+
+WIDTH, HEIGHT = 64, 80
+LINE_HEIGHT = 12
+
+
+class FakePanel:
+    """フレームメモリと VSCRDEF/VSCRSADD の表示を真似るディスプレイ"""
+
+    def __init__(self, scroll_axis="y"):
+        self.width = WIDTH
+        self.height = HEIGHT
+        self.scroll_axis = scroll_axis
+        self.rotation = 0 if scroll_axis == "y" else 90
+        self.memory = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+        self.area = (0, HEIGHT)
+        self.offset = 0
+        self.transferred_rows = 0
+
+    def set_scroll_area(self, start, end):
+        self.area = (start, end)
+        self.offset = 0
+
+    def scroll(self, offset):
+        start, end = self.area
+        self.offset = offset % (end - start)
+
+    def display_region(self, image, x0, y0, x1, y1):
+        self.memory[y0:y1, x0:x1] = np.asarray(image)[y0:y1, x0:x1]
+        self.transferred_rows += y1 - y0
+
+    def screen(self):
+        """パネルに見えている画像"""
+        start, end = self.area
+        rows = np.arange(HEIGHT)
+        inside = (rows >= start) & (rows < end)
+        rows[inside] = start + (rows[inside] - start + self.offset) % (
+            end - start
+        )
+        return self.memory[rows]
+
+
+def expected_screen(lines, top=0):
+    """スクロールせずに lines を書いた場合の画面"""
+    panel = FakePanel()
+    console = ScrollingConsole(panel, line_height=LINE_HEIGHT, top=top)
+    for line in lines:
+        console.write_line(line)
+    assert panel.offset == 0
+    return panel.screen()
+
+
+class TestScrollingConsole:
+    """ScrollingConsoleのテスト"""
+
+    def test_rows(self):
+        """コンソールは行の高さの整数倍に切り詰める"""
+        console = ScrollingConsole(FakePanel(), line_height=LINE_HEIGHT)
+        assert console.rows == HEIGHT // LINE_HEIGHT
+        assert console.lines_written == 0
+
+    def test_fills_without_scrolling(self):
+        """画面が埋まるまでは上から順に書き、スクロールしない"""
+        panel = FakePanel()
+        console = ScrollingConsole(panel, line_height=LINE_HEIGHT)
+        console.write("one\ntwo")
+        assert panel.offset == 0
+        assert console.lines_written == 2
+        assert panel.screen()[:LINE_HEIGHT].any()
+        assert panel.screen()[LINE_HEIGHT:2 * LINE_HEIGHT].any()
+        assert not panel.screen()[2 * LINE_HEIGHT:].any()
+
+    def test_wrap_around(self):
+        """埋まった後は最も古い行を書き換えてスクロールし、順番は保たれる"""
+        panel = FakePanel()
+        console = ScrollingConsole(panel, line_height=LINE_HEIGHT)
+        rows = console.rows
+        lines = [f"line {i}" for i in range(rows * 2 + 3)]
+        for line in lines:
+            console.write_line(line)
+            visible = lines[:lines.index(line) + 1][-rows:]
+            np.testing.assert_array_equal(
+                panel.screen(), expected_screen(visible)
+            )
+        assert panel.offset == (len(lines) - rows) * LINE_HEIGHT % (
+            rows * LINE_HEIGHT
+        )
+
+    def test_one_line_per_write(self):
+        """スクロール後も1行分だけ転送する"""
+        panel = FakePanel()
+        console = ScrollingConsole(panel, line_height=LINE_HEIGHT)
+        for i in range(console.rows):
+            console.write_line(str(i))
+        before = panel.transferred_rows
+        console.write_line("next")
+        assert panel.transferred_rows - before == LINE_HEIGHT
+
+    def test_reused_line_is_cleared(self):
+        """書き換える行は背景で消してから描く (長い行の残りが見えない)"""
+        panel = FakePanel()
+        console = ScrollingConsole(panel, line_height=LINE_HEIGHT)
+        rows = console.rows
+        lines = ["W" * 20] + ["x"] * rows  # 最初の長い行を短い行で上書きする
+        for line in lines:
+            console.write_line(line)
+        np.testing.assert_array_equal(
+            panel.screen(), expected_screen(lines[-rows:])
+        )
+
+    def test_clear(self):
+        """clear() で背景に戻り、スクロール位置も最初に戻る"""
+        panel = FakePanel()
+        console = ScrollingConsole(panel, line_height=LINE_HEIGHT)
+        for i in range(console.rows + 2):
+            console.write_line(str(i))
+        console.clear()
+        assert panel.offset == 0
+        assert console.lines_written == 0
+        assert not panel.screen().any()
+
+        console.write_line("again")
+        np.testing.assert_array_equal(
+            panel.screen(), expected_screen(["again"])
+        )
+
+    def test_fixed_lines_above(self):
+        """top より上の行はスクロールしない"""
+        panel = FakePanel()
+        panel.memory[:8] = 255  # タイトルバー
+        console = ScrollingConsole(panel, line_height=LINE_HEIGHT, top=8)
+        assert panel.area == (8, 8 + console.rows * LINE_HEIGHT)
+        for i in range(console.rows * 3):
+            console.write_line(str(i))
+        assert (panel.screen()[:8] == 255).all()
+
+    def test_wraps_long_text(self):
+        """画面幅を超える行は折り返す"""
+        console = ScrollingConsole(FakePanel(), line_height=LINE_HEIGHT)
+        console.write("0123456789" * 5)
+        assert console.lines_written > 1
+
+    def test_landscape_rotation_is_rejected(self):
+        """横向き (ST7789V の既定の回転90) ではエラー"""
+        with pytest.raises(ValueError, match="rotation"):
+            ScrollingConsole(FakePanel(scroll_axis="x"))
+
+    def test_too_small(self):
+        """1行に満たない範囲はエラー"""
+        with pytest.raises(ValueError):
+            ScrollingConsole(FakePanel(), line_height=LINE_HEIGHT,
+                             top=HEIGHT - 4)
@@ -0,0 +1,175 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_11_sprite_scene.py
+
+SpriteScene が z 順に描き、変化したスプライトだけを描き直し、
+汚れた領域だけ背景を戻すことを確認する。
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from pi0disp.utils.scene import SpriteScene
+from pi0disp.utils.sprite import Sprite
+
+WIDTH, HEIGHT = 160, 120
+BACKGROUND = (0, 0, 64)
+
+
+class Box(Sprite):
+    """塗りつぶした四角形のスプライト。描いた回数を数える"""
+
+    def __init__(self, x, y, size, color):
+        super().__init__(x, y, size, size)
+        self.color = color
+        self.draws = 0
+        self.updates = []
+
+    def update(self, delta_t):
+        self.updates.append(delta_t)
+
+    def draw(self, draw):
+        self.draws += 1
+        x0, y0, x1, y1 = self.bbox
+        draw.rectangle((x0, y0, x1 - 1, y1 - 1), fill=self.color)
+
+
+class FakeDisplay:
+    """display_regions() の呼び出しを記録する"""
+
+    def __init__(self):
+        self.calls = []
+
+    def display_regions(self, image, regions):
+        self.calls.append(list(regions))
+
+
+class FakePresenter:
+    """present() の呼び出しを記録する"""
+
+    def __init__(self):
+        self.calls = []
+
+    def present(self, frame, regions):
+        self.calls.append(list(regions))
+
+
+@pytest.fixture(params=[None, 8])
+def scene(request):
+    return SpriteScene(Image.new("RGB", (WIDTH, HEIGHT), BACKGROUND),
+                       tile_size=request.param, max_regions=4)
+
+
+def pixel(scene, x, y):
+    return scene.frame.getpixel((x, y))
+
+
+def covered(regions):
+    mask = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    for x0, y0, x1, y1 in regions:
+        mask[y0:y1, x0:x1] = True
+    return mask
+
+
+class TestSpriteScene:
+    """SpriteSceneのテスト"""
+
+    def test_z_order(self, scene):
+        """z の大きいスプライトを上に描く (追加の順によらない)"""
+        top = Box(10, 10, 20, (255, 0, 0))
+        bottom = Box(20, 20, 20, (0, 255, 0))
+        scene.add_sprite(top, z=2)
+        scene.add_sprite(bottom, z=1)
+        assert scene.sprites == [bottom, top]
+
+        scene.compose()
+        assert pixel(scene, 25, 25) == (255, 0, 0)  # 重なった部分
+        assert pixel(scene, 35, 35) == (0, 255, 0)
+
+        # 下のスプライトだけ動いても、重なりは上のスプライトが見える
+        bottom.x = 22
+        scene.compose()
+        assert pixel(scene, 25, 25) == (255, 0, 0)
+
+    def test_unchanged_sprites_are_skipped(self, scene):
+        """動かず mark_dirty() もされていないスプライトは描かない"""
+        moving = Box(10, 10, 10, (255, 0, 0))
+        still = Box(120, 80, 10, (0, 255, 0))
+        scene.add_sprite(moving)
+        scene.add_sprite(still)
+        scene.compose()
+        assert (moving.draws, still.draws) == (1, 1)
+
+        moving.x = 30
+        regions = scene.compose()
+        assert (moving.draws, still.draws) == (2, 1)
+        assert not covered(regions)[80:90, 120:130].any()
+
+        assert scene.compose() == []
+        assert (moving.draws, still.draws) == (2, 1)
+
+    def test_mark_dirty(self, scene):
+        """mark_dirty() すると動いていなくても描き直す"""
+        box = Box(40, 40, 10, (255, 0, 0))
+        scene.add_sprite(box)
+        scene.compose()
+
+        box.color = (255, 255, 0)
+        box.mark_dirty()
+        regions = scene.compose()
+        assert box.draws == 2
+        assert covered(regions)[40:50, 40:50].all()
+        assert pixel(scene, 45, 45) == (255, 255, 0)
+        assert scene.compose() == []
+
+    def test_only_dirty_areas_are_restored(self, scene):
+        """背景は汚れた領域だけ戻し、それ以外のフレームには触れない"""
+        box = Box(10, 10, 10, (255, 0, 0))
+        scene.add_sprite(box)
+        scene.compose()
+        scene.frame.putpixel((150, 110), (1, 2, 3))  # 目印
+
+        box.x = 60
+        regions = scene.compose()
+        assert not covered(regions)[110, 150]
+        assert pixel(scene, 150, 110) == (1, 2, 3)
+        # 前の位置は背景に戻る
+        assert pixel(scene, 15, 15) == BACKGROUND
+        assert pixel(scene, 65, 15) == (255, 0, 0)
+
+    def test_remove_sprite(self, scene):
+        """スプライトを外すと、その場所を背景に戻す"""
+        box = Box(10, 10, 10, (255, 0, 0))
+        scene.add_sprite(box)
+        scene.compose()
+        scene.remove_sprite(box)
+        assert scene.sprites == []
+        assert covered(scene.compose())[10:20, 10:20].all()
+        assert pixel(scene, 15, 15) == BACKGROUND
+
+    def test_update(self, scene):
+        """update() はすべてのスプライトの update() を呼ぶ"""
+        boxes = [Box(i * 20, 0, 10, (255, 0, 0)) for i in range(3)]
+        for box in boxes:
+            scene.add_sprite(box)
+        scene.update(0.5)
+        assert [box.updates for box in boxes] == [[0.5]] * 3
+
+    def test_render(self, scene):
+        """render() は変化した領域だけをディスプレイかプレゼンターに送る"""
+        lcd = FakeDisplay()
+        box = Box(10, 10, 10, (255, 0, 0))
+        scene.add_sprite(box)
+        regions = scene.render(lcd)
+        assert lcd.calls == [regions]
+
+        assert scene.render(lcd) == []
+        assert len(lcd.calls) == 1
+
+        presenter = FakePresenter()
+        box.x = 50
+        regions = scene.render(lcd, presenter)
+        assert presenter.calls == [regions]
+        assert len(lcd.calls) == 1
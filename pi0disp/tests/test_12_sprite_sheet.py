@@ -0,0 +1,174 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_12_sprite_sheet.py
+
+SpriteFrame.blit() を1ピクセルずつ合成した結果と比べ、
+SpriteCache の LRU とキーの扱いを確認する。
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from pi0disp.utils.sprite_sheet import (
+    SpriteCache, SpriteFrame, SpriteSheet, image_to_rgb565, new_rgb565_frame
+)
+
+WIDTH, HEIGHT = 20, 16
+SPRITE_W, SPRITE_H = 5, 4
+
+
+def sprite_image():
+    """ピクセルごとに色が違い、一部が透明なスプライト"""
+    rng = np.random.default_rng(0)
+    rgba = np.zeros((SPRITE_H, SPRITE_W, 4), dtype=np.uint8)
+    rgba[:, :, :3] = rng.integers(0, 32, (SPRITE_H, SPRITE_W, 3)) * 8
+    rgba[:, :, 3] = 255
+    rgba[0, 0, 3] = 0
+    rgba[1, 2, 3] = 127  # しきい値 (128) 未満は透明
+    rgba[3, 4, 3] = 128  # しきい値以上は描く
+    return Image.fromarray(rgba, "RGBA")
+
+
+def reference_blit(dst, frame, x, y):
+    """1ピクセルずつ合成した結果"""
+    out = dst.copy()
+    for sy in range(frame.height):
+        for sx in range(frame.width):
+            dx, dy = x + sx, y + sy
+            if 0 <= dx < WIDTH and 0 <= dy < HEIGHT and frame.mask[sy, sx]:
+                out[dy, dx] = frame.rgb565[sy, sx]
+    return out
+
+
+# 四辺と四隅、負の位置、完全に外れる位置
+POSITIONS = [
+    (7, 6), (-2, 6), (WIDTH - 3, 6), (7, -2), (7, HEIGHT - 2),
+    (-3, -2), (WIDTH - 2, HEIGHT - 1), (-SPRITE_W, 0), (WIDTH, 0),
+    (0, -SPRITE_H), (-100, -100),
+]
+
+
+class TestSpriteFrame:
+    """SpriteFrameのテスト"""
+
+    def test_mask(self):
+        """アルファがしきい値以上のピクセルだけ描く"""
+        frame = SpriteFrame(sprite_image())
+        assert not frame.opaque
+        assert not frame.mask[0, 0]
+        assert not frame.mask[1, 2]
+        assert frame.mask[3, 4]
+        assert frame.mask.sum() == SPRITE_W * SPRITE_H - 2
+
+    @pytest.mark.parametrize("x, y", POSITIONS)
+    def test_blit_clips_and_masks(self, x, y):
+        """画面の端で切り取り、透明なピクセルは下を残す"""
+        frame = SpriteFrame(sprite_image())
+        dst = new_rgb565_frame(WIDTH, HEIGHT, (0, 0, 255))
+        expected = reference_blit(dst, frame, x, y)
+
+        region = frame.blit(dst, x, y)
+        np.testing.assert_array_equal(dst, expected)
+
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + SPRITE_W, WIDTH), min(y + SPRITE_H, HEIGHT)
+        if x1 <= x0 or y1 <= y0:
+            assert region is None
+        else:
+            assert region == (x0, y0, x1, y1)
+
+    @pytest.mark.parametrize("x, y", POSITIONS[:7])
+    def test_blit_opaque(self, x, y):
+        """不透明なフレームは矩形をそのまま写す"""
+        frame = SpriteFrame(sprite_image().convert("RGB"))
+        assert frame.opaque
+        dst = new_rgb565_frame(WIDTH, HEIGHT)
+        expected = reference_blit(dst, frame, x, y)
+        frame.blit(dst, x, y)
+        np.testing.assert_array_equal(dst, expected)
+
+    @pytest.mark.parametrize("x, y", POSITIONS)
+    def test_paste_matches_blit(self, x, y):
+        """PIL 画像への paste() は blit() と同じ結果になる"""
+        frame = SpriteFrame(sprite_image())
+        image = Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 255))
+        dst = image_to_rgb565(image)
+
+        assert frame.paste(image, x, y) == frame.blit(dst, x, y)
+        np.testing.assert_array_equal(image_to_rgb565(image), dst)
+
+
+class TestSpriteSheet:
+    """SpriteSheetのテスト"""
+
+    def test_from_grid(self):
+        """シートを左から右、上から下の順に分ける"""
+        sheet_image = Image.new("RGB", (30, 20))
+        for i, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+            sheet_image.paste(color, ((i % 3) * 10, 0, (i % 3 + 1) * 10, 10))
+        sheet = SpriteSheet.from_grid(sheet_image, 10, 10)
+        assert len(sheet) == 6
+        assert sheet[1].image.getpixel((0, 0)) == (0, 255, 0)
+        assert len(SpriteSheet.from_grid(sheet_image, 10, 10, count=2)) == 2
+
+    def test_render(self):
+        """描画関数でフレームを作る (背景は透明)"""
+        sheet = SpriteSheet.render(
+            (8, 8), lambda draw, i: draw.rectangle((0, 0, i, i), fill="red"),
+            count=3
+        )
+        assert [f.mask.sum() for f in sheet.frames] == [1, 4, 9]
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            SpriteSheet([])
+
+
+class TestSpriteCache:
+    """SpriteCacheのテスト"""
+
+    @staticmethod
+    def factory(calls, key):
+        def make():
+            calls.append(key)
+            return SpriteSheet.from_images([Image.new("RGB", (2, 2))])
+        return make
+
+    def test_lru_eviction(self):
+        """上限を超えると最も長く使われていないシートを捨てる"""
+        cache = SpriteCache(max_entries=2)
+        calls = []
+        a = cache.get("a", self.factory(calls, "a"))
+        cache.get("b", self.factory(calls, "b"))
+        assert cache.get("a", self.factory(calls, "a")) is a  # a が新しくなる
+        cache.get("c", self.factory(calls, "c"))  # b を捨てる
+
+        assert cache.get("a", self.factory(calls, "a")) is a
+        cache.get("b", self.factory(calls, "b"))
+        assert calls == ["a", "b", "c", "b"]
+        assert cache.get_stats() == {'hits': 2, 'misses': 4, 'entries': 2}
+
+    def test_key_identity(self):
+        """等しいキーは同じシート、パラメータが1つでも違えば別のシート"""
+        cache = SpriteCache()
+        calls = []
+        key = ("ball", 10, (255, 0, 0))
+        sheet = cache.get(key, self.factory(calls, key))
+        # 別に作った等しいタプルでも同じシート
+        assert cache.get(("ball", 10, (255, 0, 0)),
+                         self.factory(calls, key)) is sheet
+        other = cache.get(("ball", 10, (255, 0, 1)),
+                          self.factory(calls, "other"))
+        assert other is not sheet
+        assert len(calls) == 2
+
+    def test_clear(self):
+        cache = SpriteCache()
+        calls = []
+        cache.get("a", self.factory(calls, "a"))
+        cache.clear()
+        cache.get("a", self.factory(calls, "a"))
+        assert calls == ["a", "a"]
+        assert cache.get_stats()['entries'] == 1
@@ -0,0 +1,153 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_13_asset_cache.py
+
+AssetCache のキー、ディスクのヒット・ミス、メモリマップの LRU、
+古い版のキャッシュの削除を確認する。
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pi0disp.utils.asset_cache import AssetCache
+
+SIZE = (32, 24)
+
+
+@pytest.fixture
+def source(tmp_path):
+    """元の画像ファイル"""
+    path = tmp_path / "image.png"
+    Image.new("RGB", (64, 48), (255, 0, 0)).save(path)
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AssetCache(tmp_path / "cache", max_mapped=2)
+
+
+def blobs(cache):
+    return sorted(p.name for p in cache.cache_dir.glob("*.npy"))
+
+
+def touch(path, delta_ns=10**9):
+    """更新時刻だけを変える"""
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + delta_ns))
+
+
+class TestAssetCache:
+    """AssetCacheのテスト"""
+
+    def test_load(self, cache, source):
+        """画面サイズの RGB565 (読み出し専用) を返す"""
+        buffer = cache.load(source, SIZE)
+        assert buffer.shape == (SIZE[1], SIZE[0])
+        assert buffer.dtype == np.dtype('>u2')
+        assert not buffer.flags.writeable
+        assert (buffer == 0xF800).all()
+
+    def test_disk_hit(self, cache, source, monkeypatch):
+        """2回目は変換せずにディスクのキャッシュを読む"""
+        cache.load(source, SIZE)
+        assert cache.get_stats() == {'hits': 0, 'misses': 1, 'mapped': 1}
+
+        other = AssetCache(cache.cache_dir)
+        monkeypatch.setattr(other, "_convert", pytest.fail)
+        assert (other.load(source, SIZE) == 0xF800).all()
+        assert other.get_stats() == {'hits': 1, 'misses': 0, 'mapped': 1}
+
+    def test_memory_hit(self, cache, source):
+        """メモリマップ済みなら同じ配列を返す"""
+        buffer = cache.load(source, SIZE)
+        assert cache.load(source, SIZE) is buffer
+        assert cache.get_stats()['hits'] == 1
+
+    @pytest.mark.parametrize("change", [
+        dict(size=(16, 12)), dict(fit_mode="cover"), dict(rotation=90),
+        dict(gamma=1.5),
+    ])
+    def test_parameters_are_keys(self, cache, source, change):
+        """出力サイズ・フィットモード・回転・ガンマが違えば別のキャッシュ"""
+        args = dict(size=SIZE, fit_mode="contain", rotation=0, gamma=1.0)
+        base = cache.make_key(source, **args)
+        args.update(change)
+        assert cache.make_key(source, **args) != base
+
+        cache.load(source, SIZE)
+        cache.load(source, **args)
+        assert cache.get_stats()['misses'] == 2
+        # 同じ版の元ファイルから作ったものは両方残す
+        assert len(blobs(cache)) == 2
+
+    def test_mtime_change(self, cache, source):
+        """元ファイルの更新時刻が変わると作り直す"""
+        key = cache.make_key(source, SIZE)
+        cache.load(source, SIZE)
+        touch(source)
+        assert cache.make_key(source, SIZE) != key
+        cache.load(source, SIZE)
+        assert cache.get_stats()['misses'] == 2
+
+    def test_content_change(self, cache, source):
+        """元ファイルの内容 (サイズ) が変わると新しい内容で作り直す"""
+        st = source.stat()
+        cache.load(source, SIZE)
+        Image.new("RGB", (64, 48), (0, 0, 255)).save(source, optimize=False,
+                                                     compress_level=0)
+        os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns))  # 時刻は同じ
+        assert source.stat().st_size != st.st_size
+        assert (cache.load(source, SIZE) == 0x001F).all()
+
+    def test_superseded_blobs_are_removed(self, cache, source):
+        """新しい版を変換したら、古い版のキャッシュは全て消す"""
+        cache.load(source, SIZE)
+        cache.load(source, SIZE, gamma=1.5)
+        old = blobs(cache)
+        assert len(old) == 2
+
+        touch(source)
+        cache.load(source, SIZE)
+        new = blobs(cache)
+        assert len(new) == 1
+        assert not set(new) & set(old)
+        # メモリマップも古い版は残さない
+        assert cache.get_stats()['mapped'] == 1
+
+    def test_other_files_are_kept(self, cache, source, tmp_path):
+        """別のファイルのキャッシュは消さない"""
+        other = tmp_path / "other.png"
+        Image.new("RGB", (64, 48), (0, 255, 0)).save(other)
+        cache.load(other, SIZE)
+        cache.load(source, SIZE)
+        touch(source)
+        cache.load(source, SIZE)
+        assert len(blobs(cache)) == 2
+
+    def test_max_mapped(self, cache, source):
+        """メモリマップは max_mapped 個まで、最も古いものから閉じる"""
+        a = cache.load(source, SIZE, gamma=1.0)
+        b = cache.load(source, SIZE, gamma=1.5)
+        assert cache.load(source, SIZE, gamma=1.0) is a  # a が新しくなる
+        cache.load(source, SIZE, gamma=0.5)  # b を閉じる
+        assert cache.get_stats()['mapped'] == 2
+
+        assert cache.load(source, SIZE, gamma=1.0) is a
+        reloaded = cache.load(source, SIZE, gamma=1.5)
+        assert reloaded is not b  # ディスクから開き直す
+        np.testing.assert_array_equal(reloaded, b)
+        assert cache.get_stats()['misses'] == 3
+
+    def test_clear(self, cache, source):
+        """clear() でキャッシュを全て消す"""
+        cache.load(source, SIZE)
+        cache.clear()
+        assert blobs(cache) == []
+        assert cache.get_stats()['mapped'] == 0
+        cache.load(source, SIZE)
+        assert cache.get_stats()['misses'] == 2
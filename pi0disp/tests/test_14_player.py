@@ -0,0 +1,146 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+tests/test_14_player.py
+
+AnimationPlayer を合成したアニメーションGIFと偽のディスプレイで確認する。
+偽のディスプレイは受け取った領域だけを画面に写すので、
+フレームを飛ばしたときに変化領域が引き継がれているかが分かる。
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pi0disp.utils.player import AnimationPlayer
+
+WIDTH, HEIGHT = 48, 32
+FRAMES = 12
+BOX = 8
+
+
+class FakeDisplay:
+    """display_rgb565() の領域だけを画面に写すディスプレイ"""
+
+    width = WIDTH
+    height = HEIGHT
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.screen = np.zeros((HEIGHT, WIDTH), dtype='>u2')
+        self.calls = []  # (フレームのコピー, 領域)
+
+    def display_rgb565(self, buffer, regions=None):
+        if self.delay:
+            time.sleep(self.delay)
+        if regions is None:
+            self.screen[...] = buffer
+        else:
+            for x0, y0, x1, y1 in regions:
+                self.screen[y0:y1, x0:x1] = buffer[y0:y1, x0:x1]
+        self.calls.append((buffer.copy(), regions))
+
+
+@pytest.fixture
+def gif(tmp_path):
+    """四角形が右下へ動くアニメーションGIF (すべてのフレームが異なる)"""
+    frames = []
+    for i in range(FRAMES):
+        im = Image.new("RGB", (WIDTH, HEIGHT), (0, 0, 0))
+        x, y = i * 3, i * 2
+        im.paste((255, 255, 255), (x, y, x + BOX, y + BOX))
+        frames.append(im)
+    path = tmp_path / "anime.gif"
+    frames[0].save(path, save_all=True, append_images=frames[1:],
+                   duration=20, loop=0, optimize=False)
+    return path
+
+
+def player(lcd, path, **kwargs):
+    return AnimationPlayer(lcd, path, tile_size=8, **kwargs)
+
+
+class TestAnimationPlayer:
+    """AnimationPlayerのテスト"""
+
+    def test_plays_every_frame(self, gif):
+        """すべてのフレームを順に表示し、2枚目からは変化した領域だけ送る"""
+        lcd = FakeDisplay()
+        stats = player(lcd, gif, fps=50, queue_size=FRAMES).play()
+
+        assert stats['decoded'] == FRAMES
+        assert stats['presented'] == FRAMES
+        assert stats['dropped'] == 0
+        assert lcd.calls[0][1] is None
+        for (prev, _), (buffer, regions) in zip(lcd.calls, lcd.calls[1:]):
+            assert regions
+            changed = np.zeros((HEIGHT, WIDTH), dtype=bool)
+            for x0, y0, x1, y1 in regions:
+                changed[y0:y1, x0:x1] = True
+            assert not ((buffer != prev) & ~changed).any()
+        assert stats['pixels_sent'] < FRAMES * WIDTH * HEIGHT
+        np.testing.assert_array_equal(lcd.screen, lcd.calls[-1][0])
+
+    def test_bounded_queue(self, gif):
+        """デコードは queue_size 枚まで先行し、すべてのフレームが届く"""
+        lcd = FakeDisplay(delay=0.005)
+        p = player(lcd, gif, fps=1000, queue_size=1)
+        leads = []
+        original = lcd.display_rgb565
+
+        def display_rgb565(buffer, regions=None):
+            s = p.get_stats()
+            leads.append(s['decoded'] - s['presented'] - s['dropped'])
+            original(buffer, regions)
+
+        lcd.display_rgb565 = display_rgb565
+        stats = p.play()
+        # 表示中の1枚 + 待ち行列の1枚 + put() で待つ1枚
+        assert max(leads) <= 3
+        assert stats['decoded'] == FRAMES
+        assert stats['presented'] + stats['dropped'] == FRAMES
+
+    def test_dropped_frames_carry_regions(self, gif):
+        """表示が遅れたフレームは飛ばし、その変化領域を次のフレームで送る"""
+        lcd = FakeDisplay(delay=0.03)
+        stats = player(lcd, gif, fps=100, queue_size=FRAMES).play()
+
+        assert stats['dropped'] > 0
+        assert stats['presented'] + stats['dropped'] == FRAMES
+        assert len(lcd.calls) == stats['presented']
+        # 領域だけを写した画面が、最後のフレームと一致する
+        last = lcd.calls[-1][0]
+        np.testing.assert_array_equal(lcd.screen, last)
+
+    def test_end_of_stream(self, gif):
+        """最後まで再生したら play() が戻り、スレッドも止まる"""
+        lcd = FakeDisplay()
+        p = player(lcd, gif, fps=500, loops=2)
+        stats = p.play()
+        assert stats['decoded'] == FRAMES * 2
+        assert p._thread is None
+        assert not any(t.name == "AnimationPlayer"
+                       for t in threading.enumerate())
+
+    def test_stop(self, gif):
+        """loops=0 (繰り返し) でも stop() で終わる"""
+        lcd = FakeDisplay()
+        p = player(lcd, gif, fps=100, loops=0)
+        threading.Timer(0.2, p.stop).start()
+        stats = p.play()
+        assert stats['presented'] > 0
+        assert p._thread is None
+
+    def test_decode_error(self, tmp_path):
+        """デコードのエラーは play() の呼び出し側に届く"""
+        path = tmp_path / "broken.gif"
+        path.write_bytes(b"not a gif")
+        with pytest.raises(RuntimeError):
+            player(FakeDisplay(), path).play()
+
+    def test_queue_size(self, gif):
+        with pytest.raises(ValueError):
+            player(FakeDisplay(), gif, queue_size=0)
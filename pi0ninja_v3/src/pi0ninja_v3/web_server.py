@@ -21,7 +21,10 @@ from dotenv import load_dotenv, set_key
 from pi0ninja_v3.movement_recorder import ServoController, load_movements
 from pi0disp.disp.st7789v import ST7789V
 from pi0buzzer.driver import Buzzer
+from vl53l0x_pigpio.aio import AsyncVL53L0X
 from vl53l0x_pigpio.driver import VL53L0X
+from vl53l0x_pigpio.filters import make_filter
+from vl53l0x_pigpio.sampler import DistanceSampler
 from pi0ninja_v3.facial_expressions import AnimatedFaces
 from pi0ninja_v3.robot_sound import RobotSoundPlayer
 from pi0ninja_v3.ninja_agent import NinjaAgent
@@ -52,7 +55,17 @@ async def lifespan(app: FastAPI):
 
     controllers["servo"] = ServoController()
     controllers["display"] = ST7789V()
-    controllers["distance_sensor"] = VL53L0X(pi)
+    # fast_init restores the cached SPAD/calibration state (full init on first run)
+    controllers["distance_sensor"] = VL53L0X(pi, fast_init=True)
+    # The sampler owns the sensor: readers get the latest value without I2C
+    controllers["distance_sampler"] = DistanceSampler(
+        controllers["distance_sensor"],
+        filter=make_filter("median", controllers["distance_sensor"].offset_mm),
+    )
+    controllers["distance_sampler"].start()
+    # Async view of the same sampler for the websocket (never blocks the loop)
+    controllers["distance_aio"] = AsyncVL53L0X(controllers["distance_sampler"])
+    await controllers["distance_aio"].start()
     controllers["faces"] = AnimatedFaces(controllers["display"])
 
     try:
@@ -86,6 +99,10 @@ async def lifespan(app: FastAPI):
         controllers["display"].close()
     if controllers.get("buzzer"):
         controllers["buzzer"].off()
+    if controllers.get("distance_aio"):
+        await controllers["distance_aio"].stop()
+    if controllers.get("distance_sampler"):
+        controllers["distance_sampler"].stop()
     if controllers.get("distance_sensor"):
         controllers["distance_sensor"].close()
     pi.stop()
@@ -239,8 +256,13 @@ def play_emotion_sound(emotion_name: str, request: Request):
 
 @api_router.get("/sensor/distance")
 def get_distance(request: Request):
-    sensor = request.app.state.controllers.get("distance_sensor")
-    return {"distance_mm": sensor.get_range()}
+    sampler = request.app.state.controllers.get("distance_sampler")
+    if not sampler:
+        raise HTTPException(status_code=503, detail="Distance sensor not available")
+    sample = sampler.latest
+    if sample is None:
+        raise HTTPException(status_code=503, detail="No distance sample yet")
+    return {"distance_mm": sample.distance_mm}
 
 # --- FastAPI App Initialization ---
 app = FastAPI(lifespan=lifespan)
@@ -257,14 +279,13 @@ async def read_root(request: Request):
 @app.websocket("/ws/distance")
 async def websocket_distance_endpoint(websocket: WebSocket):
     await websocket.accept()
-    sensor = websocket.app.state.controllers.get("distance_sensor")
+    sensor = websocket.app.state.controllers.get("distance_aio")
     if not sensor:
         await websocket.close(code=1011, reason="Distance sensor not available")
         return
     try:
-        while True:
-            await websocket.send_json({"distance_mm": sensor.get_range()})
-            await asyncio.sleep(0.2)
+        async for sample in sensor.stream(5):
+            await websocket.send_json({"distance_mm": sample.distance_mm})
     except WebSocketDisconnect:
         print("Client disconnected from distance websocket")
 
@@ -2,9 +2,13 @@
 # (c) 2025 Yoichi Tanibayashi
 #
 from importlib.metadata import version
+from .aio import AsyncVL53L0X
 from .click_utils import click_common_opts
 from .driver import VL53L0X
 from .my_logger import get_logger
+from .recorder import ReplaySampler, SampleRecorder
+from .sampler import DistanceSampler, Sample
+from .sensor_array import VL53L0XArray
 
 if __package__:
     __version__ = version(__package__)
@@ -14,7 +18,13 @@ else:
     
 __all__ = [
     "__version__",
+    "AsyncVL53L0X",
     "click_common_opts",
+    "DistanceSampler",
     "get_logger",
-    "VL53L0X"
+    "ReplaySampler",
+    "Sample",
+    "SampleRecorder",
+    "VL53L0X",
+    "VL53L0XArray",
 ]
@@ -4,11 +4,17 @@
 import time
 
 import click
+import numpy as np
 import pigpio
 from pathlib import Path
 
 from . import __version__, click_common_opts, get_logger, VL53L0X
-from .config_manager import get_default_config_filepath, save_config
+from .config_manager import get_default_config_filepath, update_config
+from .filters import FILTER_NAMES, make_filter
+from .profiles import RANGING_PROFILES
+from .recorder import DEFAULT_CHUNK_SIZE, ReplaySampler, SampleRecorder, load_recording
+from .sampler import DistanceSampler, Sample
+from .sensor_array import VL53L0XArray
 
 
 @click.group(
@@ -22,8 +28,23 @@ VL53L0X driver CLI
     default=str(get_default_config_filepath()), show_default=True,
     help="Path to the configuration file"
 )
+@click.option(
+    "--gpio1-pin", "-g", type=int, default=None,
+    help="GPIO pin (BCM) connected to the sensor's GPIO1 interrupt output"
+)
+@click.option(
+    "--fast-init", "-F", is_flag=True, default=False,
+    help="restore the cached SPAD/calibration state instead of a full init"
+)
+@click.option(
+    "--profile", "-P", type=click.Choice(list(RANGING_PROFILES)), default=None,
+    help="ranging profile (timing budget, signal rate limit, VCSEL periods)"
+)
 @click_common_opts(ver_str=__version__)
-def cli(ctx: click.Context, debug: bool, config_file: str) -> None:
+def cli(
+    ctx: click.Context, debug: bool, config_file: str, gpio1_pin: int | None,
+    fast_init: bool, profile: str | None
+) -> None:
     """VL53L0X距離センサーのPythonドライバー用CLIツール。"""
     cmd_name = ctx.info_name
     subcmd_name = ctx.invoked_subcommand
@@ -33,7 +54,12 @@ def cli(ctx: click.Context, debug: bool, config_file: str) -> None:
     __log.debug("cmd_name=%a, subcmd_name=%a", cmd_name, subcmd_name)
     
     # Pass config_file to the context object for subcommands
-    ctx.obj = {"config_file": Path(config_file)}
+    ctx.obj = {
+        "config_file": Path(config_file),
+        "gpio1_pin": gpio1_pin,
+        "fast_init": fast_init,
+        "profile": profile,
+    }
 
     if subcmd_name is None:
         print(f"{ctx.get_help()}")
@@ -66,7 +92,10 @@ def get(
         raise click.ClickException("cannnto connect pigpiod")
 
     try:
-        with VL53L0X(pi, debug=debug, config_file_path=ctx.obj["config_file"]) as sensor:
+        with VL53L0X(pi, debug=debug, config_file_path=ctx.obj["config_file"],
+                     gpio1_pin=ctx.obj["gpio1_pin"],
+                     fast_init=ctx.obj["fast_init"],
+                     profile=ctx.obj["profile"]) as sensor:
             for i in range(count):
                 distance: int = sensor.get_range()
                 if distance > 0:
@@ -78,40 +107,423 @@ def get(
         pi.stop()
 
 
+def _measure_performance(sensor: VL53L0X, count: int) -> tuple[float, float]:
+    """count回測定し、(合計時間[秒], 測定値の標準偏差[mm]) を返します。"""
+    start_time = time.perf_counter()
+    samples = [sensor.get_range() for _ in range(count)]
+    total_time = time.perf_counter() - start_time
+    return total_time, float(np.std(samples))
+
+
 @cli.command()
 @click.option(
     "--count", "-c", type=int, default=100, show_default=True, help="count"
 )
+@click.option(
+    "--mode", "-m", type=click.Choice(["single", "continuous", "timed", "all"]),
+    default="all", show_default=True,
+    help="ranging mode (single: single-shot, continuous: back-to-back, "
+    "timed: timed continuous)"
+)
+@click.option(
+    "--period", "-p", type=int, default=40, show_default=True,
+    help="measurement period for the timed mode [ms]"
+)
+@click.option(
+    "--each-profile", "-E", is_flag=True, default=False,
+    help="repeat the benchmark for every ranging profile"
+)
 @click_common_opts(ver_str=__version__)
-def performance(ctx: click.Context, count: int, debug: bool) -> None:
+def performance(
+    ctx: click.Context, count: int, mode: str, period: int, each_profile: bool,
+    debug: bool
+) -> None:
     """VL53L0Xセンサーの測定パフォーマンスを評価します。"""
     __log = get_logger(__name__, debug)
-    __log.debug("count=%s", count)
+    __log.debug(
+        "count=%s, mode=%s, period=%s, each_profile=%s",
+        count, mode, period, each_profile
+    )
 
     cmd_name = ctx.command.name
     __log.debug("cmd_name=%a", cmd_name)
-    
+
+    modes = ["single", "continuous", "timed"] if mode == "all" else [mode]
+    profiles = list(RANGING_PROFILES) if each_profile else [ctx.obj["profile"]]
+
     pi = pigpio.pi()
     if not pi.connected:
         raise click.ClickException("cannnto connect pigpiod")
 
     try:
-        with VL53L0X(pi, debug=debug, config_file_path=ctx.obj["config_file"]) as sensor:
-            click.echo(f"{count}回の距離測定パフォーマンスを評価します...")
-            start_time = time.perf_counter()
-            for _ in range(count):
-                sensor.get_range()
-            end_time = time.perf_counter()
+        with VL53L0X(pi, debug=debug, config_file_path=ctx.obj["config_file"],
+                     gpio1_pin=ctx.obj["gpio1_pin"],
+                     fast_init=ctx.obj["fast_init"],
+                     profile=ctx.obj["profile"]) as sensor:
+            for profile, m in ((p, m) for p in profiles for m in modes):
+                label = m
+                if profile is not None:
+                    if sensor.profile != profile:
+                        sensor.set_profile(profile)
+                    label = f"{profile}/{m}"
+                click.echo(f"[{label}] {count}回の距離測定パフォーマンスを評価します...")
+                if m == "continuous":
+                    sensor.start_continuous()
+                elif m == "timed":
+                    # 間隔はタイミングバジェットより長くする
+                    budget_ms = sensor.measurement_timing_budget_us // 1000 + 1
+                    sensor.start_continuous(max(period, budget_ms))
+                try:
+                    total_time, noise = _measure_performance(sensor, count)
+                finally:
+                    if m != "single":
+                        sensor.stop_continuous()
 
-            total_time = end_time - start_time
-            avg_time_per_measurement = total_time / count
-            measurements_per_second = count / total_time
+                avg_time_per_measurement = total_time / count
+                measurements_per_second = count / total_time
 
+                click.echo("---")
+                click.echo(f"合計時間: {total_time:.4f} 秒")
+                click.echo(f"1回あたりの平均時間: {avg_time_per_measurement * 1000:.4f} ms")
+                click.echo(f"1秒あたりの測定回数: {measurements_per_second:.2f} 回/秒")
+                click.echo(f"測定値の標準偏差: {noise:.2f} mm")
+                click.echo("---")
+    finally:
+        pi.stop()
+
+
+def _load_trace(
+    path: Path
+) -> tuple[np.ndarray | None, np.ndarray, np.ndarray | None]:
+    """
+    記録した測定値を読み込み、(時刻 [秒] または None, 距離 [mm],
+    レンジステータスまたは None) を返します。
+    record コマンドの記録 (.npy、以前の .npz)、距離の1次元配列の .npy、
+    timestamp, distance_mm 列を持つCSVに対応します。
+    """
+    if path.suffix in (".npy", ".npz"):
+        try:
+            recording = load_recording(path)
+        except ValueError:
+            return None, np.load(path), None
+        return recording["timestamp"], recording["distance_mm"], recording["status"]
+    data = np.genfromtxt(path, delimiter=",", names=True)
+    timestamps = data["timestamp"] if "timestamp" in data.dtype.names else None
+    return timestamps, data["distance_mm"], None
+
+
+def _save_trace(path: Path, timestamps: np.ndarray, distances: np.ndarray) -> None:
+    """測定値を timestamp, distance_mm 列のCSVで保存します。"""
+    np.savetxt(
+        path, np.column_stack([timestamps, distances]), delimiter=",",
+        header="timestamp,distance_mm", comments="", fmt=["%.6f", "%d"]
+    )
+
+
+@cli.command(name="bench-filter")
+@click.option(
+    "--trace", "-t", type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="recorded trace (.npy from record, .npy of distances or CSV with "
+    "timestamp,distance_mm); "
+    "measure live if omitted"
+)
+@click.option(
+    "--count", "-c", type=int, default=300, show_default=True,
+    help="number of samples measured live"
+)
+@click.option(
+    "--save", "-s", type=click.Path(dir_okay=False), default=None,
+    help="save the live samples as a CSV trace"
+)
+@click_common_opts(ver_str=__version__)
+def bench_filter(
+    ctx: click.Context, trace: str | None, count: int, save: str | None,
+    debug: bool
+) -> None:
+    """測定値のフィルターを比較します。"""
+    __log = get_logger(__name__, debug)
+    __log.debug("trace=%s, count=%s, save=%s", trace, count, save)
+
+    offset_mm = 0
+    statuses = None
+    if trace:
+        timestamps, distances, statuses = _load_trace(Path(trace))
+    else:
+        pi = pigpio.pi()
+        if not pi.connected:
+            raise click.ClickException("cannot connect to pigpiod")
+        try:
+            with VL53L0X(pi, debug=debug, config_file_path=ctx.obj["config_file"],
+                         gpio1_pin=ctx.obj["gpio1_pin"],
+                     fast_init=ctx.obj["fast_init"],
+                     profile=ctx.obj["profile"]) as sensor:
+                offset_mm = sensor.offset_mm
+                click.echo(f"{count}回測定します...")
+                timestamps = np.empty(count)
+                distances = np.empty(count, dtype=np.int32)
+                sensor.start_continuous()
+                try:
+                    for i in range(count):
+                        distances[i] = sensor.read_continuous()
+                        timestamps[i] = time.monotonic()
+                finally:
+                    sensor.stop_continuous()
+        finally:
+            pi.stop()
+        if save:
+            _save_trace(Path(save), timestamps, distances)
+            click.echo(f"測定値を {save} に保存しました。")
+
+    click.echo(f"サンプル数: {len(distances)}")
+    click.echo(f"{'filter':<12}{'batch[us]':>11}{'stream[us]':>12}"
+               f"{'std[mm]':>9}{'jitter[mm]':>12}{'rejected':>10}")
+    for name in FILTER_NAMES:
+        batch_filter = make_filter(name, offset_mm)
+        start = time.perf_counter()
+        out = batch_filter.apply(distances, timestamps, statuses)
+        batch_us = (time.perf_counter() - start) / len(distances) * 1e6
+
+        stream_filter = make_filter(name, offset_mm)
+        ts = [None] * len(distances) if timestamps is None else timestamps.tolist()
+        st = [None] * len(distances) if statuses is None else [
+            None if s < 0 else s for s in statuses.tolist()
+        ]
+        start = time.perf_counter()
+        for value, t, status in zip(distances.tolist(), ts, st):
+            stream_filter.update(value, t, status)
+        stream_us = (time.perf_counter() - start) / len(distances) * 1e6
+
+        valid = out[~np.isnan(out)]
+        std = float(np.std(valid)) if len(valid) else float("nan")
+        # 隣り合うサンプルの差のばらつき (小さいほど滑らか)
+        jitter = float(np.std(np.diff(valid))) if len(valid) > 1 else float("nan")
+        click.echo(f"{name:<12}{batch_us:>11.2f}{stream_us:>12.2f}"
+                   f"{std:>9.2f}{jitter:>12.2f}{batch_filter.rejected:>10}")
+
+
+@cli.command(help="""
+record distance samples with the range status to a .npy file""")
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False),
+    default="vl53l0x_record.npy", show_default=True, help="output file (.npy)"
+)
+@click.option(
+    "--count", "-c", type=int, default=0, show_default=True,
+    help="number of samples (0: until Ctrl-C)"
+)
+@click.option(
+    "--period", "-p", type=int, default=0, show_default=True,
+    help="measurement period [ms] (0: back-to-back)"
+)
+@click.option(
+    "--chunk-size", "-k", type=int, default=DEFAULT_CHUNK_SIZE, show_default=True,
+    help="samples per chunk appended to the file"
+)
+@click_common_opts(ver_str=__version__)
+def record(
+    ctx: click.Context, output: str, count: int, period: int, chunk_size: int,
+    debug: bool
+) -> None:
+    """測定値をファイルに記録します。"""
+    __log = get_logger(__name__, debug)
+    __log.debug(
+        "output=%s, count=%s, period=%s, chunk_size=%s",
+        output, count, period, chunk_size
+    )
+
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise click.ClickException("cannot connect to pigpiod")
+
+    try:
+        with VL53L0X(pi, debug=debug, config_file_path=ctx.obj["config_file"],
+                     gpio1_pin=ctx.obj["gpio1_pin"],
+                     fast_init=ctx.obj["fast_init"],
+                     profile=ctx.obj["profile"]) as sensor, \
+                SampleRecorder(output, chunk_size, debug=debug) as recorder:
+            click.echo("記録しています... (Ctrl-C で終了)")
+            with DistanceSampler(sensor, period_ms=period, recorder=recorder, debug=debug):
+                try:
+                    while count == 0 or recorder.count < count:
+                        time.sleep(0.5)
+                        click.echo(f"\r{recorder.count} 件", nl=False)
+                except KeyboardInterrupt:
+                    pass
+            click.echo()
+            click.echo(f"{recorder.count} 件を {output} に保存しました。")
+    finally:
+        pi.stop()
+
+
+@cli.command(help="""
+replay a recording through a filter, like a live sampler""")
+@click.argument("recording", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--filter", "-f", "filter_name", type=click.Choice(FILTER_NAMES),
+    default="none", show_default=True, help="filter applied to the samples"
+)
+@click.option(
+    "--speed", "-s", type=float, default=1.0, show_default=True,
+    help="playback speed (0: as fast as possible)"
+)
+@click_common_opts(ver_str=__version__)
+def replay(
+    ctx: click.Context, recording: str, filter_name: str, speed: float,
+    debug: bool
+) -> None:
+    """記録した測定値を再生します。"""
+    __log = get_logger(__name__, debug)
+    __log.debug("recording=%s, filter=%s, speed=%s", recording, filter_name, speed)
+
+    sampler = ReplaySampler(
+        recording, speed=speed, filter=make_filter(filter_name), debug=debug
+    )
+    start = None
+
+    def echo_sample(sample: Sample) -> None:
+        nonlocal start
+        if start is None:
+            start = sample.timestamp
+        raw = "" if sample.raw_mm is None else f" (raw {sample.raw_mm} mm)"
+        click.echo(f"{sample.timestamp - start:9.3f}s: {sample.distance_mm} mm{raw}")
+
+    sampler.add_listener(echo_sample)
+    with sampler:
+        try:
+            sampler.wait()
+        except KeyboardInterrupt:
+            pass
+
+    stats = sampler.get_stats()
+    click.echo("---")
+    click.echo(f"再生: {stats['replayed']} 件, 公開: {stats['samples']} 件, "
+               f"無効値: {stats['rejected']} 件")
+
+
+def _parse_pins(value: str) -> list[int]:
+    """ "17,27,22" のようなピン番号のリストを解析します。"""
+    try:
+        return [int(v) for v in value.split(",") if v.strip()]
+    except ValueError as e:
+        raise click.BadParameter(f"{value!r}: {e}") from e
+
+
+@cli.command(help="""
+get distances from multiple sensors""")
+@click.option(
+    "--xshut-pins", "-x", type=str, required=True,
+    help="comma-separated GPIO pins (BCM) connected to XSHUT, e.g. 17,27,22"
+)
+@click.option(
+    "--count", "-c", type=int, default=10, show_default=True, help="count"
+)
+@click.option(
+    "--period", "-p", type=int, default=None,
+    help="staggered continuous ranging period [ms] "
+    "(default: the shortest without overlap)"
+)
+@click.option(
+    "--round-robin", "-r", is_flag=True, default=False,
+    help="measure one sensor at a time with single-shot ranging"
+)
+@click_common_opts(ver_str=__version__)
+def multi(
+    ctx: click.Context, xshut_pins: str, count: int, period: int | None,
+    round_robin: bool, debug: bool
+) -> None:
+    """複数のセンサーで距離を測定します。"""
+    __log = get_logger(__name__, debug)
+    pins = _parse_pins(xshut_pins)
+    __log.debug("pins=%s, count=%s, period=%s", pins, count, period)
+
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise click.ClickException("cannot connect to pigpiod")
+
+    try:
+        with VL53L0XArray(
+                pi, pins, config_file_path=ctx.obj["config_file"],
+                fast_init=ctx.obj["fast_init"], profile=ctx.obj["profile"],
+                debug=debug
+        ) as sensors:
+            if not round_robin:
+                sensors.start(period)
+                click.echo(f"連続測距: 間隔 {sensors.period_ms} ms")
+            for i in range(count):
+                frame = sensors.poll()
+                click.echo(f"{i + 1}/{count}: " + " ".join(f"{d:5d}" for d in frame) + " mm")
+
+            stats = sensors.get_stats()
             click.echo("---")
-            click.echo(f"合計時間: {total_time:.4f} 秒")
-            click.echo(f"1回あたりの平均時間: {avg_time_per_measurement * 1000:.4f} ms")
-            click.echo(f"1秒あたりの測定回数: {measurements_per_second:.2f} 回/秒")
-            click.echo("---")
+            click.echo(f"1秒あたりのポーリング回数: {stats['polls_per_sec']:.2f} 回/秒")
+            click.echo(f"1秒あたりの測定回数 (全センサー): {stats['samples_per_sec']:.2f} 回/秒")
+            click.echo(f"エラー回数: {stats['errors']}")
+    except RuntimeError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        pi.stop()
+
+
+class _CountingPi:
+    """pigpio.pi のI2C呼び出し (pigpiodとの往復) を数えるラッパー。"""
+
+    def __init__(self, pi: pigpio.pi) -> None:
+        self._pi = pi
+        self.i2c_calls = 0
+
+    def __getattr__(self, name: str):  # type: ignore[no-untyped-def]
+        attr = getattr(self._pi, name)
+        if not name.startswith("i2c_") or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):  # type: ignore[no-untyped-def]
+            self.i2c_calls += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+@cli.command(name="bench-init")
+@click.option(
+    "--count", "-c", type=int, default=5, show_default=True,
+    help="number of initializations per mode"
+)
+@click_common_opts(ver_str=__version__)
+def bench_init(ctx: click.Context, count: int, debug: bool) -> None:
+    """センサーの初期化時間を、初期化方法ごとに比較します。"""
+    __log = get_logger(__name__, debug)
+    __log.debug("count=%s", count)
+
+    modes = [
+        # (名前, fast_init, batch_writes)
+        ("full/byte", False, False),
+        ("full/batch", False, True),
+        ("fast/batch", True, True),
+    ]
+
+    pi = pigpio.pi()
+    if not pi.connected:
+        raise click.ClickException("cannot connect to pigpiod")
+
+    try:
+        click.echo(f"{'mode':<12}{'avg[ms]':>9}{'min[ms]':>9}{'i2c calls':>11}")
+        for name, fast_init, batch_writes in modes:
+            times = []
+            calls = 0
+            for _ in range(count):
+                counting_pi = _CountingPi(pi)
+                start = time.perf_counter()
+                sensor = VL53L0X(
+                    counting_pi, debug=debug,  # type: ignore[arg-type]
+                    config_file_path=ctx.obj["config_file"],
+                    fast_init=fast_init, batch_writes=batch_writes
+                )
+                times.append(time.perf_counter() - start)
+                calls = counting_pi.i2c_calls
+                __log.debug("%s: init_mode=%s", name, sensor.init_mode)
+                sensor.close()
+            click.echo(f"{name:<12}{np.mean(times) * 1000:>9.1f}"
+                       f"{np.min(times) * 1000:>9.1f}{calls:>11}")
     finally:
         pi.stop()
 
@@ -144,7 +556,9 @@ def calibrate(ctx: click.Context, distance: int, count: int, output_file: str, d
 
     try:
         with VL53L0X(
-                pi, debug=debug, config_file_path=ctx.obj["config_file"]
+                pi, debug=debug, config_file_path=ctx.obj["config_file"],
+                gpio1_pin=ctx.obj["gpio1_pin"],
+                fast_init=ctx.obj["fast_init"], profile=ctx.obj["profile"]
         ) as sensor:
             click.echo(f"{distance}mmの距離にターゲットを置いてください。")
             click.echo("準備ができたらEnterキーを押してください...")
@@ -155,9 +569,8 @@ def calibrate(ctx: click.Context, distance: int, count: int, output_file: str, d
             click.echo(f"測定結果から計算されたオフセット値: {offset} mm")
             click.echo("この値を set_offset() に設定して使用してください。")
 
-            # オフセット値をファイルに保存
-            config_data = {"offset_mm": offset}
-            save_config(output_file_path, config_data)
+            # オフセット値をファイルに保存 (初期化キャッシュなど他の項目は残す)
+            update_config(output_file_path, {"offset_mm": offset})
             click.echo(f"オフセット値を {output_file_path} に保存しました。")
 
     finally:
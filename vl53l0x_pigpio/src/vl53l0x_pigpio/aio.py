@@ -0,0 +1,206 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+asyncio から VL53L0X を使うためのラッパー。
+
+ドライバーはブロッキング (I2Cの往復と測定完了の待ち) なので、
+イベントループから直接呼ぶと、測定のたびに他の処理 (HTTPなど) が止まります。
+`AsyncVL53L0X` は測定を `DistanceSampler` のスレッドに任せ、
+新しいサンプルを `loop.call_soon_threadsafe()` でイベントループに渡します。
+ループ側はサンプルを待つだけなので、ブロックしません。
+"""
+import asyncio
+from collections.abc import AsyncIterator
+
+from .driver import VL53L0X
+from .filters import FilterPipeline
+from .my_logger import get_logger
+from .sampler import DistanceSampler, Sample
+
+STREAM_QUEUE_SIZE = 64  # stream() で溜めておくサンプル数 (古いものから捨てる)
+
+
+class AsyncVL53L0X:
+    """
+    VL53L0X の非同期インターフェース。
+
+    ```python
+    async with AsyncVL53L0X(tof) as sensor:
+        sample = await sensor.read()
+        async for sample in sensor.stream(10):
+            ...
+    ```
+
+    センサーを渡した場合は専用の DistanceSampler を作り、start()/stop() で
+    開始・停止します。起動済みの DistanceSampler を渡した場合は、
+    それを他の読み出し側と共有し、開始・停止は行いません。
+    """
+
+    def __init__(
+            self, sensor: VL53L0X | DistanceSampler, period_ms: int = 0,
+            filter: FilterPipeline | None = None, profile: str | None = None,
+            debug: bool = False
+    ):
+        """
+        Args:
+            sensor (VL53L0X | DistanceSampler): 初期化済みのセンサー、
+                またはサンプラー
+            period_ms (int): 測定間隔 (ms)。センサーを渡した場合のみ
+            filter (FilterPipeline | None): 測定値に適用するフィルター。
+                センサーを渡した場合のみ
+            profile (str | None): 測距プロファイル。センサーを渡した場合のみ
+        """
+        self.__log = get_logger(self.__class__.__name__, debug)
+        if isinstance(sensor, DistanceSampler):
+            self.sampler = sensor
+            self._owns_sampler = False
+        else:
+            self.sampler = DistanceSampler(
+                sensor, period_ms=period_ms, filter=filter, profile=profile,
+                debug=debug
+            )
+            self._owns_sampler = True
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._waiters: list[asyncio.Future] = []
+        self._queues: list[asyncio.Queue] = []
+
+    async def __aenter__(self) -> "AsyncVL53L0X":
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self, exc_type: type | None, exc_val: Exception | None, exc_tb: type | None
+    ) -> None:
+        await self.stop()
+
+    @property
+    def running(self) -> bool:
+        """サンプルを受け取っているか。"""
+        return self._loop is not None
+
+    @property
+    def latest(self) -> Sample | None:
+        """最新のサンプル。まだなければ None。"""
+        return self.sampler.latest
+
+    async def start(self) -> None:
+        """
+        サンプルの受け取りを開始します。
+        サンプラーの開始 (I2Cアクセス) は別スレッドで行います。
+        """
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.sampler.add_listener(self._on_sample)
+        if self._owns_sampler:
+            try:
+                await asyncio.to_thread(self.sampler.start)
+            except Exception:
+                self.sampler.remove_listener(self._on_sample)
+                self._loop = None
+                raise
+
+    async def stop(self) -> None:
+        """
+        サンプルの受け取りを停止します。待っている read() は
+        RuntimeError、stream() は終了します。
+        """
+        if self._loop is None:
+            return
+        self.sampler.remove_listener(self._on_sample)
+        self._loop = None
+        if self._owns_sampler:
+            await asyncio.to_thread(self.sampler.stop)
+
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_exception(RuntimeError("AsyncVL53L0X stopped"))
+        self._waiters = []
+        for queue in self._queues:
+            self._put_nowait(queue, None)
+
+    def _on_sample(self, sample: Sample) -> None:
+        """
+        サンプラーのスレッドから呼ばれ、サンプルをイベントループに渡します。
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, sample)
+        except RuntimeError:
+            # イベントループが閉じている
+            self.__log.debug("event loop is closed")
+
+    def _dispatch(self, sample: Sample) -> None:
+        """
+        イベントループ上で、待っている read() と stream() にサンプルを渡します。
+        """
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(sample)
+        for queue in self._queues:
+            self._put_nowait(queue, sample)
+
+    @staticmethod
+    def _put_nowait(queue: asyncio.Queue, item: Sample | None) -> None:
+        """キューが一杯なら最も古いサンプルを捨てて入れます。"""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+
+    async def read(self, timeout: float | None = 1.0) -> Sample:
+        """
+        次の新しいサンプルを待って返します。
+
+        Raises:
+            TimeoutError: timeout 秒以内にサンプルが得られなかった場合
+            RuntimeError: 開始していない、または待っている間に停止した場合
+        """
+        if self._loop is None:
+            raise RuntimeError("AsyncVL53L0X is not started")
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout(timeout):
+                return await waiter
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def stream(self, hz: float | None = None) -> AsyncIterator[Sample]:
+        """
+        サンプルを順に返す非同期イテレーター。stop() で終了します。
+
+        Args:
+            hz (float | None): 1秒あたりの最大サンプル数。間のサンプルは
+                読み飛ばします。None ならすべてのサンプルを返します
+                (処理が追いつかない場合は古いものから捨てます)。
+        """
+        if self._loop is None:
+            raise RuntimeError("AsyncVL53L0X is not started")
+        if hz is not None and hz <= 0:
+            raise ValueError("hz must be positive")
+
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=1 if hz is not None else STREAM_QUEUE_SIZE
+        )
+        self._queues.append(queue)
+        loop = self._loop
+        interval = 1 / hz if hz is not None else 0.0
+        next_time = loop.time()
+        try:
+            while True:
+                sample = await queue.get()
+                if sample is None:
+                    return
+                yield sample
+                if interval:
+                    # 次の周期まで待ち、その間のサンプルは最新の1つだけ残す
+                    next_time = max(next_time + interval, loop.time())
+                    await asyncio.sleep(next_time - loop.time())
+        finally:
+            self._queues.remove(queue)
@@ -28,3 +28,13 @@ def save_config(filepath: Path, config: dict[str, Any]) -> None:
     filepath.parent.mkdir(parents=True, exist_ok=True)
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(config, f, indent=4)
+
+def update_config(filepath: Path, updates: dict[str, Any]) -> dict[str, Any]:
+    """
+    設定ファイルの指定された項目だけを更新して保存します。
+    他の項目 (オフセットや初期化キャッシュなど) は残ります。
+    """
+    config = load_config(filepath)
+    config.update(updates)
+    save_config(filepath, config)
+    return config
@@ -3,13 +3,16 @@
 #
 """Python driver for the VL53L0X distance sensor."""
 
+import threading
 import time
 import pigpio
 import numpy as np
 from pathlib import Path
 
 from .my_logger import get_logger
-from .config_manager import load_config
+from .config_manager import get_default_config_filepath, load_config, update_config
+from .filters import RANGE_STATUS_VALID, valid_mask  # noqa: F401
+from .profiles import get_profile
 
 
 # レジスタアドレス
@@ -27,6 +30,7 @@ CROSSTALK_COMPENSATION_PEAK_RATE_MCPS = 0x20
 PRE_RANGE_CONFIG_MIN_SNR = 0x27
 ALGO_PART_TO_PART_RANGE_OFFSET = 0x28
 ALGO_PHASECAL_LIM = 0x30
+ALGO_PHASECAL_CONFIG_TIMEOUT = 0x30
 GLOBAL_CONFIG_VCSEL_WIDTH = 0x32
 HISTOGRAM_CONFIG_INITIAL_PHASE_SELECT = 0x33
 FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT = 0x44
@@ -66,8 +70,10 @@ RES_CORE_AMBIENT_WINDOW_EVENTS_RTN = 0xBC
 SOFT_RESET_GO2_SOFT_RESET_N = 0xBF
 IDENTIFICATION_MODEL_ID = 0xC0
 IDENTIFICATION_REVISION_ID = 0xC2
+REF_CAL_VHV_SETTINGS = 0xCB
 RES_CORE_AMBIENT_WINDOW_EVENTS_REF = 0xD0
 RES_CORE_RANGING_TOTAL_EVENTS_REF = 0xD4
+REF_CAL_PHASE_CAL = 0xEE
 OSC_CALIBRATE_VAL = 0xF8
 
 # 共通値
@@ -183,16 +189,216 @@ SPAD_START_INDEX_APERTURE = 12
 SPAD_TOTAL_COUNT = 48
 SPAD_MAP_BITS_PER_BYTE = 8
 
+# SYSRANGE_START の測距モード
+SYSRANGE_MODE_SINGLESHOT = 0x01
+SYSRANGE_MODE_BACK_TO_BACK = 0x02
+SYSRANGE_MODE_TIMED = 0x04
+
+# 割り込みピンを使わない場合のステータス確認間隔 (秒)
+POLL_INTERVAL_S = 0.002
+
+# RESULT_RANGE_STATUS のデバイスレンジステータス (ビット6-3)
+RANGE_STATUS_SHIFT = 3
+RANGE_STATUS_MASK = 0x0F
+# 測定完了 (有効な値) は filters.RANGE_STATUS_VALID
+
+# 設定ファイル中の初期化キャッシュの項目名
+INIT_CACHE_KEY = "init_cache"
+
+# NVM (C++: VL53L0X_get_info_from_device)
+NVM_READ_DATA = 0x90  # REG_94 で指定したアドレスの4バイト
+NVM_PART_UID_UPPER = 0x77
+NVM_PART_UID_LOWER = 0x78
+PHASE_CAL_MASK = 0x7F
+
+# 測定シーケンスの各ステップのオーバーヘッド (μs)
+GET_START_OVERHEAD_US = 1910
+SET_START_OVERHEAD_US = 1320
+END_OVERHEAD_US = 960
+MSRC_OVERHEAD_US = 660
+TCC_OVERHEAD_US = 590
+DSS_OVERHEAD_US = 690
+PRE_RANGE_OVERHEAD_US = 660
+FINAL_RANGE_OVERHEAD_US = 550
+MIN_TIMING_BUDGET_US = 20000
+
+# pigpio i2c_zip のコマンド
+I2C_ZIP_END = 0
+I2C_ZIP_WRITE = 7
+# 1回の i2c_zip で送るデータの上限 (バイト)
+I2C_ZIP_MAX_BYTES = 240
+
+# レジスタ設定テーブル: (レジスタ, 値) を順に書き込む (write_table を参照)
+RegisterTable = tuple[tuple[int, int], ...]
+
+# 動的 SPAD の設定
+DYN_SPAD_SETTINGS: RegisterTable = (
+    (REG_FF, VALUE_01),
+    (DYN_SPAD_REF_EN_START_OFFSET, VALUE_00),
+    (DYN_SPAD_NUM_REQUESTED_REF_SPAD, SPAD_NUM_REQUESTED_REF),
+    (REG_FF, VALUE_00),
+    (GLOBAL_CFG_REF_EN_START_SELECT, VALUE_B4),
+)
+
+# VCSEL周期のレジスタ
+VCSEL_PERIOD_REGISTERS = {
+    "pre_range": PRE_RANGE_CONFIG_VCSEL_PERIOD,
+    "final_range": FINAL_RANGE_CONFIG_VCSEL_PERIOD,
+}
+
+# VCSEL周期 (PCLK) ごとの位相チェックなどの設定 (C++: setVcselPulsePeriod)
+VCSEL_PHASE_SETTINGS: dict[str, dict[int, RegisterTable]] = {
+    "pre_range": {
+        period: (
+            (PRE_RANGE_CONFIG_VALID_PHASE_HIGH, phase_high),
+            (PRE_RANGE_CONFIG_VALID_PHASE_LOW, VALUE_08),
+        )
+        for period, phase_high in ((12, 0x18), (14, 0x30), (16, 0x40), (18, 0x50))
+    },
+    "final_range": {
+        period: (
+            (FINAL_RANGE_CONFIG_VALID_PHASE_HIGH, phase_high),
+            (FINAL_RANGE_CONFIG_VALID_PHASE_LOW, VALUE_08),
+            (GLOBAL_CONFIG_VCSEL_WIDTH, vcsel_width),
+            (ALGO_PHASECAL_CONFIG_TIMEOUT, phasecal_timeout),
+            (REG_FF, VALUE_01),
+            (ALGO_PHASECAL_LIM, phasecal_lim),
+            (REG_FF, VALUE_00),
+        )
+        for period, phase_high, vcsel_width, phasecal_timeout, phasecal_lim in (
+            (8, 0x10, 0x02, 0x0C, 0x30),
+            (10, 0x28, 0x03, 0x09, 0x20),
+            (12, 0x38, 0x03, 0x08, 0x20),
+            (14, 0x48, 0x03, 0x07, 0x20),
+        )
+    },
+}
+
+# チューニング設定 (ST API の DefaultTuningSettings 相当)
+TUNING_SETTINGS: RegisterTable = (
+    # Further SPAD configuration registers
+    (REG_FF, VALUE_01),
+    (REG_00, VALUE_00),
+
+    (REG_FF, VALUE_00),
+    (REG_09, VALUE_00),
+    (REG_10, VALUE_00),
+    (REG_11, VALUE_00),
+
+    (REG_24, VALUE_01),
+    (REG_25, VALUE_FF),
+    (REG_75, VALUE_00),
+
+    (REG_FF, VALUE_01),
+    (REG_4E, SPAD_NUM_REQUESTED_REF),
+    (REG_48, VALUE_00),
+    (REG_30, VALUE_20),
+
+    (REG_FF, VALUE_00),
+    (REG_30, VALUE_09),
+    (REG_54, VALUE_00),
+    (REG_31, VALUE_04),
+    (REG_32, VALUE_03),
+    (REG_40, VALUE_83),
+    (REG_46, VALUE_25),
+    (REG_60, VALUE_00),
+    (REG_27, VALUE_00),
+    (REG_50, VALUE_06),
+    (REG_51, VALUE_00),
+    (REG_52, VALUE_96),
+    (REG_56, VALUE_08),
+    (REG_57, VALUE_30),
+    (REG_61, VALUE_00),
+    (REG_62, VALUE_00),
+    (REG_64, VALUE_00),
+    (REG_65, VALUE_00),
+    (REG_66, VALUE_A0),
+
+    (REG_FF, VALUE_01),
+    (REG_22, VALUE_32),
+    (REG_47, VALUE_14),
+    (REG_49, VALUE_FF),
+    (REG_4A, VALUE_00),
+
+    (REG_FF, VALUE_00),
+    (REG_7A, VALUE_0A),
+    (REG_7B, VALUE_00),
+    (REG_78, VALUE_21),
+
+    (REG_FF, VALUE_01),
+    (REG_23, VALUE_34),
+    (REG_42, VALUE_00),
+    (REG_44, VALUE_FF),
+    (REG_45, VALUE_26),
+    (REG_46, VALUE_05),
+    (REG_40, VALUE_40),
+    (REG_0E, VALUE_06),
+    (REG_20, VALUE_1A),
+    (REG_43, VALUE_40),
+
+    (REG_FF, VALUE_00),
+    (REG_34, VALUE_03),
+    (REG_35, VALUE_44),
+
+    (REG_FF, VALUE_01),
+    (REG_31, VALUE_04),
+    (REG_4B, VALUE_09),
+    (REG_4C, VALUE_05),
+    (REG_4D, VALUE_04),
+
+    (REG_FF, VALUE_00),
+    (REG_44, VALUE_00),
+    (REG_45, VALUE_20),
+    (REG_47, VALUE_08),
+    (REG_48, VALUE_28),
+    (REG_67, VALUE_00),
+    (REG_70, VALUE_04),
+    (REG_71, VALUE_01),
+    (REG_72, VALUE_FE),
+    (REG_76, VALUE_00),
+    (REG_77, VALUE_00),
+
+    (REG_FF, VALUE_01),
+    (REG_0D, VALUE_01),
+
+    (REG_FF, VALUE_00),
+    (REG_80, VALUE_01),
+    (REG_01, VALUE_F8),
+
+    (REG_FF, VALUE_01),
+    (REG_8E, VALUE_01),
+    (REG_00, VALUE_01),
+    (REG_FF, VALUE_00),
+    (REG_80, VALUE_00),
+)
+
 
 class VL53L0X:
     """
     VL53L0X driver.
     """
 
-    def __init__(self, pi: pigpio.pi, i2c_bus: int = 1, i2c_address: int = 0x29, debug: bool = False, config_file_path: Path | None = None):
+    def __init__(self, pi: pigpio.pi, i2c_bus: int = 1, i2c_address: int = 0x29, debug: bool = False, config_file_path: Path | None = None, gpio1_pin: int | None = None, fast_init: bool = False, batch_writes: bool = True, profile: str | None = None):
         """
         Initialize the VL53L0X sensor.
+
+        Args:
+            gpio1_pin (int | None): センサーの GPIO1 (割り込み出力) を
+                接続したGPIOピン番号 (BCM)。指定すると、データ準備完了を
+                I2Cのポーリングではなく割り込みで待ちます。
+            fast_init (bool): 設定ファイルに保存した SPAD マップ、
+                リファレンスキャリブレーション値、タイミングバジェットを
+                復元して初期化を短縮します。キャッシュはセンサーの
+                Part UID (NVM) ごとに保存します。キャッシュがない、または
+                センサーが一致しない場合は通常の初期化を行い、結果を保存します。
+                config_file_path がなければデフォルトの設定ファイルを使います。
+            batch_writes (bool): レジスタ設定テーブルを pigpio の i2c_zip で
+                まとめて送ります。False なら1レジスタずつ書き込みます。
+            profile (str | None): 初期化後に適用する測距プロファイル
+                (profiles.RANGING_PROFILES)。None ならセンサーの初期値のまま。
         """
+        if profile is not None:
+            get_profile(profile)  # 名前の確認 (I2Cを開く前に)
         self.pi = pi
         self.i2c_bus = i2c_bus
         self.i2c_address = i2c_address
@@ -205,15 +411,49 @@ class VL53L0X:
         self.handle = self.pi.i2c_open(self.i2c_bus, self.i2c_address)
         self.__log.debug("handle=%s", self.handle)
         self.offset_mm = 0
+        self.batch_writes = batch_writes
+        # 連続測距モード (None: シングルショット, "back_to_back", "timed")
+        self.continuous_mode: str | None = None
+        self._continuous_period_ms = 0
+        self.profile: str | None = None
+        # True なら測定結果と一緒にレンジステータスを読む (I2Cの読み出しが1回増える)
+        self.read_range_status = False
+        self.range_status: int | None = None  # 最後の測定のレンジステータス
+
+        # データ準備完了の割り込み (GPIO1 はアクティブロー)
+        self.gpio1_pin = gpio1_pin
+        self._data_ready = threading.Event()
+        self._gpio1_cb = None
+        if gpio1_pin is not None:
+            self.pi.set_mode(gpio1_pin, pigpio.INPUT)
+            self.pi.set_pull_up_down(gpio1_pin, pigpio.PUD_UP)
+            self._gpio1_cb = self.pi.callback(
+                gpio1_pin, pigpio.FALLING_EDGE, self._on_gpio1
+            )
+            self.__log.debug("gpio1_pin=%s", gpio1_pin)
 
         # Load offset from config file if provided
+        config = {}
         if config_file_path:
             config = load_config(config_file_path)
             if "offset_mm" in config:
                 self.set_offset(config["offset_mm"])
                 self.__log.debug("Loaded offset_mm=%s from %s", self.offset_mm, config_file_path)
 
-        self.initialize()
+        # 初期化キャッシュ
+        self.init_mode = ""  # "fast" または "full"
+        self._init_cache_path: Path | None = None
+        self.part_uid: str | None = None
+        init_cache = None
+        if fast_init:
+            self._init_cache_path = config_file_path or get_default_config_filepath()
+            if not config_file_path:
+                config = load_config(self._init_cache_path)
+            init_cache = config.get(INIT_CACHE_KEY, {}).get(self.init_cache_key)
+
+        self.initialize(init_cache)
+        if profile is not None:
+            self.set_profile(profile)
 
     def __enter__(self) -> "VL53L0X":
         """
@@ -276,9 +516,28 @@ class VL53L0X:
         # SYSTEM_SEQUENCE_CONFIGを設定して、構成のためにすべてのシーケンスを有効にする。
         self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_FF)
 
-    def _setup_spad_info(self) -> None:
+    def _setup_spad_info(self, ref_spad_map: list[int] | None = None) -> None:
         """
         SPAD情報を設定します。
+
+        Args:
+            ref_spad_map (list[int] | None): 初期化キャッシュの SPAD マップ。
+                None ならセンサーから読み取って求めます。
+        """
+        if ref_spad_map is None:
+            ref_spad_map = self._compute_ref_spad_map()
+        self.ref_spad_map = list(ref_spad_map)
+
+        # Configure dynamic SPAD settings
+        self.write_table(DYN_SPAD_SETTINGS)
+
+        self.write_block(GLOBAL_CFG_SPAD_ENABLES_REF_0, self.ref_spad_map)
+
+        self._load_tuning_settings()
+
+    def _compute_ref_spad_map(self) -> list[int]:
+        """
+        SPAD情報を読み取り、有効にするリファレンス SPAD のマップを求めます。
         """
         spad_count, spad_is_aperture = self._get_spad_info()
 
@@ -288,15 +547,6 @@ class VL53L0X:
         # so read it from there.
         ref_spad_map = self.read_block(GLOBAL_CFG_SPAD_ENABLES_REF_0, 6)
 
-        # Configure dynamic SPAD settings
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(DYN_SPAD_REF_EN_START_OFFSET, VALUE_00)
-        self.write_byte(
-            DYN_SPAD_NUM_REQUESTED_REF_SPAD, SPAD_NUM_REQUESTED_REF
-        )
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(GLOBAL_CFG_REF_EN_START_SELECT, VALUE_B4)
-
         first_spad_to_enable = SPAD_START_INDEX_APERTURE if spad_is_aperture else 0
         spads_enabled = 0
 
@@ -309,102 +559,13 @@ class VL53L0X:
             elif (ref_spad_map[i // SPAD_MAP_BITS_PER_BYTE] >> (i % SPAD_MAP_BITS_PER_BYTE)) & 0x1:
                 spads_enabled += 1
 
-        self.write_block(GLOBAL_CFG_SPAD_ENABLES_REF_0, ref_spad_map)
-
-        # Further SPAD configuration registers
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_00, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_09, VALUE_00)
-        self.write_byte(REG_10, VALUE_00)
-        self.write_byte(REG_11, VALUE_00)
-
-        self.write_byte(REG_24, VALUE_01)
-        self.write_byte(REG_25, VALUE_FF)
-        self.write_byte(REG_75, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_4E, SPAD_NUM_REQUESTED_REF)
-        self.write_byte(REG_48, VALUE_00)
-        self.write_byte(REG_30, VALUE_20)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_30, VALUE_09)
-        self.write_byte(REG_54, VALUE_00)
-        self.write_byte(REG_31, VALUE_04)
-        self.write_byte(REG_32, VALUE_03)
-        self.write_byte(REG_40, VALUE_83)
-        self.write_byte(REG_46, VALUE_25)
-        self.write_byte(REG_60, VALUE_00)
-        self.write_byte(REG_27, VALUE_00)
-        self.write_byte(REG_50, VALUE_06)
-        self.write_byte(REG_51, VALUE_00)
-        self.write_byte(REG_52, VALUE_96)
-        self.write_byte(REG_56, VALUE_08)
-        self.write_byte(REG_57, VALUE_30)
-        self.write_byte(REG_61, VALUE_00)
-        self.write_byte(REG_62, VALUE_00)
-        self.write_byte(REG_64, VALUE_00)
-        self.write_byte(REG_65, VALUE_00)
-        self.write_byte(REG_66, VALUE_A0)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_22, VALUE_32)
-        self.write_byte(REG_47, VALUE_14)
-        self.write_byte(REG_49, VALUE_FF)
-        self.write_byte(REG_4A, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_7A, VALUE_0A)
-        self.write_byte(REG_7B, VALUE_00)
-        self.write_byte(REG_78, VALUE_21)
+        return ref_spad_map
 
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_23, VALUE_34)
-        self.write_byte(REG_42, VALUE_00)
-        self.write_byte(REG_44, VALUE_FF)
-        self.write_byte(REG_45, VALUE_26)
-        self.write_byte(REG_46, VALUE_05)
-        self.write_byte(REG_40, VALUE_40)
-        self.write_byte(REG_0E, VALUE_06)
-        self.write_byte(REG_20, VALUE_1A)
-        self.write_byte(REG_43, VALUE_40)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_34, VALUE_03)
-        self.write_byte(REG_35, VALUE_44)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_31, VALUE_04)
-        self.write_byte(REG_4B, VALUE_09)
-        self.write_byte(REG_4C, VALUE_05)
-        self.write_byte(REG_4D, VALUE_04)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_44, VALUE_00)
-        self.write_byte(REG_45, VALUE_20)
-        self.write_byte(REG_47, VALUE_08)
-        self.write_byte(REG_48, VALUE_28)
-        self.write_byte(REG_67, VALUE_00)
-        self.write_byte(REG_70, VALUE_04)
-        self.write_byte(REG_71, VALUE_01)
-        self.write_byte(REG_72, VALUE_FE)
-        self.write_byte(REG_76, VALUE_00)
-        self.write_byte(REG_77, VALUE_00)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_0D, VALUE_01)
-
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_01)
-        self.write_byte(REG_01, VALUE_F8)
-
-        self.write_byte(REG_FF, VALUE_01)
-        self.write_byte(REG_8E, VALUE_01)
-        self.write_byte(REG_00, VALUE_01)
-        self.write_byte(REG_FF, VALUE_00)
-        self.write_byte(REG_80, VALUE_00)
+    def _load_tuning_settings(self) -> None:
+        """
+        チューニング用のレジスタ設定を書き込みます。
+        """
+        self.write_table(TUNING_SETTINGS)
 
     def _configure_interrupt_gpio(self) -> None:
         """
@@ -446,9 +607,45 @@ class VL53L0X:
         # キャリブレーション後に以前のシーケンス設定を復元
         self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_E8)
 
-    def initialize(self) -> None:
+    @property
+    def init_cache_key(self) -> str:
+        """
+        初期化キャッシュのキー (センサーの Part UID)。例: "3A4C1D7E00B6F215"
+
+        モデルIDとリビジョンIDはどの個体も同じなので、
+        NVM の Part UID で個体を区別します。最初の参照時に読み取ります。
+        """
+        if self.part_uid is None:
+            self.part_uid = self._read_part_uid()
+        return self.part_uid
+
+    def initialize(self, init_cache: dict | None = None) -> None:
         """
         センサーを初期化します。
+
+        Args:
+            init_cache (dict | None): 以前の初期化で保存した値。
+                センサーと一致すれば、SPAD情報の取得と
+                リファレンスキャリブレーションを省略します。
+        """
+        if init_cache is not None:
+            try:
+                if self._fast_initialize(init_cache):
+                    self.init_mode = "fast"
+                    self.__log.debug("fast init: %s", self.init_cache_key)
+                    return
+            except (KeyError, TypeError, ValueError) as e:
+                self.__log.warning("Invalid init cache: %s: %s", type(e).__name__, e)
+            self.__log.info("Init cache does not match. Full init")
+
+        self._full_initialize()
+        self.init_mode = "full"
+        if self._init_cache_path is not None:
+            self._save_init_cache()
+
+    def _full_initialize(self) -> None:
+        """
+        センサーを最初から初期化します。
         """
         # I2Cレジスタの初期値を設定
         self._set_i2c_registers_initial_values()
@@ -465,11 +662,128 @@ class VL53L0X:
         # タイミングバジェットを設定し、キャリブレーションを実行
         self._set_timing_budget_and_calibrations()
 
+    def _read_identification(self) -> tuple[int, int]:
+        """
+        (モデルID, リビジョンID) を読み取ります。
+        """
+        return (
+            self.read_byte(IDENTIFICATION_MODEL_ID),
+            self.read_byte(IDENTIFICATION_REVISION_ID),
+        )
+
+    def _fast_initialize(self, init_cache: dict) -> bool:
+        """
+        初期化キャッシュの値を復元して初期化します。
+
+        Returns:
+            bool: 初期化した場合 True。センサーが一致しなければ
+                何も書き込まずに False
+        """
+        ref_spad_map = [int(v) & 0xFF for v in init_cache["ref_spad_map"]]
+        vhv_settings = int(init_cache["vhv_settings"])
+        phase_cal = int(init_cache["phase_cal"])
+        budget_us = int(init_cache["timing_budget_us"])
+        if len(ref_spad_map) != 6:
+            raise ValueError(f"ref_spad_map={ref_spad_map}")
+
+        # 個体 (Part UID) はエントリを選んだキーで一致している
+        model_id, revision_id = self._read_identification()
+        if [model_id, revision_id] != [
+            init_cache["model_id"], init_cache["revision_id"]
+        ]:
+            return False
+
+        self._set_i2c_registers_initial_values()
+        self._configure_signal_rate_limit()
+        self._setup_spad_info(ref_spad_map)
+        self._configure_interrupt_gpio()
+
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_E8)
+        self.set_measurement_timing_budget(budget_us)
+        self.measurement_timing_budget_us = budget_us
+        self._set_ref_calibration(vhv_settings, phase_cal)
+        return True
+
+    def _get_ref_calibration(self) -> tuple[int, int]:
+        """
+        リファレンスキャリブレーションの結果 (VHV設定, 位相キャリブレーション) を
+        読み取ります。(C++: VL53L0X_ref_calibration_io)
+        """
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_00)
+        self.write_byte(REG_FF, VALUE_00)
+        vhv_settings = self.read_byte(REF_CAL_VHV_SETTINGS)
+        phase_cal = self.read_byte(REF_CAL_PHASE_CAL) & PHASE_CAL_MASK
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_01)
+        self.write_byte(REG_FF, VALUE_00)
+        return vhv_settings, phase_cal
+
+    def _set_ref_calibration(self, vhv_settings: int, phase_cal: int) -> None:
+        """
+        リファレンスキャリブレーションの結果を書き込みます。
+        (C++: VL53L0X_set_ref_calibration)
+        """
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_00)
+        self.write_byte(REG_FF, VALUE_00)
+        self.write_byte(REF_CAL_VHV_SETTINGS, vhv_settings)
+        current = self.read_byte(REF_CAL_PHASE_CAL)
+        self.write_byte(
+            REF_CAL_PHASE_CAL,
+            (current & ~PHASE_CAL_MASK & 0xFF) | (phase_cal & PHASE_CAL_MASK)
+        )
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_01)
+        self.write_byte(REG_FF, VALUE_00)
+
+    def _save_init_cache(self) -> None:
+        """
+        次回の高速初期化のため、初期化結果を設定ファイルに保存します。
+        """
+        assert self._init_cache_path is not None
+        model_id, revision_id = self._read_identification()
+        vhv_settings, phase_cal = self._get_ref_calibration()
+        entry = {
+            "model_id": model_id,
+            "revision_id": revision_id,
+            "ref_spad_map": self.ref_spad_map,
+            "vhv_settings": vhv_settings,
+            "phase_cal": phase_cal,
+            "timing_budget_us": self.measurement_timing_budget_us,
+        }
+        try:
+            cache = load_config(self._init_cache_path).get(INIT_CACHE_KEY, {})
+            cache[self.init_cache_key] = entry
+            update_config(self._init_cache_path, {INIT_CACHE_KEY: cache})
+        except (OSError, ValueError) as e:
+            self.__log.warning("Cannot save init cache: %s", e)
+            return
+        self.__log.debug("init cache saved to %s: %s", self._init_cache_path, entry)
+
     def _get_spad_info(self) -> tuple[int, bool]:
         """
         SPAD情報を取得します。
         """
-        # SPAD情報取得のための初期レジスタ設定
+        self._begin_nvm_read()
+
+        # SPADキャリブレーションをトリガーし、完了を待つ
+        self.write_byte(REG_94, VALUE_6B)
+        self._nvm_read_strobe()
+
+        # SPADカウントとアパーチャ情報を読み取る
+        tmp = self.read_byte(REG_92)
+        count = tmp & SPAD_COUNT_MASK
+        is_aperture = ((tmp & SPAD_APERTURE_BIT) != 0)
+
+        self._end_nvm_read()
+
+        return count, is_aperture
+
+    def _begin_nvm_read(self) -> None:
+        """
+        NVM を読み出すためのレジスタ設定をします。
+        """
         self.write_byte(REG_80, VALUE_01)
         self.write_byte(REG_FF, VALUE_01)
         self.write_byte(REG_00, VALUE_00)
@@ -481,8 +795,11 @@ class VL53L0X:
 
         self.write_byte(REG_80, VALUE_01)
 
-        # SPADキャリブレーションをトリガーし、完了を待つ
-        self.write_byte(REG_94, VALUE_6B)
+    def _nvm_read_strobe(self) -> None:
+        """
+        NVM の読み出しを開始し、完了を待ちます。
+        (C++: VL53L0X_device_read_strobe)
+        """
         self.write_byte(VALUE_83, VALUE_00)
         start = time.time()
         while self.read_byte(VALUE_83) == VALUE_00:
@@ -490,12 +807,10 @@ class VL53L0X:
                 raise Exception("Timeout")
         self.write_byte(VALUE_83, VALUE_01)
 
-        # SPADカウントとアパーチャ情報を読み取る
-        tmp = self.read_byte(REG_92)
-        count = tmp & SPAD_COUNT_MASK
-        is_aperture = ((tmp & SPAD_APERTURE_BIT) != 0)
-
-        # レジスタをデフォルト値に復元
+    def _end_nvm_read(self) -> None:
+        """
+        NVM の読み出しの後、レジスタをデフォルト値に復元します。
+        """
         self.write_byte(REG_81, VALUE_00)
         self.write_byte(REG_FF, VALUE_06)
         self.write_byte(VALUE_83, (self.read_byte(VALUE_83) & ~VALUE_04))
@@ -505,7 +820,32 @@ class VL53L0X:
         self.write_byte(REG_FF, VALUE_00)
         self.write_byte(REG_80, VALUE_00)
 
-        return count, is_aperture
+    def _read_nvm_dword(self, address: int) -> int:
+        """
+        NVM から4バイト (ビッグエンディアン) 読み取ります。
+        """
+        self.write_byte(REG_94, address)
+        self._nvm_read_strobe()
+        data = self.read_block(NVM_READ_DATA, 4)
+        if len(data) < 4:
+            raise OSError(f"Cannot read NVM {address:#04x}")
+        return int.from_bytes(bytes(data[:4]), "big")
+
+    def _read_part_uid(self) -> str:
+        """
+        センサーごとに異なる Part UID を NVM から読み取ります。
+        (C++: VL53L0X_get_info_from_device)
+
+        Returns:
+            str: 16桁の16進数 (上位, 下位の順)
+        """
+        self._begin_nvm_read()
+        try:
+            upper = self._read_nvm_dword(NVM_PART_UID_UPPER)
+            lower = self._read_nvm_dword(NVM_PART_UID_LOWER)
+        finally:
+            self._end_nvm_read()
+        return f"{upper:08X}{lower:08X}"
 
     # 内部ヘルパー関数 (C++版 calcMacroPeriod の移植)
     def _calc_macro_period(self, vcsel_period_pclks: int) -> int:
@@ -542,100 +882,308 @@ class VL53L0X:
             return (ms_byte << 8) | ls_byte
         return 0
 
-    def get_measurement_timing_budget(self) -> int:
+    def _get_sequence_step_enables(self) -> dict[str, bool]:
         """
-        現在の測定タイミングバジェットをマイクロ秒単位で返す
+        有効な測定シーケンスのステップを返します。
+        (C++: getSequenceStepEnables)
+        """
+        sequence_config = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        return {
+            "tcc": bool((sequence_config >> 4) & 0x01),
+            "dss": bool((sequence_config >> 3) & 0x01),
+            "msrc": bool((sequence_config >> 2) & 0x01),
+            "pre_range": bool((sequence_config >> 6) & 0x01),
+            "final_range": bool((sequence_config >> 7) & 0x01),
+        }
+
+    def _get_sequence_step_timeouts(self, enables: dict[str, bool]) -> dict[str, int]:
         """
-        budget_us = 1910  # Start overhead
-        enables = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        各ステップのタイムアウト (MCLK と μs) を返します。
+        無効なステップのレジスタは読まず、0 とします。
+        final_range_mclks は pre-range の分を含みません。
+        (C++: getSequenceStepTimeouts)
+        """
+        timeouts = dict.fromkeys((
+            "msrc_dss_tcc_us", "pre_range_mclks", "pre_range_us",
+            "final_range_mclks", "final_range_us",
+        ), 0)
 
-        pre_range_us: int = 0
-        pre_range_mclks: int | None = None
+        if enables["tcc"] or enables["dss"] or enables["msrc"] or enables["pre_range"]:
+            pre_range_vcsel_period_pclks = self.get_vcsel_pulse_period("pre_range")
 
-        # pre-range
-        if (enables >> 6) & 0x01:
-            pre_range_vcsel_period_pclks = self.read_byte(PRE_RANGE_CONFIG_VCSEL_PERIOD)
-            pre_range_mclks = self._decode_timeout(
+            msrc_dss_tcc_mclks = self.read_byte(MSRC_CONFIG_TIMEOUT_MACROP) + 1
+            timeouts["msrc_dss_tcc_us"] = self._timeout_mclks_to_microseconds(
+                msrc_dss_tcc_mclks, pre_range_vcsel_period_pclks
+            )
+
+            timeouts["pre_range_mclks"] = self._decode_timeout(
                 self.read_word(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
             )
-            pre_range_us = self._timeout_mclks_to_microseconds(
-                pre_range_mclks, pre_range_vcsel_period_pclks
+            timeouts["pre_range_us"] = self._timeout_mclks_to_microseconds(
+                timeouts["pre_range_mclks"], pre_range_vcsel_period_pclks
             )
-            budget_us += pre_range_us + 660  # overhead
 
-        # final-range
-        if (enables >> 7) & 0x01:
-            final_range_vcsel_period_pclks = self.read_byte(FINAL_RANGE_CONFIG_VCSEL_PERIOD)
+        if enables["final_range"]:
+            final_range_vcsel_period_pclks = self.get_vcsel_pulse_period("final_range")
             final_range_mclks = self._decode_timeout(
                 self.read_word(FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI)
             )
-
-            if (enables >> 6) & 0x01:  # if pre-range enabled, subtract it
-                if pre_range_mclks is not None:
-                    final_range_mclks -= pre_range_mclks
-
-            final_range_us = self._timeout_mclks_to_microseconds(
+            if enables["pre_range"]:
+                final_range_mclks -= timeouts["pre_range_mclks"]
+            timeouts["final_range_mclks"] = final_range_mclks
+            timeouts["final_range_us"] = self._timeout_mclks_to_microseconds(
                 final_range_mclks, final_range_vcsel_period_pclks
             )
-            budget_us += final_range_us + 550  # overhead
 
+        return timeouts
+
+    def _sequence_steps_budget_us(
+            self, enables: dict[str, bool], timeouts: dict[str, int]
+    ) -> int:
+        """
+        final-range 以外のステップにかかる時間 (μs) を返します。
+        """
+        budget_us = 0
+        if enables["tcc"]:
+            budget_us += timeouts["msrc_dss_tcc_us"] + TCC_OVERHEAD_US
+        if enables["dss"]:
+            budget_us += 2 * (timeouts["msrc_dss_tcc_us"] + DSS_OVERHEAD_US)
+        elif enables["msrc"]:
+            budget_us += timeouts["msrc_dss_tcc_us"] + MSRC_OVERHEAD_US
+        if enables["pre_range"]:
+            budget_us += timeouts["pre_range_us"] + PRE_RANGE_OVERHEAD_US
+        return budget_us
+
+    def get_measurement_timing_budget(self) -> int:
+        """
+        現在の測定タイミングバジェットをマイクロ秒単位で返す
+        (C++: getMeasurementTimingBudget)
+        """
+        enables = self._get_sequence_step_enables()
+        timeouts = self._get_sequence_step_timeouts(enables)
+
+        budget_us = GET_START_OVERHEAD_US + END_OVERHEAD_US
+        budget_us += self._sequence_steps_budget_us(enables, timeouts)
+        if enables["final_range"]:
+            budget_us += timeouts["final_range_us"] + FINAL_RANGE_OVERHEAD_US
         return budget_us
 
     def set_measurement_timing_budget(self, budget_us: int) -> bool:
         """
         測定タイミングバジェットを設定する
-        """
-        used_budget_us = 1320  # Start overhead
-        enables = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        (C++: setMeasurementTimingBudget)
 
-        pre_range_us = 0
-        pre_range_mclks = 0
-        if (enables >> 6) & 0x01:
-            pre_range_vcsel_period_pclks = self.read_byte(PRE_RANGE_CONFIG_VCSEL_PERIOD)
-            pre_range_mclks = self._decode_timeout(
-                self.read_word(PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI)
-            )
-            pre_range_us = self._timeout_mclks_to_microseconds(
-                pre_range_mclks, pre_range_vcsel_period_pclks
+        Returns:
+            bool: 設定した場合 True。バジェットが最小値未満、または
+                final-range が無効な場合は False
+
+        Raises:
+            ValueError: 各ステップの時間を差し引くと final-range の時間が残らない場合
+        """
+        if budget_us < MIN_TIMING_BUDGET_US:
+            self.__log.warning(
+                "budget_us=%s: must be %sus or more", budget_us, MIN_TIMING_BUDGET_US
             )
-            used_budget_us += pre_range_us + 660
+            return False
+
+        enables = self._get_sequence_step_enables()
+        # final-range のタイムアウトはこれから決めるので読まない
+        timeouts = self._get_sequence_step_timeouts(dict(enables, final_range=False))
 
-        if (enables >> 7) & 0x01:
-            final_range_us = budget_us - used_budget_us - 550
-            if final_range_us <= 0:
+        used_budget_us = SET_START_OVERHEAD_US + END_OVERHEAD_US
+        used_budget_us += self._sequence_steps_budget_us(enables, timeouts)
+
+        if enables["final_range"]:
+            used_budget_us += FINAL_RANGE_OVERHEAD_US
+            if used_budget_us >= budget_us:
                 raise ValueError("Requested timing budget too small")
 
-            final_range_vcsel_period_pclks = self.read_byte(FINAL_RANGE_CONFIG_VCSEL_PERIOD)
-            # ★ ここを μs→mclks に修正
+            # final-range のタイムアウトは残りの時間すべて
+            final_range_us = budget_us - used_budget_us
             final_range_mclks = self._timeout_microseconds_to_mclks(
-                final_range_us, final_range_vcsel_period_pclks
+                final_range_us, self.get_vcsel_pulse_period("final_range")
             )
-
-            if (enables >> 6) & 0x01:
-                final_range_mclks += pre_range_mclks
+            if enables["pre_range"]:
+                final_range_mclks += timeouts["pre_range_mclks"]
 
             self.write_word(
                 FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
                 self._encode_timeout(final_range_mclks),
             )
+            self.measurement_timing_budget_us = budget_us
             return True
         return False
 
+    def get_vcsel_pulse_period(self, period_type: str) -> int:
+        """
+        VCSEL (レーザー) のパルス周期を PCLK 単位で返します。
+
+        Args:
+            period_type (str): "pre_range" または "final_range"
+        """
+        register = VCSEL_PERIOD_REGISTERS.get(period_type)
+        if register is None:
+            raise ValueError(f"Unknown period type: {period_type!r}")
+        # レジスタには (周期 / 2) - 1 が入っている
+        return (self.read_byte(register) + 1) << 1
+
+    def set_vcsel_pulse_period(self, period_type: str, period_pclks: int) -> None:
+        """
+        VCSEL のパルス周期を設定します。長くすると遠くまで測れます。
+        各ステップのタイムアウトとタイミングバジェットを保ち、
+        位相キャリブレーションをやり直します。
+        (C++: setVcselPulsePeriod)
+
+        Args:
+            period_type (str): "pre_range" (12, 14, 16, 18) または
+                "final_range" (8, 10, 12, 14)
+            period_pclks (int): パルス周期 (PCLK)
+        """
+        if self.continuous_mode is not None:
+            raise RuntimeError("Stop continuous ranging before changing the VCSEL period")
+        if period_type not in VCSEL_PERIOD_REGISTERS:
+            raise ValueError(f"Unknown period type: {period_type!r}")
+        phase_settings = VCSEL_PHASE_SETTINGS[period_type].get(period_pclks)
+        if phase_settings is None:
+            raise ValueError(
+                f"Invalid {period_type} VCSEL period: {period_pclks} "
+                f"(choose from {sorted(VCSEL_PHASE_SETTINGS[period_type])})"
+            )
+
+        vcsel_period_reg = (period_pclks >> 1) - 1
+        enables = self._get_sequence_step_enables()
+        timeouts = self._get_sequence_step_timeouts(enables)
+
+        self.write_table(phase_settings)
+        if period_type == "pre_range":
+            self.write_byte(PRE_RANGE_CONFIG_VCSEL_PERIOD, vcsel_period_reg)
+
+            # タイムアウトを新しい周期で設定し直す
+            pre_range_mclks = self._timeout_microseconds_to_mclks(
+                timeouts["pre_range_us"], period_pclks
+            )
+            self.write_word(
+                PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+                self._encode_timeout(pre_range_mclks),
+            )
+            msrc_mclks = self._timeout_microseconds_to_mclks(
+                timeouts["msrc_dss_tcc_us"], period_pclks
+            )
+            self.write_byte(
+                MSRC_CONFIG_TIMEOUT_MACROP,
+                VALUE_FF if msrc_mclks > 256 else msrc_mclks - 1
+            )
+        else:
+            self.write_byte(FINAL_RANGE_CONFIG_VCSEL_PERIOD, vcsel_period_reg)
+
+            final_range_mclks = self._timeout_microseconds_to_mclks(
+                timeouts["final_range_us"], period_pclks
+            )
+            if enables["pre_range"]:
+                final_range_mclks += timeouts["pre_range_mclks"]
+            self.write_word(
+                FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI,
+                self._encode_timeout(final_range_mclks),
+            )
+
+        # 新しい周期でタイミングバジェットを設定し直す
+        self.set_measurement_timing_budget(self.measurement_timing_budget_us)
+
+        # 位相キャリブレーション
+        sequence_config = self.read_byte(SYSTEM_SEQUENCE_CONFIG)
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, VALUE_02)
+        self.perform_single_ref_calibration(VALUE_00)
+        self.write_byte(SYSTEM_SEQUENCE_CONFIG, sequence_config)
+
+    def get_signal_rate_limit(self) -> float:
+        """
+        信号レート制限 (MCPS) を返します。
+        """
+        return self.read_word(FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT) / (1 << 7)
+
+    def set_signal_rate_limit(self, limit_mcps: float) -> None:
+        """
+        信号レート制限 (MCPS) を設定します。
+        下げると反射の弱いターゲットも測れますが、誤検出が増えます。
+        """
+        if not 0 <= limit_mcps <= 511.99:
+            raise ValueError("limit_mcps must be in [0, 511.99]")
+        # Q9.7 固定小数点
+        self.write_word(
+            FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT, int(limit_mcps * (1 << 7))
+        )
+
+    def set_profile(self, name: str) -> None:
+        """
+        測距プロファイルを適用します (profiles.RANGING_PROFILES を参照)。
+        VCSEL周期は変わる場合だけ設定します (キャリブレーションを伴うため)。
+        """
+        profile = get_profile(name)
+        self.set_signal_rate_limit(profile.signal_rate_limit_mcps)
+        for period_type, period in (
+                ("pre_range", profile.pre_range_vcsel_period),
+                ("final_range", profile.final_range_vcsel_period),
+        ):
+            if self.get_vcsel_pulse_period(period_type) != period:
+                self.set_vcsel_pulse_period(period_type, period)
+        self.set_measurement_timing_budget(profile.timing_budget_us)
+        self.profile = name
+        self.__log.debug("profile=%s: %s", name, profile)
+
+    def _on_gpio1(self, gpio: int, level: int, tick: int) -> None:
+        """
+        GPIO1 の立ち下がり（データ準備完了）で呼ばれる pigpio のコールバック。
+        """
+        self._data_ready.set()
+
+    def _is_data_ready(self) -> bool:
+        """
+        測定結果が準備できているかをステータスレジスタで確認します。
+        """
+        return (self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK) != VALUE_00
+
+    def _wait_data_ready(self, timeout_s: float) -> bool:
+        """
+        データ準備完了を待ちます。
+
+        割り込みピンがあれば、GPIO1 がアサートされるまで眠って待ち、
+        起きたときにステータスを1回だけ確認します。
+        なければ POLL_INTERVAL_S ごとにステータスを確認します。
+
+        Returns:
+            bool: 準備完了なら True、タイムアウトなら False
+        """
+        deadline = time.monotonic() + timeout_s
+        while True:
+            if self.gpio1_pin is not None:
+                # 先にクリアしてからレベルを見るので、
+                # その間の立ち下がりも取りこぼさない
+                self._data_ready.clear()
+                if self.pi.read(self.gpio1_pin) == 0 and self._is_data_ready():
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return self._is_data_ready()
+                self._data_ready.wait(remaining)
+            else:
+                if self._is_data_ready():
+                    return True
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(POLL_INTERVAL_S)
+
     def perform_single_ref_calibration(self, vhv_init_byte: int) -> None:
         self.write_byte(SYSRANGE_START, VALUE_01 | vhv_init_byte)
-        start = time.time()
         # 2秒上限で待つ（環境により1秒だと落ちる場合がある）
-        while (self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK) == VALUE_00:
-            if time.time() - start > 2.0:
-                raise Exception("Timeout during ref calibration")
+        if not self._wait_data_ready(2.0):
+            raise Exception("Timeout during ref calibration")
         self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
         self.write_byte(SYSRANGE_START, VALUE_00)
 
-    def get_range(self) -> int:
+    def _restore_stop_variable(self) -> None:
         """
-        単一の測距測定を実行し、結果をmm単位で返します。
+        測定開始前の stop_variable の復元シーケンス。
         """
-        # stop_variable の復元シーケンス
         self.write_byte(REG_80, VALUE_01)
         self.write_byte(REG_FF, VALUE_01)
         self.write_byte(REG_00, VALUE_00)
@@ -644,27 +1192,122 @@ class VL53L0X:
         self.write_byte(REG_FF, VALUE_00)
         self.write_byte(REG_80, VALUE_00)
 
-        # 測定開始（シングルショット）
-        self.write_byte(SYSRANGE_START, VALUE_01)
-
-        # 予算に応じた実時間で待つ（最低1.0s）
+    def _measurement_timeout_s(self) -> float:
+        """
+        測定完了を待つ時間（秒）。予算に応じた実時間で、最低1.0秒。
+        """
         budget_s = getattr(self, "measurement_timing_budget_us", 33000) / 1_000_000.0
-        timeout_s = max(1.0, budget_s + 0.1)
+        period_s = self._continuous_period_ms / 1000.0
+        return max(1.0, budget_s + period_s + 0.1)
 
+    def _read_result(self) -> int:
+        """
+        データ準備完了を待って測定結果を読み出し、割り込みをクリアします。
+        """
         # 割り込みステータス待ち（データ準備完了）
-        start = time.time()
-        while (self.read_byte(RESULT_INTERRUPT_STATUS) & INTERRUPT_STATUS_MASK) == VALUE_00:
-            if time.time() - start > timeout_s:
-                raise Exception("Timeout waiting for measurement ready")
+        if not self._wait_data_ready(self._measurement_timeout_s()):
+            raise Exception("Timeout waiting for measurement ready")
 
         # 結果読み出し
         range_mm = self.read_word(RESULT_RANGE_STATUS + VALUE_0A)  # 0x14 + 0x0A
+        if self.read_range_status:
+            self.range_status = (
+                self.read_byte(RESULT_RANGE_STATUS) >> RANGE_STATUS_SHIFT
+            ) & RANGE_STATUS_MASK
 
         # 割り込みクリア
         self.write_byte(SYSTEM_INTERRUPT_CLEAR, VALUE_01)
 
         return range_mm - self.offset_mm
 
+    def get_range(self) -> int:
+        """
+        単一の測距測定を実行し、結果をmm単位で返します。
+        連続測距中は、次の測定結果を読み出すだけです。
+        """
+        if self.continuous_mode is not None:
+            return self.read_continuous()
+
+        self._restore_stop_variable()
+
+        # 測定開始（シングルショット）
+        self.write_byte(SYSRANGE_START, SYSRANGE_MODE_SINGLESHOT)
+
+        return self._read_result()
+
+    def start_continuous(self, period_ms: int = 0) -> None:
+        """
+        連続測距を開始します。センサーは測定を繰り返し、
+        read_continuous() は結果を読み出すだけになります。
+
+        Args:
+            period_ms (int): 測定間隔 (ms)。
+                0 の場合はバックツーバック（前の測定が終わりしだい次を開始）、
+                それ以外はその間隔で測定します（タイムド連続測距）。
+        """
+        if period_ms < 0:
+            raise ValueError("period_ms must be 0 or more")
+
+        self._restore_stop_variable()
+
+        if period_ms == 0:
+            self.write_byte(SYSRANGE_START, SYSRANGE_MODE_BACK_TO_BACK)
+            self.continuous_mode = "back_to_back"
+        else:
+            # 間隔は内部発振器のクロック数で指定する
+            osc_calibrate_val = self.read_word(OSC_CALIBRATE_VAL)
+            period = period_ms * osc_calibrate_val if osc_calibrate_val else period_ms
+            self.write_block(
+                SYS_INTERMEASUREMENT_PERIOD, list(period.to_bytes(4, "big"))
+            )
+            self.write_byte(SYSRANGE_START, SYSRANGE_MODE_TIMED)
+            self.continuous_mode = "timed"
+
+        self._continuous_period_ms = period_ms
+        self.__log.debug(
+            "continuous_mode=%s, period_ms=%s", self.continuous_mode, period_ms
+        )
+
+    def read_continuous(self) -> int:
+        """
+        連続測距の最新の測定結果をmm単位で返します。
+        次の結果が出るまで待ちます。
+        """
+        if self.continuous_mode is None:
+            raise RuntimeError("Continuous ranging is not running")
+        return self._read_result()
+
+    def stop_continuous(self) -> None:
+        """
+        連続測距を停止します。
+        """
+        self.write_byte(SYSRANGE_START, SYSRANGE_MODE_SINGLESHOT)
+
+        self.write_byte(REG_FF, VALUE_01)
+        self.write_byte(REG_00, VALUE_00)
+        self.write_byte(REG_91, VALUE_00)
+        self.write_byte(REG_00, VALUE_01)
+        self.write_byte(REG_FF, VALUE_00)
+
+        self.continuous_mode = None
+        self._continuous_period_ms = 0
+
+    def set_i2c_address(self, new_address: int) -> None:
+        """
+        センサーのI2Cアドレスを変更し、新しいアドレスで開き直します。
+        アドレスは電源を切る (XSHUT を Low にする) まで保持されます。
+
+        Args:
+            new_address (int): 新しい7ビットアドレス
+        """
+        self.write_byte(I2C_SLAVE_DEVICE_ADDRESS, new_address & 0x7F)
+        self.pi.i2c_close(self.handle)
+        self.i2c_address = new_address
+        self.handle = self.pi.i2c_open(self.i2c_bus, new_address)
+        self.__log.debug(
+            "i2c_address=%s, handle=%s", hex(new_address), self.handle
+        )
+
     def set_offset(self, offset_mm: int) -> None:
         """
         測定値のオフセット(mm)を設定します。
@@ -677,8 +1320,9 @@ class VL53L0X:
     def get_ranges(self, num_samples: int) -> np.ndarray:
         """
         指定されたサンプル数の連続測距を実行し、結果をNumPy配列で返します。
+        オフセットを引いた値は負になりうるので、符号付き整数で返します。
         """
-        samples = np.empty(num_samples, dtype=np.uint16)
+        samples = np.empty(num_samples, dtype=np.int32)
         for i in range(num_samples):
             samples[i] = self.get_range()
         return samples
@@ -693,6 +1337,9 @@ class VL53L0X:
 
         Returns:
             int: 計算されたオフセット値 (mm)
+
+        Raises:
+            ValueError: 有効な測定値が1つもない場合
         """
         self.__log.debug(
             "Calibrating with target_distance_mm=%s, num_samples=%s",
@@ -703,11 +1350,17 @@ class VL53L0X:
         current_offset = self.offset_mm
         self.set_offset(0)
 
-        samples = self.get_ranges(num_samples)
-        measured_distance = int(np.mean(samples))
+        try:
+            samples = self.get_ranges(num_samples)
+        finally:
+            # オフセットを元に戻す
+            self.set_offset(current_offset)
 
-        # オフセットを元に戻す
-        self.set_offset(current_offset)
+        # 範囲外の値を除き、外れ値に強いメディアンを取る
+        samples = samples[valid_mask(samples)]
+        if len(samples) == 0:
+            raise ValueError("No valid samples for calibration")
+        measured_distance = int(np.median(samples))
 
         offset = measured_distance - target_distance_mm
         self.__log.debug("measured_distance=%s, offset=%s", measured_distance, offset)
@@ -718,6 +1371,11 @@ class VL53L0X:
         """
         I2C接続を閉じます。
         """
+        if self.continuous_mode is not None:
+            self.stop_continuous()
+        if self._gpio1_cb is not None:
+            self._gpio1_cb.cancel()
+            self._gpio1_cb = None
         self.pi.i2c_close(self.handle)
 
     def read_byte(self, register: int) -> int:
@@ -769,3 +1427,26 @@ class VL53L0X:
         レジスタにデータのブロックを書き込みます。
         """
         self.pi.i2c_write_i2c_block_data(self.handle, register, data)
+
+    def write_table(self, table: RegisterTable) -> None:
+        """
+        レジスタ設定テーブルを順に書き込みます。
+
+        batch_writes が True なら、各書き込みを i2c_zip の Write コマンドに
+        して、I2C_ZIP_MAX_BYTES ごとに1回の pigpio 呼び出しで送ります。
+        書き込みはそれぞれ独立したI2Cトランザクションなので、
+        センサーから見た結果は write_byte() を繰り返した場合と同じです。
+        """
+        if not self.batch_writes:
+            for register, value in table:
+                self.write_byte(register, value)
+            return
+
+        per_write = 4  # I2C_ZIP_WRITE, 2, register, value
+        chunk = (I2C_ZIP_MAX_BYTES - 1) // per_write
+        for i in range(0, len(table), chunk):
+            data: list[int] = []
+            for register, value in table[i:i + chunk]:
+                data += [I2C_ZIP_WRITE, 2, register, value]
+            data.append(I2C_ZIP_END)
+            self.pi.i2c_zip(self.handle, data)
@@ -0,0 +1,329 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+測定値のフィルター。
+
+VL53L0X の測定値には、範囲外を示すコード (8190, 8191) や、
+オフセットを引いた結果の負の値、レンジステータスが有効でない測定
+(信号不足、位相エラーなど)、ときどき飛ぶ外れ値が含まれます。
+このモジュールのフィルターは、これらを除外して値を滑らかにします。
+
+各フィルターは2通りに使えます。
+
+- `update(value)`: 1サンプルずつ処理する (DistanceSampler 用)
+- `apply(values)`: 記録済みの NumPy 配列をまとめて処理する
+  (解析・ベンチマーク用)。結果は update() を順に呼んだ場合と同じです。
+
+`FilterPipeline` は無効値の除外といくつかのフィルターをつなげたもので、
+`make_filter()` で名前から作れます。
+"""
+import math
+from collections import deque
+from typing import Protocol
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 範囲外を示す測定値 (オフセットを引く前の値)
+RANGE_LIMIT_MM = 8190
+
+# RESULT_RANGE_STATUS のデバイスレンジステータスのうち、測定完了 (有効な値)
+RANGE_STATUS_VALID = 11
+
+# make_filter() で選べるフィルター名
+FILTER_NAMES = ("none", "median", "ema", "alpha_beta")
+
+
+class Filter(Protocol):
+    """フィルターのインターフェース。"""
+
+    def update(self, value: float, timestamp: float | None = None) -> float:
+        ...
+
+    def apply(
+            self, values: np.ndarray, timestamps: np.ndarray | None = None
+    ) -> np.ndarray:
+        ...
+
+    def reset(self) -> None:
+        ...
+
+
+def valid_mask(
+        values: np.ndarray, offset_mm: int = 0,
+        max_mm: int = RANGE_LIMIT_MM, statuses: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    有効な測定値を True とするマスクを返します。
+
+    Args:
+        values (np.ndarray): オフセットを引いた後の測定値
+        offset_mm (int): 測定値から引かれたオフセット。
+            センサーの生の値 (values + offset_mm) で範囲外を判定します。
+        max_mm (int): これ以上の生の値は範囲外 (8190, 8191) とみなします。
+        statuses (np.ndarray | None): 各測定のレンジステータス。
+            RANGE_STATUS_VALID 以外は無効とします。負の値 (記録の
+            STATUS_UNKNOWN) は不明として値だけで判定します。
+    """
+    values = np.asarray(values)
+    mask = (values >= 0) & (values + offset_mm < max_mm)
+    if statuses is not None:
+        statuses = np.asarray(statuses)
+        mask &= (statuses == RANGE_STATUS_VALID) | (statuses < 0)
+    return mask
+
+
+class MedianFilter:
+    """
+    直近 window 個のメディアン。単発の外れ値を取り除きます。
+    """
+
+    def __init__(self, window: int = 5):
+        if window < 1:
+            raise ValueError("window must be 1 or more")
+        self.window = window
+        self._buf: deque[float] = deque(maxlen=window)
+
+    def update(self, value: float, timestamp: float | None = None) -> float:
+        self._buf.append(value)
+        return float(np.median(self._buf))
+
+    def apply(
+            self, values: np.ndarray, timestamps: np.ndarray | None = None
+    ) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return values.copy()
+        # update() で受け取った値の続きとして処理する
+        w = self.window
+        prev = len(self._buf)
+        full = np.concatenate([np.asarray(self._buf, dtype=np.float64), values])
+        # 窓がそろうまでは、update() と同じくある分だけでメディアンを取る
+        n_head = max(0, min(w - 1 - prev, len(values)))
+        head = np.array(
+            [np.median(full[:prev + i + 1]) for i in range(n_head)]
+        )
+        self._buf.extend(values[-w:].tolist())
+        if len(full) < w:
+            return head
+        windows = sliding_window_view(full, w)[prev + n_head - (w - 1):]
+        return np.concatenate([head, np.median(windows, axis=1)])
+
+    def reset(self) -> None:
+        self._buf.clear()
+
+
+class EMAFilter:
+    """
+    指数移動平均 y = alpha * x + (1 - alpha) * y。
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self._y: float | None = None
+
+    def update(self, value: float, timestamp: float | None = None) -> float:
+        if self._y is None:
+            self._y = float(value)
+        else:
+            self._y += self.alpha * (value - self._y)
+        return self._y
+
+    def apply(
+            self, values: np.ndarray, timestamps: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        漸化式を閉じた形 y_k = b^(k+1) * (y0 + a * Σ x_j / b^(j+1))
+        (b = 1 - a) でブロックごとにまとめて計算します。
+        b^-(k+1) が大きくなりすぎないよう、ブロックの長さを a に応じて決めます。
+        """
+        values = np.asarray(values, dtype=np.float64)
+        out = np.empty_like(values)
+        if len(values) == 0:
+            return out
+        a = self.alpha
+        b = 1.0 - a
+        y = values[0] if self._y is None else self._y
+        if b <= 0:
+            out[:] = values
+        else:
+            block = max(1, min(256, int(6 / -math.log10(b))))
+            powers = b ** np.arange(1, block + 1)
+            for start in range(0, len(values), block):
+                x = values[start:start + block]
+                p = powers[:len(x)]
+                out[start:start + len(x)] = p * (y + a * np.cumsum(x / p))
+                y = out[start + len(x) - 1]
+        self._y = float(out[-1])
+        return out
+
+    def reset(self) -> None:
+        self._y = None
+
+
+class AlphaBetaFilter:
+    """
+    α-βフィルター (定常状態のカルマンフィルターに相当)。
+    距離と速度を推定するので、EMA より動く物体への遅れが小さくなります。
+    """
+
+    def __init__(
+            self, alpha: float = 0.5, beta: float = 0.1, dt: float = 0.033
+    ):
+        """
+        Args:
+            alpha (float): 距離の補正ゲイン
+            beta (float): 速度の補正ゲイン
+            dt (float): timestamp がない場合のサンプル間隔 (秒)
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.dt = dt
+        self.reset()
+
+    def update(self, value: float, timestamp: float | None = None) -> float:
+        if self._x is None:
+            self._x = float(value)
+            self._t = timestamp
+            return self._x
+
+        dt = self.dt
+        if timestamp is not None and self._t is not None:
+            dt = max(timestamp - self._t, 1e-6)
+        self._t = timestamp
+
+        predicted = self._x + self._v * dt
+        residual = value - predicted
+        self._x = predicted + self.alpha * residual
+        self._v += self.beta * residual / dt
+        return self._x
+
+    def apply(
+            self, values: np.ndarray, timestamps: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        状態が前のサンプルに依存するので、サンプルごとに update() します。
+        """
+        values = np.asarray(values, dtype=np.float64)
+        out = np.empty_like(values)
+        for i, value in enumerate(values.tolist()):
+            t = None if timestamps is None else float(timestamps[i])
+            out[i] = self.update(value, t)
+        return out
+
+    def reset(self) -> None:
+        self._x: float | None = None
+        self._v = 0.0
+        self._t: float | None = None
+
+
+class FilterPipeline:
+    """
+    無効値を除外してから、フィルターを順に適用します。
+    """
+
+    def __init__(
+            self, *stages: Filter, offset_mm: int = 0,
+            max_mm: int = RANGE_LIMIT_MM
+    ):
+        """
+        Args:
+            stages (Filter): 順に適用するフィルター
+            offset_mm (int): センサーに設定されているオフセット (valid_mask を参照)
+            max_mm (int): 範囲外とみなす生の値
+        """
+        self.stages = list(stages)
+        self.offset_mm = offset_mm
+        self.max_mm = max_mm
+        self.rejected = 0
+
+    def is_valid(self, value: float, status: int | None = None) -> bool:
+        """
+        測定値が有効か。status (レンジステータス) が None でも
+        RANGE_STATUS_VALID でもなければ無効です。
+        """
+        if status not in (None, RANGE_STATUS_VALID):
+            return False
+        return value >= 0 and value + self.offset_mm < self.max_mm
+
+    def update(
+            self, value: float, timestamp: float | None = None,
+            status: int | None = None
+    ) -> float | None:
+        """
+        1サンプルを処理します。
+
+        Args:
+            value (float): 測定値
+            timestamp (float | None): 測定時刻 (秒)
+            status (int | None): レンジステータス。None は不明
+
+        Returns:
+            float | None: フィルター後の値。無効値なら None
+                (フィルターの状態は変わりません)
+        """
+        if not self.is_valid(value, status):
+            self.rejected += 1
+            return None
+        result = float(value)
+        for stage in self.stages:
+            result = stage.update(result, timestamp)
+        return result
+
+    def apply(
+            self, values: np.ndarray, timestamps: np.ndarray | None = None,
+            statuses: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        配列をまとめて処理します。
+
+        Args:
+            values (np.ndarray): 測定値
+            timestamps (np.ndarray | None): 測定時刻 (秒)
+            statuses (np.ndarray | None): レンジステータス (valid_mask を参照)
+
+        Returns:
+            np.ndarray: values と同じ長さの float 配列。無効値の位置は NaN
+        """
+        values = np.asarray(values)
+        mask = valid_mask(values, self.offset_mm, self.max_mm, statuses)
+        self.rejected += int(np.count_nonzero(~mask))
+
+        result = values[mask].astype(np.float64)
+        valid_ts = None if timestamps is None else np.asarray(timestamps)[mask]
+        for stage in self.stages:
+            result = stage.apply(result, valid_ts)
+
+        out = np.full(len(values), np.nan)
+        out[mask] = result
+        return out
+
+    def reset(self) -> None:
+        """フィルターの状態と除外数をリセットします。"""
+        for stage in self.stages:
+            stage.reset()
+        self.rejected = 0
+
+
+def make_filter(name: str, offset_mm: int = 0) -> FilterPipeline:
+    """
+    名前からフィルターを作ります。
+
+    Args:
+        name (str): FILTER_NAMES のいずれか。"none" は無効値の除外だけ。
+        offset_mm (int): センサーに設定されているオフセット
+    """
+    stages: dict[str, list[Filter]] = {
+        "none": [],
+        "median": [MedianFilter()],
+        "ema": [EMAFilter()],
+        "alpha_beta": [AlphaBetaFilter()],
+    }
+    if name not in stages:
+        raise ValueError(
+            f"Unknown filter: {name!r} (choose from {', '.join(FILTER_NAMES)})"
+        )
+    return FilterPipeline(*stages[name], offset_mm=offset_mm)
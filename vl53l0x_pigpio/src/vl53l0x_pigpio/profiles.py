@@ -0,0 +1,50 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+測距プロファイル (速度と精度のトレードオフ)。
+
+タイミングバジェットを長くすると測定値のばらつきが小さくなり、
+短くすると測定回数が増えます。信号レート制限を下げて VCSEL の
+パルス周期を長くすると、暗いターゲットや遠くまで測れますが、
+周囲光の影響を受けやすくなります。
+値は ST のアプリケーションノートおよび Pololu のサンプルに合わせています。
+"""
+from typing import NamedTuple
+
+
+class RangingProfile(NamedTuple):
+    """測距プロファイルの設定値。"""
+    timing_budget_us: int
+    signal_rate_limit_mcps: float
+    pre_range_vcsel_period: int  # PCLK
+    final_range_vcsel_period: int  # PCLK
+
+
+DEFAULT_PROFILE = "default"
+
+RANGING_PROFILES: dict[str, RangingProfile] = {
+    # 20ms: 測定回数重視
+    "high_speed": RangingProfile(20000, 0.25, 14, 10),
+    # 33ms: センサーの初期値
+    DEFAULT_PROFILE: RangingProfile(33000, 0.25, 14, 10),
+    # 33ms: 信号レート制限を下げ、VCSEL周期を長くして最大2m程度まで
+    "long_range": RangingProfile(33000, 0.1, 18, 14),
+    # 200ms: 精度重視
+    "high_accuracy": RangingProfile(200000, 0.25, 14, 10),
+}
+
+
+def get_profile(name: str) -> RangingProfile:
+    """
+    名前から測距プロファイルを返します。
+
+    Raises:
+        ValueError: 不明な名前の場合
+    """
+    if name not in RANGING_PROFILES:
+        raise ValueError(
+            f"Unknown profile: {name!r} "
+            f"(choose from {', '.join(RANGING_PROFILES)})"
+        )
+    return RANGING_PROFILES[name]
@@ -0,0 +1,311 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+測定値の記録と再生。
+
+`SampleRecorder` はフィルター前の測定値を時刻とレンジステータス付きで
+.npy ファイルに記録します。`chunk_size` 件ごとに行をファイルの末尾に追記し、
+その後でヘッダーの件数を書き換えます。ヘッダーは固定長なので、
+追記しても既に書いた部分は書き換えません。
+途中で止まっても (書き込み中のチャンクが壊れても)、
+それまでに書き出したチャンクは読み込めます。
+
+`ReplaySampler` は記録した測定値を `DistanceSampler` と同じ
+インターフェースで再生します。フィルターや障害物判定などを、
+センサーのない開発環境で同じデータを使って何度でも評価できます。
+"""
+import struct
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from .filters import FilterPipeline
+from .my_logger import get_logger
+from .sampler import DistanceSampler
+
+# 記録の各行の型
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # time.monotonic() の値 (秒)
+    ("distance_mm", "<i4"),
+    ("status", "<i2"),  # レンジステータス (不明なら STATUS_UNKNOWN)
+])
+STATUS_UNKNOWN = -1
+CHUNK_PREFIX = "chunk_"  # 以前の .npz 形式の記録のメンバー名
+DEFAULT_CHUNK_SIZE = 1024
+# .npy ヘッダーの長さ (件数が何桁になっても変わらないように固定)
+NPY_HEADER_SIZE = 192
+
+
+def _npy_header(rows: int) -> bytes:
+    """
+    rows 件の記録の .npy (バージョン1.0) ヘッダー。長さは NPY_HEADER_SIZE。
+    """
+    header = repr({
+        "descr": np.lib.format.dtype_to_descr(RECORD_DTYPE),
+        "fortran_order": False,
+        "shape": (rows,),
+    })
+    magic = np.lib.format.magic(1, 0)
+    size = NPY_HEADER_SIZE - len(magic) - 2
+    return (
+        magic + struct.pack("<H", size)
+        + header.ljust(size - 1).encode("latin1") + b"\n"
+    )
+
+
+def load_recording(path: Path | str) -> np.ndarray:
+    """
+    記録を読み込み、RECORD_DTYPE の構造化配列を返します。
+
+    ファイルがヘッダーの件数より短い (書き込み中に止まった) 場合は、
+    ファイルにある完全な行だけを返します。以前の .npz 形式も読み込めます。
+
+    Raises:
+        ValueError: 記録のファイルでない場合
+    """
+    if zipfile.is_zipfile(path):
+        # 以前の形式: チャンクごとの .npy をメンバーにした .npz
+        with np.load(path) as data:
+            names = sorted(
+                name for name in data.files if name.startswith(CHUNK_PREFIX)
+            )
+            if not names:
+                return np.empty(0, dtype=RECORD_DTYPE)
+            return np.concatenate([data[name] for name in names])
+
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+        if dtype != RECORD_DTYPE or len(shape) != 1:
+            raise ValueError(f"{path}: not a recording (dtype={dtype})")
+        available = (Path(path).stat().st_size - f.tell()) // dtype.itemsize
+        return np.fromfile(f, dtype=dtype, count=min(shape[0], available))
+
+
+class SampleRecorder:
+    """
+    測定値を .npy ファイルにチャンク単位で追記します。
+
+    append() はメモリ上のバッファに書くだけで、chunk_size 件たまると
+    (または flush(), close() で) ファイルに書き出します。
+    DistanceSampler の recorder に渡すと、サンプラーのスレッドから呼ばれます。
+    """
+
+    def __init__(
+            self, path: Path | str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+            debug: bool = False
+    ):
+        """
+        Args:
+            path (Path | str): 出力ファイル (.npy)。既にあれば上書きします。
+            chunk_size (int): 1回に書き出す件数
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be 1 or more")
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.__log = get_logger(self.__class__.__name__, debug)
+
+        self._buffer = np.empty(chunk_size, dtype=RECORD_DTYPE)
+        self._buffered = 0
+        self._chunks = 0
+        self._written = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 0件のヘッダーだけのファイルを作る
+        self._file = open(self.path, "wb")
+        self._file.write(_npy_header(0))
+        self._file.flush()
+        self.__log.debug("path=%s, chunk_size=%s", self.path, chunk_size)
+
+    def __enter__(self) -> "SampleRecorder":
+        return self
+
+    def __exit__(
+        self, exc_type: type | None, exc_val: Exception | None, exc_tb: type | None
+    ) -> None:
+        self.close()
+
+    @property
+    def count(self) -> int:
+        """記録した件数 (書き出し前のものを含む)。"""
+        return self._written + self._buffered
+
+    def append(
+            self, timestamp: float, distance_mm: int, status: int | None = None
+    ) -> None:
+        """
+        測定値を1件記録します。
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError("SampleRecorder is closed")
+            self._buffer[self._buffered] = (
+                timestamp, distance_mm, STATUS_UNKNOWN if status is None else status
+            )
+            self._buffered += 1
+            if self._buffered == self.chunk_size:
+                self._write_chunk()
+
+    def flush(self) -> None:
+        """
+        バッファの測定値をファイルに書き出します。
+        """
+        with self._lock:
+            if self._buffered and not self._closed:
+                self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        """
+        バッファを1つのチャンクとして追記します (ロックを取って呼ぶこと)。
+
+        行を書き出してから、ヘッダーの件数を更新します。
+        行の書き込み中に止まっても、ヘッダーの件数は前のチャンクまでです。
+        """
+        self._file.seek(0, 2)
+        self._file.write(self._buffer[:self._buffered].tobytes())
+        self._file.flush()
+        self._file.seek(0)
+        self._file.write(_npy_header(self._written + self._buffered))
+        self._file.flush()
+        self.__log.debug("chunk %s: %s samples", self._chunks, self._buffered)
+        self._chunks += 1
+        self._written += self._buffered
+        self._buffered = 0
+
+    def close(self) -> None:
+        """
+        残りの測定値を書き出して閉じます。
+        """
+        self.flush()
+        with self._lock:
+            if not self._closed:
+                self._file.close()
+            self._closed = True
+
+
+class ReplaySampler(DistanceSampler):
+    """
+    記録した測定値を再生するサンプラー。
+
+    DistanceSampler と同じように latest, get_range(), get_history(),
+    get_stats(), add_listener() などが使えます。記録はフィルター前の値なので、
+    filter を変えて同じデータで比較できます。
+
+    公開するサンプルの時刻は、記録の時刻を start() の時刻からの
+    経過時間に置き換えたものです。speed を変えても時刻の間隔は記録のままなので、
+    フィルターの結果は再生速度によりません。
+    """
+
+    def __init__(
+            self, recording: np.ndarray | Path | str, speed: float = 1.0,
+            loop: bool = False, history: int = 256,
+            filter: FilterPipeline | None = None, debug: bool = False
+    ):
+        """
+        Args:
+            recording (np.ndarray | Path | str): 記録 (load_recording() の
+                戻り値) またはそのファイル
+            speed (float): 再生速度の倍率。0 なら待たずに最後まで再生します。
+            loop (bool): 最後まで再生したら最初から繰り返します。
+            history (int): リングバッファに保持するサンプル数
+            filter (FilterPipeline | None): 測定値に適用するフィルター
+        """
+        super().__init__(None, history=history, filter=filter, debug=debug)  # type: ignore[arg-type]
+        if not isinstance(recording, np.ndarray):
+            recording = load_recording(recording)
+        if len(recording) == 0:
+            raise ValueError("recording is empty")
+        if loop and len(recording) < 2:
+            raise ValueError("loop needs at least 2 samples")
+        if speed < 0:
+            raise ValueError("speed must be 0 or more")
+
+        self.recording = recording
+        self.speed = speed
+        self.loop = loop
+        self.replayed = 0
+        self._done = threading.Event()
+        self.__log = get_logger(self.__class__.__name__, debug)
+
+    def start(self) -> None:
+        """
+        再生を開始します。
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._done.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ReplaySampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        再生を止めます。
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        最後まで再生する (または stop() する) のを待ちます。
+
+        Returns:
+            bool: 終わった場合 True, timeout の場合 False
+        """
+        return self._done.wait(timeout)
+
+    def _run(self) -> None:
+        """
+        再生のスレッド。記録の時刻に合わせて測定値を公開します。
+        """
+        elapsed = self.recording["timestamp"] - self.recording["timestamp"][0]
+        distances = self.recording["distance_mm"]
+        statuses = self.recording["status"]
+        # 1周の長さ (最後のサンプルから次の周の最初のサンプルまでを含む)
+        lap_s = elapsed[-1] + float(np.median(np.diff(elapsed))) if self.loop else 0.0
+        start = time.monotonic()
+        lap_start = 0.0
+        try:
+            while True:
+                for t, distance_mm, status in zip(elapsed, distances, statuses):
+                    t += lap_start
+                    if self.speed:
+                        delay = start + t / self.speed - time.monotonic()
+                        if delay > 0 and self._stop.wait(delay):
+                            return
+                    if self._stop.is_set():
+                        return
+                    self._process(
+                        int(distance_mm), start + t,
+                        None if status == STATUS_UNKNOWN else int(status)
+                    )
+                    self.replayed += 1
+                if not self.loop:
+                    self.__log.debug("replayed=%s", self.replayed)
+                    return
+                lap_start += lap_s
+        finally:
+            self._done.set()
+
+    def get_stats(self) -> dict:
+        """
+        再生の統計を返します。
+        """
+        stats = super().get_stats()
+        stats["replayed"] = self.replayed
+        return stats
@@ -0,0 +1,262 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+距離センサーのバックグラウンドサンプラー。
+
+`DistanceSampler` はセンサーを連続測距モードにしてバックグラウンドの
+スレッドで測定を続け、最新の測定値と、時刻付きのリングバッファ (NumPy) を
+公開します。読み出し側 (HTTP, WebSocket, エージェント, 障害物判定など) は
+I2Cに触れずに値を読めるので、読み出し側がいくつあってもセンサーへの
+アクセスは1本のスレッドだけです。
+
+書き込みはサンプラーのスレッドだけが行い、最新値はタプルの差し替え
+(1回の代入) で公開するので、読み出し側はロックを取りません。
+"""
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, NamedTuple
+
+import numpy as np
+
+from .driver import VL53L0X
+from .filters import FilterPipeline
+from .my_logger import get_logger
+
+if TYPE_CHECKING:
+    from .recorder import SampleRecorder
+
+ERROR_RETRY_S = 0.1  # 測定エラー後に再試行するまでの時間 (秒)
+
+
+class Sample(NamedTuple):
+    """1回分の測定値。"""
+    distance_mm: int
+    timestamp: float  # time.monotonic() の値 (秒)
+    seq: int  # 通し番号 (0から)
+    raw_mm: int | None = None  # フィルター前の値 (フィルターなしは None)
+
+
+class DistanceSampler:
+    """
+    連続測距をバックグラウンドで実行し、最新値と履歴を提供します。
+
+    実行中はセンサーをこのクラスのスレッドが使うので、
+    他からセンサーのメソッドを直接呼ばないでください。
+    """
+
+    def __init__(
+            self, sensor: VL53L0X, period_ms: int = 0, history: int = 256,
+            filter: FilterPipeline | None = None, profile: str | None = None,
+            recorder: "SampleRecorder | None" = None, debug: bool = False
+    ):
+        """
+        Args:
+            sensor (VL53L0X): 初期化済みのセンサー
+            period_ms (int): 測定間隔 (ms)。0 はバックツーバック
+                (start_continuous() を参照)
+            history (int): リングバッファに保持するサンプル数
+            filter (FilterPipeline | None): 測定値に適用するフィルター
+                (make_filter() を参照)。無効値やレンジステータスが有効で
+                ないサンプルは公開されず、最新値は最後の有効値のままです。
+            profile (str | None): start() で連続測距の前に適用する
+                測距プロファイル (VL53L0X.set_profile() を参照)
+            recorder (SampleRecorder | None): フィルター前のすべての測定値を
+                レンジステータスと一緒に記録します。stop() で書き出します。
+        """
+        if history < 1:
+            raise ValueError("history must be 1 or more")
+
+        self.sensor = sensor
+        self.period_ms = period_ms
+        self.filter = filter
+        self.profile = profile
+        self.recorder = recorder
+        self.__log = get_logger(self.__class__.__name__, debug)
+
+        # 書き込み中のスロット用に1つ多く確保する (get_history() を参照)
+        self._slots = history + 1
+        self._timestamps = np.zeros(self._slots, dtype=np.float64)
+        self._distances = np.zeros(self._slots, dtype=np.int32)
+        self._count = 0  # 書き込んだサンプル数 (書き込み側だけが増やす)
+        self._latest: Sample | None = None
+        self._first = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # 新しいサンプルを受け取る関数 (差し替えで更新するのでロック不要)
+        self._listeners: tuple[Callable[[Sample], None], ...] = ()
+        self.errors = 0
+
+    def __enter__(self) -> "DistanceSampler":
+        self.start()
+        return self
+
+    def __exit__(
+        self, exc_type: type | None, exc_val: Exception | None, exc_tb: type | None
+    ) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        """サンプラーのスレッドが動いているか。"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def capacity(self) -> int:
+        """get_history() で返せるサンプル数の上限。"""
+        return self._slots - 1
+
+    def add_listener(self, listener: Callable[[Sample], None]) -> None:
+        """
+        新しいサンプルが公開されるたびに呼ぶ関数を登録します。
+        サンプラーのスレッドから呼ばれるので、すぐに戻る関数にしてください。
+        """
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[Sample], None]) -> None:
+        """
+        add_listener() で登録した関数を解除します。
+        """
+        self._listeners = tuple(f for f in self._listeners if f != listener)
+
+    def start(self) -> None:
+        """
+        連続測距とサンプリングを開始します。
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self.profile is not None and self.sensor.profile != self.profile:
+            self.sensor.set_profile(self.profile)
+        if self.recorder is not None or self.filter is not None:
+            self.sensor.read_range_status = True
+        self.sensor.start_continuous(self.period_ms)
+        self._thread = threading.Thread(
+            target=self._run, name="DistanceSampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        サンプリングを止め、センサーをシングルショットに戻します。
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+        self.sensor.stop_continuous()
+        if self.recorder is not None:
+            self.recorder.flush()
+
+    def _run(self) -> None:
+        """
+        サンプラーのスレッド。測定結果を待っては公開します。
+        """
+        while not self._stop.is_set():
+            try:
+                distance_mm = self.sensor.read_continuous()
+            except Exception as e:
+                self.errors += 1
+                self.__log.warning("%s: %s", type(e).__name__, e)
+                # I2Cエラーが続く場合に空回りしないよう少し待つ
+                self._stop.wait(ERROR_RETRY_S)
+                continue
+            timestamp = time.monotonic()
+            status = self.sensor.range_status
+            if self.recorder is not None:
+                self.recorder.append(timestamp, distance_mm, status)
+            self._process(distance_mm, timestamp, status)
+
+    def _process(
+            self, distance_mm: int, timestamp: float, status: int | None = None
+    ) -> None:
+        """
+        測定値にフィルターを適用し、無効値でなければ公開します。
+        status はレンジステータス (不明なら None) です。
+        """
+        if self.filter is None:
+            self._publish(distance_mm, timestamp)
+            return
+        filtered = self.filter.update(distance_mm, timestamp, status)
+        if filtered is not None:
+            self._publish(round(filtered), timestamp, distance_mm)
+
+    def _publish(
+            self, distance_mm: int, timestamp: float, raw_mm: int | None = None
+    ) -> None:
+        """
+        サンプルをリングバッファに書き、最新値を差し替えます。
+        スロットを書いてから件数を増やすので、読み出し側は
+        件数に含まれるスロットを書き途中で見ることがありません。
+        """
+        seq = self._count
+        i = seq % self._slots
+        self._timestamps[i] = timestamp
+        self._distances[i] = distance_mm
+        self._count = seq + 1
+        sample = Sample(distance_mm, timestamp, seq, raw_mm)
+        self._latest = sample
+        self._first.set()
+        for listener in self._listeners:
+            try:
+                listener(sample)
+            except Exception as e:
+                self.__log.warning("listener: %s: %s", type(e).__name__, e)
+
+    @property
+    def latest(self) -> Sample | None:
+        """最新のサンプル。まだなければ None。"""
+        return self._latest
+
+    def get_range(self, timeout: float = 1.0) -> int:
+        """
+        最新の測定値 (mm) を返します。VL53L0X.get_range() の代わりに使えます。
+        最初のサンプルが出るまでは最大 timeout 秒待ちます。
+
+        Raises:
+            TimeoutError: timeout 秒以内にサンプルが得られなかった場合
+        """
+        if not self._first.wait(timeout):
+            raise TimeoutError("No distance sample available")
+        return self._latest.distance_mm  # type: ignore[union-attr]
+
+    def get_history(self, count: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        直近のサンプルを古い順に返します。
+
+        Args:
+            count (int | None): 返すサンプル数の上限。None はすべて。
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (時刻 [秒], 距離 [mm]) の配列のコピー
+        """
+        while True:
+            end = self._count
+            n = min(end, self.capacity)
+            if count is not None:
+                n = min(n, max(count, 0))
+            idx = np.arange(end - n, end) % self._slots
+            timestamps = self._timestamps[idx]
+            distances = self._distances[idx]
+            # 書き込み側は件数 c のとき番号 c のサンプルを
+            # スロット c % _slots に書いている途中かもしれない。
+            # 読んだ最も古いサンプル (end - n) のスロットに届いていなければ確定
+            if self._count - (end - n) < self._slots:
+                return timestamps, distances
+
+    def get_stats(self) -> dict:
+        """
+        サンプリングの統計を返します。
+        """
+        timestamps, _ = self.get_history()
+        rate = 0.0
+        if len(timestamps) >= 2 and timestamps[-1] > timestamps[0]:
+            rate = (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+        return {
+            "samples": self._count,
+            "errors": self.errors,
+            "rejected": self.filter.rejected if self.filter else 0,
+            "rate_hz": rate,
+        }
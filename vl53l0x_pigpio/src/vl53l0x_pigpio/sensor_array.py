@@ -0,0 +1,240 @@
+#
+# (c) 2025 Yoichi Tanibayashi
+#
+"""
+複数の VL53L0X をまとめて扱うためのクラス。
+
+VL53L0X は電源投入時に必ずI2Cアドレス 0x29 になるので、同じバスに
+複数つなぐには、XSHUT ピンで1つずつ起動してアドレスを付け替えます。
+`VL53L0XArray` はこの手順と、センサー間の干渉 (クロストーク) を避ける
+測定スケジュールを受け持ち、全センサーの最新値を NumPy 配列で返します。
+"""
+import math
+import time
+from pathlib import Path
+
+import numpy as np
+import pigpio
+
+from .driver import I2C_SLAVE_DEVICE_ADDRESS, VL53L0X
+from .my_logger import get_logger
+
+DEFAULT_I2C_ADDRESS = 0x29
+FIRST_ASSIGNED_ADDRESS = 0x30
+BOOT_TIME_S = 0.002  # XSHUT を High にしてから起動するまでの時間 (最大1.2ms)
+RESET_TIME_S = 0.01
+PERIOD_MARGIN_MS = 5  # 連続測距の間隔に加える余裕 (ms)
+
+# 測定に失敗したセンサーの値
+INVALID_DISTANCE = -1
+
+
+def assign_i2c_address(
+        pi: pigpio.pi, new_address: int, i2c_bus: int = 1,
+        current_address: int = DEFAULT_I2C_ADDRESS
+) -> None:
+    """
+    起動直後 (初期化前) のセンサーのI2Cアドレスを変更します。
+    """
+    handle = pi.i2c_open(i2c_bus, current_address)
+    try:
+        pi.i2c_write_byte_data(handle, I2C_SLAVE_DEVICE_ADDRESS, new_address & 0x7F)
+    finally:
+        pi.i2c_close(handle)
+
+
+class VL53L0XArray:
+    """
+    XSHUT ピンで起動順を制御し、複数の VL53L0X を1つのバスで使います。
+
+    poll() は全センサーを1回ずつ測定し、距離を並べた配列を返します。
+
+    - start() 前: シングルショット測定を1つずつ順番に行います (ラウンドロビン)。
+      同時に発光するセンサーがないので、クロストークは起きません。
+    - start() 後: 各センサーを同じ間隔のタイムド連続測距にし、
+      開始時刻を 間隔/センサー数 ずつずらします。
+      測定が重ならず、poll() は結果を読み出すだけになります。
+    """
+
+    def __init__(
+            self, pi: pigpio.pi, xshut_pins: list[int],
+            addresses: list[int] | None = None, i2c_bus: int = 1,
+            config_file_path: Path | None = None,
+            gpio1_pins: list[int | None] | None = None,
+            fast_init: bool = False, profile: str | None = None,
+            debug: bool = False
+    ):
+        """
+        Args:
+            pi (pigpio.pi): pigpio の接続
+            xshut_pins (list[int]): 各センサーの XSHUT を接続したGPIOピン (BCM)
+            addresses (list[int] | None): 各センサーに割り当てるアドレス。
+                None なら 0x30 から順に割り当てます。
+            i2c_bus (int): I2Cバス番号
+            config_file_path (Path | None): 各センサーに渡す設定ファイル
+            gpio1_pins (list[int | None] | None): 各センサーの GPIO1 のピン
+            fast_init (bool): 高速初期化 (VL53L0X を参照)。
+                キャッシュはアドレスごとに保存されます。
+            profile (str | None): 各センサーに適用する測距プロファイル
+        """
+        if addresses is None:
+            addresses = [FIRST_ASSIGNED_ADDRESS + i for i in range(len(xshut_pins))]
+        if gpio1_pins is None:
+            gpio1_pins = [None] * len(xshut_pins)
+        if not len(xshut_pins) == len(addresses) == len(gpio1_pins):
+            raise ValueError("xshut_pins, addresses and gpio1_pins must have the same length")
+        if len(set(addresses)) != len(addresses) or DEFAULT_I2C_ADDRESS in addresses:
+            raise ValueError(f"addresses must be unique and not {DEFAULT_I2C_ADDRESS:#04x}")
+
+        self.pi = pi
+        self.xshut_pins = list(xshut_pins)
+        self.addresses = list(addresses)
+        self.i2c_bus = i2c_bus
+        self.__log = get_logger(self.__class__.__name__, debug)
+        self.sensors: list[VL53L0X] = []
+        self.period_ms = 0
+
+        n = len(xshut_pins)
+        self.distances = np.full(n, INVALID_DISTANCE, dtype=np.int32)
+        self.timestamps = np.zeros(n, dtype=np.float64)
+        self.errors = np.zeros(n, dtype=np.int64)
+        self._polls = 0
+        self._poll_time = 0.0
+
+        # すべてのセンサーを停止してから、1つずつ起動してアドレスを付け替える
+        for pin in self.xshut_pins:
+            self.pi.set_mode(pin, pigpio.OUTPUT)
+            self.pi.write(pin, 0)
+        time.sleep(RESET_TIME_S)
+
+        try:
+            for pin, address, gpio1_pin in zip(self.xshut_pins, self.addresses, gpio1_pins):
+                self.pi.write(pin, 1)
+                time.sleep(BOOT_TIME_S)
+                assign_i2c_address(self.pi, address, i2c_bus)
+                self.__log.debug("xshut_pin=%s: address=%s", pin, hex(address))
+                self.sensors.append(VL53L0X(
+                    self.pi, i2c_bus=i2c_bus, i2c_address=address, debug=debug,
+                    config_file_path=config_file_path, gpio1_pin=gpio1_pin,
+                    fast_init=fast_init, profile=profile
+                ))
+        except Exception as e:
+            self.close()
+            raise RuntimeError(
+                f"Cannot initialize the sensor on XSHUT GPIO{pin} "
+                f"({address:#04x}): {e}"
+            ) from e
+
+    def __enter__(self) -> "VL53L0XArray":
+        return self
+
+    def __exit__(
+        self, exc_type: type | None, exc_val: Exception | None, exc_tb: type | None
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.sensors)
+
+    @property
+    def running(self) -> bool:
+        """連続測距中か。"""
+        return self.period_ms > 0
+
+    def min_period_ms(self) -> int:
+        """
+        測定が重ならない最小の連続測距間隔 (ms)。
+        センサー数 × 最大のタイミングバジェット + 余裕。
+        """
+        budget_us = max(s.measurement_timing_budget_us for s in self.sensors)
+        return math.ceil(len(self.sensors) * budget_us / 1000) + PERIOD_MARGIN_MS
+
+    def start(self, period_ms: int | None = None) -> None:
+        """
+        開始時刻をずらして、全センサーのタイムド連続測距を開始します。
+
+        Args:
+            period_ms (int | None): 各センサーの測定間隔 (ms)。
+                None なら min_period_ms()。
+        """
+        if self.running:
+            return
+        if period_ms is None:
+            period_ms = self.min_period_ms()
+        if period_ms < self.min_period_ms():
+            self.__log.warning(
+                "period_ms=%s is shorter than %s: measurements may overlap",
+                period_ms, self.min_period_ms()
+            )
+
+        stagger_s = period_ms / 1000 / len(self.sensors)
+        next_start = time.monotonic()
+        for sensor in self.sensors:
+            delay = next_start - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            sensor.start_continuous(period_ms)
+            next_start += stagger_s
+        self.period_ms = period_ms
+        self.__log.debug("period_ms=%s, stagger=%.1fms", period_ms, stagger_s * 1000)
+
+    def stop(self) -> None:
+        """
+        連続測距を停止します。
+        """
+        for sensor in self.sensors:
+            if sensor.continuous_mode is not None:
+                sensor.stop_continuous()
+        self.period_ms = 0
+
+    def poll(self) -> np.ndarray:
+        """
+        全センサーを1回ずつ測定します (開始した順)。
+
+        Returns:
+            np.ndarray: 各センサーの距離 (mm)。測定に失敗したセンサーは
+                INVALID_DISTANCE。内部の配列のコピーです。
+        """
+        start = time.perf_counter()
+        for i, sensor in enumerate(self.sensors):
+            try:
+                if self.running:
+                    distance = sensor.read_continuous()
+                else:
+                    distance = sensor.get_range()
+            except Exception as e:
+                self.errors[i] += 1
+                self.distances[i] = INVALID_DISTANCE
+                self.__log.warning("sensor[%s]: %s: %s", i, type(e).__name__, e)
+                continue
+            self.distances[i] = distance
+            self.timestamps[i] = time.monotonic()
+        self._poll_time += time.perf_counter() - start
+        self._polls += 1
+        return self.distances.copy()
+
+    def get_stats(self) -> dict:
+        """
+        poll() の統計を返します。
+        """
+        samples = self._polls * len(self.sensors) - int(self.errors.sum())
+        return {
+            "sensors": len(self.sensors),
+            "polls": self._polls,
+            "samples": samples,
+            "errors": self.errors.tolist(),
+            "polls_per_sec": self._polls / self._poll_time if self._poll_time else 0.0,
+            "samples_per_sec": samples / self._poll_time if self._poll_time else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        測距を停止してセンサーを閉じ、XSHUT を Low にします
+        (アドレスは次の起動時に割り当て直します)。
+        """
+        self.stop()
+        for sensor in self.sensors:
+            sensor.close()
+        self.sensors = []
+        for pin in self.xshut_pins:
+            self.pi.write(pin, 0)
@@ -0,0 +1,120 @@
+import unittest
+from unittest.mock import Mock, call, patch
+from vl53l0x_pigpio.driver import (
+    VL53L0X, SYSRANGE_START, SYS_INTERMEASUREMENT_PERIOD,
+    SYSTEM_INTERRUPT_CLEAR, OSC_CALIBRATE_VAL, RESULT_RANGE_STATUS,
+    SYSRANGE_MODE_SINGLESHOT, SYSRANGE_MODE_BACK_TO_BACK, SYSRANGE_MODE_TIMED
+)
+
+class TestVL53L0XContinuous(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_word_data.side_effect = self.mock_read_word_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (6, bytearray([0] * 6))
+        self.patcher = patch('pigpio.pi', return_value=self.mock_pi)
+        self.mock_pigpio_pi = self.patcher.start()
+
+        # Minimal register values for initialization
+        self.reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            0x13: 0x01, # Measurement always ready
+        }
+        # Word registers (values as the sensor returns them, big-endian)
+        self.word_map = {
+            OSC_CALIBRATE_VAL: 0x0100,
+            RESULT_RANGE_STATUS + 10: 321,
+        }
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def mock_read_word_data(self, handle: int, register: int) -> int:
+        value = self.word_map.get(register, 0)
+        # pigpioはリトルエンディアンで読み取る
+        return ((value & 0xFF) << 8) | (value >> 8)
+
+    def byte_writes(self) -> list:
+        return self.mock_pi.i2c_write_byte_data.call_args_list
+
+    def test_start_back_to_back(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            tof.start_continuous()
+            self.assertEqual(tof.continuous_mode, "back_to_back")
+            # stop_variable の復元 (7回) の後に測定開始
+            self.assertEqual(len(self.byte_writes()), 8)
+            self.assertEqual(
+                self.byte_writes()[-1],
+                call(1, SYSRANGE_START, SYSRANGE_MODE_BACK_TO_BACK)
+            )
+
+    def test_start_timed(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            tof.start_continuous(50)
+            self.assertEqual(tof.continuous_mode, "timed")
+            # 間隔は OSC_CALIBRATE_VAL 倍してビッグエンディアン32ビットで書く
+            self.mock_pi.i2c_write_i2c_block_data.assert_called_with(
+                1, SYS_INTERMEASUREMENT_PERIOD,
+                list((50 * 0x0100).to_bytes(4, "big"))
+            )
+            self.assertEqual(
+                self.byte_writes()[-1],
+                call(1, SYSRANGE_START, SYSRANGE_MODE_TIMED)
+            )
+
+    def test_read_continuous(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            tof.set_offset(21)
+            tof.start_continuous()
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+
+            self.assertEqual(tof.read_continuous(), 300)
+            # get_range() も結果を読むだけで、測定を開始しない
+            self.assertEqual(tof.get_range(), 300)
+            self.assertEqual(
+                self.byte_writes(), [call(1, SYSTEM_INTERRUPT_CLEAR, 0x01)] * 2
+            )
+
+    def test_read_continuous_not_running(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            with self.assertRaises(RuntimeError):
+                tof.read_continuous()
+
+    def test_stop_continuous(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            tof.start_continuous()
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            tof.stop_continuous()
+            self.assertIsNone(tof.continuous_mode)
+            self.assertEqual(
+                self.byte_writes()[0],
+                call(1, SYSRANGE_START, SYSRANGE_MODE_SINGLESHOT)
+            )
+
+            # 停止後の get_range() はシングルショット測定に戻る
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            self.assertEqual(tof.get_range(), 321)
+            self.assertEqual(
+                self.byte_writes()[7],
+                call(1, SYSRANGE_START, SYSRANGE_MODE_SINGLESHOT)
+            )
+
+    def test_close_stops_continuous(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            tof.start_continuous()
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+        self.assertEqual(
+            self.byte_writes()[0],
+            call(1, SYSRANGE_START, SYSRANGE_MODE_SINGLESHOT)
+        )
+        self.mock_pi.i2c_close.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+import pigpio
+
+from vl53l0x_pigpio.driver import VL53L0X, RESULT_INTERRUPT_STATUS, RESULT_RANGE_STATUS
+
+class TestVL53L0XInterrupt(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_word_data.side_effect = self.mock_read_word_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (6, bytearray([0] * 6))
+        self.mock_pi.read.return_value = 0  # GPIO1 アサート (アクティブロー)
+        self.patcher = patch('pigpio.pi', return_value=self.mock_pi)
+        self.mock_pigpio_pi = self.patcher.start()
+
+        self.reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            RESULT_INTERRUPT_STATUS: 0x01, # Measurement always ready
+        }
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def mock_read_word_data(self, handle: int, register: int) -> int:
+        if register == RESULT_RANGE_STATUS + 10:
+            return 0x2C01  # 300 (big-endian 0x012C)
+        return 0
+
+    def status_reads(self) -> int:
+        return sum(
+            1 for c in self.mock_pi.i2c_read_byte_data.call_args_list
+            if c.args[1] == RESULT_INTERRUPT_STATUS
+        )
+
+    def test_callback_setup_and_cancel(self) -> None:
+        with VL53L0X(self.mock_pi, gpio1_pin=17) as tof:
+            self.mock_pi.set_mode.assert_called_with(17, pigpio.INPUT)
+            self.mock_pi.set_pull_up_down.assert_called_with(17, pigpio.PUD_UP)
+            self.mock_pi.callback.assert_called_once_with(
+                17, pigpio.FALLING_EDGE, tof._on_gpio1
+            )
+        self.mock_pi.callback.return_value.cancel.assert_called_once()
+
+    def test_no_callback_without_pin(self) -> None:
+        with VL53L0X(self.mock_pi):
+            pass
+        self.mock_pi.callback.assert_not_called()
+
+    def test_get_range_waits_for_interrupt(self) -> None:
+        with VL53L0X(self.mock_pi, gpio1_pin=17) as tof:
+            # GPIO1 は未アサート。コールバックが呼ばれるまで眠る
+            self.mock_pi.read.return_value = 1
+            self.mock_pi.i2c_read_byte_data.reset_mock()
+
+            def fire() -> None:
+                self.mock_pi.read.return_value = 0
+                tof._on_gpio1(17, 0, 0)
+
+            timer = threading.Timer(0.05, fire)
+            timer.start()
+            try:
+                self.assertEqual(tof.get_range(), 300)
+            finally:
+                timer.cancel()
+            # 起きたときにステータスを1回確認するだけ
+            self.assertEqual(self.status_reads(), 1)
+
+    def test_interrupt_timeout(self) -> None:
+        with VL53L0X(self.mock_pi, gpio1_pin=17) as tof:
+            self.mock_pi.read.return_value = 1
+            self.reg_map[RESULT_INTERRUPT_STATUS] = 0x00
+            self.assertFalse(tof._wait_data_ready(0.05))
+            self.reg_map[RESULT_INTERRUPT_STATUS] = 0x01
+
+    def test_polling_fallback_sleeps(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            statuses = iter([0x00, 0x00, 0x01])
+            self.mock_pi.i2c_read_byte_data.side_effect = (
+                lambda handle, register: next(statuses)
+                if register == RESULT_INTERRUPT_STATUS
+                else self.mock_read_byte_data(handle, register)
+            )
+            with patch('vl53l0x_pigpio.driver.time.sleep') as mock_sleep:
+                self.assertTrue(tof._wait_data_ready(1.0))
+            self.assertEqual(mock_sleep.call_count, 2)
+            self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import itertools
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from vl53l0x_pigpio.sampler import DistanceSampler
+
+class TestDistanceSampler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sensor = Mock()
+        self.values = itertools.count(100)
+        self.sensor.read_continuous.side_effect = self.mock_read_continuous
+
+    def mock_read_continuous(self) -> int:
+        time.sleep(0.001)
+        return next(self.values)
+
+    def wait_samples(self, sampler: DistanceSampler, count: int) -> None:
+        deadline = time.monotonic() + 2.0
+        while sampler.get_stats()["samples"] < count:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+    def test_start_stop(self) -> None:
+        sampler = DistanceSampler(self.sensor, period_ms=50)
+        with sampler:
+            self.sensor.start_continuous.assert_called_once_with(50)
+            self.assertTrue(sampler.running)
+        self.assertFalse(sampler.running)
+        self.sensor.stop_continuous.assert_called_once()
+
+    def test_latest(self) -> None:
+        sampler = DistanceSampler(self.sensor)
+        self.assertIsNone(sampler.latest)
+        with sampler:
+            self.assertGreaterEqual(sampler.get_range(), 100)
+            self.wait_samples(sampler, 5)
+        latest = sampler.latest
+        self.assertEqual(latest.distance_mm, 100 + latest.seq)
+        self.assertEqual(sampler.get_range(), latest.distance_mm)
+
+    def test_history_wraps(self) -> None:
+        sampler = DistanceSampler(self.sensor, history=8)
+        with sampler:
+            self.wait_samples(sampler, 20)
+        timestamps, distances = sampler.get_history()
+        self.assertEqual(len(distances), 8)
+        # 古い順に連続した値
+        np.testing.assert_array_equal(np.diff(distances), np.ones(7))
+        self.assertEqual(distances[-1], sampler.latest.distance_mm)
+        self.assertTrue(np.all(np.diff(timestamps) >= 0))
+
+        _, last3 = sampler.get_history(3)
+        np.testing.assert_array_equal(last3, distances[-3:])
+
+    def test_history_empty(self) -> None:
+        sampler = DistanceSampler(self.sensor)
+        timestamps, distances = sampler.get_history()
+        self.assertEqual(len(timestamps), 0)
+        self.assertEqual(len(distances), 0)
+
+    def test_get_range_timeout(self) -> None:
+        sampler = DistanceSampler(self.sensor)
+        with self.assertRaises(TimeoutError):
+            sampler.get_range(timeout=0.01)
+
+    def test_errors_are_counted(self) -> None:
+        failed = threading.Event()
+
+        def read_continuous() -> int:
+            if not failed.is_set():
+                failed.set()
+                raise Exception("Timeout waiting for measurement ready")
+            return self.mock_read_continuous()
+
+        self.sensor.read_continuous.side_effect = read_continuous
+        sampler = DistanceSampler(self.sensor)
+        with sampler:
+            self.wait_samples(sampler, 1)
+        self.assertEqual(sampler.errors, 1)
+
+    def test_history_skips_slot_being_written(self) -> None:
+        # 書き込み側がスロットを書いて、件数を増やす前の状態
+        sampler = DistanceSampler(self.sensor, history=4)
+        for seq in range(10):
+            sampler._publish(seq, float(seq))
+        slot = sampler._count % len(sampler._timestamps)
+        sampler._timestamps[slot] = 10.0
+        timestamps, distances = sampler.get_history()
+        np.testing.assert_array_equal(distances, [6, 7, 8, 9])
+        np.testing.assert_array_equal(timestamps, [6, 7, 8, 9])
+
+    def test_history_with_concurrent_writer(self) -> None:
+        # 書き込み中のスロットを読まないこと (時刻と距離に同じ番号を書く)
+        sampler = DistanceSampler(self.sensor, history=4)
+        total = 200000
+        done = threading.Event()
+
+        def writer() -> None:
+            for seq in range(total):
+                sampler._publish(seq, float(seq))
+            done.set()
+
+        # スレッドを頻繁に切り替えて、書き込み途中を読む機会を増やす
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread = threading.Thread(target=writer)
+        thread.start()
+        reads = 0
+        try:
+            while not done.is_set() or reads == 0:
+                timestamps, distances = sampler.get_history()
+                reads += 1
+                np.testing.assert_array_equal(timestamps, distances)
+                np.testing.assert_array_equal(np.diff(distances), 1)
+                self.assertLessEqual(len(distances), sampler.capacity)
+        finally:
+            thread.join()
+            sys.setswitchinterval(interval)
+        timestamps, distances = sampler.get_history()
+        np.testing.assert_array_equal(distances, np.arange(total - 4, total))
+
+if __name__ == '__main__':
+    unittest.main()
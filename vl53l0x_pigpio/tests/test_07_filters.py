@@ -0,0 +1,156 @@
+import time
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from vl53l0x_pigpio.filters import (
+    FILTER_NAMES, RANGE_STATUS_VALID, AlphaBetaFilter, EMAFilter,
+    FilterPipeline, MedianFilter, make_filter, valid_mask
+)
+from vl53l0x_pigpio.sampler import DistanceSampler
+
+class TestFilters(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.timestamps = np.arange(200) * 0.033
+        self.values = (500 + rng.normal(0, 5, 200)).astype(np.int32)
+        self.values[[10, 50]] = [8190, 8191]
+        self.values[30] = -4
+
+    def stream(self, pipeline: FilterPipeline) -> np.ndarray:
+        out = [
+            pipeline.update(v, t)
+            for v, t in zip(self.values.tolist(), self.timestamps.tolist())
+        ]
+        return np.array([np.nan if v is None else v for v in out])
+
+    def test_valid_mask(self) -> None:
+        mask = valid_mask(np.array([0, 100, 8189, 8190, 8191, -1]))
+        self.assertEqual(mask.tolist(), [True, True, True, False, False, False])
+        # オフセットを引く前の値で範囲外を判定する
+        mask = valid_mask(np.array([8170, 8169]), offset_mm=20)
+        self.assertEqual(mask.tolist(), [False, True])
+
+    def test_valid_mask_status(self) -> None:
+        values = np.array([100, 100, 100, 8190])
+        statuses = np.array([RANGE_STATUS_VALID, 4, -1, RANGE_STATUS_VALID])
+        mask = valid_mask(values, statuses=statuses)
+        # 有効でないステータスは除外し、負の値 (不明) は値だけで判定する
+        self.assertEqual(mask.tolist(), [True, False, True, False])
+
+    def test_range_status_rejected(self) -> None:
+        pipeline = make_filter("ema")
+        self.assertEqual(pipeline.update(100, status=RANGE_STATUS_VALID), 100)
+        self.assertIsNone(pipeline.update(300, status=4))  # 信号不足など
+        self.assertEqual(pipeline.update(100, status=None), 100)
+        self.assertEqual(pipeline.rejected, 1)
+
+        statuses = np.full(len(self.values), RANGE_STATUS_VALID)
+        statuses[[20, 40]] = [2, 4]
+        for name in FILTER_NAMES:
+            with self.subTest(name=name):
+                batch = make_filter(name).apply(
+                    self.values, self.timestamps, statuses
+                )
+                stream_filter = make_filter(name)
+                stream = np.array([
+                    np.nan if v is None else v for v in (
+                        stream_filter.update(v, t, s) for v, t, s in zip(
+                            self.values.tolist(), self.timestamps.tolist(),
+                            statuses.tolist()
+                        )
+                    )
+                ])
+                np.testing.assert_allclose(batch, stream, atol=1e-9)
+                self.assertTrue(np.isnan(batch[[20, 40]]).all())
+                self.assertEqual(stream_filter.rejected, 5)
+
+    def test_batch_matches_stream(self) -> None:
+        for name in FILTER_NAMES:
+            with self.subTest(name=name):
+                batch = make_filter(name).apply(self.values, self.timestamps)
+                stream = self.stream(make_filter(name))
+                np.testing.assert_allclose(batch, stream, atol=1e-9)
+                self.assertEqual(np.count_nonzero(np.isnan(batch)), 3)
+
+    def test_rejected_count(self) -> None:
+        pipeline = make_filter("none")
+        pipeline.apply(self.values)
+        self.assertEqual(pipeline.rejected, 3)
+        self.assertIsNone(pipeline.update(8190))
+        self.assertEqual(pipeline.rejected, 4)
+        pipeline.reset()
+        self.assertEqual(pipeline.rejected, 0)
+
+    def test_median_removes_spike(self) -> None:
+        out = MedianFilter(3).apply(np.array([100, 100, 400, 100, 100]))
+        np.testing.assert_array_equal(out, [100, 100, 100, 100, 100])
+
+    def test_batch_continues_stream_state(self) -> None:
+        x = self.values[:100].astype(np.float64)
+        for make in (lambda: MedianFilter(5), lambda: EMAFilter(0.3)):
+            f = make()
+            split = np.concatenate([f.apply(x[:3]), f.apply(x[3:60]), f.apply(x[60:])])
+            np.testing.assert_allclose(split, make().apply(x), atol=1e-9)
+
+    def test_ema_long_trace_is_stable(self) -> None:
+        out = EMAFilter(0.01).apply(np.full(10000, 100.0))
+        np.testing.assert_allclose(out, 100.0)
+
+    def test_alpha_beta_tracks_motion(self) -> None:
+        t = np.arange(100) * 0.05
+        values = 200 + 400 * t  # 400mm/s で遠ざかる
+        out = AlphaBetaFilter().apply(values, t)
+        self.assertAlmostEqual(out[-1], values[-1], delta=1.0)
+
+    def test_unknown_filter(self) -> None:
+        with self.assertRaises(ValueError):
+            make_filter("kalman2")
+
+    def test_sampler_with_filter(self) -> None:
+        sensor = Mock(range_status=RANGE_STATUS_VALID)
+        readings = iter([100, 8190, 100, 400, 100] + [100] * 1000)
+
+        def read_continuous() -> int:
+            time.sleep(0.001)
+            return next(readings)
+
+        sensor.read_continuous.side_effect = read_continuous
+        sampler = DistanceSampler(sensor, filter=make_filter("median"))
+        with sampler:
+            deadline = time.monotonic() + 2.0
+            while sampler.get_stats()["samples"] < 4:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.005)
+        _, distances = sampler.get_history(4)
+        # 8190 は公開されず、400 はメディアンで取り除かれる
+        np.testing.assert_array_equal(distances, [100, 100, 100, 100])
+        self.assertEqual(sampler.get_stats()["rejected"], 1)
+
+    def test_sampler_rejects_range_status(self) -> None:
+        sensor = Mock(range_status=None)
+        readings = iter([(100, RANGE_STATUS_VALID), (300, 4), (110, None)]
+                        + [(120, RANGE_STATUS_VALID)] * 1000)
+
+        def read_continuous() -> int:
+            time.sleep(0.001)
+            distance_mm, sensor.range_status = next(readings)
+            return distance_mm
+
+        sensor.read_continuous.side_effect = read_continuous
+        sampler = DistanceSampler(sensor, filter=make_filter("none"))
+        with sampler:
+            deadline = time.monotonic() + 2.0
+            while sampler.get_stats()["samples"] < 3:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.005)
+        # フィルターがあればレンジステータスを読む
+        self.assertTrue(sensor.read_range_status)
+        _, distances = sampler.get_history()
+        np.testing.assert_array_equal(distances[:3], [100, 110, 120])
+        self.assertEqual(sampler.get_stats()["rejected"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
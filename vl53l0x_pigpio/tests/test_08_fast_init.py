@@ -0,0 +1,161 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, call, patch
+
+from vl53l0x_pigpio.config_manager import load_config, update_config
+from vl53l0x_pigpio.driver import (
+    VL53L0X, INIT_CACHE_KEY, IDENTIFICATION_MODEL_ID, NVM_PART_UID_LOWER,
+    NVM_PART_UID_UPPER, NVM_READ_DATA, REF_CAL_PHASE_CAL,
+    REF_CAL_VHV_SETTINGS, REG_94, SYSRANGE_START, VALUE_6B
+)
+
+UID = "3A4C1D7E00B6F215"
+
+class TestVL53L0XFastInit(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_word_data.return_value = 0
+        self.mock_pi.i2c_read_i2c_block_data.side_effect = (
+            self.mock_read_block_data
+        )
+        self.mock_pi.i2c_write_byte_data.side_effect = (
+            self.mock_write_byte_data
+        )
+        self.patcher = patch('pigpio.pi', return_value=self.mock_pi)
+        self.mock_pigpio_pi = self.patcher.start()
+
+        self.reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            0x92: 0x05, # spad_count = 5, is_aperture = False
+            0x13: 0x01, # Measurement always ready
+            0x01: 0xE8, # SYSTEM_SEQUENCE_CONFIG
+            0x50: 14, # PRE_RANGE_CONFIG_VCSEL_PERIOD
+            0x70: 10, # FINAL_RANGE_CONFIG_VCSEL_PERIOD
+            IDENTIFICATION_MODEL_ID: 0xEE,
+            0xC2: 0x10,
+            REF_CAL_VHV_SETTINGS: 0x1A,
+            REF_CAL_PHASE_CAL: 0x81,
+        }
+
+        # NVM の内容 (REG_94 で選んだアドレスを NVM_READ_DATA から読む)
+        self.nvm = {
+            NVM_PART_UID_UPPER: bytearray.fromhex(UID[:8]),
+            NVM_PART_UID_LOWER: bytearray.fromhex(UID[8:]),
+        }
+        self.nvm_address = 0
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_file = Path(self.tmpdir.name) / "vl53l0x.json"
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        self.tmpdir.cleanup()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def mock_write_byte_data(self, handle: int, register: int, value: int) -> None:
+        if register == REG_94:
+            self.nvm_address = value
+
+    def mock_read_block_data(self, handle: int, register: int, count: int):
+        if register == NVM_READ_DATA:
+            data = self.nvm.get(self.nvm_address, bytearray(4))
+            return len(data), data
+        return 6, bytearray([0xFF] * 6)
+
+    def byte_writes(self) -> list:
+        return self.mock_pi.i2c_write_byte_data.call_args_list
+
+    def open_sensor(self) -> VL53L0X:
+        self.mock_pi.i2c_write_byte_data.reset_mock()
+        return VL53L0X(
+            self.mock_pi, config_file_path=self.config_file, fast_init=True
+        )
+
+    def test_first_init_saves_cache(self) -> None:
+        update_config(self.config_file, {"offset_mm": 7})
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.init_mode, "full")
+            self.assertEqual(tof.offset_mm, 7)
+
+        config = load_config(self.config_file)
+        self.assertEqual(config["offset_mm"], 7)
+        entry = config[INIT_CACHE_KEY][UID]
+        self.assertEqual(entry["model_id"], 0xEE)
+        self.assertEqual(entry["revision_id"], 0x10)
+        # 先頭から5個の SPAD だけが有効
+        self.assertEqual(entry["ref_spad_map"], [0x1F, 0, 0, 0, 0, 0])
+        self.assertEqual(entry["vhv_settings"], 0x1A)
+        self.assertEqual(entry["phase_cal"], 0x01)
+
+    def test_second_init_is_fast(self) -> None:
+        with self.open_sensor():
+            pass
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.init_mode, "fast")
+            writes = self.byte_writes()
+            # SPAD情報の取得とリファレンスキャリブレーションを省略
+            self.assertNotIn(call(1, REG_94, VALUE_6B), writes)
+            self.assertNotIn(call(1, SYSRANGE_START, 0x41), writes)
+            self.assertIn(call(1, REF_CAL_VHV_SETTINGS, 0x1A), writes)
+            self.assertIn(call(1, REF_CAL_PHASE_CAL, 0x81), writes)
+            self.mock_pi.i2c_write_i2c_block_data.assert_called_with(
+                1, 0xB0, [0x1F, 0, 0, 0, 0, 0]
+            )
+
+    def test_mismatch_falls_back_to_full_init(self) -> None:
+        with self.open_sensor():
+            pass
+        self.reg_map[0xC2] = 0x11  # 別のリビジョンのセンサー
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.init_mode, "full")
+            self.assertIn(call(1, REG_94, VALUE_6B), self.byte_writes())
+        entry = load_config(self.config_file)[INIT_CACHE_KEY][UID]
+        self.assertEqual(entry["revision_id"], 0x11)
+
+    def test_different_part_uid_forces_full_init(self) -> None:
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.init_cache_key, UID)
+        # 同じモデル・リビジョンの別の個体に交換
+        other = "0000000100000002"
+        self.nvm[NVM_PART_UID_UPPER] = bytearray.fromhex(other[:8])
+        self.nvm[NVM_PART_UID_LOWER] = bytearray.fromhex(other[8:])
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.init_mode, "full")
+            self.assertEqual(tof.init_cache_key, other)
+            self.assertIn(call(1, REG_94, VALUE_6B), self.byte_writes())
+        cache = load_config(self.config_file)[INIT_CACHE_KEY]
+        self.assertEqual(sorted(cache), [other, UID])
+
+    def test_broken_cache_falls_back_to_full_init(self) -> None:
+        self.config_file.write_text(json.dumps(
+            {INIT_CACHE_KEY: {UID: {"model_id": 0xEE}}}
+        ))
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.init_mode, "full")
+
+    def test_cache_follows_the_part(self) -> None:
+        with self.open_sensor():
+            pass
+        # アドレスを変えても同じ個体なら高速初期化
+        with VL53L0X(
+                self.mock_pi, i2c_address=0x30,
+                config_file_path=self.config_file, fast_init=True
+        ) as tof:
+            self.assertEqual(tof.init_mode, "fast")
+        cache = load_config(self.config_file)[INIT_CACHE_KEY]
+        self.assertEqual(sorted(cache), [UID])
+
+    def test_no_cache_without_fast_init(self) -> None:
+        with VL53L0X(self.mock_pi, config_file_path=self.config_file) as tof:
+            self.assertEqual(tof.init_mode, "full")
+        self.assertFalse(self.config_file.exists())
+
+if __name__ == '__main__':
+    unittest.main()
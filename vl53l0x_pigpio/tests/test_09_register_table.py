@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import Mock, call, patch
+
+from vl53l0x_pigpio.driver import (
+    VL53L0X, I2C_ZIP_END, I2C_ZIP_MAX_BYTES, I2C_ZIP_WRITE, TUNING_SETTINGS
+)
+
+class TestVL53L0XRegisterTable(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_pi = self.make_pi()
+        self.patcher = patch('pigpio.pi', return_value=self.mock_pi)
+        self.mock_pigpio_pi = self.patcher.start()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def make_pi(self) -> Mock:
+        reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            0x13: 0x01, # Measurement always ready
+        }
+        pi = Mock()
+        pi.i2c_open.return_value = 1
+        pi.i2c_read_byte_data.side_effect = lambda handle, register: reg_map.get(register, 0)
+        pi.i2c_read_word_data.return_value = 0
+        pi.i2c_read_i2c_block_data.return_value = (6, bytearray([0] * 6))
+        return pi
+
+    def sent_sequence(self, pi: Mock) -> list:
+        """i2c_zip の書き込みを write_byte に展開した呼び出しの列。"""
+        calls = []
+        for c in pi.mock_calls:
+            name, args, _ = c
+            if name == "i2c_zip":
+                data = args[1]
+                i = 0
+                while data[i] != I2C_ZIP_END:
+                    self.assertEqual(data[i:i + 2], [I2C_ZIP_WRITE, 2])
+                    calls.append(("i2c_write_byte_data", (args[0], data[i + 2], data[i + 3])))
+                    i += 4
+            else:
+                calls.append((name, args))
+        return calls
+
+    def test_write_table_encoding(self) -> None:
+        with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.i2c_zip.reset_mock()
+            tof.write_table(((0x10, 0x01), (0x20, 0x02)))
+            self.mock_pi.i2c_zip.assert_called_once_with(
+                1, [I2C_ZIP_WRITE, 2, 0x10, 0x01, I2C_ZIP_WRITE, 2, 0x20, 0x02, I2C_ZIP_END]
+            )
+
+    def test_write_table_chunks(self) -> None:
+        table = tuple((0x10, i) for i in range(100))
+        with VL53L0X(self.mock_pi) as tof:
+            self.mock_pi.i2c_zip.reset_mock()
+            tof.write_table(table)
+            chunks = [c.args[1] for c in self.mock_pi.i2c_zip.call_args_list]
+        self.assertGreater(len(chunks), 1)
+        for data in chunks:
+            self.assertLessEqual(len(data), I2C_ZIP_MAX_BYTES)
+            self.assertEqual(data[-1], I2C_ZIP_END)
+        values = [v for data in chunks for v in data[3:-1:4]]
+        self.assertEqual(values, list(range(100)))
+
+    def test_write_table_unbatched(self) -> None:
+        with VL53L0X(self.mock_pi, batch_writes=False) as tof:
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            tof.write_table(((0x10, 0x01), (0x20, 0x02)))
+            self.assertEqual(
+                self.mock_pi.i2c_write_byte_data.call_args_list,
+                [call(1, 0x10, 0x01), call(1, 0x20, 0x02)]
+            )
+        self.mock_pi.i2c_zip.assert_not_called()
+
+    def test_batched_init_sends_same_sequence(self) -> None:
+        VL53L0X(self.mock_pi)
+        unbatched_pi = self.make_pi()
+        VL53L0X(unbatched_pi, batch_writes=False)
+
+        self.assertEqual(
+            self.sent_sequence(self.mock_pi), self.sent_sequence(unbatched_pi)
+        )
+        # チューニング設定は数回の i2c_zip で送られる
+        self.assertLessEqual(self.mock_pi.i2c_zip.call_count, 3)
+        self.assertLess(
+            len(self.mock_pi.mock_calls),
+            len(unbatched_pi.mock_calls) - len(TUNING_SETTINGS) + 3
+        )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import itertools
+import unittest
+from unittest.mock import Mock, call, patch
+
+import numpy as np
+import pigpio
+
+from vl53l0x_pigpio.driver import I2C_SLAVE_DEVICE_ADDRESS, RESULT_RANGE_STATUS
+from vl53l0x_pigpio.sensor_array import INVALID_DISTANCE, VL53L0XArray
+
+class TestVL53L0XArray(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.handles = itertools.count(1)
+        self.addresses: dict[int, int] = {}
+        self.mock_pi.i2c_open.side_effect = self.mock_i2c_open
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_read_word_data.side_effect = self.mock_read_word_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (6, bytearray([0] * 6))
+        self.patcher = patch('pigpio.pi', return_value=self.mock_pi)
+        self.mock_pigpio_pi = self.patcher.start()
+        self.sleep_patcher = patch('vl53l0x_pigpio.sensor_array.time.sleep')
+        self.mock_sleep = self.sleep_patcher.start()
+
+        self.reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            0x13: 0x01, # Measurement always ready
+        }
+
+    def tearDown(self) -> None:
+        self.sleep_patcher.stop()
+        self.patcher.stop()
+
+    def mock_i2c_open(self, bus: int, address: int) -> int:
+        handle = next(self.handles)
+        self.addresses[handle] = address
+        return handle
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def mock_read_word_data(self, handle: int, register: int) -> int:
+        if register == RESULT_RANGE_STATUS + 10:
+            # アドレス 0x30 のセンサーは 100mm, 0x31 は 200mm, ...
+            value = (self.addresses[handle] - 0x2F) * 100
+            return ((value & 0xFF) << 8) | (value >> 8)
+        return 0
+
+    def test_address_assignment(self) -> None:
+        with VL53L0XArray(self.mock_pi, [17, 27]) as sensors:
+            self.assertEqual([s.i2c_address for s in sensors.sensors], [0x30, 0x31])
+
+            calls = self.mock_pi.mock_calls
+            # 最初に全センサーを停止
+            self.assertEqual(calls[:4], [
+                call.set_mode(17, pigpio.OUTPUT), call.write(17, 0),
+                call.set_mode(27, pigpio.OUTPUT), call.write(27, 0),
+            ])
+            # 1つずつ起動し、0x29 でアドレスを書き換えてから初期化
+            i = calls.index(call.write(17, 1))
+            self.assertEqual(calls[i + 1:i + 5], [
+                call.i2c_open(1, 0x29),
+                call.i2c_write_byte_data(1, I2C_SLAVE_DEVICE_ADDRESS, 0x30),
+                call.i2c_close(1),
+                call.i2c_open(1, 0x30),
+            ])
+            self.assertLess(i, calls.index(call.write(27, 1)))
+            self.assertIn(call.i2c_open(1, 0x31), calls)
+
+        # 閉じると XSHUT を Low に戻す
+        self.mock_pi.write.assert_has_calls([call(17, 0), call(27, 0)])
+
+    def test_invalid_addresses(self) -> None:
+        with self.assertRaises(ValueError):
+            VL53L0XArray(self.mock_pi, [17, 27], addresses=[0x30, 0x30])
+        with self.assertRaises(ValueError):
+            VL53L0XArray(self.mock_pi, [17, 27], addresses=[0x30])
+
+    def test_round_robin_poll(self) -> None:
+        with VL53L0XArray(self.mock_pi, [17, 27, 22]) as sensors:
+            frame = sensors.poll()
+            np.testing.assert_array_equal(frame, [100, 200, 300])
+            stats = sensors.get_stats()
+            self.assertEqual(stats["polls"], 1)
+            self.assertEqual(stats["samples"], 3)
+
+    def test_staggered_start(self) -> None:
+        with VL53L0XArray(self.mock_pi, [17, 27]) as sensors:
+            for s in sensors.sensors:
+                s.start_continuous = Mock()
+                s.read_continuous = Mock(return_value=123)
+            self.mock_sleep.reset_mock()
+            with patch(
+                    'vl53l0x_pigpio.sensor_array.time.monotonic',
+                    return_value=0.0
+            ):
+                sensors.start(100)
+            self.assertTrue(sensors.running)
+            for s in sensors.sensors:
+                s.start_continuous.assert_called_once_with(100)
+            # 2台目は 100ms / 2 遅れて開始
+            self.mock_sleep.assert_called_once_with(0.05)
+
+            np.testing.assert_array_equal(sensors.poll(), [123, 123])
+            for s in sensors.sensors:
+                s.read_continuous.assert_called_once()
+
+    def test_min_period(self) -> None:
+        with VL53L0XArray(self.mock_pi, [17, 27]) as sensors:
+            for s in sensors.sensors:
+                s.measurement_timing_budget_us = 33000
+            self.assertEqual(sensors.min_period_ms(), 66 + 5)
+
+    def test_poll_error(self) -> None:
+        with VL53L0XArray(self.mock_pi, [17, 27]) as sensors:
+            sensors.sensors[1].get_range = Mock(side_effect=Exception("Timeout"))
+            frame = sensors.poll()
+            np.testing.assert_array_equal(frame, [100, INVALID_DISTANCE])
+            self.assertEqual(sensors.get_stats()["errors"], [0, 1])
+            self.assertEqual(sensors.get_stats()["samples"], 1)
+
+    def test_init_error(self) -> None:
+        self.mock_pi.i2c_write_byte_data.side_effect = [None, pigpio.error("I2C write failed")]
+        with self.assertRaises(RuntimeError) as cm:
+            VL53L0XArray(self.mock_pi, [17, 27])
+        self.assertIn("GPIO17", str(cm.exception))
+        self.mock_pi.write.assert_called_with(27, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+from unittest.mock import Mock, call, patch
+
+from vl53l0x_pigpio.driver import (
+    VL53L0X, FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT,
+    FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI, FINAL_RANGE_CONFIG_VALID_PHASE_HIGH,
+    FINAL_RANGE_CONFIG_VCSEL_PERIOD, MSRC_CONFIG_TIMEOUT_MACROP,
+    PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI, PRE_RANGE_CONFIG_VALID_PHASE_HIGH,
+    PRE_RANGE_CONFIG_VCSEL_PERIOD, SYSTEM_SEQUENCE_CONFIG
+)
+from vl53l0x_pigpio.profiles import RANGING_PROFILES, get_profile
+from vl53l0x_pigpio.sampler import DistanceSampler
+
+class TestVL53L0XProfiles(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.mock_pi = Mock()
+        self.mock_pi.i2c_open.return_value = 1
+        self.mock_pi.i2c_read_byte_data.side_effect = self.mock_read_byte_data
+        self.mock_pi.i2c_write_byte_data.side_effect = self.mock_write_byte_data
+        self.mock_pi.i2c_read_word_data.side_effect = self.mock_read_word_data
+        self.mock_pi.i2c_write_word_data.side_effect = self.mock_write_word_data
+        self.mock_pi.i2c_read_i2c_block_data.return_value = (6, bytearray([0] * 6))
+        self.patcher = patch('pigpio.pi', return_value=self.mock_pi)
+        self.mock_pigpio_pi = self.patcher.start()
+
+        # センサーのレジスタ (書き込むと値が変わる)
+        self.reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            0x13: 0x01, # Measurement always ready
+            PRE_RANGE_CONFIG_VCSEL_PERIOD: 6, # 14 PCLK
+            FINAL_RANGE_CONFIG_VCSEL_PERIOD: 4, # 10 PCLK
+        }
+        self.word_map = {
+            PRE_RANGE_CONFIG_TIMEOUT_MACROP_HI: 0x0045, # 70 MCLK
+            FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI: 0x01C6, # 397 MCLK
+        }
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+
+    def mock_read_byte_data(self, handle: int, register: int) -> int:
+        return self.reg_map.get(register, 0)
+
+    def mock_write_byte_data(self, handle: int, register: int, value: int) -> None:
+        # ステータスのレジスタ (SYSRANGE_START など) は書き込んでも変わらない
+        if register not in (0x00, 0x13, 0x83):
+            self.reg_map[register] = value
+
+    def mock_read_word_data(self, handle: int, register: int) -> int:
+        value = self.word_map.get(register, 0)
+        return ((value & 0xFF) << 8) | (value >> 8)
+
+    def mock_write_word_data(self, handle: int, register: int, value: int) -> None:
+        self.word_map[register] = ((value & 0xFF) << 8) | (value >> 8)
+
+    def open_sensor(self, **kwargs) -> VL53L0X:
+        return VL53L0X(self.mock_pi, batch_writes=False, **kwargs)
+
+    def test_get_profile(self) -> None:
+        self.assertEqual(get_profile("high_speed").timing_budget_us, 20000)
+        with self.assertRaises(ValueError):
+            get_profile("bogus")
+        with self.assertRaises(ValueError):
+            self.open_sensor(profile="bogus")
+        self.mock_pi.i2c_open.assert_not_called()
+
+    def test_vcsel_period_decoding(self) -> None:
+        with self.open_sensor() as tof:
+            self.assertEqual(tof.get_vcsel_pulse_period("pre_range"), 14)
+            self.assertEqual(tof.get_vcsel_pulse_period("final_range"), 10)
+            with self.assertRaises(ValueError):
+                tof.get_vcsel_pulse_period("msrc")
+
+    def test_get_measurement_timing_budget(self) -> None:
+        with self.open_sensor() as tof:
+            # pre-range, final-range, DSS が有効 (0xE8)
+            self.reg_map[SYSTEM_SEQUENCE_CONFIG] = 0xE8
+            self.reg_map[MSRC_CONFIG_TIMEOUT_MACROP] = 0x0B # 12 MCLK
+            self.word_map[FINAL_RANGE_CONFIG_TIMEOUT_MACROP_HI] = 0x01C6
+            # MSRC 12 MCLK = 641us, pre-range 70 MCLK = 3737us (14 PCLK)
+            # final-range 397 - 70 MCLK = 12469us (10 PCLK)
+            self.assertEqual(
+                tof.get_measurement_timing_budget(),
+                1910 + 960 + 2 * (641 + 690) + (3737 + 660) + (12469 + 550)
+            )
+
+    def test_set_measurement_timing_budget(self) -> None:
+        with self.open_sensor() as tof:
+            self.assertTrue(tof.set_measurement_timing_budget(50000))
+            self.assertEqual(tof.measurement_timing_budget_us, 50000)
+            # タイムアウトのエンコードで丸められる分だけずれる
+            self.assertAlmostEqual(
+                tof.get_measurement_timing_budget(), 50000 + 1910 - 1320, delta=400
+            )
+            self.assertFalse(tof.set_measurement_timing_budget(19999))
+            self.assertEqual(tof.measurement_timing_budget_us, 50000)
+
+    def test_signal_rate_limit(self) -> None:
+        with self.open_sensor() as tof:
+            tof.set_signal_rate_limit(0.1)
+            self.assertEqual(self.word_map[FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT], 12)
+            self.assertAlmostEqual(tof.get_signal_rate_limit(), 12 / 128)
+            with self.assertRaises(ValueError):
+                tof.set_signal_rate_limit(-1)
+
+    def test_set_vcsel_pulse_period(self) -> None:
+        with self.open_sensor() as tof:
+            budget_us = tof.measurement_timing_budget_us
+            tof.set_vcsel_pulse_period("final_range", 14)
+            self.assertEqual(self.reg_map[FINAL_RANGE_CONFIG_VCSEL_PERIOD], 6)
+            self.assertEqual(self.reg_map[FINAL_RANGE_CONFIG_VALID_PHASE_HIGH], 0x48)
+            tof.set_vcsel_pulse_period("pre_range", 18)
+            self.assertEqual(self.reg_map[PRE_RANGE_CONFIG_VCSEL_PERIOD], 8)
+            self.assertEqual(self.reg_map[PRE_RANGE_CONFIG_VALID_PHASE_HIGH], 0x50)
+            # タイミングバジェットは変わらない
+            self.assertEqual(tof.measurement_timing_budget_us, budget_us)
+            # 位相キャリブレーションの後、シーケンス設定を元に戻す
+            self.assertEqual(self.reg_map[SYSTEM_SEQUENCE_CONFIG], 0xE8)
+
+            with self.assertRaises(ValueError):
+                tof.set_vcsel_pulse_period("final_range", 9)
+            tof.start_continuous()
+            with self.assertRaises(RuntimeError):
+                tof.set_vcsel_pulse_period("final_range", 10)
+
+    def test_set_profile(self) -> None:
+        with self.open_sensor(profile="long_range") as tof:
+            self.assertEqual(tof.profile, "long_range")
+            self.assertEqual(tof.get_vcsel_pulse_period("pre_range"), 18)
+            self.assertEqual(tof.get_vcsel_pulse_period("final_range"), 14)
+            self.assertEqual(self.word_map[FINAL_RANGE_CFG_MIN_COUNT_RATE_RTN_LIMIT], 12)
+
+            for name, profile in RANGING_PROFILES.items():
+                with self.subTest(name=name):
+                    tof.set_profile(name)
+                    self.assertEqual(tof.measurement_timing_budget_us, profile.timing_budget_us)
+                    self.assertEqual(
+                        tof.get_vcsel_pulse_period("final_range"),
+                        profile.final_range_vcsel_period
+                    )
+
+    def test_set_profile_skips_unchanged_vcsel_period(self) -> None:
+        with self.open_sensor() as tof:
+            self.mock_pi.i2c_write_byte_data.reset_mock()
+            tof.set_profile("high_accuracy")
+            self.assertNotIn(
+                call(1, FINAL_RANGE_CONFIG_VCSEL_PERIOD, 4),
+                self.mock_pi.i2c_write_byte_data.call_args_list
+            )
+            self.assertEqual(tof.measurement_timing_budget_us, 200000)
+
+    def test_sampler_applies_profile(self) -> None:
+        sensor = Mock(profile=None)
+        sensor.read_continuous.return_value = 100
+        with DistanceSampler(sensor, profile="high_speed"):
+            pass
+        self.assertEqual(sensor.mock_calls[:2], [
+            call.set_profile("high_speed"), call.start_continuous(0)
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
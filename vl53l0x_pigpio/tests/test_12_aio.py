@@ -0,0 +1,124 @@
+import asyncio
+import itertools
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from vl53l0x_pigpio.aio import AsyncVL53L0X
+from vl53l0x_pigpio.sampler import DistanceSampler
+
+class TestAsyncVL53L0X(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.sensor = Mock(profile=None)
+        self.values = itertools.count(100)
+        self.sensor.read_continuous.side_effect = self.mock_read_continuous
+
+    def mock_read_continuous(self) -> int:
+        time.sleep(0.002)
+        return next(self.values)
+
+    async def test_start_stop(self) -> None:
+        sensor = AsyncVL53L0X(self.sensor, period_ms=50)
+        self.assertFalse(sensor.running)
+        async with sensor:
+            self.assertTrue(sensor.running)
+            self.assertTrue(sensor.sampler.running)
+            self.sensor.start_continuous.assert_called_once_with(50)
+        self.assertFalse(sensor.running)
+        self.assertFalse(sensor.sampler.running)
+        self.sensor.stop_continuous.assert_called_once()
+
+    async def test_read(self) -> None:
+        async with AsyncVL53L0X(self.sensor) as sensor:
+            first = await sensor.read()
+            second = await sensor.read()
+            self.assertGreaterEqual(first.distance_mm, 100)
+            # 毎回新しいサンプルを待つ
+            self.assertGreater(second.seq, first.seq)
+            self.assertGreaterEqual(sensor.latest.seq, second.seq)
+
+    async def test_read_does_not_block_loop(self) -> None:
+        self.sensor.read_continuous.side_effect = lambda: time.sleep(0.05) or 100
+        async with AsyncVL53L0X(self.sensor) as sensor:
+            ticks = 0
+
+            async def ticker() -> None:
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            await sensor.read()
+            task.cancel()
+        # 測定を待っている間もループは動き続ける
+        self.assertGreater(ticks, 3)
+
+    async def test_read_timeout(self) -> None:
+        blocked = threading.Event()
+        self.sensor.read_continuous.side_effect = lambda: blocked.wait(1.0) and 100
+        async with AsyncVL53L0X(self.sensor) as sensor:
+            with self.assertRaises(TimeoutError):
+                await sensor.read(timeout=0.05)
+            self.assertEqual(sensor._waiters, [])
+            blocked.set()
+
+    async def test_read_not_started(self) -> None:
+        with self.assertRaises(RuntimeError):
+            await AsyncVL53L0X(self.sensor).read()
+
+    async def test_stream(self) -> None:
+        async with AsyncVL53L0X(self.sensor) as sensor:
+            seqs = []
+            async for sample in sensor.stream():
+                seqs.append(sample.seq)
+                if len(seqs) == 10:
+                    break
+        # すべてのサンプルを順に返す
+        self.assertEqual(seqs, list(range(seqs[0], seqs[0] + 10)))
+
+    async def test_stream_rate_limit(self) -> None:
+        async with AsyncVL53L0X(self.sensor) as sensor:
+            start = time.monotonic()
+            samples = []
+            async for sample in sensor.stream(20):
+                samples.append(sample)
+                if len(samples) == 5:
+                    break
+            elapsed = time.monotonic() - start
+        # 20Hz で 5個 -> 4周期分 (0.2秒) かかり、間のサンプルは読み飛ばす
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertGreater(samples[-1].seq - samples[0].seq, 4)
+
+    async def test_stop_ends_stream(self) -> None:
+        sensor = AsyncVL53L0X(self.sensor)
+        await sensor.start()
+        received = []
+
+        async def consume() -> None:
+            async for sample in sensor.stream():
+                received.append(sample)
+
+        task = asyncio.create_task(consume())
+        await sensor.read()
+        await sensor.stop()
+        await asyncio.wait_for(task, 1.0)
+        self.assertEqual(sensor._queues, [])
+
+    async def test_shared_sampler(self) -> None:
+        sampler = DistanceSampler(self.sensor)
+        sampler.start()
+        try:
+            async with AsyncVL53L0X(sampler) as sensor:
+                sample = await sensor.read()
+                self.assertGreaterEqual(sample.distance_mm, 100)
+            # 共有したサンプラーは止めない
+            self.assertTrue(sampler.running)
+            self.assertEqual(sampler._listeners, ())
+        finally:
+            sampler.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+import itertools
+import tempfile
+import time
+import unittest
+import zipfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+from click.testing import CliRunner
+
+from vl53l0x_pigpio.__main__ import _load_trace, cli
+from vl53l0x_pigpio.driver import RANGE_STATUS_VALID, RESULT_RANGE_STATUS, VL53L0X
+from vl53l0x_pigpio.filters import make_filter
+from vl53l0x_pigpio.recorder import (
+    NPY_HEADER_SIZE, RECORD_DTYPE, STATUS_UNKNOWN, ReplaySampler, SampleRecorder,
+    load_recording
+)
+from vl53l0x_pigpio.sampler import DistanceSampler
+
+class TestSampleRecorder(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "record.npy"
+
+    def tearDown(self) -> None:
+        self.tmpdir.cleanup()
+
+    def make_recording(self, distances: list[int], interval: float = 0.01) -> np.ndarray:
+        recording = np.zeros(len(distances), dtype=RECORD_DTYPE)
+        recording["timestamp"] = 100.0 + np.arange(len(distances)) * interval
+        recording["distance_mm"] = distances
+        recording["status"] = 11
+        return recording
+
+    def test_chunked_append(self) -> None:
+        with SampleRecorder(self.path, chunk_size=4) as recorder:
+            for i in range(10):
+                recorder.append(i * 0.1, 100 + i, 11)
+            # 2チャンク (8件) は書き出し済み、残り2件はバッファ
+            self.assertEqual(len(load_recording(self.path)), 8)
+            self.assertEqual(recorder.count, 10)
+        recording = load_recording(self.path)
+        np.testing.assert_array_equal(recording["distance_mm"], np.arange(100, 110))
+        np.testing.assert_allclose(recording["timestamp"], np.arange(10) * 0.1)
+        np.testing.assert_array_equal(recording["status"], 11)
+        # ヘッダーと10行だけ。np.load() でもそのまま読める
+        self.assertEqual(
+            self.path.stat().st_size, NPY_HEADER_SIZE + 10 * RECORD_DTYPE.itemsize
+        )
+        np.testing.assert_array_equal(np.load(self.path), recording)
+        with self.assertRaises(ValueError):
+            recorder.append(0.0, 100)
+
+    def test_truncated_recording(self) -> None:
+        with SampleRecorder(self.path, chunk_size=4) as recorder:
+            for i in range(12):
+                recorder.append(i * 0.1, 100 + i, 11)
+        # 3番目のチャンクの途中 (行の途中) で切れたファイル
+        size = NPY_HEADER_SIZE + int(9.5 * RECORD_DTYPE.itemsize)
+        with open(self.path, "r+b") as f:
+            f.truncate(size)
+        recording = load_recording(self.path)
+        np.testing.assert_array_equal(recording["distance_mm"], np.arange(100, 109))
+
+    def test_interrupted_chunk(self) -> None:
+        recorder = SampleRecorder(self.path, chunk_size=4)
+        for i in range(8):
+            recorder.append(i * 0.1, 100 + i, 11)
+        # 3番目のチャンクの行を書いている途中で止まった (ヘッダーは更新前)
+        with open(self.path, "ab") as f:
+            f.write(b"\xff" * (RECORD_DTYPE.itemsize + 5))
+        recording = load_recording(self.path)
+        np.testing.assert_array_equal(recording["distance_mm"], np.arange(100, 108))
+        recorder.close()
+
+    def test_load_npz(self) -> None:
+        # 以前の形式 (チャンクごとの .npy をメンバーにした .npz)
+        path = Path(self.tmpdir.name) / "record.npz"
+        with zipfile.ZipFile(path, "w") as zf:
+            for i, distances in enumerate([[100, 101], [102]]):
+                with zf.open(f"chunk_{i:06d}.npy", "w") as f:
+                    np.lib.format.write_array(f, self.make_recording(distances))
+        np.testing.assert_array_equal(
+            load_recording(path)["distance_mm"], [100, 101, 102]
+        )
+
+    def test_unknown_status(self) -> None:
+        with SampleRecorder(self.path) as recorder:
+            recorder.append(0.0, 100)
+        self.assertEqual(load_recording(self.path)["status"][0], STATUS_UNKNOWN)
+
+    def test_empty_recording(self) -> None:
+        SampleRecorder(self.path).close()
+        self.assertEqual(len(load_recording(self.path)), 0)
+
+    def test_load_npy(self) -> None:
+        path = Path(self.tmpdir.name) / "record.npy"
+        np.save(path, self.make_recording([100, 101]))
+        np.testing.assert_array_equal(load_recording(path)["distance_mm"], [100, 101])
+        np.save(path, np.array([100, 101]))
+        with self.assertRaises(ValueError):
+            load_recording(path)
+
+    def test_sampler_records_raw_samples(self) -> None:
+        sensor = Mock(profile=None, range_status=11)
+        values = itertools.cycle([100, 8190, 102])
+        sensor.read_continuous.side_effect = lambda: time.sleep(0.001) or next(values)
+
+        with SampleRecorder(self.path) as recorder:
+            sampler = DistanceSampler(sensor, filter=make_filter("none"), recorder=recorder)
+            with sampler:
+                deadline = time.monotonic() + 2.0
+                while recorder.count < 6:
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.005)
+            self.assertTrue(sensor.read_range_status)
+            # stop() で書き出す
+            recording = load_recording(self.path)
+        # フィルターで除外された値も記録する
+        self.assertIn(8190, recording["distance_mm"])
+        self.assertEqual(len(recording), sampler.get_stats()["samples"] + sampler.filter.rejected)
+        np.testing.assert_array_equal(recording["status"], 11)
+
+    def test_driver_range_status(self) -> None:
+        reg_map = {
+            0x83: 0x01, # To exit the loop in _get_spad_info
+            0x13: 0x01, # Measurement always ready
+            RESULT_RANGE_STATUS: (RANGE_STATUS_VALID << 3) | 0x01,
+        }
+        mock_pi = Mock()
+        mock_pi.i2c_open.return_value = 1
+        mock_pi.i2c_read_byte_data.side_effect = lambda handle, register: reg_map.get(register, 0)
+        mock_pi.i2c_read_word_data.return_value = 0
+        mock_pi.i2c_read_i2c_block_data.return_value = (6, bytearray([0] * 6))
+        with patch('pigpio.pi', return_value=mock_pi), VL53L0X(mock_pi) as tof:
+            tof.get_range()
+            self.assertIsNone(tof.range_status)
+            tof.read_range_status = True
+            tof.get_range()
+            self.assertEqual(tof.range_status, RANGE_STATUS_VALID)
+
+    def test_load_trace(self) -> None:
+        with SampleRecorder(self.path) as recorder:
+            recorder.append(1.5, 100, 11)
+        timestamps, distances, statuses = _load_trace(self.path)
+        np.testing.assert_array_equal(timestamps, [1.5])
+        np.testing.assert_array_equal(distances, [100])
+        np.testing.assert_array_equal(statuses, [11])
+
+    def test_replay(self) -> None:
+        recording = self.make_recording([100, 110, 120, 130])
+        with ReplaySampler(recording, speed=0) as sampler:
+            self.assertTrue(sampler.wait(1.0))
+            self.assertEqual(sampler.latest.distance_mm, 130)
+            self.assertEqual(sampler.get_range(), 130)
+            timestamps, distances = sampler.get_history()
+        np.testing.assert_array_equal(distances, [100, 110, 120, 130])
+        # 記録の時刻の間隔を保つ
+        np.testing.assert_allclose(np.diff(timestamps), 0.01)
+        self.assertEqual(sampler.get_stats()["replayed"], 4)
+        self.assertFalse(sampler.running)
+
+    def test_replay_is_deterministic(self) -> None:
+        rng = np.random.default_rng(0)
+        recording = self.make_recording(list(500 + rng.normal(0, 5, 200).astype(int)))
+        recording["distance_mm"][50] = 8190  # 無効値
+
+        results = []
+        for _ in range(2):
+            sampler = ReplaySampler(recording, speed=0, filter=make_filter("alpha_beta"))
+            with sampler:
+                sampler.wait(1.0)
+            results.append(sampler.get_history()[1])
+            self.assertEqual(sampler.get_stats()["rejected"], 1)
+        np.testing.assert_array_equal(results[0], results[1])
+        # 一括処理の結果と一致する
+        expected = make_filter("alpha_beta").apply(
+            recording["distance_mm"], recording["timestamp"]
+        )
+        np.testing.assert_array_equal(
+            results[0], np.round(expected[~np.isnan(expected)]).astype(np.int32)
+        )
+
+    def test_replay_rejects_range_status(self) -> None:
+        recording = self.make_recording([100, 300, 110, 120])
+        recording["status"] = [RANGE_STATUS_VALID, 4, STATUS_UNKNOWN, RANGE_STATUS_VALID]
+        sampler = ReplaySampler(recording, speed=0, filter=make_filter("none"))
+        with sampler:
+            self.assertTrue(sampler.wait(1.0))
+        # 記録したステータスで除外し、不明 (STATUS_UNKNOWN) は値だけで判定する
+        np.testing.assert_array_equal(sampler.get_history()[1], [100, 110, 120])
+        self.assertEqual(sampler.get_stats()["rejected"], 1)
+
+    def test_replay_realtime(self) -> None:
+        recording = self.make_recording([100, 110, 120], interval=0.05)
+        with ReplaySampler(recording) as sampler:
+            start = time.monotonic()
+            sampler.wait(1.0)
+            self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_replay_loop(self) -> None:
+        recording = self.make_recording([100, 110])
+        received = []
+        sampler = ReplaySampler(recording, speed=0, loop=True, history=8)
+        sampler.add_listener(received.append)
+        with sampler:
+            deadline = time.monotonic() + 2.0
+            while len(received) < 6:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.001)
+        self.assertEqual([s.distance_mm for s in received[:6]], [100, 110] * 3)
+        timestamps = [s.timestamp for s in received[:6]]
+        self.assertTrue(all(np.diff(timestamps) > 0))
+
+    def test_replay_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            ReplaySampler(np.empty(0, dtype=RECORD_DTYPE))
+        with self.assertRaises(ValueError):
+            ReplaySampler(self.make_recording([100]), loop=True)
+        with self.assertRaises(ValueError):
+            ReplaySampler(self.make_recording([100]), speed=-1)
+
+    def test_replay_cli(self) -> None:
+        with SampleRecorder(self.path) as recorder:
+            for i, d in enumerate([100, 102, 8190, 104]):
+                recorder.append(i * 0.01, d, 11)
+        result = CliRunner().invoke(
+            cli, ["replay", str(self.path), "-s", "0", "-f", "median"]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("再生: 4 件", result.output)
+        self.assertIn("無効値: 1 件", result.output)
+
+if __name__ == '__main__':
+    unittest.main()